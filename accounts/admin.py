@@ -324,10 +324,10 @@ class UserStatisticsAdmin(admin.ModelAdmin):
         Admin action to rebuild statistics from PointsTransaction audit trail.
         This is the authoritative recalculation method.
         """
-        count = 0
-        for stats in queryset:
-            stats.recalculate_from_transactions()
-            count += 1
+        from .statistics_recalculation import recalculate_statistics
+        
+        result = recalculate_statistics(user_ids=list(queryset.values_list('user_id', flat=True)))
+        count = result['users']
         self.message_user(
             request,
             f'Successfully recalculated {count} user(s) statistics from transaction history.',
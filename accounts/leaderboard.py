@@ -0,0 +1,294 @@
+"""
+Leaderboard and public statistics snapshot.
+
+All leaderboards (points, activator, hunter, B2B, most active bunkers) and
+the public totals are computed together from one UserStatistics query and
+one grouped ActivationLog query, and stored in the cache as a single
+compressed JSON blob with a version stamp. Pages and the API read the
+snapshot instead of aggregating the tables on every request; it is rebuilt
+when older than LEADERBOARD_SNAPSHOT_MAX_AGE seconds, or ahead of time by
+the build_leaderboard_snapshot command, which needs a cache shared with
+the web processes (Redis or the database cache, see settings.CACHES).
+
+Each user board is a list of rows (user_id, callsign, rank, *columns)
+sorted by rank. Ranks use competition ranking: users with equal sort
+values share a rank and the next rank skips (1, 2, 2, 4).
+"""
+import json
+import logging
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count
+
+from .models import User, UserStatistics
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_KEY = 'leaderboard_snapshot'
+SNAPSHOT_VERSION_CACHE_KEY = 'leaderboard_snapshot_version'
+SNAPSHOT_LOCK_CACHE_KEY = 'leaderboard_snapshot_lock'
+
+# Seconds a process without any snapshot waits for one being built elsewhere
+SNAPSHOT_WAIT_SECONDS = 5
+
+# Board name -> (sort fields, extra columns, only users with a positive first sort field)
+USER_BOARDS = {
+    'points': (('hunter_points', 'activator_points', 'b2b_points'), ('total_points',), False),
+    'activator': (('total_activator_qso',), ('unique_activations',), True),
+    'hunter': (('total_hunter_qso',), ('unique_bunkers_hunted',), True),
+    'b2b': (('b2b_points',), ('total_b2b_qso',), True),
+}
+
+BUNKER_COLUMNS = ('bunker_id', 'reference_number', 'name_en', 'activation_count', 'qso_count')
+
+# Number of bunkers kept on the most active bunkers board
+BUNKER_BOARD_SIZE = 100
+
+
+def cache_is_shared() -> bool:
+    """Whether the default cache is seen by other processes (not LocMem/Dummy)"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _rank_rows(rows, key):
+    """
+    Sort rows by key (descending) and assign competition ranks.
+
+    Returns:
+        List of (rank, row) tuples
+    """
+    rows = sorted(rows, key=lambda row: (tuple(-value for value in key(row)), row[0]))
+    ranked = []
+    previous = None
+    for position, row in enumerate(rows, start=1):
+        row_key = key(row)
+        if row_key != previous:
+            rank = position
+            previous = row_key
+        ranked.append((rank, row))
+    return ranked
+
+
+def build_snapshot() -> Dict:
+    """
+    Compute all leaderboards and totals and store them in the cache.
+
+    Returns:
+        The snapshot dictionary
+    """
+    from activations.models import ActivationLog
+    from bunkers.models import Bunker
+
+    started = time.monotonic()
+
+    fields = []
+    for sort_fields, columns, _ in USER_BOARDS.values():
+        fields.extend(field for field in sort_fields + columns if field not in fields)
+    stats_rows = list(
+        UserStatistics.objects.order_by().values_list('user_id', 'user__callsign', *fields)
+    )
+    field_index = {field: index for index, field in enumerate(fields, start=2)}
+
+    boards = {}
+    for name, (sort_fields, columns, positive_only) in USER_BOARDS.items():
+        sort_indexes = [field_index[field] for field in sort_fields]
+        column_indexes = [field_index[field] for field in sort_fields + columns]
+        rows = stats_rows
+        if positive_only:
+            rows = [row for row in rows if row[sort_indexes[0]] > 0]
+        boards[name] = {
+            'columns': list(sort_fields + columns),
+            'rows': [
+                [row[0], row[1], rank] + [row[index] for index in column_indexes]
+                for rank, row in _rank_rows(
+                    rows, lambda row: tuple(row[index] for index in sort_indexes)
+                )
+            ],
+        }
+
+    bunker_rows = ActivationLog.objects.order_by().values(
+        'bunker__id', 'bunker__reference_number', 'bunker__name_en'
+    ).annotate(
+        activation_count=Count('activator', distinct=True),
+        qso_count=Count('id')
+    ).order_by('-qso_count', 'bunker__id')[:BUNKER_BOARD_SIZE]
+
+    snapshot = {
+        'version': time.time_ns() // 1000,
+        'generated_at': time.time(),
+        'boards': boards,
+        'bunkers': [
+            [
+                row['bunker__id'], row['bunker__reference_number'], row['bunker__name_en'],
+                row['activation_count'], row['qso_count']
+            ]
+            for row in bunker_rows
+        ],
+        'totals': {
+            'total_users': User.objects.filter(is_active=True, auto_created=False).count(),
+            'total_bunkers': Bunker.objects.filter(is_verified=True).count(),
+            'total_activations': ActivationLog.objects.order_by().values('activator', 'bunker').distinct().count(),
+            'total_qsos': ActivationLog.objects.count(),
+        },
+    }
+
+    blob = zlib.compress(json.dumps(snapshot, separators=(',', ':')).encode('utf-8'))
+    cache.set(SNAPSHOT_CACHE_KEY, blob, None)
+    cache.set(SNAPSHOT_VERSION_CACHE_KEY, snapshot['version'], None)
+
+    logger.info(
+        f"Built leaderboard snapshot {snapshot['version']} for {len(stats_rows)} users "
+        f"({len(blob)} bytes) in {time.monotonic() - started:.2f}s"
+    )
+
+    return snapshot
+
+
+class LeaderboardSnapshot:
+    """Read access to a snapshot built by build_snapshot()"""
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.version = data['version']
+        self.generated_at = data['generated_at']
+        self.totals = data['totals']
+        self._rank_index = {}
+
+    def _row_dict(self, board: str, row) -> Dict:
+        columns = self.data['boards'][board]['columns']
+        result = {'user_id': row[0], 'callsign': row[1], 'rank': row[2]}
+        result.update(zip(columns, row[3:]))
+        return result
+
+    def top(self, board: str, limit: Optional[int] = 10) -> List[Dict]:
+        """
+        Top rows of a user board.
+
+        Args:
+            board: Name from USER_BOARDS
+            limit: Number of rows (None = all)
+
+        Returns:
+            List of dicts with user_id, callsign, rank and the board columns
+        """
+        rows = self.data['boards'][board]['rows']
+        if limit is not None:
+            rows = rows[:limit]
+        return [self._row_dict(board, row) for row in rows]
+
+    def top_user_ids(self, board: str, limit: Optional[int] = 10) -> List[int]:
+        """User IDs of the top rows of a user board, in rank order"""
+        rows = self.data['boards'][board]['rows']
+        if limit is not None:
+            rows = rows[:limit]
+        return [row[0] for row in rows]
+
+    def rank(self, board: str, callsign: str) -> Optional[Dict]:
+        """
+        Leaderboard row of a callsign.
+
+        Returns:
+            Row dict as in top(), or None if the callsign is not on the board
+        """
+        index = self._rank_index.get(board)
+        if index is None:
+            index = self._rank_index[board] = {
+                row[1]: position for position, row in enumerate(self.data['boards'][board]['rows'])
+            }
+        position = index.get(callsign.upper())
+        if position is None:
+            return None
+        return self._row_dict(board, self.data['boards'][board]['rows'][position])
+
+    def ranks(self, callsign: str) -> Dict[str, Optional[int]]:
+        """Rank of a callsign on every user board (None if not ranked)"""
+        result = {}
+        for board in USER_BOARDS:
+            row = self.rank(board, callsign)
+            result[board] = row['rank'] if row else None
+        return result
+
+    def bunkers(self, limit: Optional[int] = 10) -> List[Dict]:
+        """Most active bunkers by QSO count"""
+        rows = self.data['bunkers']
+        if limit is not None:
+            rows = rows[:limit]
+        return [dict(zip(BUNKER_COLUMNS, row)) for row in rows]
+
+
+# Decoded snapshot of this process, reused while the cached version is unchanged
+_loaded: Optional[LeaderboardSnapshot] = None
+
+
+def _read_cached() -> Optional[LeaderboardSnapshot]:
+    """Snapshot currently in the cache, decoded only if its version changed"""
+    version = cache.get(SNAPSHOT_VERSION_CACHE_KEY)
+    if _loaded is not None and _loaded.version == version:
+        return _loaded
+    if version is not None:
+        blob = cache.get(SNAPSHOT_CACHE_KEY)
+        if blob is not None:
+            return LeaderboardSnapshot(json.loads(zlib.decompress(blob)))
+    return None
+
+
+def _wait_for_snapshot() -> LeaderboardSnapshot:
+    """Wait for the snapshot another process is building; build it if it does not come"""
+    deadline = time.monotonic() + SNAPSHOT_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        snapshot = _read_cached()
+        if snapshot is not None:
+            return snapshot
+    return LeaderboardSnapshot(build_snapshot())
+
+
+def get_snapshot(max_age: Optional[int] = None) -> LeaderboardSnapshot:
+    """
+    Current leaderboard snapshot, rebuilt if missing or too old.
+
+    Reading an up-to-date snapshot costs one cache lookup of the version
+    stamp; the blob is only fetched and decoded when the version changed.
+    Only the process that takes the rebuild lock rebuilds, also when the
+    cache is empty: the others keep serving their previous snapshot, or,
+    without one, wait up to SNAPSHOT_WAIT_SECONDS for the new one.
+
+    Args:
+        max_age: Maximum snapshot age in seconds
+            (default: settings.LEADERBOARD_SNAPSHOT_MAX_AGE)
+
+    Returns:
+        LeaderboardSnapshot
+    """
+    global _loaded
+
+    if max_age is None:
+        max_age = getattr(settings, 'LEADERBOARD_SNAPSHOT_MAX_AGE', 300)
+
+    snapshot = _read_cached()
+    if snapshot is None or time.time() - snapshot.generated_at > max_age:
+        if cache.add(SNAPSHOT_LOCK_CACHE_KEY, True, 60):
+            try:
+                snapshot = LeaderboardSnapshot(build_snapshot())
+            finally:
+                cache.delete(SNAPSHOT_LOCK_CACHE_KEY)
+        elif snapshot is None:
+            # Being rebuilt by another process
+            snapshot = _loaded or _wait_for_snapshot()
+
+    _loaded = snapshot
+    return snapshot
+
+
+def invalidate_snapshot():
+    """Drop the cached snapshot; the next read rebuilds it"""
+    global _loaded
+
+    cache.delete_many([SNAPSHOT_CACHE_KEY, SNAPSHOT_VERSION_CACHE_KEY])
+    _loaded = None
@@ -0,0 +1,50 @@
+"""
+Management command to rebuild the leaderboard snapshot.
+
+The snapshot is written to the default cache, so the command only makes
+sense when that cache is shared with the web processes (Redis or the
+database cache); with a per-process cache it refuses to run.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.leaderboard import USER_BOARDS, build_snapshot, cache_is_shared
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the cached leaderboard and public statistics snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep rebuilding the snapshot every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300.0,
+            help='Seconds between rebuilds in loop mode (default: 300)'
+        )
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            raise CommandError(
+                'The default cache is local to this process, so the web processes would never see '
+                'the snapshot. Configure REDIS_URL or the database cache (CACHE_TABLE) first.'
+            )
+
+        while True:
+            started = time.monotonic()
+            snapshot = build_snapshot()
+            board_sizes = ', '.join(
+                f"{board}: {len(snapshot['boards'][board]['rows'])}" for board in USER_BOARDS
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {snapshot['version']} built in {time.monotonic() - started:.2f}s ({board_sizes})"
+            ))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -2,13 +2,12 @@
 Management command to recalculate user statistics and points
 """
 from django.core.management.base import BaseCommand
-from django.db.models import Count
-from accounts.models import User, UserStatistics
-from activations.models import ActivationLog
+from accounts.models import User
+from accounts.statistics_recalculation import recalculate_statistics
 
 
 class Command(BaseCommand):
-    help = 'Recalculate all user statistics and points from activation logs'
+    help = 'Recalculate all user statistics and points from the points ledger and activation logs'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -21,90 +20,68 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be changed without saving'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes computing user shards (default: 1)'
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            help='Number of user ID ranges to split the work into (default: one per worker)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows written per bulk update (default: 1000)'
+        )
 
     def handle(self, *args, **options):
         callsign = options.get('callsign')
         dry_run = options.get('dry_run', False)
-        
+
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be saved'))
-        
-        # Get users to process
+
+        user_ids = None
         if callsign:
-            users = User.objects.filter(callsign=callsign)
-            if not users.exists():
+            user_ids = list(User.objects.filter(callsign=callsign.upper()).values_list('id', flat=True))
+            if not user_ids:
                 self.stdout.write(self.style.ERROR(f'User {callsign} not found'))
                 return
-        else:
-            users = User.objects.all()
-        
-        total_users = users.count()
-        self.stdout.write(f'Processing {total_users} users...\n')
-        
-        updated_count = 0
-        
-        for user in users:
-            # Get or create statistics
-            stats, created = UserStatistics.objects.get_or_create(user=user)
-            
-            old_values = {
-                'hunter_points': stats.hunter_points,
-                'activator_points': stats.activator_points,
-                'total_hunter_qso': stats.total_hunter_qso,
-                'total_activator_qso': stats.total_activator_qso,
-            }
-            
-            # Recalculate HUNTER statistics (user is in `user` field = person who hunted)
-            hunter_qsos = ActivationLog.objects.filter(user=user)
-            stats.total_hunter_qso = hunter_qsos.count()
-            stats.hunter_points = hunter_qsos.count()  # 1 point per QSO
-            stats.unique_bunkers_hunted = hunter_qsos.values('bunker').distinct().count()
-            
-            # Recalculate ACTIVATOR statistics (user is in `activator` field = person who activated)
-            activator_qsos = ActivationLog.objects.filter(activator=user)
-            stats.total_activator_qso = activator_qsos.count()
-            stats.activator_points = activator_qsos.count()  # 1 point per QSO
-            stats.unique_activations = activator_qsos.values('bunker').distinct().count()
-            
-            # Recalculate B2B statistics
-            b2b_qsos = ActivationLog.objects.filter(activator=user, is_b2b=True)
-            stats.activator_b2b_qso = b2b_qsos.count()
-            stats.total_b2b_qso = b2b_qsos.count()
-            stats.b2b_points = b2b_qsos.count()  # 1 point per B2B QSO
-            
-            # Update total points
-            stats.update_total_points()
-            
-            # Check if anything changed
-            changed = False
-            changes = []
-            for field, old_value in old_values.items():
-                new_value = getattr(stats, field)
-                if old_value != new_value:
-                    changed = True
-                    changes.append(f'{field}: {old_value} → {new_value}')
-            
-            if changed:
-                updated_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ {user.callsign}:') + 
-                    f' {", ".join(changes)}'
-                )
-                
-                if not dry_run:
-                    stats.save()
-            else:
-                if callsign:  # Only show unchanged for specific user
-                    self.stdout.write(
-                        self.style.WARNING(f'○ {user.callsign}: No changes needed')
-                    )
-        
+
+        result = recalculate_statistics(
+            user_ids=user_ids,
+            workers=options['workers'],
+            shards=options.get('shards'),
+            chunk_size=options['chunk_size'],
+            dry_run=dry_run
+        )
+        changes = result['changes']
+
+        callsigns = dict(User.objects.filter(id__in=changes).values_list('id', 'callsign'))
+        for user_id in sorted(changes, key=lambda user_id: callsigns.get(user_id, '')):
+            differences = ', '.join(
+                f'{field}: {old_value} → {new_value}'
+                for field, (old_value, new_value) in changes[user_id].items()
+            )
+            self.stdout.write(self.style.SUCCESS(f'✓ {callsigns.get(user_id, user_id)}:') + f' {differences}')
+
+        if callsign and not changes:
+            self.stdout.write(self.style.WARNING(f'○ {callsign.upper()}: No changes needed'))
+
         self.stdout.write('\n' + '='*60)
+        self.stdout.write(
+            f"Computed {result['users']} users in {result['compute_seconds']:.2f}s, "
+            f"{'compared' if dry_run else 'written'} in {result['write_seconds']:.2f}s"
+        )
         if dry_run:
             self.stdout.write(
-                self.style.WARNING(f'DRY RUN: Would update {updated_count}/{total_users} users')
+                self.style.WARNING(f"DRY RUN: Would update {len(changes)}/{result['users']} users")
             )
         else:
             self.stdout.write(
-                self.style.SUCCESS(f'✓ Updated {updated_count}/{total_users} users')
+                self.style.SUCCESS(f"✓ Updated {len(changes)}/{result['users']} users")
             )
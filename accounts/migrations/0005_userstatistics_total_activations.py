@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_add_points_transaction_system'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstatistics',
+            name='total_activations',
+            field=models.PositiveIntegerField(default=0, help_text='Number of activation sessions (distinct bunker and day)', verbose_name='total activations'),
+        ),
+    ]
@@ -146,6 +146,11 @@ class UserStatistics(models.Model):
         default=0,
         help_text=_('Number of unique bunkers activated')
     )
+    total_activations = models.PositiveIntegerField(
+        _('total activations'),
+        default=0,
+        help_text=_('Number of activation sessions (distinct bunker and day)')
+    )
     activator_b2b_qso = models.PositiveIntegerField(
         _('activator B2B QSO'),
         default=0,
@@ -314,6 +319,13 @@ class UserStatistics(models.Model):
             activator=self.user
         ).values('bunker').distinct().count()
         
+        from django.db.models.functions import TruncDate
+        self.total_activations = ActivationLog.objects.filter(
+            activator=self.user
+        ).annotate(
+            activation_day=TruncDate('activation_date')
+        ).values('bunker', 'activation_day').distinct().count()
+        
         self.unique_bunkers_hunted = ActivationLog.objects.filter(
             user=self.user
         ).exclude(activator=self.user).values('bunker').distinct().count()
@@ -626,16 +638,16 @@ class PointsTransaction(models.Model):
         
         # Create reversal with negative points
         reversal = PointsTransaction.objects.create(
-            user=self.user,
+            user_id=self.user_id,
             transaction_type=self.REVERSAL,
             activator_points=-self.activator_points,
             hunter_points=-self.hunter_points,
             b2b_points=-self.b2b_points,
             event_points=-self.event_points,
             diploma_points=-self.diploma_points,
-            activation_log=self.activation_log,
-            bunker=self.bunker,
-            diploma=self.diploma,
+            activation_log_id=self.activation_log_id,
+            bunker_id=self.bunker_id,
+            diploma_id=self.diploma_id,
             reason=reason,
             notes=f"Reverses transaction #{self.id}: {self.reason}",
             created_by=created_by,
@@ -654,6 +666,14 @@ class PointsTransaction(models.Model):
         super().save(*args, **kwargs)
         
         if is_new:
+            from .statistics_batch import current_batch
+            
+            batch = current_batch()
+            if batch is not None:
+                # Applied once per user when the deferred_statistics() block exits
+                batch.add(self)
+                return
+            
             # Update the cached statistics
             stats, _ = UserStatistics.objects.get_or_create(user=self.user)
             stats.add_transaction(self)
@@ -722,16 +742,23 @@ class PointsTransactionBatch(models.Model):
         if self.is_reversed:
             raise ValueError("This batch has already been reversed")
         
+        from .statistics_batch import deferred_statistics
+        
         reversal_transactions = []
-        for transaction in self.transactions.filter(is_reversed=False):
-            reversal = transaction.reverse(
-                reason=f"{reason} (Batch reversal)",
-                created_by=created_by
-            )
-            reversal_transactions.append(reversal)
+        # One UserStatistics update per affected user instead of per reversal
+        with deferred_statistics():
+            for transaction in self.transactions.filter(is_reversed=False):
+                reversal = transaction.reverse(
+                    reason=f"{reason} (Batch reversal)",
+                    created_by=created_by
+                )
+                reversal_transactions.append(reversal)
+            
+            self.is_reversed = True
+            self.reversed_at = timezone.now()
+            self.save(update_fields=['is_reversed', 'reversed_at'])
         
-        self.is_reversed = True
-        self.reversed_at = timezone.now()
-        self.save(update_fields=['is_reversed', 'reversed_at'])
+        from diplomas.progress_engine import refresh_diploma_progress_on_commit
+        refresh_diploma_progress_on_commit({reversal.user_id for reversal in reversal_transactions})
         
         return reversal_transactions
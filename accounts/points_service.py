@@ -5,6 +5,7 @@ Single responsibility: Create PointsTransaction records.
 from django.db import transaction
 from django.utils import timezone
 from accounts.models import PointsTransaction, PointsTransactionBatch, UserStatistics
+from accounts.statistics_batch import current_batch, deferred_statistics
 from activations.models import ActivationLog
 import logging
 
@@ -55,16 +56,15 @@ class PointsService:
         activation_log.points_transaction = pts_transaction
         activation_log.save(update_fields=['points_awarded', 'points_transaction'])
         
-        # Update cached counts (not points - those are auto-updated by transaction)
-        stats, _ = UserStatistics.objects.get_or_create(user=user)
-        stats.total_activator_qso += 1
-        
-        # Update unique activations count
-        stats.unique_activations = ActivationLog.objects.filter(
-            activator=user
-        ).values('bunker').distinct().count()
-        
-        stats.save(update_fields=['total_activator_qso', 'unique_activations'])
+        # Update cached counts (not points - those are auto-updated by transaction).
+        # Unique bunker counters are maintained by activations.activity_counters.
+        batch = current_batch()
+        if batch is not None:
+            batch.add_counts(user.id, total_activator_qso=1)
+        else:
+            stats, _ = UserStatistics.objects.get_or_create(user=user)
+            stats.total_activator_qso += 1
+            stats.save(update_fields=['total_activator_qso'])
         
         logger.info(
             f"Awarded 1 activator point to {user.callsign} "
@@ -118,16 +118,15 @@ class PointsService:
             created_by=created_by
         )
         
-        # Update cached counts
-        stats, _ = UserStatistics.objects.get_or_create(user=user)
-        stats.total_hunter_qso += 1
-        
-        # Update unique bunkers hunted
-        stats.unique_bunkers_hunted = ActivationLog.objects.filter(
-            user=user
-        ).exclude(activator=user).values('bunker').distinct().count()
-        
-        stats.save(update_fields=['total_hunter_qso', 'unique_bunkers_hunted'])
+        # Update cached counts (unique bunkers hunted is maintained by
+        # activations.activity_counters)
+        batch = current_batch()
+        if batch is not None:
+            batch.add_counts(user.id, total_hunter_qso=1)
+        else:
+            stats, _ = UserStatistics.objects.get_or_create(user=user)
+            stats.total_hunter_qso += 1
+            stats.save(update_fields=['total_hunter_qso'])
         
         logger.info(
             f"Awarded 1 hunter point to {user.callsign} "
@@ -230,6 +229,100 @@ class PointsService:
         
         return tx1, tx2
     
+    @staticmethod
+    @transaction.atomic
+    def confirm_b2b_pairs(pairs, created_by=None):
+        """
+        Confirm many B2B connections at once.
+        
+        Same validation, log updates and transactions as confirm_b2b(), but
+        written with bulk queries. Logs must have `activator` and `bunker`
+        loaded (select_related) to avoid per-pair queries.
+        
+        Args:
+            pairs: Iterable of (log1, log2) reciprocal ActivationLog tuples
+            created_by: User or system that confirmed
+        
+        Returns:
+            list: (transaction1, transaction2) tuples for confirmed pairs
+        """
+        now = timezone.now()
+        logs = []
+        confirmed = []
+        used_log_ids = set()
+        
+        for log1, log2 in pairs:
+            if log1.user_id != log2.activator_id or log2.user_id != log1.activator_id:
+                logger.warning(
+                    f"Logs {log1.id} and {log2.id} are not reciprocal (users don't match)"
+                )
+                continue
+            
+            if log1.bunker_id != log2.bunker_id:
+                logger.warning(
+                    f"Logs {log1.id} and {log2.id} have different bunkers"
+                )
+                continue
+            
+            if (log1.b2b_confirmed or log2.b2b_confirmed or
+                    log1.id in used_log_ids or log2.id in used_log_ids):
+                logger.warning(
+                    f"B2B already confirmed for logs {log1.id} and {log2.id}"
+                )
+                continue
+            
+            used_log_ids.update((log1.id, log2.id))
+            
+            for log, partner_log in ((log1, log2), (log2, log1)):
+                log.b2b_confirmed = True
+                log.b2b_confirmed_at = now
+                log.b2b_partner_id = partner_log.activator_id
+                log.b2b_partner_log = partner_log
+                logs.append(log)
+            
+            confirmed.append((log1, log2))
+        
+        if not confirmed:
+            return []
+        
+        ActivationLog.objects.bulk_update(logs, [
+            'b2b_confirmed', 'b2b_confirmed_at', 'b2b_partner', 'b2b_partner_log'
+        ])
+        
+        # Award B2B points to both users
+        point_transactions = []
+        for log1, log2 in confirmed:
+            for log, partner_log in ((log1, log2), (log2, log1)):
+                point_transactions.append(PointsTransaction(
+                    user_id=log.activator_id,
+                    transaction_type=PointsTransaction.B2B_CONFIRMED,
+                    b2b_points=1,
+                    activation_log=log,
+                    bunker=log.bunker,
+                    reason=f"B2B confirmed with {partner_log.activator.callsign}",
+                    notes=f"Bunkers: {log.bunker.reference_number} ↔ {partner_log.bunker.reference_number}",
+                    created_by=created_by
+                ))
+        with deferred_statistics() as batch:
+            PointsTransaction.objects.bulk_create(point_transactions)
+            
+            # bulk_create() skips PointsTransaction.save(), so collect the
+            # cached totals explicitly (same effect as add_transaction)
+            batch.add_all(point_transactions)
+            for log in logs:
+                if log.is_b2b:
+                    batch.add_counts(log.activator_id, total_b2b_qso=1)
+        
+        logger.info(
+            f"B2B confirmed in bulk: {len(confirmed)} pairs "
+            f"({len(point_transactions)} point transactions)"
+        )
+        
+        return [
+            (point_transactions[i], point_transactions[i + 1])
+            for i in range(0, len(point_transactions), 2)
+        ]
+    
     @staticmethod
     @transaction.atomic
     def cancel_b2b(log, reason, created_by=None):
@@ -282,6 +375,9 @@ class PointsService:
         
         logger.info(f"B2B cancelled for logs {log.id} and {partner_log.id}: {reason}")
         
+        from diplomas.progress_engine import refresh_diploma_progress_on_commit
+        refresh_diploma_progress_on_commit([log.activator_id, partner_log.activator_id])
+        
         return reversal1, reversal2
     
     @staticmethod
@@ -316,6 +412,47 @@ class PointsService:
         
         return pts_transaction
     
+    @staticmethod
+    def award_diploma_bonuses(diplomas, points=10, created_by=None):
+        """
+        Award diploma bonus points for many diplomas at once.
+        
+        Same transactions as award_diploma_bonus(), written with one
+        bulk insert and one statistics update per user.
+        
+        Args:
+            diplomas: Saved Diploma instances (diploma_type loaded)
+            points: How many bonus points per diploma (default 10)
+            created_by: Who awarded this
+            
+        Returns:
+            List of PointsTransaction instances
+        """
+        point_transactions = [
+            PointsTransaction(
+                user_id=diploma.user_id,
+                transaction_type=PointsTransaction.DIPLOMA_BONUS,
+                diploma_points=points,
+                diploma=diploma,
+                reason=f"Earned diploma: {diploma.diploma_type.name_en}",
+                notes=f"Diploma #{diploma.diploma_number}",
+                created_by=created_by
+            )
+            for diploma in diplomas
+        ]
+        if not point_transactions:
+            return []
+        
+        with deferred_statistics() as batch:
+            PointsTransaction.objects.bulk_create(point_transactions)
+            
+            # bulk_create() skips PointsTransaction.save()
+            batch.add_all(point_transactions)
+        
+        logger.info(f"Awarded {points} diploma bonus points for {len(point_transactions)} diplomas")
+        
+        return point_transactions
+    
     @staticmethod
     @transaction.atomic
     def create_batch(name, transactions, log_upload=None, created_by=None):
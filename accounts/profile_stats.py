@@ -0,0 +1,309 @@
+"""
+Profile page statistics.
+
+Everything the profile page shows about a user's logs (activated and
+hunted bunkers, their per-day history and the band/mode breakdowns) is
+built from one ordered values() query over the user's ActivationLog rows,
+grouped in a single pass. The result is cached per user; the cache key
+contains the id of the user's last log, the number of logs and the latest
+log update, so a new upload, a deleted log or an edited log makes the
+next page load rebuild it.
+
+Logs where the user is the activator count as activations; logs where
+the user is the hunter and someone else the activator count as hunted
+QSOs (the same split the profile page always used).
+
+The bunkers a user has not activated or hunted yet are not part of the
+page; the browser loads them a page at a time (get_missing_bunkers()),
+using an anti-join on ActivationLog and keyset pagination on the
+reference number.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef, Q
+
+from bunkers.data_version import get_bunker_data_version
+
+PROFILE_STATS_CACHE_PREFIX = 'profile_stats'
+
+# Lists of get_missing_bunkers()
+MISSING_BUNKER_LISTS = ('not-activated', 'not-hunted')
+
+# Page size limits of get_missing_bunkers()
+MISSING_BUNKERS_PAGE_SIZE = 50
+MISSING_BUNKERS_MAX_PAGE_SIZE = 200
+
+# Default and largest radius of the distance filter
+MISSING_BUNKERS_DEFAULT_RADIUS_KM = 50
+MISSING_BUNKERS_MAX_RADIUS_KM = 500
+
+LOG_FIELDS = (
+    'user_id',
+    'activator_id',
+    'activator__callsign',
+    'bunker_id',
+    'bunker__reference_number',
+    'bunker__name_en',
+    'bunker__name_pl',
+    'activation_date',
+    'mode',
+    'band',
+    'qso_count',
+    'is_b2b',
+)
+
+
+def _user_logs(user):
+    from activations.models import ActivationLog
+
+    return ActivationLog.objects.filter(Q(user=user) | Q(activator=user))
+
+
+def _bunker_row(log: Dict) -> Dict:
+    return {
+        'bunker__id': log['bunker_id'],
+        'bunker__reference_number': log['bunker__reference_number'],
+        'bunker__name_en': log['bunker__name_en'],
+        'bunker__name_pl': log['bunker__name_pl'],
+    }
+
+
+def _count_rows(counts: Dict[str, int], field: str, with_qso_sum: bool = False) -> List[Dict]:
+    """Band/mode breakdown rows, most frequent first"""
+    rows = []
+    for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        row = {field: value, 'count': count}
+        if with_qso_sum:
+            row['qso_sum'] = count
+        rows.append(row)
+    return rows
+
+
+def build_profile_stats(user) -> Dict:
+    """
+    Aggregate all logs of a user in one query.
+
+    Args:
+        user: User whose profile is shown
+
+    Returns:
+        Dictionary with the profile page context entries 'activated_bunkers',
+        'hunted_bunkers', 'all_activations', 'all_hunted_qsos',
+        'activator_bands', 'activator_modes', 'hunter_bands' and 'hunter_modes'
+    """
+    activated = {}
+    hunted = {}
+    all_activations = {}
+    all_hunted_qsos = {}
+    activator_bands = {}
+    activator_modes = {}
+    hunter_bands = {}
+    hunter_modes = {}
+
+    # Newest first, so the per-day groups come out in display order and the
+    # first log seen for a bunker is its last activation/QSO
+    logs = _user_logs(user).order_by('-activation_date', '-id').values(*LOG_FIELDS)
+
+    for log in logs.iterator(chunk_size=2000):
+        bunker_id = log['bunker_id']
+        day = log['activation_date'].date()
+        mode = log['mode']
+        band = log['band']
+
+        if log['activator_id'] == user.pk:
+            bunker = activated.get(bunker_id)
+            if bunker is None:
+                bunker = activated[bunker_id] = _bunker_row(log)
+                bunker.update(activation_count=0, total_qso=0, last_activation=log['activation_date'])
+                all_activations[bunker_id] = []
+            bunker['total_qso'] += log['qso_count'] or 0
+
+            days = all_activations[bunker_id]
+            if not days or days[-1]['date'] != day:
+                bunker['activation_count'] += 1
+                days.append({'date': day, 'bands': set(), 'modes': set(),
+                             'total_qso': 0, 'is_b2b': False, 'count': 0})
+            group = days[-1]
+            group['total_qso'] += log['qso_count'] or 0
+            group['count'] += 1
+
+            activator_bands[band] = activator_bands.get(band, 0) + 1
+            activator_modes[mode] = activator_modes.get(mode, 0) + 1
+        elif log['user_id'] == user.pk:
+            bunker = hunted.get(bunker_id)
+            if bunker is None:
+                bunker = hunted[bunker_id] = _bunker_row(log)
+                bunker.update(qso_count=0, last_qso=log['activation_date'])
+                all_hunted_qsos[bunker_id] = []
+            bunker['qso_count'] += 1
+
+            days = all_hunted_qsos[bunker_id]
+            if not days or days[-1]['date'] != day:
+                days.append({'date': day, 'activators': set(), 'bands': set(), 'modes': set(),
+                             'total_qso': 0, 'is_b2b': False})
+            group = days[-1]
+            group['total_qso'] += 1
+            if log['activator__callsign']:
+                group['activators'].add(log['activator__callsign'])
+
+            hunter_bands[band] = hunter_bands.get(band, 0) + 1
+            hunter_modes[mode] = hunter_modes.get(mode, 0) + 1
+        else:
+            continue
+
+        if mode:
+            group['modes'].add(mode)
+        if band:
+            group['bands'].add(band)
+        if log['is_b2b']:
+            group['is_b2b'] = True
+
+    for groups in (all_activations, all_hunted_qsos):
+        for days in groups.values():
+            for group in days:
+                for key in ('activators', 'bands', 'modes'):
+                    if key in group:
+                        group[key] = sorted(group[key])
+
+    activated_bunkers = sorted(
+        activated.values(),
+        key=lambda row: (-row['activation_count'], row['bunker__reference_number'])
+    )
+    hunted_bunkers = sorted(
+        hunted.values(),
+        key=lambda row: (-row['qso_count'], row['bunker__reference_number'])
+    )
+
+    return {
+        'activated_bunkers': activated_bunkers,
+        'hunted_bunkers': hunted_bunkers,
+        'all_activations': all_activations,
+        'all_hunted_qsos': all_hunted_qsos,
+        'activator_bands': _count_rows(activator_bands, 'band', with_qso_sum=True),
+        'activator_modes': _count_rows(activator_modes, 'mode', with_qso_sum=True),
+        'hunter_bands': _count_rows(hunter_bands, 'band'),
+        'hunter_modes': _count_rows(hunter_modes, 'mode'),
+    }
+
+
+def get_profile_stats(user) -> Dict:
+    """
+    Cached profile statistics of a user (see build_profile_stats()).
+
+    Args:
+        user: User whose profile is shown
+
+    Returns:
+        Same dictionary as build_profile_stats()
+    """
+    state = _user_logs(user).aggregate(last_id=Max('id'), count=Count('id'), updated=Max('updated_at'))
+    updated = state['updated'].timestamp() if state['updated'] else 0
+    cache_key = (
+        f"{PROFILE_STATS_CACHE_PREFIX}:{user.pk}:{state['last_id'] or 0}:{state['count']}:"
+        f"{updated}:{get_bunker_data_version()}"
+    )
+
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = build_profile_stats(user)
+        cache.set(cache_key, stats, settings.PROFILE_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def get_missing_bunkers(user, kind: str, prefix: str = '', category_id: Optional[int] = None,
+                        near: Optional[Tuple[float, float, float]] = None, planned_only: bool = False,
+                        after: str = '', limit: int = MISSING_BUNKERS_PAGE_SIZE) -> Dict:
+    """
+    One page of the bunkers a user has not activated or not hunted yet.
+
+    Args:
+        user: User whose profile is shown
+        kind: 'not-activated' or 'not-hunted'
+        prefix: Only bunkers whose reference number starts with this
+        category_id: Only bunkers of this category
+        near: (latitude, longitude, radius_km) - only bunkers within the radius
+        planned_only: Only bunkers with a planned activation (by the user
+            for 'not-activated', by others for 'not-hunted')
+        after: Reference number of the last bunker of the previous page
+        limit: Page size (capped at MISSING_BUNKERS_MAX_PAGE_SIZE)
+
+    Returns:
+        Dictionary with 'results' (rows sorted by reference number), 'next'
+        (cursor for the following page or None) and, for the first page
+        only, 'count'
+    """
+    from activations.models import ActivationLog
+    from bunkers.models import Bunker
+    from planned_activations.models import PlannedActivation
+
+    if kind not in MISSING_BUNKER_LISTS:
+        raise ValueError(f'Unknown bunker list: {kind}')
+
+    if kind == 'not-activated':
+        done = ActivationLog.objects.filter(bunker=OuterRef('pk'), activator=user)
+        plans = PlannedActivation.objects.filter(user=user)
+    else:
+        done = ActivationLog.objects.filter(bunker=OuterRef('pk'), user=user).exclude(activator=user)
+        plans = PlannedActivation.objects.exclude(user=user)
+
+    bunkers = Bunker.objects.filter(~Exists(done))
+    if prefix:
+        bunkers = bunkers.filter(reference_number__istartswith=prefix.strip())
+    if category_id is not None:
+        bunkers = bunkers.filter(category_id=category_id)
+    if planned_only:
+        bunkers = bunkers.filter(Exists(plans.filter(bunker=OuterRef('pk'))))
+
+    distances = None
+    if near is not None:
+        from bunkers.spatial_index import get_spatial_index
+
+        latitude, longitude, radius = near
+        distances = {
+            point.id: distance
+            for distance, point in get_spatial_index().within(
+                latitude, longitude, min(radius, MISSING_BUNKERS_MAX_RADIUS_KM)
+            )
+        }
+        bunkers = bunkers.filter(id__in=list(distances))
+
+    result = {}
+    if not after:
+        result['count'] = bunkers.count()
+
+    limit = max(1, min(limit, MISSING_BUNKERS_MAX_PAGE_SIZE))
+    page = list(
+        bunkers.filter(reference_number__gt=after)
+        .order_by('reference_number')
+        .values('id', 'reference_number', 'name_en', 'name_pl', 'category__name_en')[:limit + 1]
+    )
+    has_next = len(page) > limit
+    page = page[:limit]
+
+    page_ids = [row['id'] for row in page]
+    planned_ids = set(plans.filter(bunker_id__in=page_ids).values_list('bunker_id', flat=True)) if page else set()
+    if kind == 'not-hunted':
+        from cluster.active_spots import get_active_spots
+        on_air_ids = get_active_spots().bunker_ids
+
+    rows = []
+    for row in page:
+        item = {
+            'id': row['id'],
+            'reference_number': row['reference_number'],
+            'name_en': row['name_en'],
+            'name_pl': row['name_pl'],
+            'category': row['category__name_en'],
+            'planned': row['id'] in planned_ids,
+        }
+        if kind == 'not-hunted':
+            item['on_air'] = row['id'] in on_air_ids
+        if distances is not None:
+            item['distance_km'] = round(distances[row['id']], 1)
+        rows.append(item)
+
+    result['results'] = rows
+    result['next'] = page[-1]['reference_number'] if has_next else None
+    return result
@@ -0,0 +1,123 @@
+"""
+Deferred UserStatistics updates for PointsTransaction.
+
+Normally every new PointsTransaction updates the cached UserStatistics row
+immediately (PointsTransaction.save() -> UserStatistics.add_transaction()).
+Inside `deferred_statistics()` the deltas are collected instead and applied
+on exit with one F()-expression UPDATE per affected user:
+
+    with deferred_statistics():
+        for qso in qsos:
+            PointsService.award_activator_points(...)
+
+The ledger itself is unchanged: every PointsTransaction is still written
+individually. Only the derived cache is written once per user, inside the
+same database transaction as the ledger rows.
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+# Point categories copied from PointsTransaction to UserStatistics
+POINT_FIELDS = ('activator_points', 'hunter_points', 'b2b_points', 'event_points', 'diploma_points')
+
+_local = threading.local()
+
+
+class StatisticsBatch:
+    """Per-user UserStatistics deltas collected by deferred_statistics()"""
+
+    def __init__(self):
+        self.deltas = defaultdict(Counter)
+        self.last_transaction_ids = {}
+
+    def add(self, pts_transaction):
+        """
+        Collect the points of a saved PointsTransaction (same effect as
+        UserStatistics.add_transaction() once applied).
+        """
+        deltas = self.deltas[pts_transaction.user_id]
+        for field in POINT_FIELDS:
+            deltas[field] += getattr(pts_transaction, field)
+        deltas['total_points'] += pts_transaction.total_points
+        self.last_transaction_ids[pts_transaction.user_id] = max(
+            self.last_transaction_ids.get(pts_transaction.user_id, 0), pts_transaction.id
+        )
+
+    def add_all(self, pts_transactions: Iterable):
+        """Collect several saved PointsTransactions (e.g. from bulk_create())"""
+        for pts_transaction in pts_transactions:
+            self.add(pts_transaction)
+
+    def add_counts(self, user_id: int, **counts):
+        """
+        Collect changes of other UserStatistics counters,
+        e.g. add_counts(user.id, total_hunter_qso=1).
+        """
+        self.deltas[user_id].update(counts)
+
+    def apply(self):
+        """Write the collected deltas, one UPDATE per user"""
+        from .models import UserStatistics
+
+        user_ids = set(self.deltas) | set(self.last_transaction_ids)
+        if not user_ids:
+            return
+
+        existing = set(
+            UserStatistics.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        UserStatistics.objects.bulk_create(
+            [UserStatistics(user_id=user_id) for user_id in user_ids - existing],
+            ignore_conflicts=True
+        )
+
+        now = timezone.now()
+        for user_id in user_ids:
+            updates = {
+                field: F(field) + delta
+                for field, delta in self.deltas[user_id].items() if delta
+            }
+            if user_id in self.last_transaction_ids:
+                updates['last_transaction_id'] = self.last_transaction_ids[user_id]
+            updates['last_updated'] = now
+            UserStatistics.objects.filter(user_id=user_id).update(**updates)
+
+        self.deltas.clear()
+        self.last_transaction_ids.clear()
+
+
+def current_batch() -> Optional[StatisticsBatch]:
+    """The active StatisticsBatch of this thread, or None"""
+    return getattr(_local, 'batch', None)
+
+
+@contextmanager
+def deferred_statistics():
+    """
+    Defer UserStatistics updates of PointsTransactions created inside the block.
+
+    Runs in a database transaction so the ledger rows and the cache update
+    commit or roll back together. Nested blocks join the outermost one.
+
+    Yields:
+        StatisticsBatch collecting the deltas
+    """
+    batch = current_batch()
+    if batch is not None:
+        yield batch
+        return
+
+    batch = _local.batch = StatisticsBatch()
+    try:
+        with transaction.atomic():
+            yield batch
+            _local.batch = None
+            batch.apply()
+    finally:
+        _local.batch = None
@@ -0,0 +1,232 @@
+"""
+Set-based recalculation of UserStatistics from the points ledger.
+
+Computes the same values as UserStatistics.recalculate_from_transactions()
+for many users at once: a handful of GROUP BY queries over PointsTransaction
+and ActivationLog per shard of users instead of ~8 aggregate queries per
+user. Shards are contiguous user ID ranges and can be computed in a process
+pool; results are written back with bulk_update in chunks.
+"""
+import logging
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connections, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PointsTransaction, UserStatistics
+from .statistics_batch import POINT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Fields rebuilt by recalculate_from_transactions(), in report order
+RECALCULATED_FIELDS = POINT_FIELDS + (
+    'total_points',
+    'total_activator_qso',
+    'total_hunter_qso',
+    'total_b2b_qso',
+    'activator_b2b_qso',
+    'unique_activations',
+    'total_activations',
+    'unique_bunkers_hunted',
+    'last_transaction_id',
+)
+
+UserRange = Tuple[int, int]
+
+
+def _in_range(field: str, user_range: UserRange) -> Q:
+    return Q(**{f'{field}__gte': user_range[0], f'{field}__lte': user_range[1]})
+
+
+def compute_statistics(user_range: UserRange) -> Dict[int, Dict[str, int]]:
+    """
+    Recalculate statistics for all users with IDs in a range.
+
+    Args:
+        user_range: Inclusive (first_user_id, last_user_id)
+
+    Returns:
+        Dictionary mapping user ID to {field: value} for RECALCULATED_FIELDS
+    """
+    from activations.models import ActivationLog
+
+    results = defaultdict(Counter)
+
+    # Points and last transaction from non-reversed ledger rows
+    for row in PointsTransaction.objects.filter(
+        _in_range('user_id', user_range), is_reversed=False
+    ).order_by().values('user_id').annotate(
+        last_transaction_id=Max('id'),
+        **{field: Sum(field) for field in POINT_FIELDS}
+    ):
+        user_stats = results[row['user_id']]
+        for field in POINT_FIELDS + ('last_transaction_id',):
+            user_stats[field] = row[field] or 0
+
+    activator_logs = ActivationLog.objects.filter(_in_range('activator_id', user_range)).order_by()
+    for row in activator_logs.values('activator_id').annotate(
+        total_activator_qso=Count('id'),
+        total_b2b_qso=Count('id', filter=Q(is_b2b=True)),
+        activator_b2b_qso=Count('id', filter=Q(is_b2b=True, b2b_confirmed=True)),
+        unique_activations=Count('bunker', distinct=True),
+    ):
+        user_stats = results[row['activator_id']]
+        for field in ('total_activator_qso', 'total_b2b_qso', 'activator_b2b_qso', 'unique_activations'):
+            user_stats[field] = row[field]
+
+    # Activation sessions: distinct (bunker, day) per activator
+    for activator_id, _, _ in activator_logs.annotate(
+        activation_day=TruncDate('activation_date')
+    ).values_list('activator_id', 'bunker_id', 'activation_day').distinct():
+        results[activator_id]['total_activations'] += 1
+
+    # Same filter as .exclude(activator=user), which keeps NULL activators
+    hunter_logs = ActivationLog.objects.filter(
+        _in_range('user_id', user_range)
+    ).filter(
+        Q(activator__isnull=True) | ~Q(activator=F('user'))
+    ).order_by()
+    for row in hunter_logs.values('user_id').annotate(
+        total_hunter_qso=Count('id'),
+        unique_bunkers_hunted=Count('bunker', distinct=True),
+    ):
+        user_stats = results[row['user_id']]
+        user_stats['total_hunter_qso'] = row['total_hunter_qso']
+        user_stats['unique_bunkers_hunted'] = row['unique_bunkers_hunted']
+
+    computed = {}
+    for user_id in UserStatistics.objects.filter(
+        _in_range('user_id', user_range)
+    ).values_list('user_id', flat=True):
+        user_stats = results.get(user_id, Counter())
+        values = {field: user_stats[field] for field in RECALCULATED_FIELDS}
+        values['total_points'] = sum(values[field] for field in POINT_FIELDS)
+        computed[user_id] = values
+    return computed
+
+
+def _compute_in_worker(user_range: UserRange) -> Dict[int, Dict[str, int]]:
+    """Process pool entry point; each worker opens its own DB connection"""
+    try:
+        return compute_statistics(user_range)
+    finally:
+        connections.close_all()
+
+
+def shard_user_ranges(user_ids: List[int], shards: int) -> List[UserRange]:
+    """
+    Split sorted user IDs into contiguous ranges of similar size.
+
+    Args:
+        user_ids: Sorted user IDs
+        shards: Number of ranges wanted
+
+    Returns:
+        List of inclusive (first_user_id, last_user_id) ranges
+    """
+    if not user_ids:
+        return []
+    shards = max(1, min(shards, len(user_ids)))
+    size = -(-len(user_ids) // shards)
+    return [
+        (user_ids[start], user_ids[min(start + size, len(user_ids)) - 1])
+        for start in range(0, len(user_ids), size)
+    ]
+
+
+def recalculate_statistics(user_ids: Optional[List[int]] = None, workers: int = 1,
+                           shards: Optional[int] = None, chunk_size: int = 1000,
+                           dry_run: bool = False) -> Dict:
+    """
+    Recalculate UserStatistics for many users from the ledger.
+
+    Args:
+        user_ids: Users to recalculate; defaults to every UserStatistics row
+        workers: Number of processes computing shards (1 = in this process)
+        shards: Number of user ID ranges (default: one per worker)
+        chunk_size: Rows per bulk_update
+        dry_run: Only compute and report differences; otherwise the
+            diploma progress of users whose statistics changed is refreshed
+
+    Returns:
+        Dictionary with 'changes' ({user_id: {field: (old, new)}}),
+        'users', 'compute_seconds' and 'write_seconds'
+    """
+    stats_queryset = UserStatistics.objects.order_by('user_id')
+    if user_ids is not None:
+        stats_queryset = stats_queryset.filter(user_id__in=user_ids)
+    all_user_ids = list(stats_queryset.values_list('user_id', flat=True))
+    ranges = shard_user_ranges(all_user_ids, shards or workers)
+
+    started = time.monotonic()
+    computed = {}
+    if workers > 1 and len(ranges) > 1:
+        # Forked workers must not share the parent's DB connection
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork')
+        ) as executor:
+            for shard_result in executor.map(_compute_in_worker, ranges):
+                computed.update(shard_result)
+    else:
+        for user_range in ranges:
+            computed.update(compute_statistics(user_range))
+
+    # Ranges may include users that were not requested
+    wanted = set(all_user_ids)
+    computed = {user_id: values for user_id, values in computed.items() if user_id in wanted}
+    compute_seconds = time.monotonic() - started
+
+    started = time.monotonic()
+    changes = {}
+    now = timezone.now()
+    for start in range(0, len(all_user_ids), chunk_size):
+        chunk_ids = all_user_ids[start:start + chunk_size]
+        chunk = list(UserStatistics.objects.filter(user_id__in=chunk_ids))
+        for stats in chunk:
+            values = computed[stats.user_id]
+            differences = {
+                field: (getattr(stats, field), values[field])
+                for field in RECALCULATED_FIELDS
+                if getattr(stats, field) != values[field]
+            }
+            if differences:
+                changes[stats.user_id] = differences
+            for field, value in values.items():
+                setattr(stats, field, value)
+            stats.last_recalculated = now
+            stats.last_updated = now
+
+        if not dry_run:
+            with transaction.atomic():
+                UserStatistics.objects.bulk_update(
+                    chunk, RECALCULATED_FIELDS + ('last_recalculated', 'last_updated')
+                )
+    write_seconds = time.monotonic() - started
+
+    if changes and not dry_run:
+        from diplomas.progress_engine import refresh_diploma_progress
+
+        changed_ids = sorted(changes)
+        for start in range(0, len(changed_ids), chunk_size):
+            refresh_diploma_progress(changed_ids[start:start + chunk_size])
+
+    logger.info(
+        f"Recalculated statistics for {len(all_user_ids)} users in "
+        f"{compute_seconds:.2f}s (+{write_seconds:.2f}s write), "
+        f"{len(changes)} changed{' (dry run)' if dry_run else ''}"
+    )
+
+    return {
+        'changes': changes,
+        'users': len(all_user_ids),
+        'compute_seconds': compute_seconds,
+        'write_seconds': write_seconds,
+    }
@@ -2,10 +2,15 @@
 API tests for accounts app.
 Tests user management, authentication, statistics, and roles.
 """
-from django.test import TestCase
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
+from .leaderboard import build_snapshot, invalidate_snapshot
 from .models import UserStatistics, UserRole, UserRoleAssignment
 
 User = get_user_model()
@@ -105,6 +110,9 @@ class UserStatisticsAPITest(TestCase):
         self.stats2.hunter_points = 200
         self.stats2.activator_points = 75
         self.stats2.save()
+        
+        # Leaderboards are served from a cached snapshot
+        invalidate_snapshot()
     
     def test_list_statistics(self):
         """Test listing statistics"""
@@ -118,6 +126,66 @@ class UserStatisticsAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Should be ordered by points (USER2 first)
         self.assertEqual(response.data[0]['user'], self.user2.id)
+        self.assertIn('X-Leaderboard-Version', response)
+    
+    def test_leaderboard_snapshot(self):
+        """Test leaderboard boards, shared ranks and snapshot reuse"""
+        user3 = User.objects.create_user(
+            email='user3@example.com',
+            callsign='USER3',
+            password='pass123'
+        )
+        UserStatistics.objects.filter(user__in=[self.user1, user3]).update(total_activator_qso=5)
+        UserStatistics.objects.filter(user=self.user2).update(total_activator_qso=9)
+        invalidate_snapshot()
+        
+        response = self.client.get('/api/statistics/leaderboard/?board=activator&limit=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['user'] for row in response.data], [self.user2.id, self.user1.id])
+        
+        # Snapshot is reused until rebuilt
+        UserStatistics.objects.filter(user=user3).update(total_activator_qso=20)
+        response = self.client.get('/api/statistics/rank/?callsign=user3')
+        self.assertEqual(response.data['ranks']['activator'], 2)
+        self.assertEqual(response.data['ranks']['points'], 3)
+        
+        snapshot = build_snapshot()
+        response = self.client.get('/api/statistics/rank/?callsign=USER3')
+        self.assertEqual(response.data['version'], snapshot['version'])
+        self.assertEqual(response.data['ranks']['activator'], 1)
+        
+        response = self.client.get('/api/statistics/leaderboard/?board=unknown')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_cold_snapshot_built_by_lock_holder_only(self):
+        """Without a cached snapshot, processes that miss the lock do not rebuild it"""
+        from . import leaderboard
+        
+        original_build = leaderboard.build_snapshot
+        previous = leaderboard.get_snapshot()
+        cache.delete_many([leaderboard.SNAPSHOT_CACHE_KEY, leaderboard.SNAPSHOT_VERSION_CACHE_KEY])
+        cache.add(leaderboard.SNAPSHOT_LOCK_CACHE_KEY, True, 60)
+        self.addCleanup(cache.delete, leaderboard.SNAPSHOT_LOCK_CACHE_KEY)
+        
+        with mock.patch.object(leaderboard, 'build_snapshot', wraps=original_build) as build:
+            # A process with a previous snapshot keeps serving it
+            self.assertIs(leaderboard.get_snapshot(), previous)
+            
+            # One without waits for the snapshot the lock holder builds
+            leaderboard._loaded = None
+            with mock.patch.object(leaderboard.time, 'sleep', side_effect=lambda seconds: original_build()):
+                snapshot = leaderboard.get_snapshot()
+            self.assertEqual(snapshot.version, cache.get(leaderboard.SNAPSHOT_VERSION_CACHE_KEY))
+        self.assertEqual(build.call_count, 0)
+    
+    def test_snapshot_command_needs_shared_cache(self):
+        """The snapshot command refuses a cache local to its own process"""
+        with self.assertRaises(CommandError):
+            call_command('build_leaderboard_snapshot')
+        
+        dummy = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=dummy), self.assertRaises(CommandError):
+            call_command('build_leaderboard_snapshot')
 
 
 class UserRoleAPITest(TestCase):
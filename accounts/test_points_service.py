@@ -518,3 +518,161 @@ class PointsServiceTestCase(TestCase):
         # Should match
         self.assertEqual(cached_points, recalculated_points)
         self.assertEqual(stats.last_transaction_id, tx.id)
+    
+    def test_deferred_statistics(self):
+        """Test that deferred statistics match immediate updates with one UPDATE per user."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from accounts.statistics_batch import deferred_statistics
+        
+        now = timezone.now()
+        logs = [
+            ActivationLog.objects.create(
+                activator=self.activator,
+                user=hunter,
+                bunker=self.bunker,
+                activation_date=now + timedelta(minutes=i),
+                band='20m',
+                mode='SSB',
+                log_upload=self.log_upload
+            )
+            for i, hunter in enumerate([self.hunter1, self.hunter2, self.hunter1])
+        ]
+        
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_statistics():
+                transactions = []
+                for log in logs:
+                    transactions.append(PointsService.award_activator_points(self.activator, log))
+                    transactions.append(PointsService.award_hunter_points(log.user, log))
+                
+                # Cache is not touched until the block exits
+                self.assertEqual(UserStatistics.objects.get(user=self.activator).activator_points, 0)
+        
+        stats_updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "accounts_userstatistics"')
+        ]
+        self.assertEqual(len(stats_updates), 3)
+        
+        activator_stats = UserStatistics.objects.get(user=self.activator)
+        self.assertEqual(activator_stats.activator_points, 3)
+        self.assertEqual(activator_stats.total_activator_qso, 3)
+        self.assertEqual(activator_stats.total_points, 3)
+        self.assertEqual(activator_stats.last_transaction_id, transactions[4].id)
+        
+        hunter_stats = UserStatistics.objects.get(user=self.hunter1)
+        self.assertEqual(hunter_stats.hunter_points, 2)
+        self.assertEqual(hunter_stats.total_hunter_qso, 2)
+        
+        # Ledger is unchanged: one transaction per award, cache matches it
+        self.assertEqual(PointsTransaction.objects.count(), 6)
+        hunter_stats.recalculate_from_transactions()
+        self.assertEqual(hunter_stats.total_points, 2)
+        
+        # Batch reversal restores the cache with deferred updates too
+        batch = PointsService.create_batch(name='Import', transactions=transactions)
+        reversals = batch.reverse_all(reason='Wrong log')
+        
+        self.assertEqual(len(reversals), 6)
+        self.assertEqual(UserStatistics.objects.get(user=self.activator).total_points, 0)
+        self.assertEqual(UserStatistics.objects.get(user=self.hunter2).hunter_points, 0)
+        self.assertTrue(all(tx.is_reversed for tx in PointsTransaction.objects.filter(
+            transaction_type=PointsTransaction.ACTIVATOR_QSO
+        )))
+    
+    def test_deferred_statistics_rollback(self):
+        """Test that an exception discards both ledger rows and deferred deltas."""
+        from accounts.statistics_batch import deferred_statistics
+        
+        log = ActivationLog.objects.create(
+            activator=self.activator,
+            user=self.hunter1,
+            bunker=self.bunker,
+            activation_date=timezone.now(),
+            log_upload=self.log_upload
+        )
+        
+        with self.assertRaises(RuntimeError):
+            with deferred_statistics():
+                PointsService.award_activator_points(self.activator, log)
+                raise RuntimeError('import failed')
+        
+        self.assertFalse(PointsTransaction.objects.exists())
+        self.assertEqual(UserStatistics.objects.get(user=self.activator).activator_points, 0)
+        
+        # Immediate updates work again after the block
+        log.refresh_from_db()
+        PointsService.award_activator_points(self.activator, log)
+        self.assertEqual(UserStatistics.objects.get(user=self.activator).activator_points, 1)
+    
+    def test_bulk_recalculation_matches_per_user(self):
+        """Test that set-based recalculation gives the same numbers as recalculate_from_transactions."""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import transaction
+        from accounts.statistics_recalculation import RECALCULATED_FIELDS, recalculate_statistics
+        
+        other_bunker = Bunker.objects.create(
+            reference_number='BOTA-TEST-002',
+            name_pl='Drugi Bunkier',
+            name_en='Second Bunker',
+            category=self.category,
+            latitude=Decimal('52.0'),
+            longitude=Decimal('21.0')
+        )
+        now = timezone.now()
+        entries = [
+            (self.activator, self.hunter1, self.bunker, 0, False),
+            (self.activator, self.hunter2, self.bunker, 1, True),
+            (self.activator, self.hunter1, other_bunker, 2, False),
+            (self.activator, self.hunter1, self.bunker, 60 * 26, False),
+            (self.activator, self.activator, other_bunker, 3, False),
+            (self.hunter1, self.activator, other_bunker, 4, True),
+        ]
+        transactions = []
+        for activator, hunter, bunker, minutes, b2b in entries:
+            log = ActivationLog.objects.create(
+                activator=activator,
+                user=hunter,
+                bunker=bunker,
+                activation_date=now + timedelta(minutes=minutes),
+                is_b2b=b2b,
+                b2b_confirmed=b2b,
+                log_upload=self.log_upload
+            )
+            transactions.append(PointsService.award_activator_points(activator, log))
+            if hunter != activator:
+                transactions.append(PointsService.award_hunter_points(hunter, log))
+        transactions[0].reverse(reason='Duplicate')
+        
+        # Corrupt the cache
+        UserStatistics.objects.update(total_points=999, unique_activations=42, total_hunter_qso=7)
+        
+        expected = {}
+        with transaction.atomic():
+            for stats in UserStatistics.objects.all():
+                stats.recalculate_from_transactions()
+                expected[stats.user_id] = {field: getattr(stats, field) for field in RECALCULATED_FIELDS}
+            transaction.set_rollback(True)
+        
+        out = StringIO()
+        call_command('recalculate_user_points', '--dry-run', stdout=out)
+        self.assertIn('SP1ACT:', out.getvalue())
+        self.assertIn('total_points: 999 →', out.getvalue())
+        self.assertIn('DRY RUN: Would update 3/3 users', out.getvalue())
+        self.assertEqual(UserStatistics.objects.get(user=self.activator).total_points, 999)
+        
+        result = recalculate_statistics(shards=2, chunk_size=2)
+        
+        self.assertEqual(result['users'], 3)
+        for stats in UserStatistics.objects.all():
+            self.assertEqual(
+                {field: getattr(stats, field) for field in RECALCULATED_FIELDS},
+                expected[stats.user_id]
+            )
+            self.assertIsNotNone(stats.last_recalculated)
+        
+        out = StringIO()
+        call_command('recalculate_user_points', '--callsign', 'sp1hnt', stdout=out)
+        self.assertIn('SP1HNT: No changes needed', out.getvalue())
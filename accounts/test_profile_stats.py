@@ -0,0 +1,285 @@
+"""
+Tests for the profile page statistics aggregation.
+"""
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.profile_stats import build_profile_stats, get_missing_bunkers, get_profile_stats
+from activations.models import ActivationLog
+from bunkers.models import Bunker, BunkerCategory
+from planned_activations.models import PlannedActivation
+
+
+User = get_user_model()
+
+
+def utc(day, hour=12):
+    return datetime(2025, 6, day, hour, tzinfo=dt_timezone.utc)
+
+
+class ProfileStatsTest(TestCase):
+    """Test single-pass profile aggregation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            callsign='SP1USR',
+            password='test123'
+        )
+        self.other = User.objects.create_user(
+            email='other@test.com',
+            callsign='SP2OTH',
+            password='test123'
+        )
+        category = BunkerCategory.objects.create(name_pl='Kategoria', name_en='Category')
+        self.bunker1 = Bunker.objects.create(
+            reference_number='B/SP-0001',
+            name_pl='Bunkier 1',
+            name_en='Bunker 1',
+            category=category,
+            latitude=Decimal('52.0'),
+            longitude=Decimal('21.0')
+        )
+        self.bunker2 = Bunker.objects.create(
+            reference_number='B/SP-0002',
+            name_pl='Bunkier 2',
+            name_en='Bunker 2',
+            category=category,
+            latitude=Decimal('53.0'),
+            longitude=Decimal('22.0')
+        )
+
+        # Own activations: bunker1 on two days, bunker2 on one day
+        for day, hour, band, mode, is_b2b in [
+            (1, 10, '40m', 'SSB', False),
+            (1, 11, '20m', 'CW', True),
+            (3, 9, '40m', 'SSB', False),
+        ]:
+            ActivationLog.objects.create(
+                user=self.other, activator=self.user, bunker=self.bunker1,
+                activation_date=utc(day, hour), band=band, mode=mode,
+                qso_count=1, is_b2b=is_b2b
+            )
+        ActivationLog.objects.create(
+            user=self.other, activator=self.user, bunker=self.bunker2,
+            activation_date=utc(2), band='2m', mode='FM', qso_count=1
+        )
+
+        # Hunted QSOs: two with the other activator on bunker2, one in the own log
+        ActivationLog.objects.create(
+            user=self.user, activator=self.other, bunker=self.bunker2,
+            activation_date=utc(5, 8), band='40m', mode='SSB', qso_count=1
+        )
+        ActivationLog.objects.create(
+            user=self.user, activator=self.other, bunker=self.bunker2,
+            activation_date=utc(5, 9), band='80m', mode='SSB', qso_count=1, is_b2b=True
+        )
+        ActivationLog.objects.create(
+            user=self.user, activator=self.user, bunker=self.bunker2,
+            activation_date=utc(6), band='40m', mode='SSB', qso_count=1
+        )
+
+    def test_activated_bunkers(self):
+        """Activations are grouped per bunker and per day"""
+        stats = build_profile_stats(self.user)
+
+        activated = stats['activated_bunkers']
+        self.assertEqual([b['bunker__id'] for b in activated], [self.bunker1.id, self.bunker2.id])
+        self.assertEqual(activated[0]['activation_count'], 2)
+        self.assertEqual(activated[0]['total_qso'], 3)
+        self.assertEqual(activated[0]['last_activation'], utc(3, 9))
+        self.assertEqual(activated[1]['activation_count'], 2)
+        self.assertEqual(activated[1]['total_qso'], 2)
+
+        days = stats['all_activations'][self.bunker1.id]
+        self.assertEqual([d['date'] for d in days], [utc(3).date(), utc(1).date()])
+        self.assertEqual(days[1]['bands'], ['20m', '40m'])
+        self.assertEqual(days[1]['modes'], ['CW', 'SSB'])
+        self.assertEqual(days[1]['total_qso'], 2)
+        self.assertEqual(days[1]['count'], 2)
+        self.assertTrue(days[1]['is_b2b'])
+        self.assertFalse(days[0]['is_b2b'])
+
+        self.assertEqual(stats['activator_bands'][0], {'band': '40m', 'count': 3, 'qso_sum': 3})
+
+    def test_hunted_bunkers(self):
+        """QSOs in other activators' logs count as hunted, own logs do not"""
+        stats = build_profile_stats(self.user)
+
+        hunted = stats['hunted_bunkers']
+        self.assertEqual(len(hunted), 1)
+        self.assertEqual(hunted[0]['bunker__id'], self.bunker2.id)
+        self.assertEqual(hunted[0]['qso_count'], 2)
+
+        days = stats['all_hunted_qsos'][self.bunker2.id]
+        self.assertEqual(len(days), 1)
+        self.assertEqual(days[0]['activators'], ['SP2OTH'])
+        self.assertEqual(days[0]['bands'], ['40m', '80m'])
+        self.assertEqual(days[0]['total_qso'], 2)
+        self.assertTrue(days[0]['is_b2b'])
+
+        self.assertEqual(stats['hunter_modes'], [{'mode': 'SSB', 'count': 2}])
+
+    def test_cached_until_logs_change(self):
+        """The cached result is reused until a log is added or edited"""
+        get_profile_stats(self.user)
+        with self.assertNumQueries(1):
+            stats = get_profile_stats(self.user)
+        self.assertEqual(len(stats['hunted_bunkers']), 1)
+
+        ActivationLog.objects.create(
+            user=self.user, activator=self.other, bunker=self.bunker1,
+            activation_date=utc(7), band='40m', mode='CW', qso_count=1
+        )
+        stats = get_profile_stats(self.user)
+        self.assertEqual(len(stats['hunted_bunkers']), 2)
+
+        # Same ids and count, but a log moved to another band
+        log = ActivationLog.objects.filter(user=self.user, activator=self.other).latest('id')
+        log.band = '20m'
+        log.save()
+        stats = get_profile_stats(self.user)
+        self.assertIn({'band': '20m', 'count': 1}, stats['hunter_bands'])
+
+    def test_profile_view_query_count_is_flat(self):
+        """The profile page does not query once per bunker"""
+        self.client.force_login(self.user)
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['activated_bunkers']), 2)
+
+        bunker3 = Bunker.objects.create(
+            reference_number='B/SP-0003', name_pl='Bunkier 3', name_en='Bunker 3',
+            category=self.bunker1.category, latitude=Decimal('54.0'), longitude=Decimal('23.0')
+        )
+        ActivationLog.objects.create(
+            user=self.other, activator=self.user, bunker=bunker3,
+            activation_date=utc(8), band='40m', mode='SSB', qso_count=1
+        )
+        ActivationLog.objects.create(
+            user=self.user, activator=self.other, bunker=bunker3,
+            activation_date=utc(8), band='40m', mode='SSB', qso_count=1
+        )
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(len(response.context['activated_bunkers']), 3)
+        self.assertEqual(len(response.context['hunted_bunkers']), 2)
+        self.assertEqual(len(after), len(before))
+
+
+class MissingBunkersTest(TestCase):
+    """Test the paginated not-activated/not-hunted bunker lists"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            callsign='SP1USR',
+            password='test123'
+        )
+        self.other = User.objects.create_user(
+            email='other@test.com',
+            callsign='SP2OTH',
+            password='test123'
+        )
+        self.category = BunkerCategory.objects.create(name_pl='Kategoria', name_en='Category')
+        self.other_category = BunkerCategory.objects.create(name_pl='Inna', name_en='Other')
+        self.bunkers = [
+            Bunker.objects.create(
+                reference_number=f'B/SP-000{i}',
+                name_pl=f'Bunkier {i}',
+                name_en=f'Bunker {i}',
+                category=self.category if i < 4 else self.other_category,
+                latitude=Decimal('52.0') + i,
+                longitude=Decimal('21.0')
+            )
+            for i in range(1, 6)
+        ]
+        # Activated bunker 1, hunted bunker 2
+        ActivationLog.objects.create(
+            user=self.other, activator=self.user, bunker=self.bunkers[0],
+            activation_date=utc(1), band='40m', mode='SSB', qso_count=1
+        )
+        ActivationLog.objects.create(
+            user=self.user, activator=self.other, bunker=self.bunkers[1],
+            activation_date=utc(1), band='40m', mode='SSB', qso_count=1
+        )
+
+    def refs(self, page):
+        return [row['reference_number'] for row in page['results']]
+
+    def test_anti_join(self):
+        """Activated/hunted bunkers are left out of their list"""
+        page = get_missing_bunkers(self.user, 'not-activated')
+        self.assertEqual(page['count'], 4)
+        self.assertNotIn('B/SP-0001', self.refs(page))
+
+        page = get_missing_bunkers(self.user, 'not-hunted')
+        self.assertEqual(page['count'], 4)
+        self.assertNotIn('B/SP-0002', self.refs(page))
+        self.assertIn('B/SP-0001', self.refs(page))
+
+    def test_keyset_pagination(self):
+        """Pages continue after the cursor without gaps or repeats"""
+        first = get_missing_bunkers(self.user, 'not-activated', limit=3)
+        self.assertEqual(self.refs(first), ['B/SP-0002', 'B/SP-0003', 'B/SP-0004'])
+        self.assertEqual(first['next'], 'B/SP-0004')
+
+        second = get_missing_bunkers(self.user, 'not-activated', after=first['next'], limit=3)
+        self.assertEqual(self.refs(second), ['B/SP-0005'])
+        self.assertIsNone(second['next'])
+        self.assertNotIn('count', second)
+
+    def test_filters(self):
+        """Prefix, category, distance and planned filters"""
+        page = get_missing_bunkers(self.user, 'not-activated', prefix='b/sp-0003')
+        self.assertEqual(self.refs(page), ['B/SP-0003'])
+
+        page = get_missing_bunkers(self.user, 'not-activated', category_id=self.other_category.id)
+        self.assertEqual(self.refs(page), ['B/SP-0004', 'B/SP-0005'])
+
+        page = get_missing_bunkers(self.user, 'not-activated', near=(55.0, 21.0, 120))
+        self.assertEqual(self.refs(page), ['B/SP-0002', 'B/SP-0003', 'B/SP-0004'])
+        self.assertEqual(page['results'][1]['distance_km'], 0.0)
+
+        PlannedActivation.objects.create(user=self.user, bunker=self.bunkers[4], planned_date=utc(20).date())
+        page = get_missing_bunkers(self.user, 'not-activated', planned_only=True)
+        self.assertEqual(self.refs(page), ['B/SP-0005'])
+        self.assertTrue(page['results'][0]['planned'])
+
+        # Own plans do not count on the hunter list
+        page = get_missing_bunkers(self.user, 'not-hunted', planned_only=True)
+        self.assertEqual(page['count'], 0)
+
+    def test_profile_bunkers_view(self):
+        """The profile page loads the lists as JSON"""
+        url = reverse('profile_bunkers', args=['not-hunted'])
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url, {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(len(data['results']), 2)
+        self.assertFalse(data['results'][0]['on_air'])
+        self.assertTrue(data['results'][0]['url'].startswith('/'))
+
+        self.assertEqual(self.client.get(url, {'lat': 'x', 'lng': '21'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('profile_bunkers', args=['everything'])).status_code, 404)
+
+        response = self.client.get(reverse('profile'))
+        self.assertNotIn('non_activated_bunkers', response.context)
@@ -94,21 +94,67 @@ class UserStatisticsViewSet(viewsets.ModelViewSet):
     ordering_fields = ['hunter_points', 'activator_points', 'b2b_points', 'last_updated']
     
     @extend_schema(
-        description="Get leaderboard by total points",
+        description="Get leaderboard by total points (or another board) from the leaderboard snapshot",
         tags=["accounts"],
         parameters=[
-            OpenApiParameter(name='limit', description='Number of results', type=int)
+            OpenApiParameter(name='limit', description='Number of results', type=int),
+            OpenApiParameter(
+                name='board',
+                description='Leaderboard: points (default), activator, hunter or b2b',
+                type=str
+            )
         ]
     )
     @action(detail=False, methods=['get'])
     def leaderboard(self, request):
         """Get top users by total points"""
+        from .leaderboard import USER_BOARDS, get_snapshot
+        
         limit = int(request.query_params.get('limit', 10))
-        stats = UserStatistics.objects.select_related('user').order_by(
-            '-hunter_points', '-activator_points', '-b2b_points'
-        )[:limit]
+        board = request.query_params.get('board', 'points')
+        if board not in USER_BOARDS:
+            return Response(
+                {'error': f"Unknown board '{board}'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        snapshot = get_snapshot()
+        user_ids = snapshot.top_user_ids(board, limit)
+        stats_by_user = {
+            stats.user_id: stats
+            for stats in UserStatistics.objects.select_related('user').filter(user_id__in=user_ids)
+        }
+        stats = [stats_by_user[user_id] for user_id in user_ids if user_id in stats_by_user]
         serializer = self.get_serializer(stats, many=True)
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response['X-Leaderboard-Version'] = str(snapshot.version)
+        return response
+    
+    @extend_schema(
+        description="Get leaderboard ranks of a callsign from the leaderboard snapshot",
+        tags=["accounts"],
+        parameters=[
+            OpenApiParameter(name='callsign', description='Callsign', type=str, required=True)
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def rank(self, request):
+        """Get ranks of a callsign on all leaderboards"""
+        from .leaderboard import get_snapshot
+        
+        callsign = request.query_params.get('callsign', '').strip().upper()
+        if not callsign:
+            return Response(
+                {'error': 'callsign parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        snapshot = get_snapshot()
+        return Response({
+            'callsign': callsign,
+            'version': snapshot.version,
+            'ranks': snapshot.ranks(callsign),
+        })
     
     @extend_schema(
         description="Recalculate user points from transaction history (authoritative source)",
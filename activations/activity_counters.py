@@ -0,0 +1,275 @@
+"""
+Materialized per-user activity counters.
+
+UserBunkerActivity holds the set of bunkers each user activated or hunted
+and UserActivationDay the set of (bunker, day) activation sessions, each
+row with the number of QSOs behind it. Both are updated incrementally when
+ActivationLog rows are inserted or deleted, and the resulting set sizes are
+kept in UserStatistics (unique_activations, unique_bunkers_hunted,
+total_activations), so reading them needs no distinct-count query.
+
+Hunted bunkers exclude QSOs where the user was their own activator, same
+as UserStatistics.recalculate_from_transactions().
+"""
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.models import UserStatistics
+
+from .models import ActivationLog, UserActivationDay, UserBunkerActivity
+
+logger = logging.getLogger(__name__)
+
+# Fields of ActivationLog that determine which counters a log contributes to
+COUNTED_FIELDS = ('user_id', 'activator_id', 'bunker_id', 'activation_date')
+
+# UserStatistics fields kept by this module
+STAT_FIELDS = ('unique_activations', 'unique_bunkers_hunted', 'total_activations')
+
+
+def _log_keys(log):
+    """
+    Counter keys a log contributes to.
+
+    Returns:
+        Tuple of (bunker keys, day keys); bunker keys are
+        (user_id, bunker_id, role), day keys (user_id, bunker_id, day)
+    """
+    bunker_keys = []
+    day_keys = []
+    if log.activator_id:
+        bunker_keys.append((log.activator_id, log.bunker_id, UserBunkerActivity.ROLE_ACTIVATOR))
+        # Same day boundaries as TruncDate() in the current time zone
+        day_keys.append((log.activator_id, log.bunker_id, timezone.localdate(log.activation_date)))
+    if log.activator_id != log.user_id:
+        bunker_keys.append((log.user_id, log.bunker_id, UserBunkerActivity.ROLE_HUNTER))
+    return bunker_keys, day_keys
+
+
+def _apply_deltas(model, key_fields, deltas: Counter, stat_field_for_key) -> Dict[int, Counter]:
+    """
+    Add QSO count deltas to a materialized set table.
+
+    Rows of keys gaining QSOs are first inserted empty with
+    ignore_conflicts, so concurrent imports touching the same new key do
+    not fail on the unique constraint; the row locks taken afterwards
+    order them. A row is counted in the set while its count is above zero
+    and deleted when it drops to zero.
+
+    Returns:
+        Per-user Counter of UserStatistics field deltas (set size changes)
+    """
+    stat_deltas = defaultdict(Counter)
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return stat_deltas
+
+    model.objects.bulk_create(
+        [model(qso_count=0, **dict(zip(key_fields, key))) for key, delta in deltas.items() if delta > 0],
+        ignore_conflicts=True
+    )
+
+    lookups = {
+        f'{field}__in': {key[index] for key in deltas}
+        for index, field in enumerate(key_fields)
+    }
+    existing = {
+        tuple(getattr(row, field) for field in key_fields): row
+        for row in model.objects.select_for_update().filter(**lookups)
+    }
+
+    to_update = []
+    to_delete = []
+    for key, delta in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            continue
+
+        was_counted = row.qso_count > 0
+        row.qso_count = max(0, row.qso_count + delta)
+        if row.qso_count > 0:
+            to_update.append(row)
+            if not was_counted:
+                stat_deltas[key[0]][stat_field_for_key(key)] += 1
+        else:
+            to_delete.append(row.pk)
+            if was_counted:
+                stat_deltas[key[0]][stat_field_for_key(key)] -= 1
+
+    if to_update:
+        model.objects.bulk_update(to_update, ['qso_count'])
+    if to_delete:
+        model.objects.filter(pk__in=to_delete).delete()
+
+    return stat_deltas
+
+
+def _bunker_stat_field(key):
+    if key[2] == UserBunkerActivity.ROLE_ACTIVATOR:
+        return 'unique_activations'
+    return 'unique_bunkers_hunted'
+
+
+def _day_stat_field(key):
+    return 'total_activations'
+
+
+@transaction.atomic
+def apply_log_changes(added: Iterable = (), removed: Iterable = ()):
+    """
+    Update the materialized sets and UserStatistics counters for inserted
+    and deleted ActivationLogs.
+
+    Each affected UserStatistics row receives a single F() update.
+
+    Args:
+        added: ActivationLogs that were inserted
+        removed: ActivationLogs (or their former field values) that were deleted
+    """
+    bunker_deltas = Counter()
+    day_deltas = Counter()
+    for logs, sign in ((added, 1), (removed, -1)):
+        for log in logs:
+            bunker_keys, day_keys = _log_keys(log)
+            for key in bunker_keys:
+                bunker_deltas[key] += sign
+            for key in day_keys:
+                day_deltas[key] += sign
+
+    stat_deltas = _apply_deltas(
+        UserBunkerActivity, ('user_id', 'bunker_id', 'role'), bunker_deltas, _bunker_stat_field
+    )
+    for user_id, deltas in _apply_deltas(
+        UserActivationDay, ('user_id', 'bunker_id', 'day'), day_deltas, _day_stat_field
+    ).items():
+        stat_deltas[user_id].update(deltas)
+
+    stat_deltas = {user_id: deltas for user_id, deltas in stat_deltas.items() if any(deltas.values())}
+    if not stat_deltas:
+        return
+
+    existing = set(
+        UserStatistics.objects.filter(user_id__in=stat_deltas).values_list('user_id', flat=True)
+    )
+    UserStatistics.objects.bulk_create(
+        [UserStatistics(user_id=user_id) for user_id in stat_deltas.keys() - existing],
+        ignore_conflicts=True
+    )
+    for user_id, deltas in stat_deltas.items():
+        UserStatistics.objects.filter(user_id=user_id).update(**{
+            field: F(field) + delta for field, delta in deltas.items() if delta
+        })
+
+
+def rebuild_activity_counters(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Rebuild the materialized sets and UserStatistics counters from
+    ActivationLog with grouped queries, then refresh the diploma progress
+    of users whose counters changed.
+
+    Args:
+        user_ids: Users to rebuild; defaults to all users
+
+    Returns:
+        Number of UserStatistics rows updated
+    """
+    activator_logs = ActivationLog.objects.filter(activator__isnull=False)
+    hunter_logs = ActivationLog.objects.filter(Q(activator__isnull=True) | ~Q(activator=F('user')))
+    bunker_rows = UserBunkerActivity.objects.all()
+    day_rows = UserActivationDay.objects.all()
+    stats_rows = UserStatistics.objects.all()
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        activator_logs = activator_logs.filter(activator_id__in=user_ids)
+        hunter_logs = hunter_logs.filter(user_id__in=user_ids)
+        bunker_rows = bunker_rows.filter(user_id__in=user_ids)
+        day_rows = day_rows.filter(user_id__in=user_ids)
+        stats_rows = stats_rows.filter(user_id__in=user_ids)
+
+    bunker_sets = [
+        UserBunkerActivity(
+            user_id=row['activator'], bunker_id=row['bunker'],
+            role=UserBunkerActivity.ROLE_ACTIVATOR, qso_count=row['qsos']
+        )
+        for row in activator_logs.order_by().values('activator', 'bunker').annotate(qsos=Count('id'))
+    ] + [
+        UserBunkerActivity(
+            user_id=row['user'], bunker_id=row['bunker'],
+            role=UserBunkerActivity.ROLE_HUNTER, qso_count=row['qsos']
+        )
+        for row in hunter_logs.order_by().values('user', 'bunker').annotate(qsos=Count('id'))
+    ]
+    day_sets = [
+        UserActivationDay(
+            user_id=row['activator'], bunker_id=row['bunker'],
+            day=row['day'], qso_count=row['qsos']
+        )
+        for row in activator_logs.annotate(
+            day=TruncDate('activation_date')
+        ).order_by().values('activator', 'bunker', 'day').annotate(qsos=Count('id'))
+    ]
+
+    counters = defaultdict(Counter)
+    for row in bunker_sets:
+        counters[row.user_id][_bunker_stat_field((row.user_id, row.bunker_id, row.role))] += 1
+    for row in day_sets:
+        counters[row.user_id]['total_activations'] += 1
+
+    with transaction.atomic():
+        bunker_rows.delete()
+        day_rows.delete()
+        UserBunkerActivity.objects.bulk_create(bunker_sets, batch_size=1000)
+        UserActivationDay.objects.bulk_create(day_sets, batch_size=1000)
+
+        # Users with logs but no statistics row yet
+        UserStatistics.objects.bulk_create(
+            [UserStatistics(user_id=user_id) for user_id in counters], batch_size=1000, ignore_conflicts=True
+        )
+        all_stats = list(stats_rows)
+        changed_ids = []
+        for stats in all_stats:
+            user_counters = counters.get(stats.user_id, Counter())
+            if any(getattr(stats, field) != user_counters[field] for field in STAT_FIELDS):
+                changed_ids.append(stats.user_id)
+            stats.unique_activations = user_counters['unique_activations']
+            stats.unique_bunkers_hunted = user_counters['unique_bunkers_hunted']
+            stats.total_activations = user_counters['total_activations']
+        UserStatistics.objects.bulk_update(all_stats, STAT_FIELDS, batch_size=1000)
+
+    if changed_ids:
+        from diplomas.progress_engine import refresh_diploma_progress
+
+        for start in range(0, len(changed_ids), 1000):
+            refresh_diploma_progress(changed_ids[start:start + 1000])
+
+    logger.info(
+        f"Rebuilt activity counters: {len(bunker_sets)} bunker rows, "
+        f"{len(day_sets)} activation days, {len(all_stats)} users"
+    )
+
+    return len(all_stats)
+
+
+def get_user_bunker_ids(user, role: str) -> set:
+    """
+    Bunker IDs the user activated or hunted, from the materialized set.
+
+    Args:
+        user: User (or user ID)
+        role: UserBunkerActivity.ROLE_ACTIVATOR or ROLE_HUNTER
+
+    Returns:
+        Set of bunker IDs
+    """
+    return set(
+        UserBunkerActivity.objects.filter(
+            user_id=getattr(user, 'pk', user),
+            role=role
+        ).values_list('bunker_id', flat=True)
+    )
@@ -0,0 +1,101 @@
+"""
+ADIF upload files.
+
+Uploaded logs are handled as binary files, never as one decoded string:
+a single pass over the file computes the SHA-256 used for duplicate
+detection and checks whether it is valid UTF-8, and the import then
+streams the same file through the ADIF tokenizer. Logs that are not
+UTF-8 (older Windows loggers) are read with settings.ADIF_FALLBACK_ENCODING.
+"""
+import codecs
+import hashlib
+from typing import Dict, Tuple
+
+from django.conf import settings
+
+from .log_import_service import LogImportService
+
+# Bytes read at a time
+READ_SIZE = 64 * 1024
+
+
+class UnsupportedEncodingError(ValueError):
+    """The file is in an encoding the ADIF tokenizer cannot read"""
+
+
+def inspect_adif_file(file) -> Tuple[str, str]:
+    """
+    Checksum and encoding of an ADIF file, reading it once in blocks.
+
+    Args:
+        file: Binary file object; it is rewound afterwards
+
+    Returns:
+        Tuple of (SHA-256 hex digest, encoding name)
+
+    Raises:
+        UnsupportedEncodingError: For UTF-16/UTF-32 files
+    """
+    checksum = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    is_utf8 = True
+
+    file.seek(0)
+    first = True
+    while True:
+        block = file.read(READ_SIZE)
+        if not block:
+            break
+        if first:
+            if block.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                raise UnsupportedEncodingError(
+                    'Invalid file encoding (UTF-16). Please export the log as UTF-8.'
+                )
+            first = False
+        checksum.update(block)
+        if is_utf8:
+            try:
+                decoder.decode(block)
+            except UnicodeDecodeError:
+                is_utf8 = False
+    if is_utf8:
+        try:
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            is_utf8 = False
+    file.seek(0)
+
+    encoding = 'utf-8' if is_utf8 else getattr(settings, 'ADIF_FALLBACK_ENCODING', 'cp1250')
+    return checksum.hexdigest(), encoding
+
+
+def import_adif_file(file, uploader_user, filename: str = None) -> Dict:
+    """
+    Import an ADIF file object, streaming it into the parser.
+
+    Args:
+        file: Binary file object (e.g. an UploadedFile)
+        uploader_user: User uploading the file
+        filename: Original filename
+
+    Returns:
+        LogImportService result dictionary
+    """
+    try:
+        file_checksum, encoding = inspect_adif_file(file)
+    except UnsupportedEncodingError as e:
+        return {
+            'success': False,
+            'errors': [str(e)],
+            'qsos_processed': 0,
+            'hunters_updated': 0
+        }
+
+    service = LogImportService()
+    return service.process_adif_upload(
+        file,
+        uploader_user,
+        filename=filename,
+        file_checksum=file_checksum,
+        encoding=encoding
+    )
@@ -4,28 +4,193 @@ Parses ADIF (.adi) files and extracts QSO data for activations.
 """
 import re
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import timezone as dt_timezone
 from django.utils import timezone
 
+from cluster.band_plan import band_for_frequency, normalize_band
+
+
+class ADIFTokenizer:
+    """
+    Length-driven streaming ADIF reader.
+    
+    The input is split on '<' and every value is cut to the length declared
+    in its <NAME:length[:type]> tag; values that contain '<' are re-joined
+    until the declared length is reached. No regular expression runs over
+    the values, lengths are counted in bytes (binary-safe) and <EOH>/<EOR>
+    are matched case-insensitively. Only one chunk and the current record
+    are held in memory.
+    """
+    
+    CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, source, encoding: str = 'utf-8', chunk_size: int = CHUNK_SIZE):
+        """
+        Initialize tokenizer
+        
+        Args:
+            source: ADIF content as str/bytes, a file-like object (text or
+                binary) or an iterable of chunks (e.g. UploadedFile.chunks())
+            encoding: Encoding used to decode field values
+            chunk_size: Bytes processed at a time
+        """
+        self.source = source
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.header = {}
+    
+    def _iter_chunks(self):
+        """Yield the source as byte chunks"""
+        source = self.source
+        encoding = self.encoding
+        
+        if isinstance(source, (str, bytes, bytearray)):
+            data = source.encode(encoding) if isinstance(source, str) else bytes(source)
+            for start in range(0, len(data), self.chunk_size):
+                yield data[start:start + self.chunk_size]
+        elif hasattr(source, 'read'):
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk.encode(encoding) if isinstance(chunk, str) else chunk
+        else:
+            for chunk in source:
+                yield chunk.encode(encoding) if isinstance(chunk, str) else chunk
+    
+    def __iter__(self):
+        """
+        Yield records (dict of uppercase field name -> stripped value).
+        
+        Fields before <EOH> are stored in self.header instead. A trailing
+        record without <EOR> is yielded as well.
+        """
+        encoding = self.encoding
+        chunks = self._iter_chunks()
+        field_names = {}
+        record = {}
+        carry = b''
+        final = False
+        
+        while not final:
+            chunk = next(chunks, None)
+            if chunk is None:
+                final = True
+                buf = carry
+            else:
+                buf = carry + chunk if carry else chunk
+            
+            # Pure ASCII chunks are processed as str (byte length == char
+            # length), anything else as bytes with per-value decoding
+            is_text = buf.isascii()
+            if is_text:
+                buf = buf.decode('ascii')
+                lt, gt, colon, eor, eoh = '<', '>', ':', 'EOR', 'EOH'
+            else:
+                lt, gt, colon, eor, eoh = b'<', b'>', b':', b'EOR', b'EOH'
+            
+            pieces = buf.split(lt)
+            # The last tag may be cut by the chunk boundary - process it
+            # together with the next chunk
+            tail = pieces.pop() if not final and len(pieces) > 1 else None
+            carry = lt + tail if tail is not None else buf[:0]
+            
+            pieces = iter(pieces)
+            next(pieces, None)  # Text before the first tag
+            
+            for piece in pieces:
+                tag, sep, value = piece.partition(gt)
+                if not sep:
+                    continue  # '<' in free text
+                
+                name, sep, length = tag.partition(colon)
+                if not sep:
+                    marker = name.strip().upper()
+                    if marker == eor:
+                        if record:
+                            yield record
+                        record = {}
+                    elif marker == eoh:
+                        self.header.update(record)
+                        record = {}
+                    continue
+                
+                if colon in length:
+                    length = length.partition(colon)[0]  # Drop type indicator
+                try:
+                    length = int(length)
+                except ValueError:
+                    continue
+                
+                if len(value) < length:
+                    # The value contains '<' - re-join the following pieces
+                    parts = [value]
+                    size = len(value)
+                    for extra in pieces:
+                        parts.append(extra)
+                        size += len(extra) + 1
+                        if size >= length:
+                            break
+                    value = lt.join(parts)
+                    
+                    if size < length and not final:
+                        # Value continues in the next chunk
+                        carry = lt + tag + gt + value + carry
+                        break
+                
+                field_name = field_names.get(name)
+                if field_name is None:
+                    field_name = name if is_text else name.decode('ascii', 'replace')
+                    field_name = field_names[name] = field_name.strip().upper()
+                
+                value = value[:length]
+                if not is_text:
+                    value = value.decode(encoding, 'replace')
+                record[field_name] = value.strip()
+            
+            if is_text:
+                carry = carry.encode('ascii')
+        
+        if record:
+            yield record
+
 
 class ADIFParser:
     """Parse ADIF format log files"""
     
-    # ADIF field pattern: <FIELD:length>value or <FIELD:length:type>value
-    FIELD_PATTERN = re.compile(r'<(\w+):(\d+)(?::(\w))?>([^<]*)')
-    
-    def __init__(self, file_content: str):
+    def __init__(self, file_content, encoding: str = 'utf-8'):
         """
         Initialize parser with file content
         
         Args:
-            file_content: String content of .adi file
+            file_content: Content of .adi file (str or bytes), a file-like
+                object or an iterable of chunks (e.g. UploadedFile.chunks())
+            encoding: Encoding of byte content
         """
         self.content = file_content
+        self.encoding = encoding
         self.header = {}
         self.qsos = []
     
+    def iter_qsos(self):
+        """
+        Stream QSO records one at a time without keeping them in memory.
+        self.header is filled as soon as <EOH> has been read.
+        
+        Yields:
+            QSO dictionaries (records with a CALL field)
+        """
+        if hasattr(self.content, 'seek'):
+            # Each call reads the file from the start (see scan())
+            self.content.seek(0)
+        tokenizer = ADIFTokenizer(self.content, encoding=self.encoding)
+        self.header = tokenizer.header
+        
+        for record in tokenizer:
+            if 'CALL' in record:  # Valid QSO must have a callsign
+                yield record
+    
     def parse(self) -> Dict:
         """
         Parse the ADIF file
@@ -33,26 +198,8 @@ class ADIFParser:
         Returns:
             Dictionary with header and qsos list
         """
-        # Split header and records
-        parts = self.content.split('<EOH>')
-        
-        if len(parts) == 2:
-            header_text, records_text = parts
-            self.header = self._parse_fields(header_text)
-        else:
-            records_text = self.content
-        
-        # Split into individual QSO records
-        qso_records = records_text.split('<EOR>')
-        
-        for record in qso_records:
-            record = record.strip()
-            if not record:
-                continue
-            
-            qso = self._parse_fields(record)
-            if qso and 'CALL' in qso:  # Valid QSO must have a callsign
-                self.qsos.append(qso)
+        for qso in self.iter_qsos():
+            self.qsos.append(qso)
         
         return {
             'header': self.header,
@@ -60,28 +207,6 @@ class ADIFParser:
             'count': len(self.qsos)
         }
     
-    def _parse_fields(self, text: str) -> Dict[str, str]:
-        """
-        Parse ADIF fields from text
-        
-        Args:
-            text: Text containing ADIF fields
-            
-        Returns:
-            Dictionary of field names to values
-        """
-        fields = {}
-        
-        for match in self.FIELD_PATTERN.finditer(text):
-            field_name = match.group(1).upper()
-            field_length = int(match.group(2))
-            # field_type = match.group(3)  # Optional type indicator
-            field_value = match.group(4)[:field_length]  # Ensure correct length
-            
-            fields[field_name] = field_value.strip()
-        
-        return fields
-    
     def extract_bunker_reference(self) -> Optional[str]:
         """
         Extract bunker reference from QSO records
@@ -107,6 +232,10 @@ class ADIFParser:
         Returns:
             Activator callsign or None
         """
+        return self._activator_callsign(self.qsos[0] if self.qsos else None)
+    
+    def _activator_callsign(self, first_qso: Optional[Dict]) -> Optional[str]:
+        """Activator callsign from the header or the first QSO record"""
         # Try header first
         if 'OPERATOR' in self.header:
             return self.header['OPERATOR'].strip().upper()
@@ -114,8 +243,7 @@ class ADIFParser:
             return self.header['STATION_CALLSIGN'].strip().upper()
         
         # Try first QSO record
-        if self.qsos:
-            first_qso = self.qsos[0]
+        if first_qso is not None:
             if 'OPERATOR' in first_qso:
                 return first_qso['OPERATOR'].strip().upper()
             if 'STATION_CALLSIGN' in first_qso:
@@ -208,13 +336,19 @@ class ADIFParser:
         """
         Extract QSO band (e.g., 80m, 40m, 2m)
         
+        The BAND name is normalized to lowercase ADIF form (40M -> 40m);
+        when it is missing or not a band, the band is taken from FREQ.
+        
         Args:
             qso: QSO record dictionary
             
         Returns:
             Band string or 'UNKNOWN'
         """
-        return qso.get('BAND', 'UNKNOWN').upper()
+        band = normalize_band(qso.get('BAND', ''))
+        if band is None and qso.get('FREQ'):
+            band = band_for_frequency(qso['FREQ'].strip(), region=0)
+        return band or 'UNKNOWN'
     
     def validate(self) -> Dict[str, any]:
         """
@@ -223,35 +357,76 @@ class ADIFParser:
         Returns:
             Dictionary with 'valid' boolean and 'errors' list
         """
+        summary = self._summarize(self.qsos)
+        return {
+            'valid': summary['valid'],
+            'errors': summary['errors'],
+            'warnings': []
+        }
+    
+    def scan(self) -> Dict[str, any]:
+        """
+        Validate the file in one streaming pass, without keeping the records.
+        
+        The records are imported in a second pass over iter_qsos(), so the
+        content must be readable twice (str/bytes or a seekable file).
+        
+        Returns:
+            Dictionary with 'valid' boolean and 'errors' list as validate(),
+            plus the record 'count', the 'bunker_reference' and
+            'activator_callsign' and all 'bunker_references' in the log
+        """
+        return self._summarize(self.iter_qsos())
+    
+    def _summarize(self, qsos: Iterable[Dict]) -> Dict[str, any]:
+        """Validation and key information of QSO records, read one at a time"""
+        count = 0
+        first_qso = None
+        bunker_refs = set()
+        bunker_ref = None
+        qso_errors = []
+        
+        for i, qso in enumerate(qsos):
+            count += 1
+            if first_qso is None:
+                first_qso = qso
+            if 'MY_SIG_INFO' in qso:
+                reference = qso['MY_SIG_INFO'].strip()
+                if re.match(r'^B/[A-Z]{2}-\d{4}$', reference):
+                    bunker_refs.add(reference)
+                    bunker_ref = bunker_ref or reference
+            
+            # Validate each QSO has required fields
+            if 'CALL' not in qso:
+                qso_errors.append(f"QSO {i+1}: Missing CALL field")
+            if 'QSO_DATE' not in qso:
+                qso_errors.append(f"QSO {i+1}: Missing QSO_DATE field")
+            if 'TIME_ON' not in qso:
+                qso_errors.append(f"QSO {i+1}: Missing TIME_ON field")
+        
         errors = []
         
         # Check for bunker reference
-        bunker_ref = self.extract_bunker_reference()
         if not bunker_ref:
             errors.append("No valid bunker reference found (MY_SIG_INFO field)")
         
         # Check for activator callsign
-        activator = self.extract_activator_callsign()
+        activator = self._activator_callsign(first_qso)
         if not activator:
             errors.append("No activator callsign found (OPERATOR or STATION_CALLSIGN field)")
         
         # Check for QSOs
-        if not self.qsos:
+        if not count:
             errors.append("No QSO records found in file")
         
-        # Validate each QSO has required fields
-        for i, qso in enumerate(self.qsos):
-            if 'CALL' not in qso:
-                errors.append(f"QSO {i+1}: Missing CALL field")
-            if 'QSO_DATE' not in qso:
-                errors.append(f"QSO {i+1}: Missing QSO_DATE field")
-            if 'TIME_ON' not in qso:
-                errors.append(f"QSO {i+1}: Missing TIME_ON field")
-        
+        errors += qso_errors
         return {
             'valid': len(errors) == 0,
             'errors': errors,
-            'warnings': []
+            'count': count,
+            'bunker_reference': bunker_ref,
+            'activator_callsign': activator,
+            'bunker_references': bunker_refs,
         }
 
 
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ActivationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'activations'
+
+    def ready(self):
+        """
+        Import signals when the app is ready.
+        """
+        import activations.signals  # noqa
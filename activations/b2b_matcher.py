@@ -0,0 +1,164 @@
+"""
+Batch matcher for reciprocal B2B (bunker-to-bunker) logs.
+
+A B2B QSO is confirmed when both activators uploaded it: activator A logged
+B at the bunker and B logged A at the same bunker within ±30 minutes.
+Instead of one query per B2B QSO, the matcher loads every candidate
+reciprocal log for a set of QSOs in one query, indexes them in memory by
+(activator, user, bunker) sorted by time and pairs both sides with a
+linear sweep. Matched pairs are confirmed with
+PointsService.confirm_b2b_pairs().
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import QuerySet
+
+from .models import ActivationLog
+
+logger = logging.getLogger(__name__)
+
+# Maximum time difference between the two sides of a B2B QSO
+B2B_MATCH_WINDOW = timedelta(minutes=30)
+
+MatchKey = Tuple[int, int, int]
+
+
+class B2BMatchIndex:
+    """
+    Unconfirmed B2B logs grouped by (activator_id, user_id, bunker_id),
+    each group sorted by activation_date.
+    """
+
+    def __init__(self, logs: Iterable[ActivationLog]):
+        self._groups: Dict[MatchKey, List[ActivationLog]] = defaultdict(list)
+        for log in logs:
+            self._groups[(log.activator_id, log.user_id, log.bunker_id)].append(log)
+        for group in self._groups.values():
+            group.sort(key=lambda log: (log.activation_date, log.id))
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def keys(self):
+        return self._groups.keys()
+
+    def get(self, key: MatchKey) -> List[ActivationLog]:
+        return self._groups.get(key, [])
+
+    def reciprocal(self, key: MatchKey) -> List[ActivationLog]:
+        """Logs of the other side: activator and user swapped, same bunker"""
+        activator_id, user_id, bunker_id = key
+        return self.get((user_id, activator_id, bunker_id))
+
+
+def sweep_pairs(left: List[ActivationLog], right: List[ActivationLog],
+                window: timedelta = B2B_MATCH_WINDOW) -> List[Tuple[ActivationLog, ActivationLog]]:
+    """
+    Pair two time-sorted log lists, each log used at most once.
+
+    Both lists are walked once; the earliest unmatched log on one side is
+    paired with the earliest log on the other side within `window`, which
+    yields the largest possible number of pairs.
+
+    Args:
+        left: Logs sorted by activation_date
+        right: Reciprocal logs sorted by activation_date
+        window: Maximum time difference of a pair
+
+    Returns:
+        List of (left_log, right_log) tuples
+    """
+    pairs = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        left_date = left[i].activation_date
+        right_date = right[j].activation_date
+        if right_date < left_date - window:
+            j += 1
+        elif right_date > left_date + window:
+            i += 1
+        else:
+            pairs.append((left[i], right[j]))
+            i += 1
+            j += 1
+    return pairs
+
+
+def _unconfirmed_b2b_logs() -> QuerySet:
+    return ActivationLog.objects.filter(
+        is_b2b=True,
+        b2b_confirmed=False,
+        activator__isnull=False
+    ).select_related('activator', 'bunker').order_by()
+
+
+def find_reciprocal_matches(logs: Iterable[ActivationLog],
+                            window: timedelta = B2B_MATCH_WINDOW) -> List[Tuple[ActivationLog, ActivationLog]]:
+    """
+    Find reciprocal logs for freshly imported B2B logs with a single query.
+
+    Args:
+        logs: B2B ActivationLogs (typically from one upload)
+        window: Maximum time difference of a pair
+
+    Returns:
+        List of (log, reciprocal_log) tuples
+    """
+    logs = [
+        log for log in logs
+        if log.is_b2b and not log.b2b_confirmed and log.activator_id
+        and log.user_id != log.activator_id
+    ]
+    if not logs:
+        return []
+
+    dates = [log.activation_date for log in logs]
+    own_ids = {log.id for log in logs}
+
+    # Candidates: partners as activators, our activators in their logs
+    candidates = _unconfirmed_b2b_logs().filter(
+        activator_id__in={log.user_id for log in logs},
+        user_id__in={log.activator_id for log in logs},
+        bunker_id__in={log.bunker_id for log in logs},
+        activation_date__gte=min(dates) - window,
+        activation_date__lte=max(dates) + window
+    ).exclude(id__in=own_ids)
+
+    own_index = B2BMatchIndex(logs)
+    candidate_index = B2BMatchIndex(candidates)
+
+    pairs = []
+    for key in own_index.keys():
+        pairs.extend(sweep_pairs(own_index.get(key), candidate_index.reciprocal(key), window))
+    return pairs
+
+
+def find_history_matches(queryset: Optional[QuerySet] = None,
+                         window: timedelta = B2B_MATCH_WINDOW) -> List[Tuple[ActivationLog, ActivationLog]]:
+    """
+    Pair all unconfirmed B2B logs against each other.
+
+    Args:
+        queryset: Optional ActivationLog queryset restricting the logs
+            considered (e.g. a date range); defaults to all logs
+        window: Maximum time difference of a pair
+
+    Returns:
+        List of (log, reciprocal_log) tuples
+    """
+    logs = _unconfirmed_b2b_logs()
+    if queryset is not None:
+        logs = logs.filter(id__in=queryset.values('id'))
+
+    index = B2BMatchIndex(log for log in logs if log.user_id != log.activator_id)
+
+    pairs = []
+    for key in index.keys():
+        activator_id, user_id, _ = key
+        # Visit each (A, B) / (B, A) pair of groups once
+        if activator_id < user_id:
+            pairs.extend(sweep_pairs(index.get(key), index.reciprocal(key), window))
+    return pairs
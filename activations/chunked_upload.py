@@ -0,0 +1,221 @@
+"""
+Chunked, resumable log uploads.
+
+Large logbooks are sent in pieces instead of one request:
+
+1. start_upload() creates a ChunkedUpload and an empty spool file on disk.
+2. append_chunk() writes each chunk at its offset. A chunk that was
+   already received (a retry after a lost response) is written again
+   over the same bytes, so the client resumes by asking for
+   received_size and continuing from there.
+3. finalize_upload() hashes the spool file and detects its encoding in
+   one pass, then imports it (or queues it) by streaming the file into
+   the ADIF parser. The spool file is removed afterwards.
+
+Only one chunk is held in memory at a time. Uploads left unfinished are
+removed by expire_chunked_uploads(), run by the upload queue worker.
+"""
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .adif_files import UnsupportedEncodingError, inspect_adif_file
+from .log_import_service import LogImportService
+from .models import ChunkedUpload
+from .upload_queue import enqueue_adif_file
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkOffsetError(ValueError):
+    """A chunk does not continue the received data"""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f'Chunk must start at offset {expected_offset}')
+        self.expected_offset = expected_offset
+
+
+def get_spool_dir() -> str:
+    """Directory holding the spool files of unfinished uploads"""
+    return str(settings.CHUNKED_UPLOAD_DIR)
+
+
+def get_spool_path(upload: ChunkedUpload) -> str:
+    """Spool file of an upload"""
+    return os.path.join(get_spool_dir(), f'{upload.id}.part')
+
+
+def _remove_spool(upload: ChunkedUpload):
+    try:
+        os.remove(get_spool_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def start_upload(user, filename: str, size: Optional[int] = None) -> ChunkedUpload:
+    """
+    Begin a chunked upload.
+
+    Args:
+        user: Uploading user
+        filename: Original filename (must end with .adi)
+        size: Total size in bytes, if known
+
+    Returns:
+        ChunkedUpload
+
+    Raises:
+        ValueError: If the filename or size is not acceptable
+    """
+    if not filename or not filename.endswith('.adi'):
+        raise ValueError('Invalid file format. Please upload a .adi (ADIF) file.')
+    if size is not None and not 0 < size <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise ValueError(f'File size must be between 1 and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes.')
+
+    upload = ChunkedUpload.objects.create(user=user, filename=filename[:255], size=size)
+    os.makedirs(get_spool_dir(), exist_ok=True)
+    open(get_spool_path(upload), 'wb').close()
+    return upload
+
+
+def append_chunk(upload: ChunkedUpload, offset: int, data: bytes) -> ChunkedUpload:
+    """
+    Write a chunk at its offset.
+
+    Args:
+        upload: ChunkedUpload of the requesting user
+        offset: Position of the chunk in the file
+        data: Chunk bytes
+
+    Returns:
+        The updated ChunkedUpload
+
+    Raises:
+        ChunkOffsetError: If the chunk starts after the received data
+        ValueError: If the upload is finished or the file would get too large
+    """
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != 'uploading':
+            raise ValueError('Upload is already finalized.')
+        if offset < 0 or offset > upload.received_size:
+            raise ChunkOffsetError(upload.received_size)
+
+        end = offset + len(data)
+        limit = upload.size or settings.CHUNKED_UPLOAD_MAX_SIZE
+        if end > limit:
+            raise ValueError(f'Chunk ends at {end}, beyond the file size of {limit} bytes.')
+
+        with open(get_spool_path(upload), 'r+b') as spool:
+            spool.seek(offset)
+            spool.write(data)
+
+        if end > upload.received_size:
+            upload.received_size = end
+            upload.save(update_fields=['received_size', 'updated_at'])
+
+    return upload
+
+
+def finalize_upload(upload: ChunkedUpload, sha256: Optional[str] = None) -> Dict:
+    """
+    Import (or queue) a completely received upload.
+
+    Args:
+        upload: ChunkedUpload of the requesting user
+        sha256: Checksum computed by the client, verified if given
+
+    Returns:
+        LogImportService result dictionary; queued uploads return
+        'queued' and 'log_upload_id' as enqueue_adif_upload()
+
+    Raises:
+        ValueError: If the upload is finished or incomplete
+
+    An unexpected error during the import marks the upload failed and is
+    raised again.
+    """
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != 'uploading':
+            raise ValueError('Upload is already finalized.')
+        if not upload.received_size or (upload.size and upload.received_size != upload.size):
+            raise ValueError(f'Upload is incomplete ({upload.received_size} of {upload.size} bytes received).')
+        upload.status = 'processing'
+        upload.save(update_fields=['status', 'updated_at'])
+
+    try:
+        with open(get_spool_path(upload), 'rb') as spool:
+            result = _import_spool(upload, spool, sha256)
+    except Exception:
+        # Do not leave the upload 'processing' forever; the spool is gone
+        upload.status = 'failed'
+        upload.save(update_fields=['status', 'updated_at'])
+        logger.exception(f"Finalizing chunked upload {upload.id} failed")
+        raise
+    finally:
+        _remove_spool(upload)
+
+    upload.status = 'completed' if result.get('success') else 'failed'
+    upload.log_upload_id = result.get('log_upload_id')
+    upload.save(update_fields=['status', 'log_upload', 'updated_at'])
+
+    logger.info(f"Finalized chunked upload {upload.id} ({upload.received_size} bytes): {upload.status}")
+    return result
+
+
+def _import_spool(upload: ChunkedUpload, spool, sha256: Optional[str]) -> Dict:
+    """Verify the spool file and import or queue it"""
+    try:
+        file_checksum, encoding = inspect_adif_file(spool)
+    except UnsupportedEncodingError as e:
+        return {'success': False, 'errors': [str(e)], 'qsos_processed': 0, 'hunters_updated': 0}
+
+    if sha256 and sha256.lower() != file_checksum:
+        return {
+            'success': False,
+            'errors': ['Checksum mismatch: the file was corrupted during upload.'],
+            'qsos_processed': 0,
+            'hunters_updated': 0
+        }
+
+    if settings.LOG_UPLOAD_QUEUE_ENABLED:
+        return enqueue_adif_file(spool, upload.user, file_checksum, filename=upload.filename)
+
+    service = LogImportService()
+    return service.process_adif_upload(
+        spool,
+        upload.user,
+        filename=upload.filename,
+        file_checksum=file_checksum,
+        encoding=encoding
+    )
+
+
+def expire_chunked_uploads(older_than: Optional[timedelta] = None) -> int:
+    """
+    Delete uploads that were not finished in time, with their spool files.
+
+    Args:
+        older_than: Idle time after which an upload is dropped
+            (default: settings.CHUNKED_UPLOAD_EXPIRE_HOURS)
+
+    Returns:
+        Number of uploads removed
+    """
+    if older_than is None:
+        older_than = timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRE_HOURS)
+
+    stale = list(ChunkedUpload.objects.filter(
+        status='uploading',
+        updated_at__lt=timezone.now() - older_than
+    ))
+    for upload in stale:
+        _remove_spool(upload)
+    ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in stale]).delete()
+    return len(stale)
@@ -0,0 +1,257 @@
+"""
+Log upload history.
+
+The history page lists a user's uploads newest first, a page at a time,
+with the QSOs of each upload. Pages are cut with a keyset cursor on
+(uploaded_at, id) instead of OFFSET, and the QSOs of a page come from one
+ActivationLog query filtered through its LogUpload. Filter inputs are
+normalized to the stored form (upper-case callsigns, references and
+modes, ADIF band names), so they are matched with equality or prefix
+lookups that can use indexes.
+
+The filtered QSOs can also be exported as CSV or ADIF; the export is
+generated row by row for a StreamingHttpResponse.
+"""
+import csv
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from django.db.models import Exists, OuterRef, Q
+
+from bunkers.references import normalize_reference
+from cluster.band_plan import normalize_band
+
+from .models import ActivationLog, LogUpload
+
+# Uploads per history page
+LOG_HISTORY_PAGE_SIZE = 20
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+EXPORT_FIELDS = (
+    'activation_date',
+    'bunker__reference_number',
+    'activator_callsign',
+    'activator__callsign',
+    'user__callsign',
+    'band',
+    'mode',
+    'is_b2b',
+    'log_upload__filename',
+)
+
+CSV_HEADER = ('date', 'time', 'bunker', 'activator', 'hunter', 'band', 'mode', 'b2b', 'filename')
+
+
+class LogHistoryFilters(NamedTuple):
+    """Normalized filters of the log history"""
+    callsign: str = ''
+    bunker_ref: str = ''
+    mode: str = ''
+    band: str = ''
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    @property
+    def active(self) -> bool:
+        return any(self)
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+
+def parse_filters(params) -> LogHistoryFilters:
+    """
+    Normalize the filter inputs of the history page.
+
+    Args:
+        params: Query parameters (callsign, bunker_ref, mode, band,
+            date_from, date_to as YYYY-MM-DD)
+
+    Returns:
+        LogHistoryFilters; invalid dates are ignored
+    """
+    band = params.get('band', '').strip()
+    return LogHistoryFilters(
+        callsign=params.get('callsign', '').strip().upper(),
+        bunker_ref=normalize_reference(params.get('bunker_ref', '')),
+        mode=params.get('mode', '').strip().upper(),
+        band=normalize_band(band) or band,
+        date_from=_parse_date(params.get('date_from', '')),
+        date_to=_parse_date(params.get('date_to', '')),
+    )
+
+
+def filter_qsos(user, filters: LogHistoryFilters):
+    """
+    QSOs of the user's uploads matching the filters.
+
+    Args:
+        user: Uploading user
+        filters: LogHistoryFilters
+
+    Returns:
+        ActivationLog queryset
+    """
+    qsos = ActivationLog.objects.filter(log_upload__user=user)
+
+    if filters.callsign:
+        qsos = qsos.filter(
+            Q(user__callsign__startswith=filters.callsign) |
+            Q(activator__callsign__startswith=filters.callsign) |
+            Q(activator_callsign__startswith=filters.callsign)
+        )
+    if filters.bunker_ref:
+        qsos = qsos.filter(bunker__reference_number__startswith=filters.bunker_ref)
+    if filters.mode:
+        qsos = qsos.filter(mode=filters.mode)
+    if filters.band:
+        qsos = qsos.filter(band=filters.band)
+    if filters.date_from:
+        qsos = qsos.filter(activation_date__gte=datetime.combine(filters.date_from, time.min, dt_timezone.utc))
+    if filters.date_to:
+        # The whole last day is included
+        qsos = qsos.filter(
+            activation_date__lt=datetime.combine(filters.date_to + timedelta(days=1), time.min, dt_timezone.utc)
+        )
+    return qsos
+
+
+def encode_cursor(upload: LogUpload) -> str:
+    """Cursor pointing after an upload"""
+    return f"{(upload.uploaded_at - EPOCH) // timedelta(microseconds=1)}.{upload.id}"
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """(uploaded_at, id) of a cursor, or None if it is not valid"""
+    try:
+        microseconds, upload_id = cursor.split('.')
+        return EPOCH + timedelta(microseconds=int(microseconds)), int(upload_id)
+    except (ValueError, OverflowError):
+        return None
+
+
+def get_history_page(user, filters: LogHistoryFilters, cursor: str = '',
+                     page_size: int = LOG_HISTORY_PAGE_SIZE) -> Dict:
+    """
+    One page of the user's uploads with their (filtered) QSOs.
+
+    Args:
+        user: Uploading user
+        filters: LogHistoryFilters; when any is set, only uploads with
+            matching QSOs are listed
+        cursor: Cursor of the previous page ('' for the first page)
+        page_size: Uploads per page
+
+    Returns:
+        Dictionary with 'uploads' (newest first), 'qsos_by_upload'
+        (upload id -> list of ActivationLog, newest first) and 'next_cursor'
+        (None on the last page)
+    """
+    uploads = LogUpload.objects.filter(user=user)
+    if filters.active:
+        uploads = uploads.filter(Exists(filter_qsos(user, filters).filter(log_upload=OuterRef('pk'))))
+
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        uploaded_at, upload_id = position
+        uploads = uploads.filter(Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=upload_id))
+
+    uploads = list(uploads.order_by('-uploaded_at', '-id')[:page_size + 1])
+    next_cursor = encode_cursor(uploads[page_size - 1]) if len(uploads) > page_size else None
+    uploads = uploads[:page_size]
+
+    qsos_by_upload = {upload.id: [] for upload in uploads}
+    if uploads:
+        qsos = (
+            filter_qsos(user, filters)
+            .filter(log_upload_id__in=list(qsos_by_upload))
+            .select_related('bunker', 'activator', 'user')
+            .order_by('-activation_date', '-id')
+        )
+        for qso in qsos:
+            qsos_by_upload[qso.log_upload_id].append(qso)
+
+    return {
+        'uploads': uploads,
+        'qsos_by_upload': qsos_by_upload,
+        'next_cursor': next_cursor,
+    }
+
+
+def _export_rows(qsos) -> Iterator[Dict]:
+    return qsos.order_by('-activation_date', '-id').values(*EXPORT_FIELDS).iterator(chunk_size=2000)
+
+
+class _Echo:
+    """File-like object handing csv.writer output back instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(qsos) -> Iterator[str]:
+    """
+    Filtered QSOs as CSV lines.
+
+    Args:
+        qsos: Queryset from filter_qsos()
+
+    Yields:
+        CSV lines, header first
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in _export_rows(qsos):
+        activation_date = row['activation_date']
+        yield writer.writerow((
+            activation_date.strftime('%Y-%m-%d'),
+            activation_date.strftime('%H:%M:%S'),
+            row['bunker__reference_number'],
+            row['activator_callsign'] or row['activator__callsign'] or '',
+            row['user__callsign'],
+            row['band'],
+            row['mode'],
+            'Y' if row['is_b2b'] else 'N',
+            row['log_upload__filename'],
+        ))
+
+
+def _adif_field(name: str, value: str) -> str:
+    # Lengths are in bytes, as read by ADIFTokenizer
+    return f"<{name}:{len(value.encode('utf-8'))}>{value} " if value else ''
+
+
+def export_adif(qsos) -> Iterator[str]:
+    """
+    Filtered QSOs as an ADIF (.adi) file.
+
+    Args:
+        qsos: Queryset from filter_qsos()
+
+    Yields:
+        ADIF header, then one record per QSO
+    """
+    yield (
+        'BOTA log history export\n'
+        f"{_adif_field('ADIF_VER', '3.1.4')}\n"
+        f"{_adif_field('PROGRAMID', 'BOTA')}\n"
+        '<EOH>\n'
+    )
+    for row in _export_rows(qsos):
+        activation_date = row['activation_date']
+        yield ''.join((
+            _adif_field('CALL', row['user__callsign']),
+            _adif_field('QSO_DATE', activation_date.strftime('%Y%m%d')),
+            _adif_field('TIME_ON', activation_date.strftime('%H%M%S')),
+            _adif_field('BAND', row['band'] if row['band'] != 'UNKNOWN' else ''),
+            _adif_field('MODE', row['mode'] if row['mode'] != 'UNKNOWN' else ''),
+            _adif_field('STATION_CALLSIGN', row['activator_callsign'] or row['activator__callsign'] or ''),
+            _adif_field('MY_SIG', 'BOTA'),
+            _adif_field('MY_SIG_INFO', row['bunker__reference_number']),
+            '<EOR>\n',
+        ))
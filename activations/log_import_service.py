@@ -3,25 +3,33 @@ Service for processing ADIF log imports and updating user statistics.
 Handles activator log uploads and hunter point calculations.
 """
 import hashlib
-import re
+import logging
 from django.db import transaction, IntegrityError
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from typing import Dict, List
+from itertools import islice
+from typing import Dict, Iterable, List
 from decimal import Decimal
 
+from .activity_counters import apply_log_changes
 from .adif_parser import ADIFParser
+from .b2b_matcher import find_reciprocal_matches
 from .models import ActivationLog, ActivationKey
-from bunkers.models import Bunker
+from bunkers.references import resolve
 from accounts.models import UserStatistics
+from accounts.statistics_batch import deferred_statistics
 from accounts.points_service import PointsService
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class LogImportService:
     """Service for importing ADIF logs and processing activations"""
     
+    # Rows per INSERT/UPDATE statement in the bulk import path
+    BULK_BATCH_SIZE = 500
+    
     def __init__(self):
         self.parser = None
         self.bunker = None
@@ -31,6 +39,8 @@ class LogImportService:
         self.warnings = []
         self.log_upload = None
         self.transactions = []
+        self.points_batch = None
+        self.import_error = None
     
     def _extract_base_callsign(self, callsign: str) -> str:
         """
@@ -61,30 +71,87 @@ class LogImportService:
         return max(parts, key=len).upper().strip() if parts else callsign.upper().strip()
         self.transactions = []  # Track all point transactions for batch creation
     
-    @transaction.atomic
-    def process_adif_upload(self, file_content: str, uploader_user: User, filename: str = None) -> Dict:
+    def process_adif_upload(self, file_content, uploader_user: User, filename: str = None,
+                            bulk: bool = True, log_upload=None, incremental: bool = False,
+                            file_checksum: str = None, encoding: str = 'utf-8') -> Dict:
         """
         Process uploaded ADIF file
         
         Args:
-            file_content: Content of .adi file as string
+            file_content: Content of .adi file as string, or a binary file
+                object streamed into the parser (requires file_checksum)
             uploader_user: User uploading the file
             filename: Optional filename for logging
+            bulk: Import all QSOs as a set (default) instead of one by one
+            log_upload: Existing queued LogUpload to process instead of creating one
+            incremental: Commit each chunk of QSOs separately so progress
+                (processed_qso_count) is visible while the import runs.
+                Used by the upload queue worker; by default the whole
+                import runs in a single transaction. The points batch is
+                created first and receives each chunk's transactions with
+                the chunk, so it is complete even if the import fails
+                later; a retry of the upload resumes after the committed
+                chunks.
+            file_checksum: SHA-256 of the raw file, if already computed
+            encoding: Encoding of a binary file (see activations.chunked_upload.inspect_adif_file)
             
         Returns:
             Dictionary with processing results
+        
+        If the import fails with an error, a non-incremental import is rolled
+        back completely; in both modes the LogUpload (if it still exists) is
+        then marked as failed, so the file can be uploaded again.
         """
+        args = (file_content, uploader_user, filename, bulk, log_upload, file_checksum, encoding, incremental)
+        self.log_upload = log_upload
+        self.import_error = None
+        if incremental:
+            result = self._process_adif_upload(*args)
+        else:
+            with transaction.atomic():
+                result = self._process_adif_upload(*args)
+        
+        if self.import_error is not None and self.log_upload is not None:
+            self._mark_failed(self.log_upload, self.import_error)
+        return result
+    
+    def _mark_failed(self, log_upload, error_message: str):
+        """Mark an upload failed after its import transaction ended"""
+        from .models import LogUpload
+        
+        log_upload.status = 'failed'
+        log_upload.error_message = error_message
+        # Updates nothing if the upload was created in the rolled back transaction
+        LogUpload.objects.filter(pk=log_upload.pk).update(status='failed', error_message=error_message)
+    
+    def _process_adif_upload(self, file_content, uploader_user: User, filename: str,
+                             bulk: bool, log_upload, file_checksum: str, encoding: str,
+                             incremental: bool) -> Dict:
+        """Body of process_adif_upload(), see there for arguments"""
         from .models import LogUpload
         
         try:
             # Calculate file checksum for duplicate detection
-            file_checksum = hashlib.sha256(file_content.encode('utf-8')).hexdigest()
+            if file_checksum is None:
+                file_checksum = hashlib.sha256(file_content.encode('utf-8')).hexdigest()
             
             # Check for duplicate upload
-            existing_upload = LogUpload.objects.filter(
+            existing_uploads = LogUpload.objects.filter(
                 file_checksum=file_checksum,
                 user=uploader_user
-            ).first()
+            )
+            if log_upload is not None:
+                existing_uploads = existing_uploads.exclude(pk=log_upload.pk)
+            existing_upload = existing_uploads.exclude(status='failed').first()
+            
+            if existing_upload is None and log_upload is None:
+                # Retry of a failed import: continue it, QSOs committed
+                # before the failure are skipped as duplicates
+                log_upload = existing_uploads.filter(status='failed').first()
+                if log_upload is not None:
+                    log_upload.status = 'processing'
+                    log_upload.error_message = ''
+                    log_upload.save(update_fields=['status', 'error_message'])
             
             if existing_upload:
                 return {
@@ -95,23 +162,30 @@ class LogImportService:
                     'duplicate_upload': True
                 }
             
-            # Create LogUpload record
-            log_upload = LogUpload.objects.create(
-                user=uploader_user,
-                filename=filename or 'unknown.adi',
-                file_format='ADIF',
-                file_checksum=file_checksum,
-                status='processing'
-            )
+            # Create LogUpload record (queued uploads already have one)
+            if log_upload is None:
+                log_upload = LogUpload.objects.create(
+                    user=uploader_user,
+                    filename=filename or 'unknown.adi',
+                    file_format='ADIF',
+                    file_checksum=file_checksum,
+                    status='processing'
+                )
             self.log_upload = log_upload
             self.transactions = []  # Reset transactions list
+            self.points_batch = None
             
-            # Parse ADIF file
-            self.parser = ADIFParser(file_content)
-            parse_result = self.parser.parse()
+            # Validate the whole file in a first streaming pass, so nothing
+            # is written for an invalid one; the records are imported in a
+            # second pass and never all held in memory
+            self.parser = ADIFParser(file_content, encoding=encoding)
+            validation = self.parser.scan()
+            
+            # Total number of records, for progress reporting
+            log_upload.qso_count = validation['count']
+            log_upload.heartbeat_at = timezone.now()
+            log_upload.save(update_fields=['qso_count', 'heartbeat_at'])
             
-            # Validate
-            validation = self.parser.validate()
             if not validation['valid']:
                 log_upload.status = 'failed'
                 log_upload.error_message = '; '.join(validation['errors'])
@@ -124,19 +198,14 @@ class LogImportService:
                 }
             
             # Extract key information
-            bunker_ref = self.parser.extract_bunker_reference()
-            activator_callsign = self.parser.extract_activator_callsign()
+            bunker_ref = validation['bunker_reference']
+            activator_callsign = validation['activator_callsign']
             
             # Extract base callsign (remove portable indicators)
             base_callsign = self._extract_base_callsign(activator_callsign)
             
-            # Count unique bunker references in the log
-            unique_bunker_refs = set()
-            for qso in self.parser.qsos:
-                if 'MY_SIG_INFO' in qso:
-                    bunker_ref_qso = qso['MY_SIG_INFO'].strip()
-                    if re.match(r'^B/[A-Z]{2}-\d{4}$', bunker_ref_qso):
-                        unique_bunker_refs.add(bunker_ref_qso)
+            # Unique bunker references in the log
+            unique_bunker_refs = validation['bunker_references']
             
             # Validate max 3 references per ADIF session
             if len(unique_bunker_refs) > 3:
@@ -151,9 +220,8 @@ class LogImportService:
                 }
             
             # Verify bunker exists
-            try:
-                self.bunker = Bunker.objects.get(reference_number=bunker_ref)
-            except Bunker.DoesNotExist:
+            record = resolve(bunker_ref)
+            if record is None:
                 log_upload.status = 'failed'
                 log_upload.error_message = f"Bunker {bunker_ref} not found in database"
                 log_upload.save()
@@ -163,6 +231,7 @@ class LogImportService:
                     'qsos_processed': 0,
                     'hunters_updated': 0
                 }
+            self.bunker = record.to_bunker()
             
             # Verify activator user (use base callsign)
             try:
@@ -198,19 +267,121 @@ class LogImportService:
                 }
             
             # Process QSOs
-            qsos_processed = 0
-            qsos_duplicates = 0
-            hunters_updated = set()
-            b2b_qsos = 0
+            if bulk:
+                if incremental:
+                    # Committed chunks add their transactions to it
+                    self.points_batch = self._get_points_batch(log_upload, filename, uploader_user)
+                counts = self._process_qsos_in_chunks(self.parser.iter_qsos())
+            else:
+                counts = self._process_qsos_per_row(self.parser.iter_qsos())
+            qsos_processed = counts['qsos_processed']
+            qsos_duplicates = counts['qsos_duplicates']
+            hunters_updated = counts['hunters_updated']
+            b2b_qsos = counts['b2b_qsos']
+            
+            with transaction.atomic():
+                # Points transaction batch for audit trail
+                batch = self.points_batch
+                if batch is None and self.transactions:
+                    batch = self._get_points_batch(log_upload, filename, uploader_user)
+                    batch.transactions.add(*self.transactions)
+                if batch is not None:
+                    transaction_count = batch.transactions.count()
+                    if transaction_count:
+                        batch.description = f"Batch of {transaction_count} transactions"
+                        batch.save(update_fields=['description'])
+                        log_upload.points_batch = batch
+                    else:
+                        batch.delete()
+                        batch = None
+                
+                # Update diploma progress for activator and all hunters
+                # whose counters changed with this upload
+                if qsos_processed:
+                    self._refresh_diploma_progress(hunters_updated)
+                
+                # Update LogUpload with final statistics
+                total_qsos = qsos_processed + qsos_duplicates
+                log_upload.qso_count = total_qsos
+                log_upload.processed_qso_count = qsos_processed
+                log_upload.status = 'completed'
+                log_upload.save()
+        
+            return {
+                'success': True,
+                'qsos_processed': qsos_processed,
+                'qsos_duplicates': qsos_duplicates,
+                'hunters_updated': len(hunters_updated),
+                'b2b_qsos': b2b_qsos,
+                'bunker': bunker_ref,
+                'activator': activator_callsign,
+                'warnings': self.warnings,
+                'errors': [],
+                'log_upload_id': log_upload.id,
+                'batch_id': batch.id if batch is not None else None
+            }
+            
+        except Exception as e:
+            logger.exception(f"Error in process_adif_upload ({filename})")
+            if not incremental:
+                # Also undo the chunks committed before the failure
+                transaction.set_rollback(True)
+            self.import_error = f'Error processing file: {e}'
+            
+            return {
+                'success': False,
+                'errors': [self.import_error],
+                'qsos_processed': 0,
+                'hunters_updated': 0
+            }
+    
+    def _get_points_batch(self, log_upload, filename: str, uploader_user: User):
+        """Points batch of an upload, shared by all runs of a resumed import"""
+        from accounts.models import PointsTransactionBatch
+        
+        batch = PointsTransactionBatch.objects.filter(log_upload=log_upload).first()
+        if batch is None:
+            batch = PointsService.create_batch(
+                name=f"Log import: {filename or 'unknown.adi'}",
+                transactions=[],
+                log_upload=log_upload,
+                created_by=uploader_user
+            )
+        return batch
+    
+    def _refresh_diploma_progress(self, hunter_callsigns):
+        """Update diploma progress of the activator and the given hunters"""
+        from diplomas.progress_engine import refresh_diploma_progress
+        
+        refresh_diploma_progress([self.activator.pk] + list(
+            User.objects.filter(callsign__in=hunter_callsigns).values_list('id', flat=True)
+        ))
+    
+    def _process_qsos_per_row(self, qsos: Iterable[Dict]) -> Dict:
+        """
+        Process QSO records one at a time with _process_qso().
+        
+        Args:
+            qsos: Parsed QSO dictionaries
             
-            for qso in self.parser.qsos:
+        Returns:
+            Dictionary with processing counters
+        """
+        qsos_processed = 0
+        qsos_duplicates = 0
+        hunters_updated = set()
+        b2b_logs = []
+        
+        # Statistics of every user are written once, when the block exits
+        with deferred_statistics():
+            for qso in qsos:
                 result = self._process_qso(qso)
                 if result['success']:
                     qsos_processed += 1
                     if result.get('hunter_callsign'):
                         hunters_updated.add(result['hunter_callsign'])
                     if result.get('is_b2b'):
-                        b2b_qsos += 1
+                        b2b_logs.append(result['log'])
                 else:
                     # Only add warning if there's an actual error (not duplicate)
                     if result.get('error'):
@@ -218,62 +389,312 @@ class LogImportService:
                     elif result.get('duplicate'):
                         qsos_duplicates += 1
             
-            # Create points transaction batch for audit trail
-            if self.transactions:
-                batch = PointsService.create_batch(
-                    name=f"Log import: {filename or 'unknown.adi'}",
-                    transactions=self.transactions,
-                    log_upload=log_upload,
-                    created_by=uploader_user
-                )
-                log_upload.points_batch = batch
-            
-            # Update diploma progress for activator
-            self._update_diploma_progress(self.activator)
+            # Check if B2B can be confirmed (both logs uploaded)
+            self._confirm_b2b_matches(b2b_logs)
+        b2b_qsos = len(b2b_logs)
+        
+        return {
+            'qsos_processed': qsos_processed,
+            'qsos_duplicates': qsos_duplicates,
+            'hunters_updated': hunters_updated,
+            'b2b_qsos': b2b_qsos,
+        }
+    
+    def _process_qsos_in_chunks(self, qsos: Iterable[Dict]) -> Dict:
+        """
+        Run the bulk import over chunks of BULK_BATCH_SIZE records.
+        
+        The chunks are taken from the records as they are read, so only one
+        chunk is held in memory at a time.
+        
+        Each chunk is committed in its own (nested) transaction and
+        processed_qso_count is updated after it, so a queued upload reports
+        progress while it runs. Duplicates across chunks are still detected
+        because earlier chunks are already in the database.
+        
+        With an incremental import's points batch, each chunk adds its
+        transactions to the batch in the same transaction. If a chunk
+        fails, the diploma progress of the users of the committed chunks
+        is refreshed before the error is raised.
+        
+        Args:
+            qsos: Parsed QSO dictionaries (e.g. ADIFParser.iter_qsos())
             
-            # Update diploma progress for all hunters
-            for hunter_callsign in hunters_updated:
+        Returns:
+            Dictionary with processing counters
+        """
+        qsos = iter(qsos)
+        totals = {
+            'qsos_processed': 0,
+            'qsos_duplicates': 0,
+            'hunters_updated': set(),
+            'b2b_qsos': 0,
+        }
+        
+        try:
+            while True:
+                chunk = list(islice(qsos, self.BULK_BATCH_SIZE))
+                if not chunk:
+                    break
+                committed = len(self.transactions)
                 try:
-                    hunter = User.objects.get(callsign=hunter_callsign)
-                    self._update_diploma_progress(hunter)
-                except User.DoesNotExist:
-                    pass
+                    with transaction.atomic():
+                        counts = self._process_qsos_bulk(chunk)
+                        if self.points_batch is not None:
+                            self.points_batch.transactions.add(*self.transactions[committed:])
+                except Exception:
+                    # Rolled back with the chunk
+                    del self.transactions[committed:]
+                    raise
+                
+                totals['qsos_processed'] += counts['qsos_processed']
+                totals['qsos_duplicates'] += counts['qsos_duplicates']
+                totals['hunters_updated'] |= counts['hunters_updated']
+                totals['b2b_qsos'] += counts['b2b_qsos']
+                
+                # Progress, and a heartbeat for requeue_stale_uploads()
+                self.log_upload.processed_qso_count = totals['qsos_processed']
+                self.log_upload.heartbeat_at = timezone.now()
+                self.log_upload.save(update_fields=['processed_qso_count', 'heartbeat_at'])
+        except Exception:
+            if self.points_batch is not None and totals['qsos_processed']:
+                self._refresh_diploma_progress(totals['hunters_updated'])
+            raise
+        
+        return totals
+    
+    def _process_qsos_bulk(self, qsos: List[Dict]) -> Dict:
+        """
+        Process all QSO records of the upload as one set.
+        
+        Produces the same logs, transactions and statistics as calling
+        _process_qso() for every record, but with a fixed number of queries
+        per batch instead of 10+ queries per QSO:
+        - hunters are resolved in one query, missing ones bulk-created
+        - duplicates are detected with a single pre-query on the
+          unique_together key (activator, user, bunker, activation_date)
+        - ActivationLog and PointsTransaction rows are inserted in batches
+        - UserStatistics is written once per affected user
+        
+        Args:
+            qsos: Parsed QSO dictionaries
             
-            # Update LogUpload with final statistics
-            total_qsos = qsos_processed + qsos_duplicates
-            log_upload.qso_count = total_qsos
-            log_upload.processed_qso_count = qsos_processed
-            log_upload.status = 'completed'
-            log_upload.save()
+        Returns:
+            Dictionary with processing counters
+        """
+        from accounts.models import PointsTransaction
         
-            return {
-                'success': True,
-                'qsos_processed': qsos_processed,
-                'qsos_duplicates': qsos_duplicates,
-                'hunters_updated': len(hunters_updated),
-                'b2b_qsos': b2b_qsos,
-                'bunker': bunker_ref,
-                'activator': activator_callsign,
-                'warnings': self.warnings,
-                'errors': [],
-                'log_upload_id': log_upload.id,
-                'batch_id': batch.id if self.transactions else None
-            }
+        # Validate records (same checks and messages as _process_qso)
+        rows = []
+        for qso in qsos:
+            hunter_callsign = qso.get('CALL', '').strip().upper()
+            if not hunter_callsign:
+                self.warnings.append('Missing callsign')
+                continue
             
-        except Exception as e:
-            # Catch any unexpected errors to prevent atomic block issues
-            import traceback
-            error_msg = str(e)
-            traceback_str = traceback.format_exc()
-            print(f"Error in process_adif_upload: {error_msg}")
-            print(traceback_str)
+            qso_datetime = self.parser.parse_qso_datetime(qso)
+            if not qso_datetime:
+                self.warnings.append(f'Invalid date/time for {hunter_callsign}')
+                continue
             
+            rows.append((hunter_callsign, qso_datetime, qso))
+        
+        if not rows:
             return {
-                'success': False,
-                'errors': [f'Error processing file: {error_msg}'],
                 'qsos_processed': 0,
-                'hunters_updated': 0
+                'qsos_duplicates': 0,
+                'hunters_updated': set(),
+                'b2b_qsos': 0,
             }
+        
+        hunters = self._resolve_hunters({callsign for callsign, _, _ in rows})
+        
+        # Detect duplicates (already in DB or repeated within this file)
+        dates = [qso_datetime for _, qso_datetime, _ in rows]
+        seen_keys = set(
+            ActivationLog.objects.filter(
+                activator=self.activator,
+                bunker=self.bunker,
+                activation_date__range=(min(dates), max(dates))
+            ).values_list('user_id', 'activation_date')
+        )
+        
+        qsos_duplicates = 0
+        new_logs = []
+        for hunter_callsign, qso_datetime, qso in rows:
+            hunter_user = hunters.get(hunter_callsign)
+            if hunter_user is None:
+                self.warnings.append(
+                    f'Error processing QSO: could not create user {hunter_callsign}'
+                )
+                continue
+            
+            key = (hunter_user.id, qso_datetime)
+            if key in seen_keys:
+                qsos_duplicates += 1
+                continue
+            seen_keys.add(key)
+            
+            new_logs.append(ActivationLog(
+                user=hunter_user,
+                bunker=self.bunker,
+                activator=self.activator,
+                activator_callsign=self.activator_callsign_full,
+                activation_date=qso_datetime,
+                is_b2b=self.parser.is_b2b_qso(qso),
+                mode=self.parser.get_qso_mode(qso),
+                band=self.parser.get_qso_band(qso),
+                qso_count=1,  # Each ADIF record represents 1 QSO
+                notes=f"Imported from ADIF log",
+                verified=True,  # Auto-verify activator-uploaded logs
+                points_awarded=True,
+                log_upload=self.log_upload  # Link to upload batch
+            ))
+        
+        new_logs, race_duplicates = self._bulk_insert_logs(new_logs)
+        qsos_duplicates += race_duplicates
+        
+        # bulk_create() skips the ActivationLog signals that maintain the
+        # unique bunker / activation session counters
+        apply_log_changes(added=new_logs)
+        
+        # Activator and hunter points, in the same order as the per-row path
+        bunker_ref = self.bunker.reference_number
+        point_transactions = []
+        for log in new_logs:
+            point_transactions.append(PointsTransaction(
+                user=self.activator,
+                transaction_type=PointsTransaction.ACTIVATOR_QSO,
+                activator_points=1,  # 1 point per QSO
+                activation_log=log,
+                bunker=self.bunker,
+                reason=f"Activator QSO from {bunker_ref}",
+                notes=f"Mode: {log.mode}, Band: {log.band}",
+                created_by=self.activator
+            ))
+            if log.user_id != self.activator.id:
+                point_transactions.append(PointsTransaction(
+                    user=log.user,
+                    transaction_type=PointsTransaction.HUNTER_QSO,
+                    hunter_points=1,  # 1 point per QSO
+                    activation_log=log,
+                    bunker=self.bunker,
+                    reason=f"Hunter QSO with {bunker_ref}",
+                    notes=f"Worked {self.activator.callsign} at bunker",
+                    created_by=self.activator
+                ))
+        
+        # One UserStatistics update per user for this chunk, B2B included
+        with deferred_statistics() as statistics:
+            PointsTransaction.objects.bulk_create(point_transactions, batch_size=self.BULK_BATCH_SIZE)
+            self.transactions.extend(point_transactions)
+            
+            # Link each log to its activator transaction
+            for pts_transaction in point_transactions:
+                if pts_transaction.transaction_type == PointsTransaction.ACTIVATOR_QSO:
+                    pts_transaction.activation_log.points_transaction = pts_transaction
+                    statistics.add_counts(pts_transaction.user_id, total_activator_qso=1)
+                else:
+                    statistics.add_counts(pts_transaction.user_id, total_hunter_qso=1)
+            ActivationLog.objects.bulk_update(
+                new_logs, ['points_transaction'], batch_size=self.BULK_BATCH_SIZE
+            )
+            
+            # bulk_create() skips PointsTransaction.save()
+            statistics.add_all(point_transactions)
+            
+            # B2B confirmation needs the reciprocal log of another activator
+            self._confirm_b2b_matches([log for log in new_logs if log.is_b2b])
+        
+        logger.info(
+            f"Bulk imported {len(new_logs)} QSOs for {self.activator.callsign} "
+            f"at {bunker_ref} ({qsos_duplicates} duplicates, "
+            f"{len(point_transactions)} point transactions)"
+        )
+        
+        return {
+            'qsos_processed': len(new_logs),
+            'qsos_duplicates': qsos_duplicates,
+            'hunters_updated': {log.user.callsign for log in new_logs},
+            'b2b_qsos': sum(1 for log in new_logs if log.is_b2b),
+        }
+    
+    def _resolve_hunters(self, callsigns) -> Dict[str, User]:
+        """
+        Resolve hunter callsigns to users, creating placeholder accounts
+        for unknown callsigns (same defaults as the per-row get_or_create).
+        
+        Args:
+            callsigns: Set of uppercase hunter callsigns
+            
+        Returns:
+            Dictionary mapping callsign to User
+        """
+        hunters = {
+            user.callsign: user
+            for user in User.objects.filter(callsign__in=callsigns)
+        }
+        
+        missing = sorted(callsigns - hunters.keys())
+        if missing:
+            # bulk_create skips post_save, so statistics rows are created here
+            User.objects.bulk_create(
+                [
+                    User(
+                        callsign=callsign,
+                        email=f'{callsign.lower()}@temp.bota.invalid',  # Temporary email
+                        is_active=False,  # Inactive until they register properly
+                        auto_created=True  # Mark as auto-created from log import
+                    )
+                    for callsign in missing
+                ],
+                batch_size=self.BULK_BATCH_SIZE,
+                ignore_conflicts=True  # Created meanwhile by a concurrent upload
+            )
+            created = list(User.objects.filter(callsign__in=missing))
+            UserStatistics.objects.bulk_create(
+                [UserStatistics(user=user) for user in created],
+                batch_size=self.BULK_BATCH_SIZE,
+                ignore_conflicts=True
+            )
+            hunters.update((user.callsign, user) for user in created)
+        
+        return hunters
+    
+    def _bulk_insert_logs(self, logs: List[ActivationLog]):
+        """
+        Insert new ActivationLog rows in batches.
+        
+        If a concurrent upload inserted some of the same QSOs after the
+        duplicate pre-query, those rows are dropped and the rest re-inserted.
+        
+        Args:
+            logs: Unsaved ActivationLog instances
+            
+        Returns:
+            Tuple of (inserted logs, number of rows dropped as duplicates)
+        """
+        if not logs:
+            return [], 0
+        
+        try:
+            with transaction.atomic():
+                return ActivationLog.objects.bulk_create(logs, batch_size=self.BULK_BATCH_SIZE), 0
+        except IntegrityError:
+            dates = [log.activation_date for log in logs]
+            existing_keys = set(
+                ActivationLog.objects.filter(
+                    activator=self.activator,
+                    bunker=self.bunker,
+                    activation_date__range=(min(dates), max(dates))
+                ).values_list('user_id', 'activation_date')
+            )
+            remaining = [
+                log for log in logs
+                if (log.user_id, log.activation_date) not in existing_keys
+            ]
+            inserted = ActivationLog.objects.bulk_create(remaining, batch_size=self.BULK_BATCH_SIZE)
+            return inserted, len(logs) - len(remaining)
     
     def _process_qso(self, qso: Dict) -> Dict:
         """
@@ -354,15 +775,12 @@ class LogImportService:
             if hunter_tx:
                 self.transactions.append(hunter_tx)
             
-            # Check if B2B can be confirmed (both logs uploaded)
-            if is_b2b:
-                self._check_and_award_b2b(self.activator, hunter_user, log)
-            
             return {
                 'success': True,
                 'hunter_callsign': hunter_callsign,
                 'is_b2b': is_b2b,
-                'log_id': log.id
+                'log_id': log.id,
+                'log': log
             }
         
         except Exception as e:
@@ -371,123 +789,31 @@ class LogImportService:
                 'error': f'Error processing QSO: {str(e)}'
             }
     
-    def _check_and_award_b2b(self, activator: User, hunter: User, current_log: ActivationLog):
+    def _confirm_b2b_matches(self, logs: List[ActivationLog]):
         """
-        Check if B2B can be confirmed (both logs uploaded) and award points using PointsService.
+        Confirm B2B QSOs whose reciprocal log was already uploaded and award
+        points using PointsService.
         
         B2B is only confirmed when:
         1. Activator A uploads log showing they worked Activator B
         2. Activator B uploads log showing they worked Activator A
         3. Both QSOs are within reasonable time window (±30 minutes)
         
-        Args:
-            activator: The activator who just uploaded their log
-            hunter: The hunter in the log (who might also be an activator)
-            current_log: The ActivationLog just created
-        """
-        from datetime import timedelta
-        
-        qso_datetime = current_log.activation_date
-        
-        # Look for reciprocal log within ±30 minutes
-        time_window_start = qso_datetime - timedelta(minutes=30)
-        time_window_end = qso_datetime + timedelta(minutes=30)
-        
-        # Find reciprocal log: hunter was activator, current activator was in their log
-        reciprocal_log = ActivationLog.objects.filter(
-            activator=hunter,  # Hunter was the activator
-            user=activator,    # Current activator was in their log
-            bunker=current_log.bunker,  # Same bunker
-            activation_date__gte=time_window_start,
-            activation_date__lte=time_window_end,
-            is_b2b=True  # They also marked it as B2B
-        ).first()
-        
-        if reciprocal_log:
-            # Try to confirm B2B using PointsService
-            tx1, tx2 = PointsService.confirm_b2b(
-                log1=current_log,
-                log2=reciprocal_log,
-                created_by=activator
-            )
-            
-            if tx1 and tx2:
-                # B2B confirmed! Add transactions to batch
-                self.transactions.append(tx1)
-                self.transactions.append(tx2)
-                
-                self.warnings.append(
-                    f"✅ B2B confirmed between {activator.callsign} and {hunter.callsign}!"
-                )
-    
-    
-    def _update_diploma_progress(self, user: User):
-        """
-        Update diploma progress for user after statistics change
+        All reciprocal candidates are loaded with one query (see b2b_matcher).
         
         Args:
-            user: User to update diploma progress for
+            logs: B2B ActivationLogs just created by this upload
         """
-        from diplomas.models import DiplomaType, DiplomaProgress, Diploma
-        from django.db.models.functions import TruncDate
-        
-        # Get user's current statistics
-        stats, _ = UserStatistics.objects.get_or_create(user=user)
-        
-        # Calculate total activations = distinct (bunker, date) combinations
-        # Each activation session counts as one, regardless of QSO count
-        total_activations = ActivationLog.objects.filter(
-            activator=user
-        ).annotate(
-            activation_day=TruncDate('activation_date')
-        ).values('bunker', 'activation_day').distinct().count()
-        
-        # Calculate unique hunted bunkers
-        unique_hunted = ActivationLog.objects.filter(
-            user=user
-        ).exclude(activator=user).values('bunker').distinct().count()
-        
-        # Get or create progress records for all active diplomas
-        active_diplomas = DiplomaType.objects.filter(is_active=True)
-        
-        for diploma_type in active_diplomas:
-            # Skip time-limited diplomas that are not currently valid
-            if diploma_type.is_time_limited() and not diploma_type.is_currently_valid():
-                continue
-            
-            progress, created = DiplomaProgress.objects.get_or_create(
-                user=user,
-                diploma_type=diploma_type
-            )
-            
-            # Update points and bunker counts based on user statistics
-            # Points: Each activation session = 1 activator point (distinct bunker+date)
-            #         Each QSO hunting bunkers = 1 hunter point
-            #         Each B2B QSO = 1 B2B point
-            # Counts: Unique bunkers and distinct (bunker, date) activation sessions
-            progress.update_points(
-                activator=total_activations,                     # Total activation sessions (bunker+date)
-                hunter=stats.total_hunter_qso,                  # Total QSOs hunting bunkers
-                b2b=stats.activator_b2b_qso,                    # Total B2B QSOs
-                unique_activations=stats.unique_activations,     # Unique bunkers activated
-                total_activations=total_activations,             # Total activation sessions (bunker+date)
-                unique_hunted=unique_hunted,                     # Unique bunkers hunted
-                total_hunted=unique_hunted                       # Total hunted (same as unique for hunters)
+        pairs = find_reciprocal_matches(logs)
+        if not pairs:
+            return
+        
+        for tx1, tx2 in PointsService.confirm_b2b_pairs(pairs, created_by=self.activator):
+            # B2B confirmed! Add transactions to batch
+            self.transactions.append(tx1)
+            self.transactions.append(tx2)
+            
+            self.warnings.append(
+                f"✅ B2B confirmed between {self.activator.callsign} and "
+                f"{tx1.activation_log.user.callsign}!"
             )
-            
-            # Check if eligible and not already awarded
-            if progress.is_eligible:
-                existing = Diploma.objects.filter(
-                    user=user,
-                    diploma_type=diploma_type
-                ).exists()
-                
-                if not existing:
-                    # Automatically issue diploma
-                    Diploma.objects.create(
-                        diploma_type=diploma_type,
-                        user=user,
-                        activator_points_earned=progress.activator_points,
-                        hunter_points_earned=progress.hunter_points,
-                        b2b_points_earned=progress.b2b_points
-                    )
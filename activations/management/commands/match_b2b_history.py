@@ -0,0 +1,78 @@
+"""
+Management command to re-run the B2B matcher over historical logs
+"""
+from datetime import datetime, time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.points_service import PointsService
+from activations.b2b_matcher import find_history_matches
+from activations.models import ActivationLog
+from diplomas.progress_engine import refresh_diploma_progress
+
+
+class Command(BaseCommand):
+    help = 'Confirm B2B QSOs whose reciprocal logs were uploaded but never matched'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Only consider QSOs on or after this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--callsign',
+            type=str,
+            help='Only consider B2B QSOs involving this activator callsign'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show matches without confirming them'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be saved'))
+
+        queryset = None
+        if options.get('since') or options.get('callsign'):
+            queryset = ActivationLog.objects.all()
+            if options.get('since'):
+                try:
+                    since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+                except ValueError:
+                    raise CommandError('--since must be in YYYY-MM-DD format')
+                queryset = queryset.filter(
+                    activation_date__gte=timezone.make_aware(datetime.combine(since, dt_time.min))
+                )
+            if options.get('callsign'):
+                callsign = options['callsign'].upper()
+                queryset = queryset.filter(activator__callsign=callsign) | queryset.filter(
+                    user__callsign=callsign
+                )
+
+        pairs = find_history_matches(queryset)
+
+        for log1, log2 in pairs:
+            self.stdout.write(
+                f'{log1.activator.callsign} ↔ {log2.activator.callsign} at '
+                f'{log1.bunker.reference_number} '
+                f'({log1.activation_date:%Y-%m-%d %H:%M} / {log2.activation_date:%H:%M})'
+            )
+
+        if dry_run:
+            self.stdout.write(f'Found {len(pairs)} unconfirmed B2B pairs')
+            return
+
+        confirmed = PointsService.confirm_b2b_pairs(pairs)
+
+        # B2B points changed for both sides of every confirmed pair
+        refresh_diploma_progress(
+            {tx.user_id for tx_pair in confirmed for tx in tx_pair}
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Confirmed {len(confirmed)} B2B pairs'))
@@ -0,0 +1,84 @@
+"""
+Management command to process queued log uploads (upload queue worker)
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from activations.chunked_upload import expire_chunked_uploads
+from activations.upload_queue import process_next_upload, requeue_stale_uploads
+from bunkers.references import warm_references
+
+
+class Command(BaseCommand):
+    help = 'Process pending log uploads from the database-backed upload queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls of an empty queue (default: 2)'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=0,
+            help='Exit after processing this many uploads (default: no limit)'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=30,
+            help='Requeue uploads whose worker reported no progress for this many minutes (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        loop = options['loop']
+        sleep_seconds = options['sleep']
+        max_jobs = options['max_jobs']
+        stale_after = timedelta(minutes=options['stale_after'])
+        
+        processed = 0
+        
+        # Resolve bunker references of the first upload without a query
+        if loop:
+            warm_references()
+        
+        while True:
+            requeued = requeue_stale_uploads(stale_after)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale uploads'))
+            expired = expire_chunked_uploads()
+            if expired:
+                self.stdout.write(self.style.WARNING(f'Removed {expired} unfinished chunked uploads'))
+            
+            result = process_next_upload()
+            
+            if result is None:
+                if not loop:
+                    break
+                time.sleep(sleep_seconds)
+                continue
+            
+            processed += 1
+            if result['success']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Upload {result['log_upload_id']}: {result['qsos_processed']} QSOs processed, "
+                    f"{result.get('qsos_duplicates', 0)} duplicates"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"Upload failed: {'; '.join(result.get('errors', []))}"
+                ))
+            
+            if max_jobs and processed >= max_jobs:
+                break
+        
+        self.stdout.write(f'Processed {processed} uploads')
@@ -0,0 +1,74 @@
+"""
+Management command to rebuild or check the materialized activity counters
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import UserStatistics
+from activations.activity_counters import rebuild_activity_counters
+
+CHECKED_FIELDS = ('unique_activations', 'unique_bunkers_hunted', 'total_activations')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user bunker/activation-session sets and counters from activation logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--callsign',
+            type=str,
+            help='Rebuild or check only this callsign'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare counters with UserStatistics.recalculate_from_transactions() without changing them'
+        )
+
+    def handle(self, *args, **options):
+        stats_queryset = UserStatistics.objects.select_related('user').order_by('user_id')
+        if options.get('callsign'):
+            stats_queryset = stats_queryset.filter(user__callsign=options['callsign'].upper())
+            if not stats_queryset.exists():
+                self.stdout.write(self.style.ERROR(f"User {options['callsign']} not found"))
+                return
+
+        if options['check']:
+            self.check_counters(stats_queryset)
+            return
+
+        user_ids = None
+        if options.get('callsign'):
+            user_ids = list(stats_queryset.values_list('user_id', flat=True))
+
+        updated = rebuild_activity_counters(user_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt activity counters for {updated} users'))
+
+    def check_counters(self, stats_queryset):
+        """Report users whose counters differ from a full recalculation"""
+        mismatches = 0
+
+        for stats in stats_queryset.iterator():
+            stored = {field: getattr(stats, field) for field in CHECKED_FIELDS}
+
+            # Recalculate in a transaction that is always rolled back
+            with transaction.atomic():
+                stats.recalculate_from_transactions()
+                transaction.set_rollback(True)
+
+            expected = {field: getattr(stats, field) for field in CHECKED_FIELDS}
+            if stored != expected:
+                mismatches += 1
+                differences = ', '.join(
+                    f'{field}: {stored[field]} != {expected[field]}'
+                    for field in CHECKED_FIELDS if stored[field] != expected[field]
+                )
+                self.stdout.write(self.style.WARNING(f'{stats.user.callsign}: {differences}'))
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(
+                f'{mismatches} users with inconsistent counters; '
+                f'run rebuild_activity_counters to fix them'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('All activity counters are consistent'))
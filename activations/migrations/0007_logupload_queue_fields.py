@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activations', '0006_add_activator_callsign_field'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logupload',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Processing Finished At'),
+        ),
+        migrations.AddField(
+            model_name='logupload',
+            name='raw_file',
+            field=models.FileField(blank=True, help_text='Uploaded log file kept for queued processing', null=True, upload_to='log_uploads/%Y/%m/', verbose_name='Raw File'),
+        ),
+        migrations.AddField(
+            model_name='logupload',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When a queue worker claimed this upload', null=True, verbose_name='Processing Started At'),
+        ),
+        migrations.AddIndex(
+            model_name='logupload',
+            index=models.Index(fields=['status', 'uploaded_at'], name='activations_status_3d9773_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activations', '0007_logupload_queue_fields'),
+        ('bunkers', '0008_add_bunker_info_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivationDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('qso_count', models.PositiveIntegerField(default=0, verbose_name='QSO Count')),
+                ('bunker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activation_days', to='bunkers.bunker', verbose_name='Bunker')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activation_days', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'User Activation Day',
+                'verbose_name_plural': 'User Activation Days',
+                'unique_together': {('user', 'bunker', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserBunkerActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('activator', 'Activator'), ('hunter', 'Hunter')], max_length=10, verbose_name='Role')),
+                ('qso_count', models.PositiveIntegerField(default=0, verbose_name='QSO Count')),
+                ('bunker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_activity', to='bunkers.bunker', verbose_name='Bunker')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bunker_activity', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'User Bunker Activity',
+                'verbose_name_plural': 'User Bunker Activity',
+                'unique_together': {('user', 'bunker', 'role')},
+            },
+        ),
+    ]
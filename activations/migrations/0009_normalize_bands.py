@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+from cluster.band_plan import normalize_band
+
+
+def normalize_log_bands(apps, schema_editor):
+    """Store band names in lowercase ADIF form (40M -> 40m)"""
+    ActivationLog = apps.get_model('activations', 'ActivationLog')
+    bands = ActivationLog.objects.exclude(band='').values_list('band', flat=True).distinct()
+    for band in list(bands):
+        normalized = normalize_band(band)
+        if normalized and normalized != band:
+            ActivationLog.objects.filter(band=band).update(band=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_userstatistics_total_activations'),
+        ('activations', '0008_activity_counters'),
+        ('bunkers', '0008_add_bunker_info_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_log_bands, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='activationlog',
+            index=models.Index(fields=['user', 'band'], name='activations_user_id_be018e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activationlog',
+            index=models.Index(fields=['activator', 'band'], name='activations_activat_6e5a09_idx'),
+        ),
+    ]
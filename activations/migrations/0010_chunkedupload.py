@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:28
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activations', '0009_normalize_bands'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(help_text='Original filename of the uploaded log', max_length=255, verbose_name='Filename')),
+                ('size', models.BigIntegerField(blank=True, help_text='Total size in bytes announced by the client', null=True, verbose_name='Size')),
+                ('received_size', models.BigIntegerField(default=0, help_text='Bytes received so far; the next chunk starts at this offset', verbose_name='Received Size')),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='uploading', max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('log_upload', models.ForeignKey(blank=True, help_text='Upload created when the file was finalized', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='activations.logupload', verbose_name='Log Upload')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Chunked Upload',
+                'verbose_name_plural': 'Chunked Uploads',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='activations_status_e8352e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_userstatistics_total_activations'),
+        ('activations', '0010_chunkedupload'),
+        ('bunkers', '0008_add_bunker_info_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activationlog',
+            index=models.Index(fields=['log_upload', 'activation_date'], name='activations_log_upl_642aca_idx'),
+        ),
+    ]
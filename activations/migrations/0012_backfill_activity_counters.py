@@ -0,0 +1,77 @@
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_activity_counters(apps, schema_editor):
+    """
+    Fill UserBunkerActivity/UserActivationDay from the existing logs and set
+    the UserStatistics counters from them (same grouped queries as
+    activations.activity_counters.rebuild_activity_counters())
+    """
+    ActivationLog = apps.get_model('activations', 'ActivationLog')
+    UserBunkerActivity = apps.get_model('activations', 'UserBunkerActivity')
+    UserActivationDay = apps.get_model('activations', 'UserActivationDay')
+    UserStatistics = apps.get_model('accounts', 'UserStatistics')
+
+    activator_logs = ActivationLog.objects.filter(activator__isnull=False)
+    hunter_logs = ActivationLog.objects.filter(Q(activator__isnull=True) | ~Q(activator=F('user')))
+
+    bunker_sets = [
+        UserBunkerActivity(
+            user_id=row['activator'], bunker_id=row['bunker'], role='activator', qso_count=row['qsos']
+        )
+        for row in activator_logs.order_by().values('activator', 'bunker').annotate(qsos=Count('id'))
+    ] + [
+        UserBunkerActivity(
+            user_id=row['user'], bunker_id=row['bunker'], role='hunter', qso_count=row['qsos']
+        )
+        for row in hunter_logs.order_by().values('user', 'bunker').annotate(qsos=Count('id'))
+    ]
+    day_sets = [
+        UserActivationDay(
+            user_id=row['activator'], bunker_id=row['bunker'], day=row['day'], qso_count=row['qsos']
+        )
+        for row in activator_logs.annotate(
+            day=TruncDate('activation_date')
+        ).order_by().values('activator', 'bunker', 'day').annotate(qsos=Count('id'))
+    ]
+
+    counters = defaultdict(Counter)
+    for row in bunker_sets:
+        counters[row.user_id]['unique_activations' if row.role == 'activator' else 'unique_bunkers_hunted'] += 1
+    for row in day_sets:
+        counters[row.user_id]['total_activations'] += 1
+
+    UserBunkerActivity.objects.all().delete()
+    UserActivationDay.objects.all().delete()
+    UserBunkerActivity.objects.bulk_create(bunker_sets, batch_size=1000)
+    UserActivationDay.objects.bulk_create(day_sets, batch_size=1000)
+
+    # Users with logs but no statistics row yet
+    UserStatistics.objects.bulk_create(
+        [UserStatistics(user_id=user_id) for user_id in counters], batch_size=1000, ignore_conflicts=True
+    )
+    all_stats = list(UserStatistics.objects.all())
+    for stats in all_stats:
+        user_counters = counters.get(stats.user_id, Counter())
+        stats.unique_activations = user_counters['unique_activations']
+        stats.unique_bunkers_hunted = user_counters['unique_bunkers_hunted']
+        stats.total_activations = user_counters['total_activations']
+    UserStatistics.objects.bulk_update(
+        all_stats, ['unique_activations', 'unique_bunkers_hunted', 'total_activations'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_userstatistics_total_activations'),
+        ('activations', '0011_activationlog_log_upload_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_activity_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activations', '0012_backfill_activity_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logupload',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last progress report of the worker processing this upload', null=True, verbose_name='Last Heartbeat'),
+        ),
+    ]
@@ -4,8 +4,11 @@ from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 import secrets
+import uuid
 import string
 
+from cluster.band_plan import normalize_band
+
 
 class ActivationKey(models.Model):
     """
@@ -298,6 +301,9 @@ class ActivationLog(models.Model):
             models.Index(fields=['is_b2b', 'verified']),
             models.Index(fields=['points_awarded']),
             models.Index(fields=['b2b_confirmed']),
+            models.Index(fields=['user', 'band']),
+            models.Index(fields=['activator', 'band']),
+            models.Index(fields=['log_upload', 'activation_date']),
         ]
         # Prevent duplicate QSOs from same upload
         unique_together = [
@@ -307,6 +313,11 @@ class ActivationLog(models.Model):
     def __str__(self):
         return f"{self.user.callsign} activated {self.bunker.reference_number} on {self.activation_date.strftime('%Y-%m-%d')}"
 
+    def save(self, *args, **kwargs):
+        """Store the band in normalized form (40M -> 40m), like the ADIF import"""
+        self.band = normalize_band(self.band) or self.band
+        super().save(*args, **kwargs)
+
     def get_duration(self):
         """Calculate activation duration if end_date is set"""
         if self.end_date and self.activation_date:
@@ -321,6 +332,89 @@ class ActivationLog(models.Model):
         return None
 
 
+class UserBunkerActivity(models.Model):
+    """
+    Materialized set of bunkers each user activated or hunted.
+    
+    One row per (user, bunker, role) with the number of QSOs behind it,
+    maintained incrementally as ActivationLog rows are inserted or deleted
+    (see activations.activity_counters). Backs the unique_activations and
+    unique_bunkers_hunted counters in UserStatistics.
+    """
+    ROLE_ACTIVATOR = 'activator'
+    ROLE_HUNTER = 'hunter'
+    ROLE_CHOICES = [
+        (ROLE_ACTIVATOR, _('Activator')),
+        (ROLE_HUNTER, _('Hunter')),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='bunker_activity',
+        verbose_name=_("User")
+    )
+    bunker = models.ForeignKey(
+        'bunkers.Bunker',
+        on_delete=models.CASCADE,
+        related_name='user_activity',
+        verbose_name=_("Bunker")
+    )
+    role = models.CharField(
+        max_length=10,
+        choices=ROLE_CHOICES,
+        verbose_name=_("Role")
+    )
+    qso_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("QSO Count")
+    )
+    
+    class Meta:
+        verbose_name = _("User Bunker Activity")
+        verbose_name_plural = _("User Bunker Activity")
+        unique_together = [['user', 'bunker', 'role']]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.role} {self.bunker_id} ({self.qso_count} QSOs)"
+
+
+class UserActivationDay(models.Model):
+    """
+    Materialized set of activation sessions: distinct (bunker, day) pairs
+    per activator with the number of QSOs logged that day.
+    
+    Backs the total_activations counter in UserStatistics.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='activation_days',
+        verbose_name=_("User")
+    )
+    bunker = models.ForeignKey(
+        'bunkers.Bunker',
+        on_delete=models.CASCADE,
+        related_name='activation_days',
+        verbose_name=_("Bunker")
+    )
+    day = models.DateField(
+        verbose_name=_("Day")
+    )
+    qso_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("QSO Count")
+    )
+    
+    class Meta:
+        verbose_name = _("User Activation Day")
+        verbose_name_plural = _("User Activation Days")
+        unique_together = [['user', 'bunker', 'day']]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.bunker_id} {self.day} ({self.qso_count} QSOs)"
+
+
 class License(models.Model):
     """
     Special event licenses or permits for activations.
@@ -464,6 +558,13 @@ class LogUpload(models.Model):
         verbose_name=_("File Format"),
         help_text=_("Format of the log file (ADIF, CSV, etc.)")
     )
+    raw_file = models.FileField(
+        upload_to='log_uploads/%Y/%m/',
+        null=True,
+        blank=True,
+        verbose_name=_("Raw File"),
+        help_text=_("Uploaded log file kept for queued processing")
+    )
     uploaded_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name=_("Uploaded At")
@@ -494,6 +595,23 @@ class LogUpload(models.Model):
         verbose_name=_("Error Message"),
         help_text=_("Error details if upload failed")
     )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Processing Started At"),
+        help_text=_("When a queue worker claimed this upload")
+    )
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Last Heartbeat"),
+        help_text=_("Last progress report of the worker processing this upload")
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Processing Finished At")
+    )
     notes = models.TextField(
         blank=True,
         verbose_name=_("Notes")
@@ -506,7 +624,89 @@ class LogUpload(models.Model):
         indexes = [
             models.Index(fields=['user', '-uploaded_at']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', 'uploaded_at']),
         ]
 
     def __str__(self):
         return f"{self.user.callsign} - {self.filename} ({self.uploaded_at.strftime('%Y-%m-%d %H:%M')})"
+
+    def get_progress_percent(self):
+        """Processing progress in percent (100 once the upload is finished)"""
+        if self.status in ('completed', 'failed'):
+            return 100
+        if not self.qso_count:
+            return 0
+        return min(99, int(self.processed_qso_count * 100 / self.qso_count))
+
+
+class ChunkedUpload(models.Model):
+    """
+    Log file uploaded in chunks (see activations.chunked_upload).
+    The received bytes are spooled to disk until the upload is finalized.
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='chunked_uploads',
+        verbose_name=_("User")
+    )
+    filename = models.CharField(
+        max_length=255,
+        verbose_name=_("Filename"),
+        help_text=_("Original filename of the uploaded log")
+    )
+    size = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Size"),
+        help_text=_("Total size in bytes announced by the client")
+    )
+    received_size = models.BigIntegerField(
+        default=0,
+        verbose_name=_("Received Size"),
+        help_text=_("Bytes received so far; the next chunk starts at this offset")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('uploading', _('Uploading')),
+            ('processing', _('Processing')),
+            ('completed', _('Completed')),
+            ('failed', _('Failed')),
+        ],
+        default='uploading',
+        verbose_name=_("Status")
+    )
+    log_upload = models.ForeignKey(
+        LogUpload,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("Log Upload"),
+        help_text=_("Upload created when the file was finalized")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Created At")
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Updated At")
+    )
+
+    class Meta:
+        verbose_name = _("Chunked Upload")
+        verbose_name_plural = _("Chunked Uploads")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.callsign} - {self.filename} ({self.received_size} bytes)"
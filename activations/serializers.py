@@ -4,7 +4,9 @@ Handles activation keys, logs, and licenses.
 """
 import datetime
 from rest_framework import serializers
-from .models import ActivationKey, ActivationLog, License
+
+from cluster.band_plan import normalize_band
+from .models import ActivationKey, ActivationLog, ChunkedUpload, License, LogUpload
 
 
 class LicenseSerializer(serializers.ModelSerializer):
@@ -46,6 +48,10 @@ class ActivationLogSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
     
+    def validate_band(self, value):
+        """Normalize the band name (40M -> 40m); other values are kept"""
+        return normalize_band(value) or value
+    
     def get_activation_date_utc(self, obj):
         """Format activation date with UTC suffix for UI display"""
         if obj.activation_date:
@@ -62,6 +68,20 @@ class ActivationLogSerializer(serializers.ModelSerializer):
         return None
 
 
+class LogUploadSerializer(serializers.ModelSerializer):
+    """Serializer for LogUpload model (upload status and progress)"""
+    progress_percent = serializers.IntegerField(source='get_progress_percent', read_only=True)
+    
+    class Meta:
+        model = LogUpload
+        fields = [
+            'id', 'filename', 'file_format', 'status',
+            'qso_count', 'processed_qso_count', 'progress_percent',
+            'error_message', 'uploaded_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
 class ActivationKeySerializer(serializers.ModelSerializer):
     """Serializer for ActivationKey model"""
     bunker_reference = serializers.CharField(source='bunker.reference_number', read_only=True)
@@ -121,3 +141,15 @@ class ActivationKeyUsageSerializer(serializers.Serializer):
     def validate(self, attrs):
         """Validate activation key usage"""
         return attrs
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Serializer for ChunkedUpload model (resumable upload state)"""
+    
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'id', 'filename', 'size', 'received_size', 'status',
+            'log_upload', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'received_size', 'status', 'log_upload', 'created_at', 'updated_at']
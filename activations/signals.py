@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from bunkers.models import Bunker
+from diplomas.progress_engine import refresh_diploma_progress_on_commit
+
+from .activity_counters import COUNTED_FIELDS, apply_log_changes, rebuild_activity_counters
+from .models import ActivationLog, UserBunkerActivity
+
+# update_fields names that can change which counters a log contributes to
+COUNTED_FIELD_NAMES = {'user', 'user_id', 'activator', 'activator_id', 'bunker', 'bunker_id', 'activation_date'}
+
+
+@receiver(pre_save, sender=ActivationLog)
+def remember_counted_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Remember the stored user/activator/bunker/date of an edited log so
+    post_save can move its contribution to the activity counters.
+    """
+    instance._counted_previous = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not COUNTED_FIELD_NAMES & set(update_fields):
+        return
+    instance._counted_previous = ActivationLog.objects.filter(
+        pk=instance.pk
+    ).values(*COUNTED_FIELDS).first()
+
+
+@receiver(post_save, sender=ActivationLog)
+def update_activity_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep materialized activity counters in sync with inserted or edited logs.
+    """
+    if raw:
+        return
+    if created:
+        apply_log_changes(added=[instance])
+        return
+    
+    previous = getattr(instance, '_counted_previous', None)
+    if previous and any(previous[field] != getattr(instance, field) for field in COUNTED_FIELDS):
+        apply_log_changes(added=[instance], removed=[SimpleNamespace(**previous)])
+        refresh_diploma_progress_on_commit([
+            instance.user_id, instance.activator_id, previous['user_id'], previous['activator_id']
+        ])
+
+
+@receiver(post_delete, sender=ActivationLog)
+def update_activity_counters_on_delete(sender, instance, **kwargs):
+    """
+    Keep materialized activity counters and diploma progress in sync with
+    deleted logs.
+    """
+    apply_log_changes(removed=[instance])
+    refresh_diploma_progress_on_commit([instance.user_id, instance.activator_id])
+
+
+@receiver(pre_delete, sender=Bunker)
+def rebuild_activity_counters_on_bunker_delete(sender, instance, **kwargs):
+    """
+    Rebuild the counters of everyone with activity on a deleted bunker.
+    
+    The deletion cascades to the bunker's logs and to its counter rows in
+    one pass, so the incremental updates of the deleted logs cannot be
+    relied on; the affected users are rebuilt once the deletion commits.
+    """
+    user_ids = set(UserBunkerActivity.objects.filter(bunker=instance).values_list('user_id', flat=True))
+    if user_ids:
+        transaction.on_commit(lambda: rebuild_activity_counters(user_ids))
@@ -0,0 +1,171 @@
+"""
+Tests for materialized per-user activity counters.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import UserStatistics
+from activations.activity_counters import get_user_bunker_ids, rebuild_activity_counters
+from activations.log_import_service import LogImportService
+from activations.models import ActivationLog, UserActivationDay, UserBunkerActivity
+from bunkers.models import Bunker, BunkerCategory
+
+User = get_user_model()
+
+
+class ActivityCountersTest(TestCase):
+    """Test incremental maintenance of activity counters"""
+
+    def setUp(self):
+        """Set up test data"""
+        category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        self.bunker1, self.bunker2 = [
+            Bunker.objects.create(
+                reference_number=f'B/SP-003{i}', name_pl=f'B{i}', name_en=f'B{i}',
+                category=category, latitude=Decimal('52.0'), longitude=Decimal('21.0')
+            )
+            for i in (1, 2)
+        ]
+        self.activator = User.objects.create_user(
+            email='sp3fck@test.com', callsign='SP3FCK', password='testpass123'
+        )
+        self.hunter = User.objects.create_user(
+            email='sp3blz@test.com', callsign='SP3BLZ', password='testpass123'
+        )
+        self.start = timezone.make_aware(datetime(2025, 11, 4, 10, 0))
+
+    def _log(self, bunker, hours, user=None):
+        return ActivationLog.objects.create(
+            activator=self.activator,
+            user=user or self.hunter,
+            bunker=bunker,
+            activation_date=self.start + timedelta(hours=hours),
+            qso_count=1
+        )
+
+    def _counters(self, user):
+        stats = UserStatistics.objects.get(user=user)
+        return stats.unique_activations, stats.unique_bunkers_hunted, stats.total_activations
+
+    def test_insert_and_delete(self):
+        """Counters follow inserted and deleted logs"""
+        first = self._log(self.bunker1, 0)
+        self._log(self.bunker1, 1)
+        self._log(self.bunker1, 24)
+        self._log(self.bunker2, 2)
+        self._log(self.bunker2, 3, user=self.activator)  # own call, not hunted
+
+        self.assertEqual(self._counters(self.activator), (2, 0, 3))
+        self.assertEqual(self._counters(self.hunter), (0, 2, 0))
+        self.assertEqual(
+            get_user_bunker_ids(self.hunter, UserBunkerActivity.ROLE_HUNTER),
+            {self.bunker1.id, self.bunker2.id}
+        )
+
+        first.delete()
+        self.assertEqual(self._counters(self.activator), (2, 0, 3))
+
+        ActivationLog.objects.filter(bunker=self.bunker2).delete()
+        self.assertEqual(self._counters(self.activator), (1, 0, 2))
+        self.assertEqual(self._counters(self.hunter), (0, 1, 0))
+        self.assertFalse(UserBunkerActivity.objects.filter(bunker=self.bunker2).exists())
+
+    def test_edit_moves_contribution(self):
+        """Changing a log's bunker moves its contribution"""
+        log = self._log(self.bunker1, 0)
+
+        log.bunker = self.bunker2
+        log.save()
+
+        self.assertEqual(self._counters(self.hunter), (0, 1, 0))
+        self.assertEqual(
+            list(UserActivationDay.objects.values_list('bunker_id', 'qso_count')),
+            [(self.bunker2.id, 1)]
+        )
+
+    def test_bulk_import_updates_counters(self):
+        """Bulk log import maintains counters without the model signals"""
+        adif = """<ADIF_VER:5>3.1.5
+<EOH>
+<CALL:6>SP3BLZ <QSO_DATE:8>20251104 <TIME_ON:4>2015 <OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0031 <EOR>
+<CALL:6>SQ3BMJ <QSO_DATE:8>20251104 <TIME_ON:4>2016 <OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0031 <EOR>
+"""
+        result = LogImportService().process_adif_upload(adif, self.activator, filename='log.adi')
+
+        self.assertTrue(result['success'], result)
+        self.assertEqual(self._counters(self.activator), (1, 0, 1))
+        self.assertEqual(self._counters(User.objects.get(callsign='SQ3BMJ')), (0, 1, 0))
+
+    def test_rebuild_and_check(self):
+        """Rebuild restores counters and the checker reports drift"""
+        self._log(self.bunker1, 0)
+        self._log(self.bunker2, 30)
+        UserStatistics.objects.filter(user=self.activator).update(unique_activations=7)
+        UserBunkerActivity.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_activity_counters', '--check', stdout=out)
+        self.assertIn('SP3FCK: unique_activations: 7 != 2', out.getvalue())
+
+        rebuild_activity_counters()
+
+        self.assertEqual(self._counters(self.activator), (2, 0, 2))
+        self.assertEqual(self._counters(self.hunter), (0, 2, 0))
+        self.assertEqual(UserBunkerActivity.objects.count(), 4)
+
+        out = StringIO()
+        call_command('rebuild_activity_counters', '--check', stdout=out)
+        self.assertIn('All activity counters are consistent', out.getvalue())
+
+    def test_bunker_deleted(self):
+        """Deleting a bunker with logs rebuilds the counters of its users"""
+        self._log(self.bunker1, 0)
+        self._log(self.bunker2, 30)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bunker1.delete()
+
+        self.assertEqual(self._counters(self.activator), (1, 0, 1))
+        self.assertEqual(self._counters(self.hunter), (0, 1, 0))
+        out = StringIO()
+        call_command('rebuild_activity_counters', '--check', stdout=out)
+        self.assertIn('All activity counters are consistent', out.getvalue())
+
+    def test_key_inserted_concurrently(self):
+        """A set row already inserted by a concurrent import is reused, not a conflict"""
+        UserBunkerActivity.objects.create(
+            user=self.hunter, bunker=self.bunker1, role=UserBunkerActivity.ROLE_HUNTER, qso_count=0
+        )
+
+        self._log(self.bunker1, 0)
+
+        self.assertEqual(self._counters(self.hunter), (0, 1, 0))
+        self.assertEqual(
+            UserBunkerActivity.objects.get(user=self.hunter, bunker=self.bunker1).qso_count, 1
+        )
+
+    def test_migration_backfill(self):
+        """The migration fills the sets and counters of logs imported before it"""
+        from importlib import import_module
+        from django.apps import apps
+
+        migration = import_module('activations.migrations.0012_backfill_activity_counters')
+        self._log(self.bunker1, 0)
+        self._log(self.bunker1, 30)
+        UserBunkerActivity.objects.all().delete()
+        UserActivationDay.objects.all().delete()
+        UserStatistics.objects.update(unique_activations=0, unique_bunkers_hunted=0, total_activations=0)
+        # Statistics rows are created for users who have none yet
+        UserStatistics.objects.filter(user=self.hunter).delete()
+
+        migration.backfill_activity_counters(apps, None)
+
+        self.assertEqual(self._counters(self.activator), (1, 0, 2))
+        self.assertEqual(self._counters(self.hunter), (0, 1, 0))
+        self.assertEqual(UserActivationDay.objects.count(), 2)
@@ -4,8 +4,9 @@ Tests for ADIF parser and log import service.
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from decimal import Decimal
+from unittest import mock
 
-from activations.adif_parser import ADIFParser, parse_adif_file
+from activations.adif_parser import ADIFParser, ADIFTokenizer, parse_adif_file
 from activations.log_import_service import LogImportService
 from bunkers.models import Bunker, BunkerCategory
 
@@ -104,6 +105,74 @@ B2B QSOs: 0
         self.assertEqual(dt.day, 4)
         self.assertEqual(dt.hour, 20)
         self.assertEqual(dt.minute, 15)
+    
+    def test_get_qso_band(self):
+        """Test band normalization with FREQ fallback"""
+        parser = ADIFParser(self.sample_adif)
+        
+        self.assertEqual(parser.get_qso_band({'BAND': '40M'}), '40m')
+        self.assertEqual(parser.get_qso_band({'BAND': '70CM'}), '70cm')
+        self.assertEqual(parser.get_qso_band({'FREQ': '14.285000'}), '20m')
+        self.assertEqual(parser.get_qso_band({'BAND': 'junk', 'FREQ': '7.090'}), '40m')
+        self.assertEqual(parser.get_qso_band({'FREQ': '100.0'}), 'UNKNOWN')
+        self.assertEqual(parser.get_qso_band({}), 'UNKNOWN')
+
+
+class ADIFTokenizerTest(TestCase):
+    """Test streaming, length-driven ADIF tokenizer"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.adif = (
+            "Header text <with brackets>\n"
+            "<ADIF_VER:5>3.1.5 <eoh>\n"
+            "<CALL:6>SP3BLZ <COMMENT:9>a<b>c<d>e <QSO_DATE:8>20251104 <eor>\n"
+            "<call:6>SQ3BMJ <NAME:7>Łódź <TIME_ON:4:N>2015 <EoR>\n"
+            "<CALL:6>SP3BKR <MODE:2>CW"
+        )
+        self.expected = [
+            {'CALL': 'SP3BLZ', 'COMMENT': 'a<b>c<d>e', 'QSO_DATE': '20251104'},
+            {'CALL': 'SQ3BMJ', 'NAME': 'Łódź', 'TIME_ON': '2015'},
+            {'CALL': 'SP3BKR', 'MODE': 'CW'},
+        ]
+    
+    def test_tokenize_string(self):
+        """Values containing '<', lowercase markers and byte lengths"""
+        tokenizer = ADIFTokenizer(self.adif)
+        
+        self.assertEqual(list(tokenizer), self.expected)
+        self.assertEqual(tokenizer.header, {'ADIF_VER': '3.1.5'})
+    
+    def test_tokenize_chunk_boundaries(self):
+        """Chunk boundaries inside tags, values and UTF-8 characters"""
+        data = self.adif.encode('utf-8')
+        
+        for chunk_size in (1, 2, 3, 5, 7, 16):
+            chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+            self.assertEqual(list(ADIFTokenizer(chunks)), self.expected, chunk_size)
+    
+    def test_tokenize_file_objects(self):
+        """Binary and text file-like objects"""
+        import io
+        
+        self.assertEqual(
+            list(ADIFTokenizer(io.BytesIO(self.adif.encode('utf-8')), chunk_size=4)),
+            self.expected
+        )
+        self.assertEqual(
+            list(ADIFTokenizer(io.StringIO(self.adif), chunk_size=4)),
+            self.expected
+        )
+    
+    def test_parser_streams_qsos(self):
+        """ADIFParser.iter_qsos yields records with a callsign"""
+        parser = ADIFParser(self.adif.encode('utf-8'))
+        
+        qsos = list(parser.iter_qsos())
+        
+        self.assertEqual([qso['CALL'] for qso in qsos], ['SP3BLZ', 'SQ3BMJ', 'SP3BKR'])
+        self.assertEqual(parser.header['ADIF_VER'], '3.1.5')
+        self.assertEqual(parser.qsos, [])
 
 
 class LogImportServiceTest(TestCase):
@@ -156,6 +225,53 @@ class LogImportServiceTest(TestCase):
         self.assertEqual(result['bunker'], 'B/SP-0039')
         self.assertEqual(result['activator'], 'SP3FCK')
     
+    def test_failed_import_rolls_back(self):
+        """A chunk failing after committed chunks undoes the whole import; the file can be retried"""
+        from accounts.models import PointsTransaction
+        from activations.models import ActivationLog, LogUpload
+        
+        process_chunk = LogImportService._process_qsos_bulk
+        calls = []
+        
+        def fail_second_chunk(service, qsos):
+            calls.append(len(qsos))
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return process_chunk(service, qsos)
+        
+        with mock.patch.object(LogImportService, 'BULK_BATCH_SIZE', 1), \
+                mock.patch.object(LogImportService, '_process_qsos_bulk', fail_second_chunk), \
+                self.assertLogs('activations.log_import_service', 'ERROR'):
+            result = LogImportService().process_adif_upload(self.sample_adif, self.activator)
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(result['qsos_processed'], 0)
+        self.assertFalse(ActivationLog.objects.exists())
+        self.assertFalse(PointsTransaction.objects.exists())
+        self.assertFalse(LogUpload.objects.exclude(status='failed').exists())
+        
+        result = LogImportService().process_adif_upload(self.sample_adif, self.activator)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['qsos_processed'], 2)
+    
+    def test_failed_queued_import_marked_failed(self):
+        """An existing upload whose import raises is marked failed after the rollback"""
+        from activations.models import LogUpload
+        
+        log_upload = LogUpload.objects.create(
+            user=self.activator, filename='log.adi', file_format='ADIF', status='processing'
+        )
+        with mock.patch.object(LogImportService, '_process_qsos_bulk', side_effect=RuntimeError('boom')), \
+                self.assertLogs('activations.log_import_service', 'ERROR'):
+            result = LogImportService().process_adif_upload(
+                self.sample_adif, self.activator, log_upload=log_upload
+            )
+        
+        self.assertFalse(result['success'])
+        log_upload.refresh_from_db()
+        self.assertEqual(log_upload.status, 'failed')
+        self.assertIn('boom', log_upload.error_message)
+    
     def test_hunter_points_awarded(self):
         """Test that hunter points are awarded"""
         service = LogImportService()
@@ -194,3 +310,137 @@ class LogImportServiceTest(TestCase):
         
         self.assertFalse(result['success'])
         self.assertIn('only upload logs for your own callsign', result['errors'][0])
+
+
+class BulkLogImportTest(TestCase):
+    """Test that the bulk import path matches the per-row path"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.category = BunkerCategory.objects.create(
+            name_pl='Schron',
+            name_en='Shelter'
+        )
+        self.bunker = Bunker.objects.create(
+            reference_number='B/SP-0039',
+            name_pl='K705',
+            name_en='K705',
+            category=self.category,
+            latitude=Decimal('52.0'),
+            longitude=Decimal('21.0')
+        )
+        self.activator = User.objects.create_user(
+            email='sp3fck@test.com',
+            callsign='SP3FCK',
+            password='testpass123'
+        )
+        # Registered hunter who already has statistics
+        self.hunter = User.objects.create_user(
+            email='sp3blz@test.com',
+            callsign='SP3BLZ',
+            password='testpass123'
+        )
+        
+        header = "<ADIF_VER:5>3.1.5\n<EOH>\n"
+        record = (
+            "<CALL:{}>{} <MODE:2>CW <BAND:3>40m <QSO_DATE:8>20251104 <TIME_ON:6>{} "
+            "<OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0039 <EOR>\n"
+        )
+        records = [
+            ('SP3BLZ', '201500'),
+            ('SQ3BMJ', '201600'),
+            ('SP3BLZ', '201500'),  # Duplicate within file
+            ('sp3bkr', '201700'),  # Lowercase callsign
+            ('SP3FCK', '201800'),  # Activator in own log
+            ('SQ3BMJ', '2099XX'),  # Invalid time
+        ]
+        self.adif = header + ''.join(
+            record.format(len(call), call, time_on) for call, time_on in records
+        )
+    
+    def _snapshot(self):
+        """Collect import results independent of primary keys"""
+        from accounts.models import PointsTransaction, UserStatistics
+        from activations.models import ActivationLog
+        
+        return {
+            'users': sorted(User.objects.values_list('callsign', 'email', 'is_active', 'auto_created')),
+            'logs': sorted(ActivationLog.objects.values_list(
+                'user__callsign', 'activator__callsign', 'activation_date',
+                'mode', 'band', 'is_b2b', 'verified', 'points_awarded',
+                'points_transaction__transaction_type'
+            )),
+            'transactions': sorted(PointsTransaction.objects.values_list(
+                'user__callsign', 'transaction_type', 'activator_points',
+                'hunter_points', 'reason', 'notes', 'created_by__callsign'
+            )),
+            'statistics': sorted(UserStatistics.objects.values_list(
+                'user__callsign', 'total_activator_qso', 'unique_activations',
+                'total_hunter_qso', 'unique_bunkers_hunted', 'activator_points',
+                'hunter_points', 'total_points'
+            )),
+        }
+    
+    def _import(self, bulk):
+        """Run the import and return (result, snapshot)"""
+        result = LogImportService().process_adif_upload(self.adif, self.activator, bulk=bulk)
+        for key in ('log_upload_id', 'batch_id'):
+            result.pop(key)
+        return result, self._snapshot()
+    
+    def test_bulk_matches_per_row(self):
+        """Bulk import produces the same logs, points and statistics"""
+        from django.db import transaction
+        
+        sid = transaction.savepoint()
+        per_row_result, per_row_state = self._import(bulk=False)
+        transaction.savepoint_rollback(sid)
+        
+        bulk_result, bulk_state = self._import(bulk=True)
+        
+        self.assertEqual(bulk_result, per_row_result)
+        self.assertEqual(bulk_state, per_row_state)
+        self.assertEqual(bulk_result['qsos_processed'], 4)
+        self.assertEqual(bulk_result['qsos_duplicates'], 1)
+    
+    def test_bulk_reimport_counts_duplicates(self):
+        """QSOs already in the database are reported as duplicates"""
+        LogImportService().process_adif_upload(self.adif, self.activator)
+        
+        result = LogImportService().process_adif_upload(
+            self.adif + "\n", self.activator
+        )
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['qsos_processed'], 0)
+        self.assertEqual(result['qsos_duplicates'], 5)
+    
+    def test_streamed_in_chunks(self):
+        """A file is validated whole, then imported chunk by chunk without keeping the records"""
+        import io
+        from activations.adif_files import import_adif_file
+        from activations.models import ActivationLog
+        
+        process_chunk = LogImportService._process_qsos_bulk
+        chunk_sizes = []
+        
+        def record_chunk(service, qsos):
+            chunk_sizes.append(len(qsos))
+            return process_chunk(service, qsos)
+        
+        with mock.patch.object(LogImportService, 'BULK_BATCH_SIZE', 4), \
+                mock.patch.object(LogImportService, '_process_qsos_bulk', record_chunk), \
+                mock.patch.object(ADIFParser, 'parse', side_effect=AssertionError('not streamed')):
+            result = import_adif_file(io.BytesIO(self.adif.encode('utf-8')), self.activator)
+        
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['qsos_processed'], 4)
+        self.assertEqual(chunk_sizes, [4, 2])
+        
+        # A bad record at the end rejects the file before anything is written
+        ActivationLog.objects.all().delete()
+        adif = self.adif + "<CALL:6>SQ3XYZ <MY_SIG_INFO:9>B/SP-0039 <EOR>\n"
+        result = import_adif_file(io.BytesIO(adif.encode('utf-8')), self.activator)
+        self.assertFalse(result['success'])
+        self.assertIn('QSO 7: Missing QSO_DATE field', result['errors'])
+        self.assertFalse(ActivationLog.objects.exists())
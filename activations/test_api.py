@@ -110,6 +110,19 @@ class ActivationLogAPITest(TestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get(f'/api/activation-logs/?user={self.user.id}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_band_is_normalized(self):
+        """Bands written through the API or the model are stored as 40m, not 40M"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(f'/api/activation-logs/{self.log.id}/', {'band': '40M'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['band'], '40m')
+        
+        log = ActivationLog.objects.create(
+            user=self.user, bunker=self.bunker, activation_date=timezone.now(), band=' 70CM'
+        )
+        log.refresh_from_db()
+        self.assertEqual(log.band, '70cm')
 
 
 class LicenseAPITest(TestCase):
@@ -0,0 +1,162 @@
+"""
+Tests for the batch B2B matcher.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import PointsTransaction, UserStatistics
+from accounts.points_service import PointsService
+from activations.b2b_matcher import find_history_matches, find_reciprocal_matches, sweep_pairs
+from activations.log_import_service import LogImportService
+from activations.models import ActivationLog, LogUpload
+from bunkers.models import Bunker, BunkerCategory
+
+User = get_user_model()
+
+
+class B2BMatcherTest(TestCase):
+    """Test pairing of reciprocal B2B logs"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.category = BunkerCategory.objects.create(
+            name_pl='Schron',
+            name_en='Shelter'
+        )
+        self.bunker = Bunker.objects.create(
+            reference_number='B/SP-0039',
+            name_pl='K705',
+            name_en='K705',
+            category=self.category,
+            latitude=Decimal('52.0'),
+            longitude=Decimal('21.0')
+        )
+        self.other_bunker = Bunker.objects.create(
+            reference_number='B/SP-0040',
+            name_pl='K706',
+            name_en='K706',
+            category=self.category,
+            latitude=Decimal('52.1'),
+            longitude=Decimal('21.1')
+        )
+        self.op_a = User.objects.create_user(
+            email='sp3fck@test.com', callsign='SP3FCK', password='testpass123'
+        )
+        self.op_b = User.objects.create_user(
+            email='sp3blz@test.com', callsign='SP3BLZ', password='testpass123'
+        )
+        self.start = timezone.make_aware(datetime(2025, 11, 4, 20, 0))
+
+    def _log(self, activator, user, minutes, bunker=None, is_b2b=True):
+        return ActivationLog.objects.create(
+            activator=activator,
+            user=user,
+            bunker=bunker or self.bunker,
+            activation_date=self.start + timedelta(minutes=minutes),
+            is_b2b=is_b2b,
+            qso_count=1
+        )
+
+    def test_sweep_pairs_each_log_once(self):
+        """Sweep pairs logs within the window and uses each log once"""
+        left = [self._log(self.op_a, self.op_b, m) for m in (0, 10, 120)]
+        right = [self._log(self.op_b, self.op_a, m) for m in (5, 200)]
+
+        pairs = sweep_pairs(left, right)
+
+        self.assertEqual(pairs, [(left[0], right[0])])
+
+    def test_find_reciprocal_matches_single_query(self):
+        """Candidates for all logs of an upload are loaded with one query"""
+        own = [self._log(self.op_a, self.op_b, m) for m in (0, 60, 120)]
+        theirs = [self._log(self.op_b, self.op_a, m) for m in (10, 65, 200)]
+        self._log(self.op_b, self.op_a, 125, bunker=self.other_bunker)
+        self._log(self.op_b, self.op_a, 119, is_b2b=False)
+
+        with self.assertNumQueries(1):
+            pairs = find_reciprocal_matches(own)
+
+        self.assertEqual(pairs, [(own[0], theirs[0]), (own[1], theirs[1])])
+
+    def test_confirm_b2b_pairs(self):
+        """Bulk confirmation matches PointsService.confirm_b2b results"""
+        log1 = self._log(self.op_a, self.op_b, 0)
+        log2 = self._log(self.op_b, self.op_a, 3)
+
+        confirmed = PointsService.confirm_b2b_pairs(find_reciprocal_matches([log1]))
+
+        self.assertEqual(len(confirmed), 1)
+        tx1, tx2 = confirmed[0]
+        self.assertEqual(tx1.user, self.op_a)
+        self.assertEqual(tx2.user, self.op_b)
+        self.assertEqual(tx1.reason, 'B2B confirmed with SP3BLZ')
+
+        log1.refresh_from_db()
+        log2.refresh_from_db()
+        self.assertTrue(log1.b2b_confirmed)
+        self.assertEqual(log1.b2b_partner, self.op_b)
+        self.assertEqual(log1.b2b_partner_log, log2)
+        self.assertEqual(log2.b2b_partner_log, log1)
+
+        for user in (self.op_a, self.op_b):
+            stats = UserStatistics.objects.get(user=user)
+            self.assertEqual(stats.b2b_points, 1)
+            self.assertEqual(stats.total_b2b_qso, 1)
+            self.assertEqual(stats.total_points, 1)
+
+        # Already confirmed pairs are skipped
+        self.assertEqual(PointsService.confirm_b2b_pairs([(log1, log2)]), [])
+        self.assertEqual(
+            PointsTransaction.objects.filter(
+                transaction_type=PointsTransaction.B2B_CONFIRMED
+            ).count(),
+            2
+        )
+
+    def test_import_confirms_b2b(self):
+        """Uploading the second side of a B2B QSO confirms it"""
+        reciprocal = self._log(self.op_b, self.op_a, 15)
+        adif = """<ADIF_VER:5>3.1.5
+<EOH>
+<CALL:6>SP3BLZ <MODE:3>SSB <BAND:3>80m <QSO_DATE:8>20251104 <TIME_ON:4>2010 <OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0039 <SIG:4>BOTA <SIG_INFO:9>B/SP-0040 <EOR>
+"""
+
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                ActivationLog.objects.filter(activator=self.op_a).delete()
+                LogUpload.objects.all().delete()
+                ActivationLog.objects.filter(id=reciprocal.id).update(
+                    b2b_confirmed=False, b2b_partner_log=None
+                )
+
+                result = LogImportService().process_adif_upload(
+                    adif, self.op_a, filename='log.adi', bulk=bulk
+                )
+
+                self.assertTrue(result['success'], result)
+                reciprocal.refresh_from_db()
+                self.assertTrue(reciprocal.b2b_confirmed)
+                self.assertEqual(reciprocal.b2b_partner_log.activator, self.op_a)
+
+    def test_match_b2b_history_command(self):
+        """Command confirms historical pairs that were never matched"""
+        self._log(self.op_a, self.op_b, 0)
+        self._log(self.op_b, self.op_a, 20)
+        self._log(self.op_a, self.op_b, 300)
+
+        out = StringIO()
+        call_command('match_b2b_history', '--dry-run', stdout=out)
+        self.assertIn('Found 1 unconfirmed B2B pairs', out.getvalue())
+        self.assertFalse(ActivationLog.objects.filter(b2b_confirmed=True).exists())
+
+        out = StringIO()
+        call_command('match_b2b_history', '--callsign', 'sp3blz', stdout=out)
+        self.assertIn('Confirmed 1 B2B pairs', out.getvalue())
+        self.assertEqual(ActivationLog.objects.filter(b2b_confirmed=True).count(), 2)
+        self.assertEqual(find_history_matches(), [])
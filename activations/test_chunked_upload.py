@@ -0,0 +1,158 @@
+"""
+Tests for chunked, resumable log uploads.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from activations.adif_files import import_adif_file, inspect_adif_file
+from activations.chunked_upload import expire_chunked_uploads, finalize_upload, get_spool_path
+from activations.models import ActivationLog, ChunkedUpload
+from bunkers.models import Bunker, BunkerCategory
+
+User = get_user_model()
+
+SPOOL_DIR = tempfile.mkdtemp()
+
+ADIF = b"""<ADIF_VER:5>3.1.5
+<EOH>
+<CALL:6>SP3BLZ <MODE:3>SSB <BAND:3>80M <QSO_DATE:8>20251104 <TIME_ON:6>201514 <OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0039 <EOR>
+<CALL:6>SQ3BMJ <MODE:3>SSB <FREQ:5>3.710 <QSO_DATE:8>20251104 <TIME_ON:6>201523 <OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0039 <COMMENT:4>\xa3\xf3d\x9f <EOR>
+"""
+
+
+@override_settings(CHUNKED_UPLOAD_DIR=SPOOL_DIR, LOG_UPLOAD_QUEUE_ENABLED=False)
+class ChunkedUploadTest(TestCase):
+    """Test the chunked upload protocol"""
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        Bunker.objects.create(
+            reference_number='B/SP-0039', name_pl='K705', name_en='K705', category=category,
+            latitude=Decimal('52.0'), longitude=Decimal('21.0')
+        )
+        self.activator = User.objects.create_user(
+            email='sp3fck@test.com',
+            callsign='SP3FCK',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.activator)
+    
+    def put_chunk(self, upload_id, offset, data):
+        return self.client.put(
+            f'/api/chunked-uploads/{upload_id}/chunk/?offset={offset}',
+            data, content_type='application/octet-stream'
+        )
+    
+    def test_resumable_upload(self):
+        """Chunks are appended, retries are harmless and gaps are refused"""
+        response = self.client.post('/api/chunked-uploads/', {'filename': 'log.adi', 'size': len(ADIF)})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload_id = response.data['id']
+        
+        half = len(ADIF) // 2
+        self.assertEqual(self.put_chunk(upload_id, 0, ADIF[:half]).data['received_size'], half)
+        # Retry of a chunk whose response was lost
+        self.assertEqual(self.put_chunk(upload_id, 0, ADIF[:half]).data['received_size'], half)
+        response = self.put_chunk(upload_id, half + 10, ADIF[half + 10:])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['received_size'], half)
+        
+        # Incomplete uploads cannot be finalized
+        response = self.client.post(f'/api/chunked-uploads/{upload_id}/finalize/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.put_chunk(upload_id, half, ADIF[half:])
+        self.assertEqual(self.client.get(f'/api/chunked-uploads/{upload_id}/').data['received_size'], len(ADIF))
+        
+        response = self.client.post(
+            f'/api/chunked-uploads/{upload_id}/finalize/',
+            {'sha256': hashlib.sha256(ADIF).hexdigest()}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['qsos_processed'], 2)
+        self.assertEqual(
+            sorted(ActivationLog.objects.values_list('band', flat=True)), ['80m', '80m']
+        )
+        upload = ChunkedUpload.objects.get(id=upload_id)
+        self.assertEqual(upload.status, 'completed')
+        self.assertEqual(upload.log_upload_id, response.data['log_upload_id'])
+        self.assertFalse(os.path.exists(get_spool_path(upload)))
+        
+        response = self.client.post(f'/api/chunked-uploads/{upload_id}/finalize/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_checksum_mismatch(self):
+        """A corrupted upload is not imported"""
+        upload_id = self.client.post('/api/chunked-uploads/', {'filename': 'log.adi'}).data['id']
+        self.put_chunk(upload_id, 0, ADIF)
+        
+        response = self.client.post(
+            f'/api/chunked-uploads/{upload_id}/finalize/', {'sha256': '0' * 64}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ChunkedUpload.objects.get(id=upload_id).status, 'failed')
+        self.assertFalse(ActivationLog.objects.exists())
+    
+    def test_import_error_marks_upload_failed(self):
+        """An exception during the import does not leave the upload processing"""
+        upload_id = self.client.post('/api/chunked-uploads/', {'filename': 'log.adi'}).data['id']
+        self.put_chunk(upload_id, 0, ADIF)
+        upload = ChunkedUpload.objects.get(id=upload_id)
+        
+        with mock.patch(
+            'activations.chunked_upload.LogImportService.process_adif_upload', side_effect=RuntimeError('boom')
+        ), self.assertLogs('activations.chunked_upload', 'ERROR'), self.assertRaises(RuntimeError):
+            finalize_upload(upload)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'failed')
+        self.assertFalse(os.path.exists(get_spool_path(upload)))
+    
+    def test_other_users_and_formats(self):
+        """Uploads are private and only .adi files are accepted"""
+        response = self.client.post('/api/chunked-uploads/', {'filename': 'log.txt'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        upload_id = self.client.post('/api/chunked-uploads/', {'filename': 'log.adi'}).data['id']
+        other = User.objects.create_user(email='other@test.com', callsign='SP1OTH', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.put_chunk(upload_id, 0, ADIF).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_expire_unfinished_uploads(self):
+        """Abandoned uploads are removed with their spool files"""
+        upload_id = self.client.post('/api/chunked-uploads/', {'filename': 'log.adi'}).data['id']
+        upload = ChunkedUpload.objects.get(id=upload_id)
+        self.assertTrue(os.path.exists(get_spool_path(upload)))
+        
+        self.assertEqual(expire_chunked_uploads(), 0)
+        ChunkedUpload.objects.filter(id=upload_id).update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(expire_chunked_uploads(), 1)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(os.path.exists(get_spool_path(upload)))
+    
+    def test_encoding_detection(self):
+        """Logs that are not UTF-8 are read with the fallback encoding"""
+        self.assertEqual(inspect_adif_file(BytesIO(ADIF)), (hashlib.sha256(ADIF).hexdigest(), 'cp1250'))
+        self.assertEqual(inspect_adif_file(BytesIO('<CALL:4>Łódź'.encode()))[1], 'utf-8')
+        
+        result = import_adif_file(BytesIO(ADIF), self.activator, filename='log.adi')
+        self.assertTrue(result['success'], result)
+        self.assertEqual(ActivationLog.objects.count(), 2)
@@ -0,0 +1,148 @@
+"""
+Tests for the log upload history backend and export.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from activations.adif_parser import ADIFParser
+from activations.log_history import (
+    decode_cursor, encode_cursor, export_adif, export_csv, filter_qsos, get_history_page, parse_filters
+)
+from activations.models import ActivationLog, LogUpload
+from bunkers.models import Bunker, BunkerCategory
+
+
+User = get_user_model()
+
+
+class LogHistoryTest(TestCase):
+    """Test filtered, keyset-paginated log history"""
+
+    def setUp(self):
+        self.activator = User.objects.create_user(
+            email='activator@test.com',
+            callsign='SP3ACT',
+            password='test123'
+        )
+        self.hunter = User.objects.create_user(
+            email='hunter@test.com',
+            callsign='SP9HNT',
+            password='test123'
+        )
+        category = BunkerCategory.objects.create(name_pl='Kategoria', name_en='Category')
+        self.bunker = Bunker.objects.create(
+            reference_number='B/SP-0039',
+            name_pl='Bunkier',
+            name_en='Bunker',
+            category=category,
+            latitude=Decimal('52.0'),
+            longitude=Decimal('21.0')
+        )
+
+        # Five uploads, one QSO each; two share the same upload time
+        now = timezone.now().replace(microsecond=0)
+        self.uploads = []
+        for i in range(5):
+            upload = LogUpload.objects.create(
+                user=self.activator, filename=f'log{i}.adi', file_format='ADIF', qso_count=1
+            )
+            uploaded_at = now - timedelta(hours=min(i, 3))
+            LogUpload.objects.filter(pk=upload.pk).update(uploaded_at=uploaded_at)
+            upload.uploaded_at = uploaded_at
+            self.uploads.append(upload)
+            ActivationLog.objects.create(
+                user=self.hunter,
+                activator=self.activator,
+                activator_callsign='SP3ACT/P',
+                bunker=self.bunker,
+                log_upload=upload,
+                activation_date=datetime(2025, 6, 1 + i, 10, 30, tzinfo=dt_timezone.utc),
+                band='40m' if i % 2 else '20m',
+                mode='SSB',
+                qso_count=1
+            )
+
+    def test_parse_filters(self):
+        """Inputs are normalized to the stored form"""
+        filters = parse_filters({
+            'callsign': ' sp9h ', 'bunker_ref': 'b/sp-00', 'mode': 'ssb', 'band': '40M',
+            'date_from': '2025-06-02', 'date_to': 'not a date'
+        })
+        self.assertEqual(filters.callsign, 'SP9H')
+        self.assertEqual(filters.bunker_ref, 'B/SP-00')
+        self.assertEqual(filters.mode, 'SSB')
+        self.assertEqual(filters.band, '40m')
+        self.assertIsNone(filters.date_to)
+        self.assertTrue(filters.active)
+        self.assertFalse(parse_filters({}).active)
+
+    def test_filter_qsos(self):
+        """Prefix, equality and inclusive date filters"""
+        self.assertEqual(filter_qsos(self.activator, parse_filters({'callsign': 'sp9'})).count(), 5)
+        self.assertEqual(filter_qsos(self.activator, parse_filters({'callsign': 'SP3ACT/P'})).count(), 5)
+        self.assertEqual(filter_qsos(self.activator, parse_filters({'callsign': 'SP1'})).count(), 0)
+        self.assertEqual(filter_qsos(self.activator, parse_filters({'band': '40m'})).count(), 2)
+        self.assertEqual(filter_qsos(self.activator, parse_filters({'date_to': '2025-06-02'})).count(), 2)
+        self.assertEqual(filter_qsos(self.hunter, parse_filters({})).count(), 0)
+
+    def test_keyset_pages(self):
+        """Pages follow each other without gaps, also across equal upload times"""
+        filters = parse_filters({})
+        seen = []
+        cursor = ''
+        while True:
+            page = get_history_page(self.activator, filters, cursor=cursor, page_size=2)
+            seen.extend(upload.id for upload in page['uploads'])
+            if page['next_cursor'] is None:
+                break
+            cursor = page['next_cursor']
+
+        expected = sorted(self.uploads, key=lambda u: (u.uploaded_at, u.id), reverse=True)
+        self.assertEqual(seen, [upload.id for upload in expected])
+
+    def test_page_qsos_filtered(self):
+        """Only uploads with matching QSOs are listed when filtering"""
+        page = get_history_page(self.activator, parse_filters({'band': '40m'}))
+        self.assertEqual(len(page['uploads']), 2)
+        for upload in page['uploads']:
+            self.assertEqual([qso.band for qso in page['qsos_by_upload'][upload.id]], ['40m'])
+
+    def test_cursor_round_trip(self):
+        upload = self.uploads[0]
+        self.assertEqual(decode_cursor(encode_cursor(upload)), (upload.uploaded_at, upload.id))
+        self.assertIsNone(decode_cursor('garbage'))
+
+    def test_export_csv(self):
+        lines = list(export_csv(filter_qsos(self.activator, parse_filters({'band': '20m'}))))
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('date,time,bunker'))
+        self.assertIn('B/SP-0039,SP3ACT/P,SP9HNT,20m,SSB,N', lines[1])
+
+    def test_export_adif_reimports(self):
+        """The ADIF export is read back by the ADIF parser"""
+        content = ''.join(export_adif(filter_qsos(self.activator, parse_filters({}))))
+        parser = ADIFParser(content)
+        data = parser.parse()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(parser.extract_bunker_reference(), 'B/SP-0039')
+        self.assertEqual(data['qsos'][0]['STATION_CALLSIGN'], 'SP3ACT/P')
+        self.assertEqual(data['qsos'][0]['QSO_DATE'], '20250605')
+
+    def test_view(self):
+        """History page and streamed export"""
+        self.client.force_login(self.activator)
+        response = self.client.get(reverse('log_history'), {'band': '40M'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['filtered_qso_count'], 2)
+        self.assertEqual(response.context['upload_count'], 5)
+
+        response = self.client.get(reverse('log_history'), {'band': '40m', 'export': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(body.strip().splitlines()), 3)
@@ -0,0 +1,229 @@
+"""
+Tests for the database-backed log upload queue.
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from activations.log_import_service import LogImportService
+from activations.models import ActivationLog, LogUpload
+from activations.upload_queue import (
+    claim_next_upload, enqueue_adif_upload, process_next_upload, requeue_stale_uploads
+)
+from bunkers.models import Bunker, BunkerCategory
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class LogUploadQueueTest(TestCase):
+    """Test queueing and processing of log uploads"""
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+    
+    def setUp(self):
+        """Set up test data"""
+        self.category = BunkerCategory.objects.create(
+            name_pl='Schron',
+            name_en='Shelter'
+        )
+        self.bunker = Bunker.objects.create(
+            reference_number='B/SP-0039',
+            name_pl='K705',
+            name_en='K705',
+            category=self.category,
+            latitude=Decimal('52.0'),
+            longitude=Decimal('21.0')
+        )
+        self.activator = User.objects.create_user(
+            email='sp3fck@test.com',
+            callsign='SP3FCK',
+            password='testpass123'
+        )
+        self.adif = b"""<ADIF_VER:5>3.1.5
+<EOH>
+<CALL:6>SP3BLZ <MODE:3>SSB <BAND:3>80m <QSO_DATE:8>20251104 <TIME_ON:6>201514 <OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0039 <EOR>
+<CALL:6>SQ3BMJ <MODE:3>SSB <BAND:3>80m <QSO_DATE:8>20251104 <TIME_ON:6>201523 <OPERATOR:6>SP3FCK <MY_SIG_INFO:9>B/SP-0039 <EOR>
+"""
+    
+    def test_enqueue_stores_pending_upload(self):
+        """Enqueued uploads are pending and keep the raw file"""
+        result = enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        
+        self.assertTrue(result['success'])
+        log_upload = LogUpload.objects.get(id=result['log_upload_id'])
+        self.assertEqual(log_upload.status, 'pending')
+        with log_upload.raw_file.open('rb') as raw_file:
+            self.assertEqual(raw_file.read(), self.adif)
+        self.assertEqual(ActivationLog.objects.count(), 0)
+    
+    def test_enqueue_rejects_duplicate_file(self):
+        """The same file cannot be queued twice"""
+        enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        result = enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        
+        self.assertFalse(result['success'])
+        self.assertTrue(result['duplicate_upload'])
+    
+    def test_process_next_upload(self):
+        """Worker imports the queued upload and records progress"""
+        result = enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        
+        process_result = process_next_upload()
+        
+        self.assertTrue(process_result['success'])
+        self.assertEqual(process_result['log_upload_id'], result['log_upload_id'])
+        log_upload = LogUpload.objects.get(id=result['log_upload_id'])
+        self.assertEqual(log_upload.status, 'completed')
+        self.assertEqual(log_upload.processed_qso_count, 2)
+        self.assertEqual(log_upload.get_progress_percent(), 100)
+        self.assertIsNotNone(log_upload.finished_at)
+        self.assertEqual(ActivationLog.objects.filter(log_upload=log_upload).count(), 2)
+        self.assertIsNone(process_next_upload())
+    
+    def test_failed_import_resumes(self):
+        """Committed chunks keep their points batch; a retry of the file resumes after them"""
+        result = enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        process_chunk = LogImportService._process_qsos_bulk
+        calls = []
+        
+        def fail_second_chunk(service, qsos):
+            calls.append(len(qsos))
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return process_chunk(service, qsos)
+        
+        with mock.patch.object(LogImportService, 'BULK_BATCH_SIZE', 1), \
+                mock.patch.object(LogImportService, '_process_qsos_bulk', fail_second_chunk), \
+                self.assertLogs('activations.log_import_service', 'ERROR'):
+            self.assertFalse(process_next_upload()['success'])
+        
+        log_upload = LogUpload.objects.get(id=result['log_upload_id'])
+        self.assertEqual(log_upload.status, 'failed')
+        self.assertEqual(ActivationLog.objects.filter(log_upload=log_upload).count(), 1)
+        # Activator and hunter transaction of the committed chunk
+        self.assertEqual(log_upload.points_batch.transactions.count(), 2)
+        
+        retry = enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        self.assertTrue(retry['success'])
+        self.assertEqual(retry['log_upload_id'], log_upload.id)
+        self.assertTrue(process_next_upload()['success'])
+        
+        log_upload.refresh_from_db()
+        self.assertEqual(log_upload.status, 'completed')
+        self.assertEqual(ActivationLog.objects.filter(log_upload=log_upload).count(), 2)
+        self.assertEqual(log_upload.points_batch.transactions.count(), 4)
+    
+    def test_process_invalid_encoding_fails(self):
+        """Non-UTF-8 files are marked as failed"""
+        enqueue_adif_upload(b'\xff\xfe<EOH>', self.activator, filename='bad.adi')
+        
+        process_result = process_next_upload()
+        
+        self.assertFalse(process_result['success'])
+        log_upload = LogUpload.objects.get()
+        self.assertEqual(log_upload.status, 'failed')
+        self.assertIn('UTF-8', log_upload.error_message)
+    
+    def test_claim_marks_processing(self):
+        """Claimed uploads are not handed out again"""
+        enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        
+        log_upload = claim_next_upload()
+        
+        self.assertEqual(log_upload.status, 'processing')
+        self.assertIsNone(claim_next_upload())
+    
+    def test_requeue_stale_uploads(self):
+        """Uploads abandoned by a crashed worker go back to pending"""
+        enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        log_upload = claim_next_upload()
+        # A long import that still reports progress is left alone
+        LogUpload.objects.filter(id=log_upload.id).update(
+            started_at=timezone.now() - timedelta(hours=1),
+            heartbeat_at=timezone.now() - timedelta(minutes=1)
+        )
+        self.assertEqual(requeue_stale_uploads(timedelta(minutes=30)), 0)
+        
+        LogUpload.objects.filter(id=log_upload.id).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale_uploads(timedelta(minutes=30)), 1)
+        log_upload.refresh_from_db()
+        self.assertEqual(log_upload.status, 'pending')
+        self.assertIsNone(log_upload.heartbeat_at)
+    
+    def test_chunks_refresh_heartbeat(self):
+        """Every committed chunk refreshes the heartbeat of the upload"""
+        result = enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        log_upload = claim_next_upload()
+        LogUpload.objects.filter(id=log_upload.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        log_upload.refresh_from_db()
+        
+        with mock.patch.object(LogUpload, 'save', autospec=True, side_effect=LogUpload.save) as save:
+            with mock.patch.object(LogImportService, 'BULK_BATCH_SIZE', 1):
+                from activations.upload_queue import process_upload
+                self.assertTrue(process_upload(log_upload)['success'])
+        heartbeats = [
+            call for call in save.call_args_list
+            if 'heartbeat_at' in (call.kwargs.get('update_fields') or ())
+        ]
+        # After parsing and after each of the two chunks
+        self.assertEqual(len(heartbeats), 3)
+        log_upload = LogUpload.objects.get(id=result['log_upload_id'])
+        self.assertGreater(log_upload.heartbeat_at, timezone.now() - timedelta(minutes=1))
+    
+    @override_settings(LOG_UPLOAD_QUEUE_ENABLED=True)
+    def test_api_upload_is_queued(self):
+        """API upload returns the LogUpload id immediately when queueing"""
+        client = APIClient()
+        client.force_authenticate(user=self.activator)
+        
+        response = client.post(
+            '/api/activation-logs/upload_adif/',
+            {'file': SimpleUploadedFile('log.adi', self.adif)},
+            format='multipart'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        log_upload_id = response.data['log_upload_id']
+        
+        response = client.get(f'/api/log-uploads/{log_upload_id}/progress/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'pending')
+        
+        process_next_upload()
+        
+        response = client.get(f'/api/log-uploads/{log_upload_id}/progress/')
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(response.data['processed_qso_count'], 2)
+        self.assertEqual(response.data['progress_percent'], 100)
+    
+    def test_progress_of_other_user_hidden(self):
+        """Users cannot see the uploads of other users"""
+        result = enqueue_adif_upload(self.adif, self.activator, filename='log.adi')
+        other = User.objects.create_user(
+            email='other@test.com',
+            callsign='OTHER',
+            password='testpass123'
+        )
+        client = APIClient()
+        client.force_authenticate(user=other)
+        
+        response = client.get(f"/api/log-uploads/{result['log_upload_id']}/progress/")
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,223 @@
+"""
+Database-backed job queue for asynchronous log upload processing.
+
+Uploads are stored as pending LogUpload rows together with the raw file and
+processed by worker processes (`manage.py process_log_uploads`), so a slow
+import no longer holds a web worker. No external broker is needed: workers
+claim jobs with SELECT ... FOR UPDATE SKIP LOCKED.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .adif_files import UnsupportedEncodingError, inspect_adif_file
+from .log_import_service import LogImportService
+from .models import LogUpload
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_adif_upload(file_content: bytes, uploader_user, filename: str = None) -> Dict:
+    """
+    Store an uploaded ADIF file as a pending LogUpload job.
+
+    Args:
+        file_content: Raw bytes of the .adi file
+        uploader_user: User uploading the file
+        filename: Original filename
+
+    Returns:
+        Dictionary with 'success', 'log_upload_id' and 'status', or
+        'errors' if the same file was already uploaded
+    """
+    # Same checksum as LogImportService (sha256 of the raw file)
+    file_checksum = hashlib.sha256(file_content).hexdigest()
+    return enqueue_adif_file(ContentFile(file_content), uploader_user, file_checksum, filename)
+
+
+def enqueue_adif_file(file, uploader_user, file_checksum: str, filename: str = None) -> Dict:
+    """
+    Store an ADIF file object as a pending LogUpload job without reading it into memory.
+
+    Args:
+        file: Binary file object positioned at the start
+        uploader_user: User uploading the file
+        file_checksum: SHA-256 of the file
+        filename: Original filename
+
+    Returns:
+        Same as enqueue_adif_upload()
+    """
+    existing_uploads = LogUpload.objects.filter(
+        file_checksum=file_checksum,
+        user=uploader_user
+    )
+    existing_upload = existing_uploads.exclude(status='failed').first()
+
+    if existing_upload:
+        return {
+            'success': False,
+            'errors': [f'This file was already uploaded on {existing_upload.uploaded_at.strftime("%Y-%m-%d %H:%M")}'],
+            'qsos_processed': 0,
+            'hunters_updated': 0,
+            'duplicate_upload': True
+        }
+
+    filename = filename or 'unknown.adi'
+
+    # A failed upload of the same file is queued again and resumes after
+    # the chunks it committed, with the same points batch
+    log_upload = existing_uploads.filter(status='failed').first()
+    if log_upload is not None:
+        if log_upload.raw_file:
+            log_upload.raw_file.delete(save=False)
+        log_upload.filename = filename
+        log_upload.status = 'pending'
+        log_upload.error_message = ''
+        log_upload.started_at = None
+        log_upload.heartbeat_at = None
+        log_upload.finished_at = None
+    else:
+        log_upload = LogUpload(
+            user=uploader_user,
+            filename=filename,
+            file_format='ADIF',
+            file_checksum=file_checksum,
+            status='pending'
+        )
+    log_upload.raw_file.save(filename, file if isinstance(file, File) else File(file), save=False)
+    log_upload.save()
+
+    logger.info(f"Queued log upload {log_upload.id} ({filename}) for {uploader_user.callsign}")
+
+    return {
+        'success': True,
+        'queued': True,
+        'log_upload_id': log_upload.id,
+        'status': log_upload.status,
+        'errors': []
+    }
+
+
+def claim_next_upload() -> Optional[LogUpload]:
+    """
+    Claim the oldest pending upload for processing.
+
+    Rows locked by other workers are skipped, so several workers can poll
+    the queue concurrently without processing the same upload twice.
+
+    Returns:
+        The claimed LogUpload (now 'processing') or None if the queue is empty
+    """
+    with transaction.atomic():
+        log_upload = (
+            LogUpload.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('uploaded_at', 'id')
+            .first()
+        )
+        if log_upload is None:
+            return None
+
+        log_upload.status = 'processing'
+        log_upload.started_at = log_upload.heartbeat_at = timezone.now()
+        log_upload.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+
+    return log_upload
+
+
+def process_upload(log_upload: LogUpload) -> Dict:
+    """
+    Import a claimed upload, reporting progress in processed_qso_count.
+
+    Args:
+        log_upload: LogUpload returned by claim_next_upload()
+
+    Returns:
+        LogImportService result dictionary
+    """
+    try:
+        with log_upload.raw_file.open('rb') as raw_file:
+            file_checksum, encoding = inspect_adif_file(raw_file)
+            service = LogImportService()
+            result = service.process_adif_upload(
+                raw_file,
+                log_upload.user,
+                filename=log_upload.filename,
+                log_upload=log_upload,
+                incremental=True,
+                file_checksum=log_upload.file_checksum or file_checksum,
+                encoding=encoding
+            )
+    except UnsupportedEncodingError as e:
+        result = {
+            'success': False,
+            'errors': [str(e)],
+            'qsos_processed': 0,
+            'hunters_updated': 0
+        }
+    except (OSError, ValueError) as e:
+        result = {
+            'success': False,
+            'errors': [f'Stored log file could not be read: {e}'],
+            'qsos_processed': 0,
+            'hunters_updated': 0
+        }
+
+    log_upload.refresh_from_db()
+    if not result['success'] and log_upload.status != 'failed':
+        log_upload.status = 'failed'
+        log_upload.error_message = '; '.join(result.get('errors', []))
+    log_upload.finished_at = timezone.now()
+    log_upload.save(update_fields=['status', 'error_message', 'finished_at'])
+
+    logger.info(
+        f"Processed log upload {log_upload.id}: {log_upload.status} "
+        f"({log_upload.processed_qso_count}/{log_upload.qso_count} QSOs)"
+    )
+
+    return result
+
+
+def process_next_upload() -> Optional[Dict]:
+    """
+    Claim and process one pending upload.
+
+    Returns:
+        Result dictionary, or None if there was nothing to process
+    """
+    log_upload = claim_next_upload()
+    if log_upload is None:
+        return None
+    return process_upload(log_upload)
+
+
+def requeue_stale_uploads(older_than: timedelta) -> int:
+    """
+    Put uploads back in the queue whose worker died while processing them.
+
+    The import refreshes heartbeat_at after every committed chunk, so an
+    upload is only considered abandoned when its worker stopped reporting
+    progress, however long the import takes. Re-processing is safe: QSOs
+    imported before the crash are skipped as duplicates, and the new
+    transactions join the upload's points batch.
+
+    Args:
+        older_than: How long the worker of an upload may stay silent
+
+    Returns:
+        Number of uploads requeued
+    """
+    cutoff = timezone.now() - older_than
+    return LogUpload.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status='processing',
+        raw_file__isnull=False
+    ).exclude(raw_file='').update(status='pending', started_at=None, heartbeat_at=None)
@@ -1,21 +1,25 @@
 """
 API views for activations app.
 """
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser, MultiPartParser, FormParser
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiRequest
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db import models
+from django.conf import settings
 
-from .models import ActivationKey, ActivationLog, License
+from .models import ActivationKey, ActivationLog, ChunkedUpload, License, LogUpload
 from .serializers import (
-    ActivationKeySerializer, ActivationLogSerializer,
-    LicenseSerializer, ActivationKeyUsageSerializer
+    ActivationKeySerializer, ActivationLogSerializer, ChunkedUploadSerializer,
+    LicenseSerializer, ActivationKeyUsageSerializer, LogUploadSerializer
 )
-from .log_import_service import LogImportService
+from .adif_files import UnsupportedEncodingError, import_adif_file, inspect_adif_file
+from .chunked_upload import ChunkOffsetError, append_chunk, finalize_upload, start_upload
+from .upload_queue import enqueue_adif_file
 
 
 @extend_schema_view(
@@ -177,6 +181,11 @@ class ActivationLogViewSet(viewsets.ModelViewSet):
         4. Award hunter points (1 point per QSO, 2x for B2B)
         5. Award activator points
         6. Update user statistics
+        
+        With LOG_UPLOAD_QUEUE_ENABLED the file is only stored and queued;
+        the response (202) contains log_upload_id for polling
+        /api/log-uploads/{id}/progress/. Large logs can be sent in
+        resumable chunks through /api/chunked-uploads/ instead.
         """
         # Check for uploaded file
         if 'file' not in request.FILES:
@@ -194,18 +203,19 @@ class ActivationLogViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Read file content
-        try:
-            file_content = uploaded_file.read().decode('utf-8')
-        except UnicodeDecodeError:
-            return Response(
-                {'error': 'Invalid file encoding. File must be UTF-8 encoded.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # Queue for background processing
+        if settings.LOG_UPLOAD_QUEUE_ENABLED:
+            try:
+                file_checksum, encoding = inspect_adif_file(uploaded_file)
+            except UnsupportedEncodingError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            result = enqueue_adif_file(uploaded_file, request.user, file_checksum, filename=uploaded_file.name)
+            if result['success']:
+                return Response(result, status=status.HTTP_202_ACCEPTED)
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
         
-        # Process the log
-        service = LogImportService()
-        result = service.process_adif_upload(file_content, request.user)
+        # Process the log, streaming the file into the parser
+        result = import_adif_file(uploaded_file, request.user, filename=uploaded_file.name)
         
         if result['success']:
             return Response(result, status=status.HTTP_200_OK)
@@ -213,6 +223,131 @@ class ActivationLogViewSet(viewsets.ModelViewSet):
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
 
+@extend_schema_view(
+    list=extend_schema(description="List own log uploads", tags=["activations"]),
+    retrieve=extend_schema(description="Retrieve log upload details", tags=["activations"]),
+)
+class LogUploadViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for LogUpload model - upload history and queue progress"""
+    queryset = LogUpload.objects.all()
+    serializer_class = LogUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status']
+    
+    def get_queryset(self):
+        """Non-staff users only see their own uploads"""
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+    
+    @extend_schema(
+        description="Live processing progress of a (queued) log upload",
+        responses={200: LogUploadSerializer},
+        tags=["activations"]
+    )
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """Return status and processed_qso_count of an upload"""
+        log_upload = self.get_object()
+        return Response(LogUploadSerializer(log_upload).data)
+
+
+class ChunkParser(BaseParser):
+    """Raw request body of an upload chunk"""
+    media_type = 'application/octet-stream'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        limit = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+        data = stream.read(limit + 1)
+        if len(data) > limit:
+            raise ParseError(f'Chunks may be at most {limit} bytes.')
+        return data
+
+
+@extend_schema_view(
+    create=extend_schema(description="Start a chunked log upload", tags=["activations"]),
+    retrieve=extend_schema(description="Upload state; resume from received_size", tags=["activations"]),
+)
+class ChunkedUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable upload of large ADIF logs (see activations.chunked_upload):
+    POST to start, PUT each chunk to /{id}/chunk/?offset=N as
+    application/octet-stream, then POST /{id}/finalize/.
+    """
+    queryset = ChunkedUpload.objects.all()
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Users only see their own uploads"""
+        return super().get_queryset().filter(user=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        """Start an upload; returns its id and the chunk size to use"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = start_upload(
+                request.user,
+                serializer.validated_data['filename'],
+                serializer.validated_data.get('size')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = self.get_serializer(upload).data
+        data['chunk_size'] = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @extend_schema(
+        description="Write a chunk (raw bytes) at ?offset=; resending a received chunk is harmless",
+        request={'application/octet-stream': {'type': 'string', 'format': 'binary'}},
+        responses={200: ChunkedUploadSerializer},
+        tags=["activations"]
+    )
+    @action(detail=True, methods=['put'], parser_classes=[ChunkParser])
+    def chunk(self, request, pk=None):
+        """Append a chunk; 409 with the expected offset if it does not fit"""
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', ''))
+        except ValueError:
+            return Response({'error': 'offset is required'}, status=status.HTTP_400_BAD_REQUEST)
+        data = request.data if isinstance(request.data, bytes) else b''
+        
+        try:
+            upload = append_chunk(upload, offset, data)
+        except ChunkOffsetError as e:
+            return Response(
+                {'error': str(e), 'received_size': e.expected_offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+    
+    @extend_schema(
+        description="Import the uploaded file; optional 'sha256' is verified",
+        tags=["activations"]
+    )
+    @action(detail=True, methods=['post'], parser_classes=[JSONParser, FormParser])
+    def finalize(self, request, pk=None):
+        """Import (or queue) the complete file"""
+        upload = self.get_object()
+        try:
+            result = finalize_upload(upload, request.data.get('sha256'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not result['success']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        if result.get('queued'):
+            return Response(result, status=status.HTTP_202_ACCEPTED)
+        return Response(result, status=status.HTTP_200_OK)
+
+
 @extend_schema_view(
     list=extend_schema(description="List licenses", tags=["activations"]),
     retrieve=extend_schema(description="Retrieve license details", tags=["activations"]),
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Microbenchmark: streaming ADIF tokenizer vs. the previous regex parser.
+
+Usage:
+    python benchmark_adif_parser.py [record_count]
+"""
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bota_project.settings')
+
+import django
+django.setup()
+
+from activations.adif_parser import ADIFParser
+
+# Regex parser used before the streaming tokenizer (split on <EOH>/<EOR>)
+LEGACY_FIELD_PATTERN = re.compile(r'<(\w+):(\d+)(?::(\w))?>([^<]*)')
+
+
+def legacy_parse_fields(text):
+    fields = {}
+    for match in LEGACY_FIELD_PATTERN.finditer(text):
+        fields[match.group(1).upper()] = match.group(4)[:int(match.group(2))].strip()
+    return fields
+
+
+def legacy_parse(content):
+    parts = content.split('<EOH>')
+    if len(parts) == 2:
+        header_text, records_text = parts
+        legacy_parse_fields(header_text)
+    else:
+        records_text = content
+
+    qsos = []
+    for record in records_text.split('<EOR>'):
+        record = record.strip()
+        if not record:
+            continue
+        qso = legacy_parse_fields(record)
+        if qso and 'CALL' in qso:
+            qsos.append(qso)
+    return qsos
+
+
+def generate_log(record_count):
+    """Build an ADIF log with record_count QSOs"""
+    header = "Benchmark log\n<ADIF_VER:5>3.1.5\n<PROGRAMID:9>benchmark\n<EOH>\n"
+    records = []
+    for i in range(record_count):
+        call = f"SP{i % 10}A{i % 1000:03d}"
+        time_on = f"{(i // 3600) % 24:02d}{(i // 60) % 60:02d}{i % 60:02d}"
+        records.append(
+            f"<CALL:{len(call)}>{call} <MODE:3>SSB <BAND:3>40m <FREQ:8>7.150000 "
+            f"<QSO_DATE:8>20251104 <TIME_ON:6>{time_on} <RST_RCVD:2>59 <RST_SENT:2>59 "
+            f"<STATION_CALLSIGN:6>SP3FCK <OPERATOR:6>SP3FCK <MY_SIG:6>WWBOTA "
+            f"<MY_SIG_INFO:9>B/SP-0039 <EOR>\n"
+        )
+    return header + ''.join(records)
+
+
+def best_of(func, repeat=3):
+    """Return the best wall-clock time of several runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    content = generate_log(record_count)
+    print(f"Log: {record_count} records, {len(content) / 1024 / 1024:.1f} MB")
+
+    assert legacy_parse(content) == ADIFParser(content).parse()['qsos']
+
+    legacy = best_of(lambda: legacy_parse(content))
+    streaming = best_of(lambda: ADIFParser(content).parse())
+    streaming_bytes = best_of(lambda: sum(1 for _ in ADIFParser(content.encode()).iter_qsos()))
+
+    print(f"Regex parser:                {legacy:.3f}s")
+    print(f"Streaming tokenizer (parse): {streaming:.3f}s ({legacy / streaming:.2f}x)")
+    print(f"Streaming tokenizer (iter):  {streaming_bytes:.3f}s ({legacy / streaming_bytes:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,7 @@ from cluster.views import (
     ClusterViewSet, ClusterMemberViewSet, ClusterAlertViewSet, SpotViewSet
 )
 from activations.views import (
-    ActivationKeyViewSet, ActivationLogViewSet, LicenseViewSet
+    ActivationKeyViewSet, ActivationLogViewSet, ChunkedUploadViewSet, LicenseViewSet, LogUploadViewSet
 )
 from diplomas.views import (
     DiplomaTypeViewSet, DiplomaViewSet, DiplomaProgressViewSet, DiplomaVerificationViewSet
@@ -49,6 +49,8 @@ router.register(r'spots', SpotViewSet, basename='spot')
 router.register(r'activation-keys', ActivationKeyViewSet, basename='activationkey')
 router.register(r'activation-logs', ActivationLogViewSet, basename='activationlog')
 router.register(r'licenses', LicenseViewSet, basename='license')
+router.register(r'log-uploads', LogUploadViewSet, basename='logupload')
+router.register(r'chunked-uploads', ChunkedUploadViewSet, basename='chunkedupload')
 
 # Register diplomas viewsets
 router.register(r'diploma-types', DiplomaTypeViewSet, basename='diplomatype')
@@ -2,6 +2,10 @@
 ASGI config for bota_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is the production entry point (gunicorn with uvicorn workers, see
+gunicorn_config.py and render.yaml): long-lived responses such as the live
+spot feed (/api/spots/stream/) are async views, which a sync WSGI worker
+would block on for as long as a client stays connected.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -1,17 +1,13 @@
-from django.utils import timezone
-from cluster.models import Spot
+from cluster.active_spots import get_active_spots
 
 
 def active_activations(request):
     """Context processor to show LIVE badge when there are active spots"""
-    # Check if there are any active spots (not expired)
+    # Count active spots (not expired) from the cached registry
     # This shows real ON AIR activity
-    active_spots_count = Spot.objects.filter(
-        is_active=True,
-        expires_at__gt=timezone.now()
-    ).count()
+    active_spots_count = get_active_spots().count
     
     return {
         'has_active_activations': active_spots_count > 0,
         'active_spots_count': active_spots_count,
-    }
\ No newline at end of file
+    }
@@ -200,6 +200,63 @@ WHITENOISE_INDEX_FILE = False  # Disable directory index
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Log upload queue
+# When enabled, uploaded logs are stored and processed by a separate worker
+# (python manage.py process_log_uploads --loop) instead of inside the request
+LOG_UPLOAD_QUEUE_ENABLED = os.environ.get('LOG_UPLOAD_QUEUE_ENABLED', 'False') == 'True'
+
+# Chunked log uploads (/api/chunked-uploads/)
+# Chunks are spooled to CHUNKED_UPLOAD_DIR until the upload is finalized;
+# unfinished uploads are removed after CHUNKED_UPLOAD_EXPIRE_HOURS by the
+# upload queue worker. Logs that are not UTF-8 are read as ADIF_FALLBACK_ENCODING.
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', str(BASE_DIR / 'upload_chunks'))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', str(200 * 1024 * 1024)))
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+CHUNKED_UPLOAD_EXPIRE_HOURS = int(os.environ.get('CHUNKED_UPLOAD_EXPIRE_HOURS', '24'))
+ADIF_FALLBACK_ENCODING = os.environ.get('ADIF_FALLBACK_ENCODING', 'cp1250')
+
+# Leaderboard snapshot
+# Public statistics and the leaderboard API read a cached snapshot that is
+# rebuilt when older than this many seconds
+# (or ahead of time by python manage.py build_leaderboard_snapshot)
+LEADERBOARD_SNAPSHOT_MAX_AGE = int(os.environ.get('LEADERBOARD_SNAPSHOT_MAX_AGE', '300'))
+
+# Site root used in links that are generated outside a request
+# (e.g. diploma verification QR codes rendered by warm_diploma_pdfs)
+SITE_URL = os.environ.get('SITE_URL', '')
+
+# Diploma PDF render cache (diplomas.pdf_cache)
+# Rendered PDFs are stored in the media storage; set DIPLOMA_PDF_SENDFILE to
+# 'x-sendfile' (Apache) or 'x-accel-redirect' (nginx, files served from the
+# internal location DIPLOMA_PDF_ACCEL_PREFIX) to let the web server send them
+DIPLOMA_PDF_SENDFILE = os.environ.get('DIPLOMA_PDF_SENDFILE', '')
+DIPLOMA_PDF_ACCEL_PREFIX = os.environ.get('DIPLOMA_PDF_ACCEL_PREFIX', '/protected-media/')
+
+# Decoded diploma template images kept per process (diplomas.pdf_assets)
+DIPLOMA_TEMPLATE_IMAGE_CACHE_SIZE = int(os.environ.get('DIPLOMA_TEMPLATE_IMAGE_CACHE_SIZE', '8'))
+
+# Profile page statistics (accounts.profile_stats)
+# Cached per user and rebuilt after the user's logs change; this only bounds
+# how long an unused entry stays in the cache
+PROFILE_STATS_CACHE_TIMEOUT = int(os.environ.get('PROFILE_STATS_CACHE_TIMEOUT', '3600'))
+
+# Live spot feed (server-sent events at /api/spots/stream/)
+# Serve with an ASGI server (bota_project.asgi) so open streams do not hold worker threads.
+# Events are stored in the database (pruned by sweep_spots after an hour).
+# Clients can resume from any of the last SPOT_EVENT_BUFFER_SIZE events;
+# each stream ends after SPOT_STREAM_MAX_SECONDS and the client reconnects.
+SPOT_EVENT_BUFFER_SIZE = int(os.environ.get('SPOT_EVENT_BUFFER_SIZE', '500'))
+SPOT_STREAM_MAX_SECONDS = int(os.environ.get('SPOT_STREAM_MAX_SECONDS', '300'))
+SPOT_STREAM_POLL_INTERVAL = float(os.environ.get('SPOT_STREAM_POLL_INTERVAL', '1.0'))
+
+# Spot sweeper (python manage.py sweep_spots --loop)
+# Inactive spots not updated for this many days are moved to ArchivedSpot
+SPOT_ARCHIVE_AFTER_DAYS = int(os.environ.get('SPOT_ARCHIVE_AFTER_DAYS', '30'))
+
+# Band plan for frequency to band lookup (cluster.band_plan)
+# 1-3 restricts bands to an IARU region, 0 accepts the full ADIF band list
+BAND_PLAN_REGION = int(os.environ.get('BAND_PLAN_REGION', '0'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -309,18 +366,45 @@ SERVER_EMAIL = DEFAULT_FROM_EMAIL
 PASSWORD_RESET_TIMEOUT = 300  # 5 minutes in seconds
 
 # Cache Configuration
-# Using LocMemCache for development (in-memory caching)
-# For production, consider Redis: pip install django-redis
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'bota-cache',
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000,  # Maximum number of cached items
-        },
-        'TIMEOUT': 300,  # Default timeout: 5 minutes
+# The cache holds state shared by all worker processes (bunker data version,
+# active spot registry, leaderboard snapshot, ...), so every process must use
+# the same backend: Redis if REDIS_URL is set, otherwise the database cache
+# table CACHE_TABLE (created by `migrate`, accounts/0006_create_cache_table,
+# and by `python manage.py createcachetable` after renaming CACHE_TABLE).
+# LocMemCache (per process) is only used for local development with DEBUG.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_TABLE = os.environ.get('CACHE_TABLE', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 300,  # Default timeout: 5 minutes
+        }
+    }
+elif DEBUG and not CACHE_TABLE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bota-cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,  # Maximum number of cached items
+            },
+            'TIMEOUT': 300,  # Default timeout: 5 minutes
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': CACHE_TABLE or 'bota_cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 50000,
+            },
+            'TIMEOUT': 300,  # Default timeout: 5 minutes
+        }
     }
-}
 
 # Cache key prefix to avoid conflicts
 CACHE_MIDDLEWARE_KEY_PREFIX = 'bota'
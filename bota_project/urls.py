@@ -20,6 +20,7 @@ from .public_api_router import public_router, urlpatterns as public_api_urlpatte
 from frontend.health import health_check
 from frontend.static_debug import static_files_debug
 from frontend.diagnostics import production_diagnostics
+from cluster.views import spot_stream
 
 # Import admin customizations
 from . import admin as admin_customizations
@@ -40,6 +41,9 @@ urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
     
+    # Live spot feed (server-sent events; before the router, which would match spots/<pk>/)
+    path('api/spots/stream/', spot_stream, name='spot_stream'),
+    
     # API endpoints (not translated for consistency)
     path('api/', include(router.urls)),
     
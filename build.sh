@@ -33,6 +33,9 @@ echo ""
 echo "=== Running migrations ==="
 python manage.py migrate --no-input --verbosity 2
 echo ""
+echo "=== Creating cache table ==="
+python manage.py createcachetable
+echo ""
 echo "=== Showing migration status ==="
 python manage.py showmigrations
 
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
+from .data_version import bump_bunker_data_version
 from .models import (
     BunkerCategory,
     Bunker,
@@ -156,6 +157,8 @@ class BunkerAdmin(admin.ModelAdmin):
             verified_by=request.user,
             verification_date=timezone.now()
         )
+        # queryset.update() skips the Bunker signals
+        bump_bunker_data_version()
         self.message_user(request, f'{updated} bunker(s) marked as verified.')
     mark_as_verified.short_description = 'Mark selected bunkers as verified'
     
@@ -166,6 +169,8 @@ class BunkerAdmin(admin.ModelAdmin):
             verified_by=None,
             verification_date=None
         )
+        # queryset.update() skips the Bunker signals
+        bump_bunker_data_version()
         self.message_user(request, f'{updated} bunker(s) marked as unverified.')
     mark_as_unverified.short_description = 'Mark selected bunkers as unverified'
     
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class BunkersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bunkers'
+
+    def ready(self):
+        """
+        Import signals when the app is ready.
+        """
+        import bunkers.signals  # noqa
@@ -0,0 +1,30 @@
+"""
+Version stamp of the bunker data.
+
+Process-local structures derived from Bunker rows (spatial index, map
+layers, reference lookups) remember the version they were built from and
+rebuild when the shared stamp in the cache changes. The stamp is bumped by
+the Bunker signals and by code that changes bunkers without them
+(queryset.update(), bulk operations).
+"""
+import time
+
+from django.core.cache import cache
+
+BUNKER_DATA_VERSION_CACHE_KEY = 'bunker_data_version'
+
+
+def get_bunker_data_version() -> int:
+    """Current version stamp of the bunker data"""
+    version = cache.get(BUNKER_DATA_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(BUNKER_DATA_VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(BUNKER_DATA_VERSION_CACHE_KEY)
+    return version
+
+
+def bump_bunker_data_version() -> int:
+    """Mark all structures derived from bunkers as stale"""
+    version = time.time_ns()
+    cache.set(BUNKER_DATA_VERSION_CACHE_KEY, version, None)
+    return version
@@ -5,7 +5,8 @@ Example: B/SP-0001,A Pz.W. Nord,WW2 Battle Bunker,52.355094,15.467441,JO72RI
 """
 import csv
 from django.core.management.base import BaseCommand, CommandError
-from bunkers.models import Bunker, BunkerCategory
+from bunkers.models import BunkerCategory
+from bunkers.references import save_bunkers
 from decimal import Decimal
 
 
@@ -46,8 +47,7 @@ class Command(BaseCommand):
                 if skip_header:
                     next(reader)
                 
-                created_count = 0
-                updated_count = 0
+                bunkers = {}
                 error_count = 0
                 
                 for row_num, row in enumerate(reader, start=1):
@@ -75,31 +75,33 @@ class Command(BaseCommand):
                     # Locator is optional
                     locator = row[5].strip() if len(row) > 5 else ''
                     
-                    # Check if bunker exists
-                    bunker, created = Bunker.objects.update_or_create(
-                        reference_number=reference,
-                        defaults={
-                            'name_en': name,
-                            'name_pl': name,  # Use same name for both languages
-                            'description_en': f'{bunker_type}. Locator: {locator}' if locator else bunker_type,
-                            'description_pl': f'{bunker_type}. Lokator: {locator}' if locator else bunker_type,
-                            'category': default_category,
-                            'latitude': lat,
-                            'longitude': lon,
-                            'is_verified': True,  # Auto-verify imported bunkers
-                        }
-                    )
-                    
-                    if created:
-                        created_count += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(f'Created: {reference} - {name}')
-                        )
-                    else:
-                        updated_count += 1
+                    if reference in bunkers:
                         self.stdout.write(
-                            self.style.WARNING(f'Updated: {reference} - {name}')
+                            self.style.WARNING(f'Row {row_num}: {reference} repeated, using the later row')
                         )
+                    bunkers[reference] = {
+                        'name_en': name,
+                        'name_pl': name,  # Use same name for both languages
+                        'description_en': f'{bunker_type}. Locator: {locator}' if locator else bunker_type,
+                        'description_pl': f'{bunker_type}. Lokator: {locator}' if locator else bunker_type,
+                        'category': default_category,
+                        'latitude': lat,
+                        'longitude': lon,
+                        'is_verified': True,  # Auto-verify imported bunkers
+                    }
+                
+                # Create new and update existing bunkers in bulk
+                created, updated = save_bunkers(bunkers)
+                created_count = len(created)
+                updated_count = len(updated)
+                for reference in created:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Created: {reference} - {bunkers[reference]["name_en"]}')
+                    )
+                for reference in updated:
+                    self.stdout.write(
+                        self.style.WARNING(f'Updated: {reference} - {bunkers[reference]["name_en"]}')
+                    )
                 
                 # Summary
                 self.stdout.write(self.style.SUCCESS('\n' + '='*50))
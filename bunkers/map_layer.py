@@ -0,0 +1,158 @@
+"""
+Static bunker map layer and small status overlays.
+
+The bunker layer (verified bunkers with coordinates) is serialized once per
+bunker data version as a compact JSON array document and kept in the cache
+together with its gzip encoding and ETag, so the map page and the layer
+requests do not touch the bunker table. Per-user status (activated/hunted)
+and live-spot status are served separately as bitsets of bunker IDs: bit
+`id % 8` of byte `id // 8`, base64 encoded.
+"""
+import base64
+import gzip
+import hashlib
+import json
+from typing import Iterable, NamedTuple, Optional
+
+from django.core.cache import cache
+
+from .data_version import get_bunker_data_version
+from .models import Bunker
+
+BUNKER_LAYER_CACHE_KEY = 'bunker_map_layer:{version}'
+
+# Columns of each row in the bunker layer
+BUNKER_LAYER_FIELDS = ('id', 'reference', 'name', 'lat', 'lng')
+
+
+class MapLayer(NamedTuple):
+    """Serialized layer ready to be sent"""
+    version: int
+    count: int
+    body: bytes
+    gzip_body: bytes
+    etag: str
+
+
+def serialize_layer(data, version: int, count: int) -> MapLayer:
+    """Encode a layer document as JSON and gzip with a content ETag"""
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return MapLayer(
+        version=version,
+        count=count,
+        body=body,
+        gzip_body=gzip.compress(body, mtime=0),
+        etag='"{}"'.format(hashlib.md5(body).hexdigest()),
+    )
+
+
+def build_bunker_layer(version: int) -> MapLayer:
+    """Serialize all verified bunkers with coordinates"""
+    rows = [
+        [bunker_id, reference, name, float(latitude), float(longitude)]
+        for bunker_id, reference, name, latitude, longitude in Bunker.objects.filter(
+            is_verified=True,
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).order_by('reference_number').values_list(
+            'id', 'reference_number', 'name_en', 'latitude', 'longitude'
+        )
+    ]
+    return serialize_layer(
+        {'version': version, 'fields': BUNKER_LAYER_FIELDS, 'bunkers': rows},
+        version,
+        len(rows)
+    )
+
+
+# Layer of this process, reused while the bunker data version is unchanged
+_bunker_layer: Optional[MapLayer] = None
+
+
+def get_bunker_layer() -> MapLayer:
+    """
+    Bunker layer for the current bunker data version.
+
+    Returns:
+        MapLayer, built by the first process that needs it and shared
+        through the cache
+    """
+    global _bunker_layer
+
+    version = get_bunker_data_version()
+    if _bunker_layer is not None and _bunker_layer.version == version:
+        return _bunker_layer
+
+    cache_key = BUNKER_LAYER_CACHE_KEY.format(version=version)
+    layer = cache.get(cache_key)
+    if layer is None:
+        layer = build_bunker_layer(version)
+        cache.set(cache_key, tuple(layer), 24 * 60 * 60)
+    else:
+        layer = MapLayer(*layer)
+
+    _bunker_layer = layer
+    return layer
+
+
+def encode_id_bitset(ids: Iterable[int]) -> str:
+    """
+    Encode IDs as a base64 bitset.
+
+    Args:
+        ids: Non-negative integer IDs
+
+    Returns:
+        Base64 string; bit `id % 8` of byte `id // 8` is set for each ID
+    """
+    ids = list(ids)
+    if not ids:
+        return ''
+    bits = bytearray(max(ids) // 8 + 1)
+    for item_id in ids:
+        bits[item_id >> 3] |= 1 << (item_id & 7)
+    return base64.b64encode(bytes(bits)).decode('ascii')
+
+
+def decode_id_bitset(encoded: str) -> set:
+    """Inverse of encode_id_bitset()"""
+    bits = base64.b64decode(encoded)
+    return {
+        index * 8 + bit
+        for index, byte in enumerate(bits) if byte
+        for bit in range(8) if byte >> bit & 1
+    }
+
+
+def build_user_overlay(user) -> MapLayer:
+    """Verified bunkers the user activated and hunted, as bitsets"""
+    from activations.models import UserBunkerActivity
+
+    bunker_ids = {UserBunkerActivity.ROLE_ACTIVATOR: [], UserBunkerActivity.ROLE_HUNTER: []}
+    if user is not None and user.is_authenticated:
+        for bunker_id, role in UserBunkerActivity.objects.filter(
+            user=user,
+            bunker__is_verified=True
+        ).values_list('bunker_id', 'role'):
+            bunker_ids[role].append(bunker_id)
+
+    return serialize_layer(
+        {
+            'activated': encode_id_bitset(bunker_ids[UserBunkerActivity.ROLE_ACTIVATOR]),
+            'hunted': encode_id_bitset(bunker_ids[UserBunkerActivity.ROLE_HUNTER]),
+        },
+        version=0,
+        count=sum(len(ids) for ids in bunker_ids.values())
+    )
+
+
+def build_spot_overlay() -> MapLayer:
+    """Verified bunkers with an active spot, as a bitset"""
+    from cluster.active_spots import get_active_spots
+
+    bunker_ids = get_active_spots().verified_bunker_ids
+    return serialize_layer(
+        {'under_activation': encode_id_bitset(bunker_ids)},
+        version=0,
+        count=len(bunker_ids)
+    )
@@ -0,0 +1,289 @@
+"""
+Pre-clustered bunker map tiles.
+
+The map requests bunkers per slippy-map tile (z, x, y) in the Web Mercator
+projection used by the base map, instead of the whole bunker layer. Each
+tile is clustered on a regular pixel grid: bunkers sharing a grid cell at
+the tile's zoom become one cluster marker (centroid, count and bounds),
+cells holding a single bunker stay plain bunker markers. From
+CLUSTER_MAX_ZOOM on, all bunkers are sent as plain markers.
+
+The coordinates of the verified bunkers are kept per process as arrays
+sorted by Mercator x, so a tile is cut out with two bisections. Serialized
+tiles are cached per (bunker data version, z, x, y).
+"""
+import json
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from .data_version import get_bunker_data_version
+from .map_layer import BUNKER_LAYER_FIELDS, MapLayer, serialize_layer
+from .models import Bunker
+
+BUNKER_TILE_CACHE_KEY = 'bunker_map_tile:{version}:{z}:{x}:{y}'
+
+TILE_SIZE = 256
+
+# Clustering grid cell size in pixels (must divide TILE_SIZE)
+CLUSTER_CELL_PIXELS = 64
+
+# Zoom from which bunkers are never clustered
+CLUSTER_MAX_ZOOM = 14
+
+MAX_TILE_ZOOM = 19
+
+# Largest number of tiles one viewport request may cover
+MAX_VIEWPORT_TILES = 64
+
+# Latitude limit of the Web Mercator projection
+MAX_LATITUDE = 85.0511287798
+
+# Columns of each cluster row: centroid, member count and member bounds
+CLUSTER_FIELDS = ('lat', 'lng', 'count', 'south', 'west', 'north', 'east')
+
+
+def project(latitude: float, longitude: float) -> Tuple[float, float]:
+    """
+    Web Mercator projection.
+
+    Returns:
+        (x, y) in the unit square, y growing southwards
+    """
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    sin_lat = math.sin(math.radians(latitude))
+    x = (longitude + 180) / 360
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+
+
+def tile_range(bbox: Tuple[float, float, float, float], zoom: int) -> Tuple[range, range]:
+    """
+    Tiles covering a bounding box.
+
+    Args:
+        bbox: (west, south, east, north) in degrees
+        zoom: Tile zoom level
+
+    Returns:
+        (x range, y range) of tile coordinates
+    """
+    west, south, east, north = bbox
+    tiles = 1 << zoom
+    min_x, min_y = project(north, west)
+    max_x, max_y = project(south, east)
+    return (
+        range(min(int(min_x * tiles), tiles - 1), min(int(max_x * tiles), tiles - 1) + 1),
+        range(min(int(min_y * tiles), tiles - 1), min(int(max_y * tiles), tiles - 1) + 1),
+    )
+
+
+class BunkerTileIndex:
+    """Projected coordinates of the verified bunkers, sorted by x"""
+
+    def __init__(self, rows: List[list], version: Optional[int] = None):
+        self.version = version
+        projected = sorted(
+            (project(row[3], row[4]) + (row,) for row in rows),
+            key=lambda item: (item[0], item[1])
+        )
+        self.xs = [item[0] for item in projected]
+        self.ys = [item[1] for item in projected]
+        self.rows = [item[2] for item in projected]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def bounds(self) -> Optional[List[List[float]]]:
+        """[[south, west], [north, east]] of all bunkers, None if there are none"""
+        if not self.rows:
+            return None
+        latitudes = [row[3] for row in self.rows]
+        longitudes = [row[4] for row in self.rows]
+        return [[min(latitudes), min(longitudes)], [max(latitudes), max(longitudes)]]
+
+    def tile(self, z: int, x: int, y: int) -> Dict:
+        """
+        Cluster the bunkers of one tile.
+
+        Returns:
+            Dict with the tile coordinates, 'clusters' (rows of
+            CLUSTER_FIELDS) and 'bunkers' (rows of BUNKER_LAYER_FIELDS)
+        """
+        tiles = 1 << z
+        x_min, x_max = x / tiles, (x + 1) / tiles
+        y_min, y_max = y / tiles, (y + 1) / tiles
+        # The last tile of a row/column also takes points exactly on the edge
+        start = bisect_left(self.xs, x_min)
+        end = bisect_left(self.xs, x_max) if x + 1 < tiles else len(self.xs)
+
+        cells = defaultdict(list)
+        cell_scale = tiles * TILE_SIZE / CLUSTER_CELL_PIXELS
+        for index in range(start, end):
+            point_y = self.ys[index]
+            if point_y < y_min or (point_y >= y_max and y + 1 < tiles):
+                continue
+            cells[(int(self.xs[index] * cell_scale), int(point_y * cell_scale))].append(self.rows[index])
+
+        clusters = []
+        bunkers = []
+        for members in cells.values():
+            if len(members) == 1 or z >= CLUSTER_MAX_ZOOM:
+                bunkers.extend(members)
+                continue
+            latitudes = [row[3] for row in members]
+            longitudes = [row[4] for row in members]
+            clusters.append([
+                round(sum(latitudes) / len(members), 6),
+                round(sum(longitudes) / len(members), 6),
+                len(members),
+                min(latitudes), min(longitudes), max(latitudes), max(longitudes),
+            ])
+
+        return {
+            'z': z,
+            'x': x,
+            'y': y,
+            'cluster_fields': CLUSTER_FIELDS,
+            'clusters': sorted(clusters),
+            'fields': BUNKER_LAYER_FIELDS,
+            'bunkers': sorted(bunkers, key=lambda row: row[1]),
+        }
+
+
+# Index of this process, rebuilt when the bunker data version changes
+_tile_index: Optional[BunkerTileIndex] = None
+
+
+def get_tile_index() -> BunkerTileIndex:
+    """
+    Tile index of all verified bunkers with coordinates.
+
+    Returns:
+        BunkerTileIndex for the current bunker data version
+    """
+    global _tile_index
+
+    version = get_bunker_data_version()
+    if _tile_index is None or _tile_index.version != version:
+        rows = [
+            [bunker_id, reference, name, float(latitude), float(longitude)]
+            for bunker_id, reference, name, latitude, longitude in Bunker.objects.filter(
+                is_verified=True,
+                latitude__isnull=False,
+                longitude__isnull=False
+            ).order_by().values_list('id', 'reference_number', 'name_en', 'latitude', 'longitude')
+        ]
+        _tile_index = BunkerTileIndex(rows, version)
+    return _tile_index
+
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    """Whether (z, x, y) is an existing tile"""
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+
+def get_tile(z: int, x: int, y: int) -> MapLayer:
+    """
+    Serialized, clustered tile for the current bunker data version.
+
+    Args:
+        z: Zoom level (0 to MAX_TILE_ZOOM)
+        x: Tile column
+        y: Tile row
+
+    Returns:
+        MapLayer whose count is the number of bunkers in the tile
+    """
+    version = get_bunker_data_version()
+    cache_key = BUNKER_TILE_CACHE_KEY.format(version=version, z=z, x=x, y=y)
+    layer = cache.get(cache_key)
+    if layer is not None:
+        return MapLayer(*layer)
+
+    index = get_tile_index()
+    data = index.tile(z, x, y)
+    data['version'] = version
+    layer = serialize_layer(
+        data,
+        version,
+        len(data['bunkers']) + sum(cluster[2] for cluster in data['clusters'])
+    )
+    cache.set(cache_key, tuple(layer), 24 * 60 * 60)
+    return layer
+
+
+def get_viewport(bbox: Tuple[float, float, float, float], zoom: int) -> Dict:
+    """
+    Clusters and bunkers of all tiles covering a bounding box.
+
+    Args:
+        bbox: (west, south, east, north) in degrees
+        zoom: Map zoom level
+
+    Returns:
+        Dict with the version, zoom, covered tile ranges, 'clusters' and
+        'bunkers' (same rows as the tiles)
+
+    Raises:
+        ValueError: If the box covers more than MAX_VIEWPORT_TILES tiles
+    """
+    zoom = max(0, min(MAX_TILE_ZOOM, zoom))
+    x_range, y_range = tile_range(bbox, zoom)
+    if len(x_range) * len(y_range) > MAX_VIEWPORT_TILES:
+        raise ValueError(f'Viewport covers more than {MAX_VIEWPORT_TILES} tiles; zoom in')
+
+    clusters = []
+    bunkers = []
+    version = get_bunker_data_version()
+    for x in x_range:
+        for y in y_range:
+            tile = json.loads(get_tile(zoom, x, y).body)
+            clusters.extend(tile['clusters'])
+            bunkers.extend(tile['bunkers'])
+
+    return {
+        'version': version,
+        'zoom': zoom,
+        'tiles': {'x': [x_range.start, x_range.stop - 1], 'y': [y_range.start, y_range.stop - 1]},
+        'cluster_fields': CLUSTER_FIELDS,
+        'clusters': clusters,
+        'fields': BUNKER_LAYER_FIELDS,
+        'bunkers': bunkers,
+    }
+
+
+def _normalize(text: str) -> str:
+    """Drop spaces and punctuation for loose matching"""
+    return re.sub(r'[\s.\-/]', '', text)
+
+
+def search(query: str) -> Optional[list]:
+    """
+    Find a bunker for the map search box.
+
+    Tries the reference number first, then the name; each exactly,
+    as a substring, and ignoring spaces and punctuation.
+
+    Returns:
+        Bunker row (BUNKER_LAYER_FIELDS) or None
+    """
+    term = query.strip().lower()
+    if not term:
+        return None
+    normalized_term = _normalize(term)
+    rows = sorted(get_tile_index().rows, key=lambda row: row[1])
+
+    for column in (1, 2):
+        values = [(row, (row[column] or '').lower()) for row in rows]
+        for row, value in values:
+            if value == term:
+                return row
+        for row, value in values:
+            if value and (term in value or (normalized_term and normalized_term in _normalize(value))):
+                return row
+    return None
@@ -0,0 +1,196 @@
+"""
+Bunker reference resolver.
+
+Spots, log imports, planned activations and the CSV importers all turn
+reference numbers (e.g. B/SP-0039) into bunkers. Instead of one query per
+reference they resolve against a process-local map of compact records,
+loaded with one query (or from the shared cache, where the first process
+to load a version leaves a copy) and reloaded when the bunker data
+version changes (see bunkers.data_version). A reference missing from the
+map is looked up in the database before it is reported unknown, so a
+bunker created moments ago (before the version change is visible) still
+resolves, and is added to the map.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .data_version import bump_bunker_data_version, get_bunker_data_version
+from .models import Bunker
+
+REFERENCE_MAP_CACHE_KEY = 'bunker_references:{version}'
+
+RECORD_FIELDS = (
+    'id', 'reference_number', 'name_en', 'name_pl',
+    'latitude', 'longitude', 'category_id', 'is_verified'
+)
+
+
+class BunkerRecord(NamedTuple):
+    """Compact bunker data resolved from a reference"""
+    id: int
+    reference_number: str
+    name_en: str
+    name_pl: str
+    latitude: float
+    longitude: float
+    category_id: Optional[int]
+    is_verified: bool
+
+    def to_bunker(self) -> Bunker:
+        """
+        Bunker instance with the record's fields, without a query.
+
+        Meant for assigning foreign keys and reading the fields above; it is
+        not a full row and must not be saved.
+        """
+        bunker = Bunker(**self._asdict())
+        bunker._state.adding = False
+        bunker._state.db = 'default'
+        return bunker
+
+
+def normalize_reference(reference: str) -> str:
+    """Reference number as stored (trimmed, uppercase)"""
+    return (reference or '').strip().upper()
+
+
+# (version, {reference_number: BunkerRecord}) of this process
+_reference_map: Optional[Tuple[int, Dict[str, BunkerRecord]]] = None
+
+
+def _load_records(references: Optional[Iterable[str]] = None) -> List[tuple]:
+    rows = Bunker.objects.order_by()
+    if references is not None:
+        rows = rows.filter(reference_number__in=references)
+    rows = rows.values_list(*RECORD_FIELDS)
+    return [
+        (pk, reference, name_en, name_pl, float(latitude), float(longitude), category_id, is_verified)
+        for pk, reference, name_en, name_pl, latitude, longitude, category_id, is_verified in rows
+    ]
+
+
+def get_records() -> Dict[str, BunkerRecord]:
+    """
+    Normalized reference number to record for all bunkers.
+
+    Returns:
+        Dict for the current bunker data version (do not modify)
+    """
+    global _reference_map
+
+    version = get_bunker_data_version()
+    if _reference_map is not None and _reference_map[0] == version:
+        return _reference_map[1]
+
+    cache_key = REFERENCE_MAP_CACHE_KEY.format(version=version)
+    rows = cache.get(cache_key)
+    if rows is None:
+        rows = _load_records()
+        cache.set(cache_key, rows, 24 * 60 * 60)
+
+    _reference_map = (version, {normalize_reference(row[1]): BunkerRecord(*row) for row in rows})
+    return _reference_map[1]
+
+
+def _fetch_missing(references: List[str]) -> Dict[str, BunkerRecord]:
+    """Look up references missing from the map in the database and add them"""
+    records = get_records()
+    found = {}
+    for row in _load_records(references):
+        record = BunkerRecord(*row)
+        found[normalize_reference(record.reference_number)] = record
+    records.update(found)
+    return found
+
+
+def warm_references():
+    """Load the reference map ahead of the first request (e.g. in long-running commands)"""
+    get_records()
+
+
+def resolve(reference: str) -> Optional[BunkerRecord]:
+    """
+    Resolve one reference number.
+
+    Args:
+        reference: Reference number, case-insensitive
+
+    Returns:
+        BunkerRecord, or None if no bunker has the reference
+    """
+    reference = normalize_reference(reference)
+    record = get_records().get(reference)
+    if record is None and reference:
+        record = _fetch_missing([reference]).get(reference)
+    return record
+
+
+def resolve_many(references: Iterable[str]) -> Dict[str, BunkerRecord]:
+    """
+    Resolve many reference numbers at once.
+
+    Args:
+        references: Reference numbers, case-insensitive
+
+    Returns:
+        Dict of normalized reference to BunkerRecord; unknown references are missing
+    """
+    records = get_records()
+    resolved = {}
+    missing = set()
+    for reference in references:
+        reference = normalize_reference(reference)
+        record = records.get(reference)
+        if record is not None:
+            resolved[reference] = record
+        elif reference:
+            missing.add(reference)
+    if missing:
+        resolved.update(_fetch_missing(sorted(missing)))
+    return resolved
+
+
+def save_bunkers(bunkers: Dict[str, dict], batch_size: int = 500) -> Tuple[List[str], List[str]]:
+    """
+    Create or update bunkers by reference number in bulk.
+
+    Existing references are resolved in one call and updated with
+    bulk_update, new ones inserted with bulk_create. Bulk writes skip the
+    Bunker signals, so the data version is bumped here.
+
+    Args:
+        bunkers: Reference number to field values (as update_or_create defaults)
+        batch_size: Rows per query
+
+    Returns:
+        Tuple of (created references, updated references), as passed in
+    """
+    existing = resolve_many(bunkers)
+    now = timezone.now()
+
+    to_create = []
+    to_update = []
+    update_fields = {'updated_at'}
+    created = []
+    updated = []
+    for reference, values in bunkers.items():
+        record = existing.get(normalize_reference(reference))
+        if record is None:
+            to_create.append(Bunker(reference_number=reference.strip(), **values))
+            created.append(reference)
+        else:
+            to_update.append(Bunker(id=record.id, reference_number=record.reference_number, updated_at=now, **values))
+            update_fields.update(values)
+            updated.append(reference)
+
+    with transaction.atomic():
+        Bunker.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            Bunker.objects.bulk_update(to_update, sorted(update_fields), batch_size=batch_size)
+        bump_bunker_data_version()
+        transaction.on_commit(bump_bunker_data_version)
+
+    return created, updated
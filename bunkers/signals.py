@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .data_version import bump_bunker_data_version
+from .models import Bunker
+
+
+@receiver(post_save, sender=Bunker)
+@receiver(post_delete, sender=Bunker)
+def bunker_changed(sender, instance, **kwargs):
+    """
+    Invalidate structures derived from bunkers.
+
+    Bumped again on commit, so another process that rebuilt from the
+    not yet committed state in between does not keep it.
+    """
+    bump_bunker_data_version()
+    transaction.on_commit(bump_bunker_data_version)
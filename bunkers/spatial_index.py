@@ -0,0 +1,159 @@
+"""
+In-memory spatial index of bunker coordinates.
+
+Bunkers are bucketed in a regular latitude/longitude grid. A radius query
+only measures the bunkers in the grid cells overlapping the query circle's
+bounding box; a k-nearest query repeats radius queries with a growing
+radius. The index is built once per process from a single values_list()
+query and rebuilt when the bunker data version changes (see
+bunkers.data_version).
+"""
+import math
+from collections import defaultdict
+from typing import List, NamedTuple, Optional, Tuple
+
+from .data_version import get_bunker_data_version
+from .models import Bunker
+
+EARTH_RADIUS_KM = 6371.0
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Grid cell size in degrees (about 22 km of latitude)
+CELL_DEGREES = 0.2
+
+# Longest possible great-circle distance
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+class BunkerPoint(NamedTuple):
+    """Indexed bunker"""
+    id: int
+    reference_number: str
+    name_en: str
+    latitude: float
+    longitude: float
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class BunkerSpatialIndex:
+    """Grid index answering radius and k-nearest queries"""
+
+    def __init__(self, points: List[BunkerPoint], version: Optional[int] = None):
+        self.version = version
+        self.size = len(points)
+        self.columns = round(360 / CELL_DEGREES)
+        self.cells = defaultdict(list)
+        for point in points:
+            self.cells[self._cell(point.latitude, point.longitude)].append(point)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        row = math.floor((latitude + 90) / CELL_DEGREES)
+        column = math.floor((longitude + 180) / CELL_DEGREES) % self.columns
+        return row, column
+
+    def within(self, latitude: float, longitude: float, radius_km: float,
+               exclude_id: Optional[int] = None) -> List[Tuple[float, BunkerPoint]]:
+        """
+        Bunkers within a distance of a point.
+
+        Args:
+            latitude: Latitude of the centre
+            longitude: Longitude of the centre
+            radius_km: Search radius in kilometres
+            exclude_id: Bunker ID to leave out (e.g. the centre bunker)
+
+        Returns:
+            List of (distance_km, BunkerPoint), nearest first
+        """
+        delta_lat = radius_km / KM_PER_DEGREE
+        min_row, _ = self._cell(max(-90.0, latitude - delta_lat), longitude)
+        max_row, _ = self._cell(min(90.0, latitude + delta_lat), longitude)
+
+        # Widest longitude span of the circle, at the latitude nearest a pole
+        polar_latitude = min(90.0, abs(latitude) + delta_lat)
+        cos_polar = math.cos(math.radians(polar_latitude))
+        if cos_polar * KM_PER_DEGREE * 180 <= radius_km:
+            column_offsets = range(self.columns)
+            first_column = 0
+        else:
+            delta_lng = min(180.0, radius_km / (KM_PER_DEGREE * cos_polar))
+            _, first_column = self._cell(latitude, longitude - delta_lng)
+            span = math.floor((longitude + delta_lng + 180) / CELL_DEGREES) - math.floor(
+                (longitude - delta_lng + 180) / CELL_DEGREES
+            )
+            column_offsets = range(min(span + 1, self.columns))
+
+        results = []
+        for row in range(min_row, max_row + 1):
+            for offset in column_offsets:
+                for point in self.cells.get((row, (first_column + offset) % self.columns), ()):
+                    if point.id == exclude_id:
+                        continue
+                    distance = haversine_km(latitude, longitude, point.latitude, point.longitude)
+                    if distance <= radius_km:
+                        results.append((distance, point))
+
+        results.sort(key=lambda result: (result[0], result[1].id))
+        return results
+
+    def nearest(self, latitude: float, longitude: float, k: int,
+                max_radius_km: Optional[float] = None,
+                exclude_id: Optional[int] = None) -> List[Tuple[float, BunkerPoint]]:
+        """
+        The k bunkers nearest to a point.
+
+        Args:
+            latitude: Latitude of the centre
+            longitude: Longitude of the centre
+            k: Number of bunkers
+            max_radius_km: Ignore bunkers farther away than this
+            exclude_id: Bunker ID to leave out
+
+        Returns:
+            List of (distance_km, BunkerPoint), nearest first
+        """
+        limit = min(max_radius_km or MAX_DISTANCE_KM, MAX_DISTANCE_KM)
+        radius = min(CELL_DEGREES * KM_PER_DEGREE, limit)
+        while True:
+            results = self.within(latitude, longitude, radius, exclude_id=exclude_id)
+            # Every bunker closer than the k-th found one is inside the radius
+            if len(results) >= k or radius >= limit:
+                return results[:k]
+            radius = min(radius * 2, limit)
+
+
+# Index of this process, rebuilt when the bunker data version changes
+_index: Optional[BunkerSpatialIndex] = None
+
+
+def get_spatial_index() -> BunkerSpatialIndex:
+    """
+    Spatial index of all bunkers with coordinates.
+
+    Returns:
+        BunkerSpatialIndex for the current bunker data version
+    """
+    global _index
+
+    version = get_bunker_data_version()
+    if _index is None or _index.version != version:
+        points = [
+            BunkerPoint(bunker_id, reference, name, float(latitude), float(longitude))
+            for bunker_id, reference, name, latitude, longitude in Bunker.objects.filter(
+                latitude__isnull=False,
+                longitude__isnull=False
+            ).order_by().values_list('id', 'reference_number', 'name_en', 'latitude', 'longitude')
+        ]
+        _index = BunkerSpatialIndex(points, version)
+    return _index
@@ -108,6 +108,29 @@ class BunkerAPITest(TestCase):
         self.assertEqual(len(response.data['results']), 1)
 
 
+    def test_nearby_bunkers(self):
+        """Test nearby bunkers endpoint"""
+        Bunker.objects.create(
+            reference_number='BNK-002',
+            name_pl='Bunkier 2',
+            name_en='Bunker 2',
+            category=self.category,
+            latitude=Decimal('52.500000'),
+            longitude=Decimal('21.000000')
+        )
+        
+        response = self.client.get('/api/bunkers/nearby/?lat=52.2&lng=21.0&radius=50')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['reference_number'] for row in response.data], ['BNK-001', 'BNK-002'])
+        self.assertLess(response.data[0]['distance_km'], response.data[1]['distance_km'])
+        
+        response = self.client.get('/api/bunkers/nearby/?lat=52.5&lng=21.0&k=1')
+        self.assertEqual([row['reference_number'] for row in response.data], ['BNK-002'])
+        
+        response = self.client.get('/api/bunkers/nearby/?lat=52.2')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class BunkerPhotoAPITest(TestCase):
     """Test BunkerPhoto API endpoints"""
     
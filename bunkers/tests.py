@@ -392,3 +392,289 @@ class BunkerInspectionModelTest(TestCase):
             bunker=self.bunker,
             user=self.hunter
         ).count(), 2)
+
+
+class BunkerSpatialIndexTest(TestCase):
+    """Test the in-memory bunker spatial index"""
+
+    def test_queries_match_brute_force(self):
+        """Radius and k-nearest queries return the same bunkers as a full scan"""
+        import random
+        from .spatial_index import BunkerPoint, BunkerSpatialIndex, haversine_km
+
+        rng = random.Random(7)
+        points = [
+            BunkerPoint(i, f'B/SP-{i:04d}', f'B{i}', rng.uniform(49, 55), rng.uniform(14, 24))
+            for i in range(500)
+        ]
+        # Near the date line and a pole
+        points += [
+            BunkerPoint(1000, 'W-1', 'West', 10.0, 179.9),
+            BunkerPoint(1001, 'E-1', 'East', 10.0, -179.9),
+            BunkerPoint(1002, 'N-1', 'North', 89.9, 0.0),
+            BunkerPoint(1003, 'N-2', 'North', 89.9, 180.0),
+        ]
+        index = BunkerSpatialIndex(points)
+
+        for latitude, longitude, radius in ((52.0, 19.0, 50), (50.5, 23.9, 120), (10.0, 180.0, 30), (89.95, 90.0, 25)):
+            expected = sorted(
+                (haversine_km(latitude, longitude, p.latitude, p.longitude), p.id) for p in points
+            )
+            found = index.within(latitude, longitude, radius)
+            self.assertEqual(
+                [point.id for _, point in found],
+                [point_id for distance, point_id in expected if distance <= radius]
+            )
+            self.assertEqual(
+                [point.id for _, point in index.nearest(latitude, longitude, 5)],
+                [point_id for _, point_id in expected[:5]]
+            )
+
+        self.assertNotIn(1000, [p.id for _, p in index.within(10.0, 179.9, 30, exclude_id=1000)])
+
+    def test_index_follows_bunker_changes(self):
+        """The shared index is rebuilt when bunkers change"""
+        from .spatial_index import get_spatial_index
+
+        category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        Bunker.objects.create(
+            reference_number='B/SP-0001', name_pl='A', name_en='A', category=category,
+            latitude=Decimal('52.000000'), longitude=Decimal('21.000000')
+        )
+        self.assertEqual(len(get_spatial_index().within(52.0, 21.0, 10)), 1)
+
+        bunker = Bunker.objects.create(
+            reference_number='B/SP-0002', name_pl='B', name_en='B', category=category,
+            latitude=Decimal('52.010000'), longitude=Decimal('21.000000')
+        )
+        self.assertEqual(len(get_spatial_index().within(52.0, 21.0, 10)), 2)
+
+        bunker.delete()
+        self.assertEqual(len(get_spatial_index().within(52.0, 21.0, 10)), 1)
+
+
+class BunkerMapLayerTest(TestCase):
+    """Test the cached bunker map layer and status overlays"""
+
+    def setUp(self):
+        self.category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        self.verified, self.unverified = [
+            Bunker.objects.create(
+                reference_number=f'B/SP-000{i}', name_pl=f'B{i}', name_en=f'B{i}',
+                category=self.category, latitude=Decimal('52.0'), longitude=Decimal('21.0'),
+                is_verified=verified
+            )
+            for i, verified in ((1, True), (2, False))
+        ]
+        self.user = User.objects.create_user(
+            email='map@example.com', callsign='SP1MAP', password='testpass123'
+        )
+
+    def test_bitset_roundtrip(self):
+        """ID bitsets decode to the encoded IDs"""
+        from .map_layer import decode_id_bitset, encode_id_bitset
+
+        ids = {0, 7, 8, 1234, 99999}
+        self.assertEqual(decode_id_bitset(encode_id_bitset(ids)), ids)
+        self.assertEqual(decode_id_bitset(encode_id_bitset([])), set())
+
+    def test_layer_is_versioned_and_conditional(self):
+        """Layer is rebuilt on bunker changes and served with ETag/gzip"""
+        import gzip
+        import json
+        from django.urls import reverse
+        from .map_layer import get_bunker_layer
+
+        layer = get_bunker_layer()
+        self.assertEqual(json.loads(layer.body)['bunkers'], [[self.verified.id, 'B/SP-0001', 'B1', 52.0, 21.0]])
+
+        response = self.client.get(
+            f"{reverse('map_bunkers_layer')}?v={layer.version}", HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(response.content), layer.body)
+
+        response = self.client.get(reverse('map_bunkers_layer'), HTTP_IF_NONE_MATCH=layer.etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.unverified.is_verified = True
+        self.unverified.save()
+        new_layer = get_bunker_layer()
+        self.assertNotEqual(new_layer.version, layer.version)
+        self.assertEqual(new_layer.count, 2)
+
+        response = self.client.get(reverse('map'))
+        self.assertTrue(response.context['bunkers_tile_url'].endswith(f'?v={new_layer.version}'))
+        self.assertEqual(response.context['bunkers_count'], 2)
+        self.assertNotContains(response, 'B/SP-0002')
+
+    def test_user_overlay(self):
+        """User overlay marks activated and hunted bunkers"""
+        import json
+        from django.urls import reverse
+        from activations.models import ActivationLog
+        from .map_layer import decode_id_bitset
+
+        hunter = User.objects.create_user(
+            email='hunter@example.com', callsign='SP2MAP', password='testpass123'
+        )
+        ActivationLog.objects.create(
+            activator=self.user, user=hunter, bunker=self.verified, activation_date=timezone.now()
+        )
+
+        self.client.force_login(self.user)
+        overlay = json.loads(self.client.get(reverse('map_user_overlay')).content)
+        self.assertEqual(decode_id_bitset(overlay['activated']), {self.verified.id})
+        self.assertEqual(decode_id_bitset(overlay['hunted']), set())
+
+        self.client.logout()
+        overlay = json.loads(self.client.get(reverse('map_user_overlay')).content)
+        self.assertEqual(overlay, {'activated': '', 'hunted': ''})
+
+
+class BunkerMapTileTest(TestCase):
+    """Test the clustered bunker map tiles"""
+
+    def setUp(self):
+        category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        # Two bunkers about 100 m apart near Warsaw, one near Gdansk
+        coordinates = [
+            ('B/SP-0001', Decimal('52.230000'), Decimal('21.010000')),
+            ('B/SP-0002', Decimal('52.231000'), Decimal('21.010000')),
+            ('B/SP-0003', Decimal('54.350000'), Decimal('18.650000')),
+        ]
+        self.bunkers = [
+            Bunker.objects.create(
+                reference_number=reference, name_pl=reference, name_en=f'Bunker {reference[-1]}',
+                category=category, latitude=latitude, longitude=longitude, is_verified=True
+            )
+            for reference, latitude, longitude in coordinates
+        ]
+
+    def test_tile_clustering(self):
+        """Close bunkers are clustered at low zoom and split at high zoom"""
+        from .map_tiles import CLUSTER_MAX_ZOOM, get_tile_index, project
+
+        index = get_tile_index()
+        self.assertEqual(len(index), 3)
+
+        tile = index.tile(0, 0, 0)
+        self.assertEqual(len(tile['clusters']), 1)
+        self.assertEqual(tile['clusters'][0][2], 3)
+
+        tile = index.tile(6, 35, 21)
+        self.assertEqual(tile['clusters'][0][2], 2)
+        self.assertEqual([row[1] for row in tile['bunkers']], [])
+
+        x, y = project(52.23, 21.01)
+        z = CLUSTER_MAX_ZOOM
+        tile = index.tile(z, int(x * (1 << z)), int(y * (1 << z)))
+        self.assertEqual(tile['clusters'], [])
+        self.assertEqual([row[1] for row in tile['bunkers']], ['B/SP-0001', 'B/SP-0002'])
+
+    def test_tile_view_and_viewport_api(self):
+        """Tiles are served versioned; the API merges the tiles of a viewport"""
+        import json
+        from django.urls import reverse
+        from .map_tiles import get_tile
+
+        layer = get_tile(0, 0, 0)
+        response = self.client.get(f"{reverse('map_tile', args=[0, 0, 0])}?v={layer.version}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response.content, layer.body)
+        self.assertEqual(self.client.get(reverse('map_tile', args=[1, 2, 0])).status_code, 404)
+
+        response = self.client.get('/api/bunkers/clusters/?bbox=14,49,24,55&zoom=15')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/bunkers/clusters/?bbox=18,51,22,55&zoom=8')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sum(cluster[2] for cluster in response.data['clusters']) + len(response.data['bunkers']), 3
+        )
+
+        # Moving a bunker changes the version, so stale tiles are not served
+        self.bunkers[2].latitude = Decimal('52.232000')
+        self.bunkers[2].longitude = Decimal('21.010000')
+        self.bunkers[2].save()
+        tile = json.loads(get_tile(6, 35, 21).body)
+        self.assertEqual(tile['clusters'][0][2], 3)
+
+    def test_search(self):
+        """Map search matches references loosely, then names"""
+        import json
+        from django.urls import reverse
+
+        response = self.client.get(reverse('map_search'), {'q': 'bsp0003'})
+        self.assertEqual(json.loads(response.content)['bunker']['reference'], 'B/SP-0003')
+        response = self.client.get(reverse('map_search'), {'q': 'bunker 2'})
+        self.assertEqual(json.loads(response.content)['bunker']['reference'], 'B/SP-0002')
+        response = self.client.get(reverse('map_search'), {'q': 'nothing'})
+        self.assertIsNone(json.loads(response.content)['bunker'])
+
+
+class BunkerReferenceResolverTest(TestCase):
+    """Test the cached reference resolver"""
+    
+    def setUp(self):
+        self.category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        self.bunker = Bunker.objects.create(
+            reference_number='B/SP-0001', name_pl='Schron A', name_en='Shelter A', category=self.category,
+            latitude=Decimal('52.0'), longitude=Decimal('21.0')
+        )
+    
+    def test_resolve(self):
+        """References resolve case-insensitively, in batches, without queries once loaded"""
+        from .references import resolve, resolve_many
+        
+        record = resolve(' b/sp-0001 ')
+        self.assertEqual(record.id, self.bunker.id)
+        self.assertEqual(record.name_en, 'Shelter A')
+        self.assertEqual(record.category_id, self.category.id)
+        self.assertEqual(record.to_bunker().pk, self.bunker.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_many(['B/SP-0001'])['B/SP-0001'].id, self.bunker.id)
+        # Unknown references are checked in the database, once per call
+        with self.assertNumQueries(1):
+            self.assertEqual(list(resolve_many(['B/SP-0001', 'B/SP-9999', 'b/sp-9998'])), ['B/SP-0001'])
+        with self.assertNumQueries(1):
+            self.assertIsNone(resolve('B/SP-9999'))
+        
+        Bunker.objects.create(
+            reference_number='B/SP-0002', name_pl='B', name_en='B', category=self.category,
+            latitude=Decimal('52.1'), longitude=Decimal('21.1')
+        )
+        self.assertIsNotNone(resolve('B/SP-0002'))
+    
+    def test_resolve_miss_falls_back_to_database(self):
+        """A bunker missing from the loaded map (no version change seen yet) still resolves"""
+        from .references import get_records, resolve, resolve_many
+        
+        get_records()
+        # bulk_create sends no signals, so the data version stays the same
+        bunker, = Bunker.objects.bulk_create([Bunker(
+            reference_number='B/SP-0005', name_pl='E', name_en='E', category=self.category,
+            latitude=Decimal('52.2'), longitude=Decimal('21.2')
+        )])
+        self.assertEqual(resolve('b/sp-0005').name_en, 'E')
+        with self.assertNumQueries(0):
+            # Added to the map
+            self.assertEqual(list(resolve_many(['B/SP-0005'])), ['B/SP-0005'])
+    
+    def test_save_bunkers(self):
+        """Existing references are updated and new ones created in bulk"""
+        from .references import resolve, save_bunkers
+        
+        values = {
+            'name_pl': 'Nowy', 'name_en': 'New', 'category': self.category,
+            'latitude': Decimal('50.0'), 'longitude': Decimal('19.0'), 'is_verified': True,
+        }
+        created, updated = save_bunkers({'B/SP-0001': values, 'B/SP-0003': values})
+        self.assertEqual((created, updated), (['B/SP-0003'], ['B/SP-0001']))
+        self.bunker.refresh_from_db()
+        self.assertEqual(self.bunker.name_en, 'New')
+        self.assertTrue(self.bunker.is_verified)
+        self.assertEqual(resolve('B/SP-0001').name_en, 'New')
+        self.assertIsNotNone(resolve('B/SP-0003'))
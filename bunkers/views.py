@@ -4,7 +4,7 @@ API views for bunkers app.
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import BunkerCategory, Bunker, BunkerPhoto, BunkerResource, BunkerInspection
@@ -13,6 +13,11 @@ from .serializers import (
     BunkerPhotoSerializer, BunkerResourceSerializer, BunkerInspectionSerializer
 )
 
+# Limits of the nearby bunkers endpoint
+NEARBY_DEFAULT_RADIUS_KM = 50
+NEARBY_MAX_RADIUS_KM = 500
+NEARBY_MAX_RESULTS = 200
+
 
 @extend_schema_view(
     list=extend_schema(description="List bunker categories", tags=["bunkers"]),
@@ -52,6 +57,97 @@ class BunkerViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Set created_by to current user"""
         serializer.save(created_by=self.request.user)
+    
+    @extend_schema(
+        description="Find bunkers near a point (within radius, or the k nearest)",
+        tags=["bunkers"],
+        parameters=[
+            OpenApiParameter(name='lat', description='Latitude', type=float, required=True),
+            OpenApiParameter(name='lng', description='Longitude', type=float, required=True),
+            OpenApiParameter(
+                name='radius',
+                description=f'Search radius in km (default: {NEARBY_DEFAULT_RADIUS_KM}, max: {NEARBY_MAX_RADIUS_KM})',
+                type=float
+            ),
+            OpenApiParameter(
+                name='k',
+                description=f'Return only the k nearest bunkers within the radius (max: {NEARBY_MAX_RESULTS})',
+                type=int
+            ),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Bunkers near a point, nearest first, from the in-memory spatial index"""
+        from .spatial_index import get_spatial_index
+        
+        try:
+            latitude = float(request.query_params['lat'])
+            longitude = float(request.query_params['lng'])
+            radius = float(request.query_params.get('radius', NEARBY_DEFAULT_RADIUS_KM))
+            k = int(request.query_params.get('k', NEARBY_MAX_RESULTS))
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'lat and lng are required; lat, lng, radius and k must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius <= 0 or k <= 0:
+            return Response(
+                {'error': 'Coordinates out of range or non-positive radius/k'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = get_spatial_index().nearest(
+            latitude, longitude,
+            k=min(k, NEARBY_MAX_RESULTS),
+            max_radius_km=min(radius, NEARBY_MAX_RADIUS_KM)
+        )
+        return Response([
+            {
+                'id': point.id,
+                'reference_number': point.reference_number,
+                'name_en': point.name_en,
+                'latitude': point.latitude,
+                'longitude': point.longitude,
+                'distance_km': round(distance, 3),
+            }
+            for distance, point in results
+        ])
+    
+    @extend_schema(
+        description="Clustered bunker markers of a map viewport, computed per cached map tile",
+        tags=["bunkers"],
+        parameters=[
+            OpenApiParameter(
+                name='bbox', description='Viewport as west,south,east,north in degrees', type=str, required=True
+            ),
+            OpenApiParameter(name='zoom', description='Map zoom level', type=int, required=True),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """Cluster markers and single bunkers inside a bounding box"""
+        from .map_tiles import get_viewport
+        
+        try:
+            west, south, east, north = (float(value) for value in request.query_params['bbox'].split(','))
+            zoom = int(request.query_params['zoom'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'bbox (west,south,east,north) and zoom are required and must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if west > east or south > north or zoom < 0:
+            return Response(
+                {'error': 'Invalid bounding box or zoom'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            viewport = get_viewport((west, south, east, north), zoom)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(viewport)
 
 
 @extend_schema_view(
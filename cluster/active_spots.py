@@ -0,0 +1,252 @@
+"""
+Registry of the active spots.
+
+Pages only need a summary of the active spots (how many, on which
+bunkers and bands), which used to be queried on every request, and spot
+ingestion needs to find the active spot a new report repeats. The
+registry keeps one entry per active spot, ordered by expiry time, in the
+shared cache; each process also keeps the decoded registry until the
+version changes. The version is a stamp in the shared cache, bumped on
+commit by the Spot signals and by the bulk paths (ingestion, the sweeper,
+admin actions), so an unchanged registry costs cache lookups only. Changes
+made around them (a raw queryset.update()) are caught by an aggregate
+query over the active spots (number, ID sum, latest update): it is stored
+with the registry when it is built, and each process repeats it at most
+every SPOTS_VERSION_CHECK_SECONDS and bumps the stamp when it differs.
+After a change the registry is rebuilt with two queries. Expired entries are dropped at
+read time, so a spot stops counting the moment it expires even before the
+sweeper deactivates it.
+"""
+import time
+from bisect import bisect_right
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+ACTIVE_SPOTS_VERSION_CACHE_KEY = 'active_spots_version'
+ACTIVE_SPOTS_CACHE_KEY = 'active_spot_registry:{version}:{bunker_version}'
+
+# How often each process compares the registry with the database, to catch
+# changes that did not bump the version stamp
+SPOTS_VERSION_CHECK_SECONDS = 5
+
+# Reports of the same activator and reference within this many MHz are one spot
+FREQUENCY_TOLERANCE_MHZ = 0.01
+
+
+def frequency_bucket(frequency: float) -> int:
+    """Frequency bucket of FREQUENCY_TOLERANCE_MHZ width"""
+    return int(round(float(frequency) / FREQUENCY_TOLERANCE_MHZ))
+
+
+class ActiveSpotEntry(NamedTuple):
+    """Active spot as kept in the registry"""
+    expires_at: float
+    spot_id: int
+    bunker_id: Optional[int]
+    bunker_verified: bool
+    band: str
+    activator_callsign: str
+    frequency: float
+    bunker_reference: str
+
+
+class ActiveSpotRegistry:
+    """Active spots ordered by expiry time"""
+
+    def __init__(self, entries: List[Tuple], version: Optional[Tuple] = None,
+                 database_version: Optional[str] = None):
+        self.version = version
+        self.database_version = database_version
+        self.checked_at = time.monotonic()
+        self.entries = sorted(ActiveSpotEntry(*entry) for entry in entries)
+        self._expiry_times = [entry.expires_at for entry in self.entries]
+        self._summary_start = None
+        self._summary = None
+        self._lookup = None
+
+    def active(self, now: Optional[float] = None) -> List[ActiveSpotEntry]:
+        """Entries not yet expired at `now` (default: current time)"""
+        return self.entries[self._first_active(now):]
+
+    def _first_active(self, now: Optional[float]) -> int:
+        return bisect_right(self._expiry_times, time.time() if now is None else now)
+
+    def _summarize(self) -> Tuple[FrozenSet[int], FrozenSet[int], List[str]]:
+        start = self._first_active(None)
+        if start != self._summary_start:
+            entries = self.entries[start:]
+            self._summary = (
+                frozenset(entry.bunker_id for entry in entries if entry.bunker_id is not None),
+                frozenset(entry.bunker_id for entry in entries if entry.bunker_verified),
+                sorted({entry.band for entry in entries}),
+            )
+            self._summary_start = start
+        return self._summary
+
+    def find(self, activator_callsign: str, frequency: float,
+             bunker_reference: str = '') -> Optional[ActiveSpotEntry]:
+        """
+        Active spot of an activator on a frequency and reference.
+
+        Args:
+            activator_callsign: Activator callsign (uppercase)
+            frequency: Frequency in MHz; matches within FREQUENCY_TOLERANCE_MHZ
+            bunker_reference: Bunker reference ('' for none)
+
+        Returns:
+            Entry of the matching spot, or None
+        """
+        if self._lookup is None:
+            self._lookup = {}
+            for entry in self.entries:
+                key = (entry.activator_callsign, frequency_bucket(entry.frequency), entry.bunker_reference)
+                self._lookup.setdefault(key, []).append(entry)
+
+        now = time.time()
+        frequency = float(frequency)
+        bucket = frequency_bucket(frequency)
+        for neighbour in (bucket, bucket - 1, bucket + 1):
+            for entry in self._lookup.get((activator_callsign, neighbour, bunker_reference or ''), ()):
+                if entry.expires_at > now and abs(entry.frequency - frequency) <= FREQUENCY_TOLERANCE_MHZ + 1e-9:
+                    return entry
+        return None
+
+    @property
+    def count(self) -> int:
+        """Number of active spots"""
+        return len(self.entries) - self._first_active(None)
+
+    @property
+    def bunker_ids(self) -> FrozenSet[int]:
+        """IDs of bunkers with an active spot"""
+        return self._summarize()[0]
+
+    @property
+    def verified_bunker_ids(self) -> FrozenSet[int]:
+        """IDs of verified bunkers with an active spot"""
+        return self._summarize()[1]
+
+    @property
+    def bands(self) -> List[str]:
+        """Bands with an active spot, sorted"""
+        return self._summarize()[2]
+
+
+def build_registry(version: Optional[Tuple] = None) -> ActiveSpotRegistry:
+    """Load the active spots from the database"""
+    from .models import Spot
+
+    # Read first: a change in between makes the next check rebuild again
+    database_version = get_database_spots_version()
+    rows = Spot.objects.filter(
+        is_active=True,
+        expires_at__gt=timezone.now()
+    ).order_by().values_list(
+        'expires_at', 'id', 'bunker_id', 'bunker__is_verified', 'band',
+        'activator_callsign', 'frequency', 'bunker_reference'
+    )
+    return ActiveSpotRegistry(
+        [
+            (
+                expires_at.timestamp(), spot_id, bunker_id, bool(verified), band,
+                callsign, float(frequency), reference or ''
+            )
+            for expires_at, spot_id, bunker_id, verified, band, callsign, frequency, reference in rows
+        ],
+        version,
+        database_version
+    )
+
+
+def get_spots_version() -> int:
+    """Current version stamp of the active spots"""
+    version = cache.get(ACTIVE_SPOTS_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(ACTIVE_SPOTS_VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(ACTIVE_SPOTS_VERSION_CACHE_KEY)
+    return version
+
+
+def bump_spots_version() -> int:
+    """Mark the active spot registry as stale"""
+    version = time.time_ns()
+    cache.set(ACTIVE_SPOTS_VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def bump_spots_version_on_commit():
+    """
+    Bump the version stamp now and once the transaction commits, so another
+    process that rebuilt from the not yet committed state does not keep it
+    """
+    bump_spots_version()
+    transaction.on_commit(bump_spots_version)
+
+
+def get_database_spots_version() -> str:
+    """Version of the active spots, derived from the database"""
+    from .models import Spot
+
+    row = Spot.objects.filter(is_active=True).aggregate(
+        count=Count('id'), id_sum=Sum('id'), updated=Max('updated_at')
+    )
+    updated = row['updated'].timestamp() if row['updated'] else 0
+    return f"{row['count']}-{row['id_sum'] or 0}-{updated}"
+
+
+# Registry of this process, reused while the versions are unchanged
+_registry: Optional[ActiveSpotRegistry] = None
+
+
+def _database_changed(registry: ActiveSpotRegistry) -> bool:
+    """Whether the active spots changed without a version bump (checked periodically)"""
+    now = time.monotonic()
+    if now - registry.checked_at < SPOTS_VERSION_CHECK_SECONDS:
+        return False
+    registry.checked_at = now
+    if get_database_spots_version() == registry.database_version:
+        return False
+    bump_spots_version()
+    return True
+
+
+def get_active_spots() -> ActiveSpotRegistry:
+    """
+    Current active spot registry.
+
+    Costs two cache lookups of version stamps when nothing changed, plus
+    the aggregate query every SPOTS_VERSION_CHECK_SECONDS; the entries are
+    fetched (or rebuilt from the database) only after a change. A bunker
+    change invalidates it too, as spots store bunker verification.
+
+    Returns:
+        ActiveSpotRegistry
+    """
+    global _registry
+
+    from bunkers.data_version import get_bunker_data_version
+
+    version = (get_spots_version(), get_bunker_data_version())
+    if _registry is not None and _registry.version == version:
+        if not _database_changed(_registry):
+            return _registry
+        version = (get_spots_version(), version[1])
+
+    cache_key = ACTIVE_SPOTS_CACHE_KEY.format(version=version[0], bunker_version=version[1])
+    cached = cache.get(cache_key)
+    if cached is None:
+        registry = build_registry(version)
+        cache.set(
+            cache_key, (registry.database_version, [tuple(entry) for entry in registry.entries]),
+            24 * 60 * 60
+        )
+    else:
+        database_version, entries = cached
+        registry = ActiveSpotRegistry(entries, version, database_version)
+
+    _registry = registry
+    return registry
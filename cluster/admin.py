@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import Cluster, Spot, SpotHistory
+from .models import ArchivedSpot, Cluster, Spot, SpotHistory
 # Unused in V2: ClusterMember, ClusterAlert
 
 
@@ -133,7 +133,13 @@ class SpotAdmin(admin.ModelAdmin):
     
     def mark_inactive(self, request, queryset):
         """Admin action to mark selected spots as inactive"""
-        updated = queryset.update(is_active=False)
+        from .active_spots import bump_spots_version_on_commit
+        from .spot_events import publish_expired
+        
+        spot_ids = list(queryset.filter(is_active=True).values_list('id', flat=True))
+        updated = Spot.objects.filter(id__in=spot_ids).update(is_active=False)
+        bump_spots_version_on_commit()
+        publish_expired(spot_ids)
         self.message_user(request, f'{updated} spot(s) marked as inactive.')
     mark_inactive.short_description = 'Mark selected spots as inactive'
     
@@ -148,11 +154,9 @@ class SpotAdmin(admin.ModelAdmin):
     
     def cleanup_expired(self, request, queryset):
         """Admin action to mark expired spots as inactive"""
-        expired_spots = queryset.filter(
-            expires_at__lt=timezone.now(),
-            is_active=True
-        )
-        count = expired_spots.update(is_active=False)
+        from .spot_sweeper import expire_spots
+        
+        count = len(expire_spots(queryset))
         self.message_user(request, f'{count} expired spot(s) marked as inactive.')
     cleanup_expired.short_description = 'Cleanup expired spots'
 
@@ -174,3 +178,33 @@ class SpotHistoryAdmin(admin.ModelAdmin):
     ]
     ordering = ['-respotted_at']
     readonly_fields = ['respotted_at']
+
+
+@admin.register(ArchivedSpot)
+class ArchivedSpotAdmin(admin.ModelAdmin):
+    """Admin configuration for ArchivedSpot (read-only)"""
+    list_display = [
+        'activator_callsign',
+        'frequency',
+        'band',
+        'bunker_reference',
+        'spotter',
+        'respot_count',
+        'respotter_count',
+        'created_at',
+        'expired_at'
+    ]
+    list_filter = ['band', 'created_at']
+    search_fields = [
+        'activator_callsign',
+        'bunker_reference',
+        'spotter__callsign',
+        'comment'
+    ]
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ClusterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cluster'
+
+    def ready(self):
+        """
+        Import signals when the app is ready.
+        """
+        import cluster.signals  # noqa
@@ -0,0 +1,182 @@
+"""
+Amateur radio band plans.
+
+Frequency to band lookup for spots and logs, and normalization of band
+names as loggers write them in ADIF (40M, 40m, 70CM). A plan is a list
+of non-overlapping frequency ranges sorted by their lower edge, searched
+with bisect. Plan 0 is the ADIF band enumeration (the union of what any
+logger may report); plans 1-3 are the IARU region allocations.
+settings.BAND_PLAN_REGION selects the default plan.
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+# ADIF band enumeration: (band, lower edge MHz, upper edge MHz)
+ADIF_BANDS: List[Tuple[str, float, float]] = [
+    ('2190m', 0.1357, 0.1378),
+    ('630m', 0.472, 0.479),
+    ('560m', 0.501, 0.504),
+    ('160m', 1.8, 2.0),
+    ('80m', 3.5, 4.0),
+    ('60m', 5.06, 5.45),
+    ('40m', 7.0, 7.3),
+    ('30m', 10.1, 10.15),
+    ('20m', 14.0, 14.35),
+    ('17m', 18.068, 18.168),
+    ('15m', 21.0, 21.45),
+    ('12m', 24.89, 25.0),
+    ('10m', 28.0, 29.7),
+    ('8m', 40.0, 45.0),
+    ('6m', 50.0, 54.0),
+    ('5m', 54.000001, 69.9),
+    ('4m', 70.0, 71.0),
+    ('2m', 144.0, 148.0),
+    ('1.25m', 222.0, 225.0),
+    ('70cm', 420.0, 450.0),
+    ('33cm', 902.0, 928.0),
+    ('23cm', 1240.0, 1300.0),
+    ('13cm', 2300.0, 2450.0),
+    ('9cm', 3300.0, 3500.0),
+    ('6cm', 5650.0, 5925.0),
+    ('3cm', 10000.0, 10500.0),
+    ('1.25cm', 24000.0, 24250.0),
+    ('6mm', 47000.0, 47200.0),
+    ('4mm', 75500.0, 81000.0),
+    ('2.5mm', 119980.0, 123000.0),
+    ('2mm', 134000.0, 149000.0),
+    ('1mm', 241000.0, 250000.0),
+]
+
+# Allocations shared by all IARU regions
+_COMMON_BANDS = [
+    ('2190m', 0.1357, 0.1378),
+    ('630m', 0.472, 0.479),
+    ('60m', 5.3515, 5.3665),
+    ('30m', 10.1, 10.15),
+    ('20m', 14.0, 14.35),
+    ('17m', 18.068, 18.168),
+    ('15m', 21.0, 21.45),
+    ('12m', 24.89, 24.99),
+    ('10m', 28.0, 29.7),
+    ('23cm', 1240.0, 1300.0),
+]
+
+REGION_BANDS: Dict[int, List[Tuple[str, float, float]]] = {
+    # Europe, Africa, Middle East, northern Asia
+    1: _COMMON_BANDS + [
+        ('160m', 1.81, 2.0),
+        ('80m', 3.5, 3.8),
+        ('40m', 7.0, 7.2),
+        ('6m', 50.0, 54.0),
+        ('4m', 70.0, 70.5),
+        ('2m', 144.0, 146.0),
+        ('70cm', 430.0, 440.0),
+    ],
+    # Americas
+    2: _COMMON_BANDS + [
+        ('160m', 1.8, 2.0),
+        ('80m', 3.5, 4.0),
+        ('40m', 7.0, 7.3),
+        ('6m', 50.0, 54.0),
+        ('2m', 144.0, 148.0),
+        ('1.25m', 222.0, 225.0),
+        ('70cm', 420.0, 450.0),
+        ('33cm', 902.0, 928.0),
+    ],
+    # Asia, Pacific
+    3: _COMMON_BANDS + [
+        ('160m', 1.8, 2.0),
+        ('80m', 3.5, 3.9),
+        ('40m', 7.0, 7.3),
+        ('6m', 50.0, 54.0),
+        ('2m', 144.0, 148.0),
+        ('70cm', 430.0, 440.0),
+    ],
+}
+
+# Lowercase ADIF band names, in frequency order
+BAND_NAMES: List[str] = [name for name, low, high in ADIF_BANDS]
+_BAND_NAMES = set(BAND_NAMES)
+
+
+class BandPlan:
+    """Frequency ranges of one band plan"""
+
+    def __init__(self, bands: List[Tuple[str, float, float]]):
+        bands = sorted(bands, key=lambda band: band[1])
+        self.names = [name for name, low, high in bands]
+        self.lower_edges = [low for name, low, high in bands]
+        self.upper_edges = [high for name, low, high in bands]
+
+    def band(self, frequency: float) -> Optional[str]:
+        """Band of a frequency in MHz, or None outside the plan"""
+        index = bisect_right(self.lower_edges, frequency) - 1
+        if index >= 0 and frequency <= self.upper_edges[index]:
+            return self.names[index]
+        return None
+
+
+@lru_cache(maxsize=None)
+def _band_plan(region: int) -> BandPlan:
+    return BandPlan(REGION_BANDS.get(region, ADIF_BANDS))
+
+
+def get_band_plan(region: Optional[int] = None) -> BandPlan:
+    """
+    Band plan of an IARU region.
+
+    Args:
+        region: 1-3, 0 for the ADIF band enumeration
+            (default: settings.BAND_PLAN_REGION)
+
+    Returns:
+        BandPlan
+    """
+    if region is None:
+        region = getattr(settings, 'BAND_PLAN_REGION', 0)
+    return _band_plan(region)
+
+
+@lru_cache(maxsize=4096)
+def _band_for_frequency(frequency, region: int) -> Optional[str]:
+    try:
+        frequency = float(frequency)
+    except (TypeError, ValueError):
+        return None
+    return _band_plan(region).band(frequency)
+
+
+def band_for_frequency(frequency, region: Optional[int] = None) -> Optional[str]:
+    """
+    Band of a frequency.
+
+    Lookups are memoized, as the same few frequencies repeat in logs and spots.
+
+    Args:
+        frequency: Frequency in MHz (Decimal, float or string)
+        region: Band plan, see get_band_plan()
+
+    Returns:
+        Band name (e.g. "40m"), or None if the frequency is not in a band
+    """
+    if region is None:
+        region = getattr(settings, 'BAND_PLAN_REGION', 0)
+    return _band_for_frequency(frequency, region)
+
+
+@lru_cache(maxsize=1024)
+def normalize_band(band: str) -> Optional[str]:
+    """
+    Band name as stored, from a name as written by loggers.
+
+    Args:
+        band: Band name in any case, e.g. "40M", " 70CM"
+
+    Returns:
+        ADIF band name in lowercase (e.g. "40m"), or None if not a band
+    """
+    band = (band or '').strip().lower()
+    return band if band in _BAND_NAMES else None
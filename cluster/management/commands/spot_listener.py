@@ -0,0 +1,133 @@
+"""
+Management command to accept DX-cluster spot lines over TCP (telnet-style listener)
+"""
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from accounts.models import User
+from bunkers.references import warm_references
+from cluster.spot_ingest import MAX_BATCH_SIZE, ingest_spots, parse_spot_line
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Listen for DX-cluster spot lines ("DX de ...") on a TCP port and ingest them in batches. '
+        'Feed it with a cluster relay, a skimmer or e.g. `nc localhost 7300 < spots.txt`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--spotter',
+            required=True,
+            help='Callsign of the user recorded as spotter of ingested spots'
+        )
+        parser.add_argument(
+            '--host',
+            default='127.0.0.1',
+            help='Address to listen on (default: 127.0.0.1)'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=7300,
+            help='Port to listen on (default: 7300)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help=f'Write after this many spots (default: 100, max: {MAX_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--flush-interval',
+            type=float,
+            default=2.0,
+            help='Write pending spots at least every this many seconds (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            self.spotter = User.objects.get(callsign=options['spotter'].upper())
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['spotter']} not found")
+
+        self.batch_size = max(1, min(options['batch_size'], MAX_BATCH_SIZE))
+        self.flush_interval = options['flush_interval']
+        self.pending = []
+        self.flush_lock = None
+        warm_references()
+
+        asyncio.run(self.serve(options['host'], options['port']))
+
+    async def serve(self, host, port):
+        self.flush_lock = asyncio.Lock()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.stdout.write(self.style.SUCCESS(f'Listening for spots on {host}:{port}'))
+
+        flusher = asyncio.create_task(self.flush_periodically())
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            flusher.cancel()
+            await self.flush()
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        self.stdout.write(f'Connection from {peer}')
+        writer.write(b'BOTA spot listener ready\r\n')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                report = parse_spot_line(line.decode('utf-8', errors='replace'))
+                if report is None:
+                    continue
+                self.pending.append(report)
+                if len(self.pending) >= self.batch_size:
+                    await self.flush()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            self.stdout.write(f'Connection from {peer} closed')
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            reports, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+            started = time.monotonic()
+            try:
+                result = await sync_to_async(self.ingest)(reports)
+            except Exception:
+                # Keep the connections and the periodic flush alive; the batch is dropped
+                logger.exception(f"Ingesting {len(reports)} spots failed")
+                self.stderr.write(f'Ingesting {len(reports)} spots failed, batch dropped')
+                return
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(reports)} spots: {result['created']} new, {result['updated']} refreshed, "
+                f"{result['duplicates']} duplicates ({time.monotonic() - started:.2f}s)"
+            ))
+
+    def ingest(self, reports):
+        try:
+            return ingest_spots(reports, self.spotter)
+        finally:
+            # Like after a request: drop a connection broken by a database error
+            close_old_connections()
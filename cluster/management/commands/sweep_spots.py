@@ -0,0 +1,67 @@
+"""
+Management command to expire and archive spots (spot sweeper)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from cluster.spot_events import prune_events
+from cluster.spot_sweeper import archive_spots, expire_spots, get_archive_after_days
+
+
+class Command(BaseCommand):
+    help = 'Deactivate expired spots, prune the live feed event log and move old inactive spots to the spot archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between sweeps in loop mode (default: 60)'
+        )
+        parser.add_argument(
+            '--archive-after',
+            type=int,
+            default=None,
+            help='Archive inactive spots not updated for this many days '
+                 f'(default: SPOT_ARCHIVE_AFTER_DAYS, currently {get_archive_after_days()})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Spots archived per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--archive-every',
+            type=int,
+            default=60,
+            help='In loop mode, archive only on every Nth sweep (default: 60)'
+        )
+
+    def handle(self, *args, **options):
+        sweeps = 0
+        
+        while True:
+            expired = expire_spots()
+            if expired:
+                self.stdout.write(self.style.SUCCESS(f'Expired {len(expired)} spots'))
+            
+            pruned = prune_events()
+            if pruned:
+                self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} spot feed events'))
+            
+            if sweeps % max(1, options['archive_every']) == 0:
+                archived = archive_spots(options['archive_after'], batch_size=options['batch_size'])
+                if archived:
+                    self.stdout.write(self.style.SUCCESS(f'Archived {archived} spots'))
+            sweeps += 1
+            
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
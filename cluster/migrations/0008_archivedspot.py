@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bunkers', '0008_add_bunker_info_url'),
+        ('cluster', '0007_spothistory_cluster_spo_spot_id_2ca6a9_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSpot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('spot_id', models.BigIntegerField(help_text='ID the spot had in the live table', unique=True, verbose_name='Spot ID')),
+                ('activator_callsign', models.CharField(db_index=True, max_length=20, verbose_name='Activator Callsign')),
+                ('frequency', models.DecimalField(decimal_places=3, max_digits=7, verbose_name='Frequency (MHz)')),
+                ('band', models.CharField(blank=True, max_length=10, verbose_name='Band')),
+                ('bunker_reference', models.CharField(blank=True, default='', max_length=20, verbose_name='Bunker Reference')),
+                ('comment', models.CharField(blank=True, default='', max_length=200, verbose_name='Comment')),
+                ('created_at', models.DateTimeField(verbose_name='Created At')),
+                ('last_updated_at', models.DateTimeField(verbose_name='Last Updated At')),
+                ('expired_at', models.DateTimeField(verbose_name='Expired At')),
+                ('respot_count', models.IntegerField(default=0, verbose_name='Respot Count')),
+                ('respotter_count', models.IntegerField(default=0, help_text='Number of different users who respotted', verbose_name='Respotters')),
+                ('first_respot_at', models.DateTimeField(blank=True, null=True, verbose_name='First Respot')),
+                ('last_respot_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Respot')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archived At')),
+                ('bunker', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_spots', to='bunkers.bunker', verbose_name='Bunker')),
+                ('spotter', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_spots', to=settings.AUTH_USER_MODEL, verbose_name='Last Spotter')),
+            ],
+            options={
+                'verbose_name': 'Archived Spot',
+                'verbose_name_plural': 'Archived Spots',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='cluster_arc_created_625277_idx'), models.Index(fields=['bunker', '-created_at'], name='cluster_arc_bunker__c5679b_idx')],
+            },
+        ),
+    ]
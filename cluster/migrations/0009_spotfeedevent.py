@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cluster', '0008_archivedspot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpotFeedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=10, verbose_name='Event Type')),
+                ('spot_id', models.BigIntegerField(verbose_name='Spot ID')),
+                ('data', models.JSONField(blank=True, help_text='Serialized spot (empty for expired/deleted spots)', null=True, verbose_name='Data')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Spot Feed Event',
+                'verbose_name_plural': 'Spot Feed Events',
+                'ordering': ['id'],
+            },
+        ),
+    ]
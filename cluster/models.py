@@ -214,28 +214,8 @@ def detect_band_from_frequency(frequency):
     Detect amateur radio band from frequency in MHz.
     Returns band name (e.g., "40m", "20m") or None if not in amateur band.
     """
-    freq = float(frequency)
-    
-    band_map = [
-        (1.8, 2.0, "160m"),
-        (3.5, 4.0, "80m"),
-        (7.0, 7.3, "40m"),
-        (10.1, 10.15, "30m"),
-        (14.0, 14.35, "20m"),
-        (18.068, 18.168, "17m"),
-        (21.0, 21.45, "15m"),
-        (24.89, 24.99, "12m"),
-        (28.0, 29.7, "10m"),
-        (50.0, 54.0, "6m"),
-        (144.0, 148.0, "2m"),
-        (430.0, 440.0, "70cm"),
-    ]
-    
-    for min_freq, max_freq, band_name in band_map:
-        if min_freq <= freq <= max_freq:
-            return band_name
-    
-    return None
+    from .band_plan import band_for_frequency
+    return band_for_frequency(frequency)
 
 
 class SpotHistory(models.Model):
@@ -392,12 +372,11 @@ class Spot(models.Model):
             self.expires_at = timezone.now() + timedelta(minutes=30)
         
         # Try to resolve bunker from reference
-        if self.bunker_reference and not self.bunker:
-            from bunkers.models import Bunker
-            try:
-                self.bunker = Bunker.objects.get(reference_number=self.bunker_reference)
-            except Bunker.DoesNotExist:
-                pass
+        if self.bunker_reference and not self.bunker_id:
+            from bunkers.references import resolve
+            record = resolve(self.bunker_reference)
+            if record is not None:
+                self.bunker_id = record.id
         
         super().save(*args, **kwargs)
 
@@ -423,3 +402,136 @@ class Spot(models.Model):
             return _("1 min ago")
         else:
             return _("%(minutes)d min ago") % {'minutes': minutes}
+
+
+class ArchivedSpot(models.Model):
+    """
+    Compact record of a spot removed from the live Spot table.
+    The respot history is rolled up into counts and first/last times.
+    """
+    spot_id = models.BigIntegerField(
+        unique=True,
+        verbose_name=_("Spot ID"),
+        help_text=_("ID the spot had in the live table")
+    )
+    activator_callsign = models.CharField(
+        max_length=20,
+        db_index=True,
+        verbose_name=_("Activator Callsign")
+    )
+    spotter = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_spots',
+        verbose_name=_("Last Spotter")
+    )
+    frequency = models.DecimalField(
+        max_digits=7,
+        decimal_places=3,
+        verbose_name=_("Frequency (MHz)")
+    )
+    band = models.CharField(
+        max_length=10,
+        blank=True,
+        verbose_name=_("Band")
+    )
+    bunker_reference = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        verbose_name=_("Bunker Reference")
+    )
+    bunker = models.ForeignKey(
+        'bunkers.Bunker',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_spots',
+        verbose_name=_("Bunker")
+    )
+    comment = models.CharField(
+        max_length=200,
+        blank=True,
+        default='',
+        verbose_name=_("Comment")
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Created At")
+    )
+    last_updated_at = models.DateTimeField(
+        verbose_name=_("Last Updated At")
+    )
+    expired_at = models.DateTimeField(
+        verbose_name=_("Expired At")
+    )
+    respot_count = models.IntegerField(
+        default=0,
+        verbose_name=_("Respot Count")
+    )
+    respotter_count = models.IntegerField(
+        default=0,
+        verbose_name=_("Respotters"),
+        help_text=_("Number of different users who respotted")
+    )
+    first_respot_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("First Respot")
+    )
+    last_respot_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Last Respot")
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Archived At")
+    )
+
+    class Meta:
+        verbose_name = _("Archived Spot")
+        verbose_name_plural = _("Archived Spots")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['bunker', '-created_at']),
+        ]
+
+    def __str__(self):
+        bunker_info = self.bunker_reference if self.bunker_reference else "No ref"
+        return f"{self.activator_callsign} @ {self.frequency} MHz ({bunker_info}, archived)"
+
+
+class SpotFeedEvent(models.Model):
+    """
+    Entry of the live spot feed event log (see cluster.spot_events).
+    The ID is the event cursor clients resume from.
+    """
+    event_type = models.CharField(
+        max_length=10,
+        verbose_name=_("Event Type")
+    )
+    spot_id = models.BigIntegerField(
+        verbose_name=_("Spot ID")
+    )
+    data = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name=_("Data"),
+        help_text=_("Serialized spot (empty for expired/deleted spots)")
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name=_("Created At")
+    )
+
+    class Meta:
+        verbose_name = _("Spot Feed Event")
+        verbose_name_plural = _("Spot Feed Events")
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.event_type} spot {self.spot_id}"
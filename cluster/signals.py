@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .active_spots import bump_spots_version_on_commit
+from .models import Spot
+from .spot_events import (
+    EVENT_CREATED, EVENT_DELETED, EVENT_EXPIRED, EVENT_UPDATED,
+    publish_spot_event, serialize_spot
+)
+
+
+@receiver(post_save, sender=Spot)
+def spot_saved(sender, instance, created, **kwargs):
+    """Invalidate the active spot registry and publish the change to the live feed once committed"""
+    bump_spots_version_on_commit()
+    
+    if created:
+        event_type = EVENT_CREATED
+    elif instance.is_active:
+        event_type = EVENT_UPDATED
+    else:
+        event_type = EVENT_EXPIRED
+    data = serialize_spot(instance) if event_type != EVENT_EXPIRED else None
+    transaction.on_commit(lambda: publish_spot_event(event_type, instance.pk, data))
+
+
+@receiver(post_delete, sender=Spot)
+def spot_deleted(sender, instance, **kwargs):
+    """Invalidate the active spot registry and publish the deletion to the live feed once committed"""
+    if not instance.is_active:
+        # Already gone from the registry and the feed (e.g. archived)
+        return
+    
+    bump_spots_version_on_commit()
+    spot_id = instance.pk
+    transaction.on_commit(lambda: publish_spot_event(EVENT_DELETED, spot_id))
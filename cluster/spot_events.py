@@ -0,0 +1,287 @@
+"""
+Spot event log for the live spot feed.
+
+Every spot change (created, updated/respotted, expired, deleted) is
+published once as a SpotFeedEvent row, so all web processes read the same
+log; the row ID is the event ID. The event carries the spot already
+serialized, so streaming it to any number of clients costs one indexed
+query per poll. Clients resume from the last event ID they saw; the last
+SPOT_EVENT_BUFFER_SIZE events can be replayed, older cursors (or events
+already pruned by the spot sweeper) get a 'reset' and reload the spot list.
+
+IDs are handed out when a row is inserted, so an event may become visible
+just before one with a lower ID that is still being committed. A gap in the
+IDs is therefore only skipped once the event after it is older than
+SPOT_EVENT_SETTLE_SECONDS (the missing ID was rolled back); until then the
+read stops before it and the event is picked up on the next poll.
+
+Streams do not poll the log each: SpotEventHub reads it once per poll for
+all streams of a process and hands each stream the new events through its
+own queue. A stream only reads the log itself while it catches up from an
+older cursor, or after falling so far behind that its queue overflowed.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import SpotFeedEvent
+
+logger = logging.getLogger(__name__)
+
+# Seconds a published event stays available for replay
+SPOT_EVENT_TTL = 60 * 60
+
+# Seconds after which a gap in the event IDs is taken as a rolled back insert
+SPOT_EVENT_SETTLE_SECONDS = 5
+
+# Batches of events queued for one stream before it has to catch up by itself
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+EVENT_CREATED = 'created'
+EVENT_UPDATED = 'updated'
+EVENT_EXPIRED = 'expired'
+EVENT_DELETED = 'deleted'
+
+
+class SpotEvent(NamedTuple):
+    """Published spot event"""
+    id: int
+    type: str
+    spot_id: int
+    data: Optional[Dict]
+
+
+def get_buffer_size() -> int:
+    """Number of events kept for replay"""
+    return getattr(settings, 'SPOT_EVENT_BUFFER_SIZE', 500)
+
+
+def serialize_spot(spot) -> Dict:
+    """
+    Spot fields sent with events.
+
+    Relative times ("5 min ago") are left to the client, so an event stays
+    valid for as long as it is replayed.
+    """
+    return {
+        'id': spot.id,
+        'activator_callsign': spot.activator_callsign,
+        'spotter_callsign': spot.spotter.callsign if spot.spotter_id else None,
+        'frequency': str(spot.frequency),
+        'band': spot.band,
+        'bunker_reference': spot.bunker_reference or '',
+        'bunker_name': spot.bunker.name_en if spot.bunker_id else None,
+        'comment': spot.comment or '',
+        'created_at': spot.created_at.isoformat() if spot.created_at else None,
+        'updated_at': spot.updated_at.isoformat() if spot.updated_at else None,
+        'expires_at': spot.expires_at.isoformat() if spot.expires_at else None,
+        'is_active': spot.is_active,
+        'respot_count': spot.respot_count,
+    }
+
+
+def get_last_event_id() -> int:
+    """ID of the last published event (0 if none)"""
+    return SpotFeedEvent.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+
+async def aget_last_event_id() -> int:
+    """Async version of get_last_event_id()"""
+    return (await SpotFeedEvent.objects.aaggregate(last_id=Max('id')))['last_id'] or 0
+
+
+def publish_spot_event(event_type: str, spot_id: int, data: Optional[Dict] = None) -> int:
+    """
+    Append an event to the log.
+
+    Args:
+        event_type: One of the EVENT_* constants
+        spot_id: ID of the spot
+        data: Serialized spot (None for expired/deleted spots)
+
+    Returns:
+        The event ID
+    """
+    return SpotFeedEvent.objects.create(event_type=event_type, spot_id=spot_id, data=data).id
+
+
+def publish_expired(spot_ids: Iterable[int]) -> int:
+    """
+    Publish expiry events for spots deactivated in bulk (queryset.update()).
+
+    Returns:
+        Number of events published
+    """
+    events = SpotFeedEvent.objects.bulk_create([
+        SpotFeedEvent(event_type=EVENT_EXPIRED, spot_id=spot_id) for spot_id in spot_ids
+    ])
+    return len(events)
+
+
+def prune_events(now=None) -> int:
+    """
+    Delete events older than SPOT_EVENT_TTL.
+
+    The last event is kept, so the current cursor stays valid.
+
+    Returns:
+        Number of deleted events
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=SPOT_EVENT_TTL)
+    deleted, _ = SpotFeedEvent.objects.filter(
+        created_at__lt=cutoff, id__lt=get_last_event_id()
+    ).delete()
+    return deleted
+
+
+def _events_query(after_id: int):
+    return SpotFeedEvent.objects.filter(id__gt=after_id).order_by('id')[:get_buffer_size()]
+
+
+def _collect(after_id: int, bounds: Dict, rows: List[SpotFeedEvent]) -> Tuple[List[SpotEvent], bool]:
+    """Events after a cursor from the fetched rows; True if the cursor cannot be resumed"""
+    first_id, last_id = bounds['first_id'], bounds['last_id']
+    if last_id is None:
+        return [], after_id > 0
+    if after_id > last_id or last_id - after_id > get_buffer_size():
+        return [], True
+    if after_id < first_id - 1:
+        # Pruned: the client missed events
+        return [], True
+
+    settled_before = timezone.now() - timedelta(seconds=SPOT_EVENT_SETTLE_SECONDS)
+    events = []
+    expected_id = after_id + 1
+    for row in rows:
+        if row.id != expected_id and row.created_at > settled_before:
+            # Lower IDs may still be committing; picked up on the next read
+            break
+        events.append(SpotEvent(row.id, row.event_type, row.spot_id, row.data))
+        expected_id = row.id + 1
+    return events, False
+
+
+def read_events(after_id: int) -> Tuple[List[SpotEvent], bool]:
+    """
+    Events published after a cursor.
+
+    Args:
+        after_id: Last event ID the client has seen
+
+    Returns:
+        (events in order, reset) where reset means the client missed
+        events and must reload the full spot list
+    """
+    bounds = SpotFeedEvent.objects.aggregate(first_id=Min('id'), last_id=Max('id'))
+    if bounds['last_id'] is None or bounds['last_id'] <= after_id:
+        return _collect(after_id, bounds, [])
+    return _collect(after_id, bounds, list(_events_query(after_id)))
+
+
+async def aread_events(after_id: int) -> Tuple[List[SpotEvent], bool]:
+    """Async version of read_events()"""
+    bounds = await SpotFeedEvent.objects.aaggregate(first_id=Min('id'), last_id=Max('id'))
+    if bounds['last_id'] is None or bounds['last_id'] <= after_id:
+        return _collect(after_id, bounds, [])
+    return _collect(after_id, bounds, [row async for row in _events_query(after_id)])
+
+
+class SpotEventBatch(NamedTuple):
+    """Result of one poll of the hub"""
+    after_id: int
+    events: List[SpotEvent]
+    reset: bool
+    cursor: int
+
+
+class SpotEventSubscription:
+    """Event batches for one stream"""
+
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, batch: SpotEventBatch):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            # A slow client; the stream catches up from the log
+            self.overflowed = True
+
+    def clear(self):
+        """Drop the queued batches after an overflow"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+class SpotEventHub:
+    """
+    Reads the event log for all streams of a process.
+
+    One poller task per event loop runs while there are subscriptions and
+    publishes every read to all of them. `cursor` is the last event ID the
+    poller has read; batches are contiguous, each starting at the cursor
+    the previous one ended at.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.cursor = 0
+        self.subscriptions = set()
+        self.task = None
+
+    async def subscribe(self) -> SpotEventSubscription:
+        """Start receiving event batches (and the poller, if needed)"""
+        subscription = SpotEventSubscription()
+        if self.task is None or self.task.done():
+            cursor = await aget_last_event_id()
+            if self.task is None or self.task.done():
+                self.cursor = cursor
+                self.task = self.loop.create_task(self._poll())
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: SpotEventSubscription):
+        """Stop receiving event batches; the last one stops the poller"""
+        self.subscriptions.discard(subscription)
+        if not self.subscriptions and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _poll(self):
+        while True:
+            try:
+                events, reset = await aread_events(self.cursor)
+                after_id = self.cursor
+                if reset:
+                    self.cursor = await aget_last_event_id()
+                elif events:
+                    self.cursor = events[-1].id
+                if reset or events:
+                    batch = SpotEventBatch(after_id, events, reset, self.cursor)
+                    for subscription in self.subscriptions:
+                        subscription.put(batch)
+            except Exception:
+                logger.exception("Reading the spot event log failed")
+            await asyncio.sleep(getattr(settings, 'SPOT_STREAM_POLL_INTERVAL', 1.0))
+
+
+# Hub of this process (and event loop)
+_hub: Optional[SpotEventHub] = None
+
+
+def get_event_hub() -> SpotEventHub:
+    """Event hub of the running event loop"""
+    global _hub
+
+    if _hub is None or _hub.loop is not asyncio.get_running_loop():
+        _hub = SpotEventHub()
+    return _hub
@@ -0,0 +1,239 @@
+"""
+Batch spot ingestion.
+
+Spots from automated sources (skimmers, DX-cluster feeds) arrive in
+volume and mostly repeat spots that are already active. A batch is
+processed in memory first: reports are deduplicated against each other
+and against the active spot registry by (activator, frequency bucket,
+reference), bunker references are resolved from the cached reference map,
+and then all new spots are inserted with one bulk_create and all repeated
+ones refreshed with one bulk_update. The live feed and the active spot
+registry version are updated once per batch.
+
+DX-cluster spot lines look like:
+
+    DX de SP1ABC:    14250.0  SP2XYZ       B/SP-0039 CQ BOTA          1234Z
+"""
+import re
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .active_spots import (
+    FREQUENCY_TOLERANCE_MHZ, bump_spots_version_on_commit, frequency_bucket, get_active_spots
+)
+from .models import Spot, detect_band_from_frequency
+from .spot_events import EVENT_CREATED, EVENT_UPDATED, publish_spot_event, serialize_spot
+
+# Largest number of spots accepted in one batch
+MAX_BATCH_SIZE = 500
+
+# Lifetime of an ingested or refreshed spot
+SPOT_LIFETIME = timedelta(minutes=30)
+
+SPOT_LINE_RE = re.compile(
+    r'^DX de\s+(?P<spotter>[A-Z0-9/#-]+):?\s+(?P<frequency>\d+(?:\.\d+)?)\s+'
+    r'(?P<callsign>[A-Z0-9/]+)\s*(?P<comment>.*?)\s*(?:\b\d{4}Z)?\s*$',
+    re.IGNORECASE
+)
+REFERENCE_RE = re.compile(r'\bB/[A-Z]{2}-\d{4}\b', re.IGNORECASE)
+CALLSIGN_RE = re.compile(r'^[A-Z0-9]+(?:/[A-Z0-9]+)*$')
+
+
+class SpotReport(NamedTuple):
+    """Validated spot report"""
+    activator_callsign: str
+    frequency: Decimal
+    bunker_reference: str
+    comment: str
+
+
+def make_report(activator_callsign: str, frequency, bunker_reference: str = '',
+                comment: str = '') -> SpotReport:
+    """
+    Validate and normalize a spot report.
+
+    Args:
+        activator_callsign: Activator callsign (portable suffixes allowed)
+        frequency: Frequency in MHz
+        bunker_reference: Bunker reference like B/SP-0039 (optional)
+        comment: Free text, truncated to 200 characters
+
+    Returns:
+        SpotReport
+
+    Raises:
+        ValueError: If a field is invalid
+    """
+    callsign = (activator_callsign or '').strip().upper()
+    if not (3 <= len(callsign) <= 20 and CALLSIGN_RE.match(callsign)):
+        raise ValueError(f'Invalid callsign: {activator_callsign!r}')
+
+    try:
+        frequency = Decimal(str(frequency)).quantize(Decimal('0.001'))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'Invalid frequency: {frequency!r}')
+    if not detect_band_from_frequency(frequency):
+        raise ValueError(f'Frequency {frequency} MHz is outside the amateur radio bands')
+
+    reference = (bunker_reference or '').strip().upper()
+    if reference and not REFERENCE_RE.fullmatch(reference):
+        raise ValueError(f'Invalid bunker reference: {bunker_reference!r}')
+
+    return SpotReport(callsign, frequency, reference, (comment or '').strip()[:200])
+
+
+def parse_spot_line(line: str) -> Optional[SpotReport]:
+    """
+    Parse a DX-cluster spot line.
+
+    The frequency is in kHz; the first bunker reference in the comment is
+    taken as the spot's reference.
+
+    Returns:
+        SpotReport, or None if the line is not a valid spot
+    """
+    match = SPOT_LINE_RE.match(line.strip())
+    if not match:
+        return None
+
+    comment = match.group('comment')
+    reference = REFERENCE_RE.search(comment)
+    try:
+        return make_report(
+            match.group('callsign'),
+            Decimal(match.group('frequency')) / 1000,
+            reference.group(0) if reference else '',
+            comment
+        )
+    except ValueError:
+        return None
+
+
+def _find_pending(pending: Dict[tuple, SpotReport], report: SpotReport) -> Optional[tuple]:
+    """Key of a report in the batch that is the same spot"""
+    bucket = frequency_bucket(report.frequency)
+    for neighbour in (bucket, bucket - 1, bucket + 1):
+        key = (report.activator_callsign, neighbour, report.bunker_reference)
+        other = pending.get(key)
+        if other is not None and abs(other.frequency - report.frequency) <= Decimal(str(FREQUENCY_TOLERANCE_MHZ)):
+            return key
+    return None
+
+
+def ingest_spots(reports: Iterable[SpotReport], spotter, now=None) -> Dict[str, int]:
+    """
+    Create or refresh spots from a batch of reports.
+
+    A report repeating an active spot (same activator and reference, within
+    FREQUENCY_TOLERANCE_MHZ) refreshes it; repeats within the batch count
+    once, the last one wins.
+
+    Args:
+        reports: SpotReport instances
+        spotter: User recorded as the spotter
+        now: Reference time (default: now)
+
+    Returns:
+        Dict with 'created', 'updated' and 'duplicates' counts
+    """
+    from bunkers.models import Bunker
+    from bunkers.references import resolve_many
+
+    now = now or timezone.now()
+    registry = get_active_spots()
+
+    new_spots: Dict[tuple, SpotReport] = {}
+    refreshed: Dict[int, SpotReport] = {}
+    duplicates = 0
+    for report in reports:
+        key = _find_pending(new_spots, report)
+        if key is not None:
+            new_spots[key] = report
+            duplicates += 1
+            continue
+        entry = registry.find(report.activator_callsign, float(report.frequency), report.bunker_reference)
+        if entry is not None:
+            if entry.spot_id in refreshed:
+                duplicates += 1
+            refreshed[entry.spot_id] = report
+            continue
+        new_spots[(report.activator_callsign, frequency_bucket(report.frequency), report.bunker_reference)] = report
+
+    references = resolve_many(
+        report.bunker_reference for report in new_spots.values() if report.bunker_reference
+    )
+    expires_at = now + SPOT_LIFETIME
+
+    with transaction.atomic():
+        updated_spots = []
+        if refreshed:
+            spots = Spot.objects.in_bulk(list(refreshed))
+            for spot_id, report in refreshed.items():
+                spot = spots.get(spot_id)
+                if spot is None:
+                    # Deleted since the registry was built
+                    new_spots[(report.activator_callsign, None, spot_id)] = report
+                    continue
+                spot.frequency = report.frequency
+                spot.comment = report.comment
+                spot.spotter = spotter
+                spot.expires_at = expires_at
+                spot.updated_at = now
+                spot.is_active = True
+                updated_spots.append(spot)
+            Spot.objects.bulk_update(
+                updated_spots,
+                ['frequency', 'comment', 'spotter', 'expires_at', 'updated_at', 'is_active']
+            )
+
+        created_spots = Spot.objects.bulk_create([
+            Spot(
+                activator_callsign=report.activator_callsign,
+                spotter=spotter,
+                frequency=report.frequency,
+                band=detect_band_from_frequency(report.frequency) or 'Unknown',
+                bunker_reference=report.bunker_reference or None,
+                bunker_id=getattr(references.get(report.bunker_reference), 'id', None),
+                comment=report.comment,
+                expires_at=expires_at,
+                last_respot_time=now,
+            )
+            for report in new_spots.values()
+        ])
+
+        changed = created_spots + updated_spots
+        if changed:
+            bunkers = Bunker.objects.in_bulk({spot.bunker_id for spot in changed if spot.bunker_id})
+            for spot in changed:
+                spot.bunker = bunkers.get(spot.bunker_id)
+            events = [(EVENT_CREATED, spot.id, serialize_spot(spot)) for spot in created_spots]
+            events += [(EVENT_UPDATED, spot.id, serialize_spot(spot)) for spot in updated_spots]
+
+            bump_spots_version_on_commit()
+            transaction.on_commit(lambda: [publish_spot_event(*event) for event in events])
+
+    return {'created': len(created_spots), 'updated': len(updated_spots), 'duplicates': duplicates}
+
+
+def ingest_lines(lines: Iterable[str], spotter, now=None) -> Dict[str, int]:
+    """
+    Ingest DX-cluster spot lines; other lines are skipped.
+
+    Returns:
+        Counts as in ingest_spots(), plus 'skipped' lines
+    """
+    reports: List[SpotReport] = []
+    skipped = 0
+    for line in lines:
+        report = parse_spot_line(line)
+        if report is None:
+            skipped += 1
+        else:
+            reports.append(report)
+    result = ingest_spots(reports, spotter, now=now)
+    result['skipped'] = skipped
+    return result
@@ -0,0 +1,129 @@
+"""
+Spot expiry and archiving.
+
+expire_spots() deactivates spots past their expiry time in one UPDATE and
+tells the live feed and the active spot registry. archive_spots() moves
+inactive spots older than a number of days out of the live tables: each
+spot becomes one ArchivedSpot row with its SpotHistory rolled up (respot
+count, distinct respotters, first and last respot), and the Spot rows and
+their history are deleted. Both run from the sweep_spots command, so the
+Spot table only holds the recent working set; the command also prunes the
+live feed event log (spot_events.prune_events()).
+"""
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .active_spots import bump_spots_version_on_commit
+from .models import ArchivedSpot, Spot, SpotHistory
+from .spot_events import publish_expired
+
+logger = logging.getLogger(__name__)
+
+
+def expire_spots(queryset=None, now=None) -> List[int]:
+    """
+    Mark expired active spots as inactive.
+
+    Args:
+        queryset: Spots to consider (default: all)
+        now: Reference time (default: now)
+
+    Returns:
+        IDs of the deactivated spots
+    """
+    if queryset is None:
+        queryset = Spot.objects.all()
+    now = now or timezone.now()
+
+    spot_ids = list(
+        queryset.filter(is_active=True, expires_at__lte=now).values_list('id', flat=True)
+    )
+    if not spot_ids:
+        return []
+
+    # is_active=True again, in case a spot was respotted meanwhile
+    Spot.objects.filter(id__in=spot_ids, is_active=True, expires_at__lte=now).update(is_active=False)
+    bump_spots_version_on_commit()
+    transaction.on_commit(lambda: publish_expired(spot_ids))
+    return spot_ids
+
+
+def get_archive_after_days() -> int:
+    """Age in days after which inactive spots are archived"""
+    return getattr(settings, 'SPOT_ARCHIVE_AFTER_DAYS', 30)
+
+
+def archive_spots(older_than_days: Optional[int] = None, batch_size: int = 1000,
+                  now=None) -> int:
+    """
+    Move old inactive spots to ArchivedSpot.
+
+    Args:
+        older_than_days: Archive spots last updated this many days ago
+            (default: settings.SPOT_ARCHIVE_AFTER_DAYS)
+        batch_size: Spots per transaction
+        now: Reference time (default: now)
+
+    Returns:
+        Number of archived spots
+    """
+    if older_than_days is None:
+        older_than_days = get_archive_after_days()
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            spots = list(
+                Spot.objects.filter(is_active=False, updated_at__lt=cutoff).order_by('id')[:batch_size]
+            )
+            if not spots:
+                break
+            spot_ids = [spot.id for spot in spots]
+
+            history = {
+                row['spot_id']: row
+                for row in SpotHistory.objects.filter(spot_id__in=spot_ids).order_by().values(
+                    'spot_id'
+                ).annotate(
+                    respotters=Count('respotter', distinct=True),
+                    first_respot=Min('respotted_at'),
+                    last_respot=Max('respotted_at')
+                )
+            }
+
+            ArchivedSpot.objects.bulk_create([
+                ArchivedSpot(
+                    spot_id=spot.id,
+                    activator_callsign=spot.activator_callsign,
+                    spotter_id=spot.spotter_id,
+                    frequency=spot.frequency,
+                    band=spot.band,
+                    bunker_reference=spot.bunker_reference or '',
+                    bunker_id=spot.bunker_id,
+                    comment=spot.comment or '',
+                    created_at=spot.created_at,
+                    last_updated_at=spot.updated_at,
+                    expired_at=spot.expires_at,
+                    respot_count=spot.respot_count,
+                    respotter_count=history.get(spot.id, {}).get('respotters', 0),
+                    first_respot_at=history.get(spot.id, {}).get('first_respot'),
+                    last_respot_at=history.get(spot.id, {}).get('last_respot'),
+                )
+                for spot in spots
+            ], ignore_conflicts=True)
+
+            # Cascades to SpotHistory
+            Spot.objects.filter(id__in=spot_ids).delete()
+            bump_spots_version_on_commit()
+
+        archived += len(spots)
+        logger.info(f"Archived {len(spots)} spots")
+
+    return archived
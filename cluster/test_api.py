@@ -148,3 +148,173 @@ class ClusterAlertAPITest(TestCase):
         response = self.client.get(f'/api/cluster-alerts/?cluster={self.cluster.id}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
+
+
+class SpotStreamAPITest(TestCase):
+    """Test the live spot feed"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='spotter@example.com',
+            callsign='SP1SPT',
+            password='testpass123'
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            callsign='SP1ADM',
+            password='testpass123'
+        )
+    
+    def test_spot_events(self):
+        """Spot changes are published once committed and can be replayed"""
+        from .models import Spot
+        from .spot_events import get_last_event_id, read_events
+        
+        cursor = int(self.client.get('/api/spots/active/')['X-Spot-Event-Id'])
+        self.assertEqual(cursor, get_last_event_id())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            spot = Spot.objects.create(
+                activator_callsign='SP2ACT', spotter=self.user, frequency=Decimal('14.250')
+            )
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/spots/{spot.id}/respot/', {'comment': 'CW'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        Spot.objects.filter(id=spot.id).update(expires_at=timezone.now() - timezone.timedelta(minutes=1))
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/spots/cleanup_expired/')
+        
+        events, reset = read_events(cursor)
+        self.assertFalse(reset)
+        self.assertEqual([event.type for event in events], ['created', 'updated', 'expired'])
+        self.assertEqual(events[0].data['activator_callsign'], 'SP2ACT')
+        self.assertEqual(events[1].data['respot_count'], 1)
+        self.assertEqual(read_events(events[-1].id), ([], False))
+        
+        # A cursor older than the replay buffer cannot be resumed
+        with self.settings(SPOT_EVENT_BUFFER_SIZE=2):
+            self.assertEqual(read_events(cursor), ([], True))
+    
+    def test_event_log_gaps_and_pruning(self):
+        """Recent gaps in the event IDs are waited for, pruned events force a reset"""
+        from .models import SpotFeedEvent
+        from .spot_events import get_last_event_id, prune_events, publish_spot_event, read_events
+        
+        cursor = get_last_event_id()
+        first_id = publish_spot_event('deleted', 1)
+        # An event with a lower ID still being committed
+        SpotFeedEvent.objects.create(id=first_id + 2, event_type='deleted', spot_id=3)
+        events, reset = read_events(cursor)
+        self.assertFalse(reset)
+        self.assertEqual([event.spot_id for event in events], [1])
+        
+        # Once settled, the gap is a rolled back insert and skipped
+        SpotFeedEvent.objects.filter(id=first_id + 2).update(
+            created_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+        self.assertEqual([event.spot_id for event in read_events(first_id)[0]], [3])
+        
+        SpotFeedEvent.objects.update(created_at=timezone.now() - timezone.timedelta(hours=2))
+        self.assertEqual(prune_events(), 1)
+        self.assertEqual(get_last_event_id(), first_id + 2)
+        self.assertEqual(read_events(cursor), ([], True))
+        self.assertEqual(read_events(first_id + 2), ([], False))
+    
+    def test_stream(self):
+        """The stream sends events after the cursor as server-sent events"""
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        from .spot_events import get_last_event_id, publish_spot_event
+        
+        cursor = get_last_event_id()
+        event_id = publish_spot_event('deleted', 42)
+        
+        async def read_stream():
+            response = await AsyncClient().get('/api/spots/stream/', headers={'Last-Event-ID': str(cursor)})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            return b''.join([chunk async for chunk in response.streaming_content]).decode()
+        
+        with self.settings(SPOT_STREAM_MAX_SECONDS=0.05, SPOT_STREAM_POLL_INTERVAL=0.01):
+            content = async_to_sync(read_stream)()
+        self.assertIn(f'id: {event_id}\nevent: deleted\ndata: {{"spot_id":42,"spot":null}}\n\n', content)
+    
+    def test_streams_share_one_poller(self):
+        """Concurrent streams get new events from one poll of the log"""
+        import asyncio
+        from asgiref.sync import async_to_sync, sync_to_async
+        from django.test import AsyncClient
+        from .spot_events import get_event_hub, publish_spot_event
+        
+        async def read_stream(response):
+            return b''.join([chunk async for chunk in response.streaming_content]).decode()
+        
+        async def publish():
+            await asyncio.sleep(0.05)
+            hub = get_event_hub()
+            subscribers = len(hub.subscriptions)
+            event_id = await sync_to_async(publish_spot_event)('deleted', 7)
+            return subscribers, hub.task is not None, event_id
+        
+        async def run():
+            responses = [await AsyncClient().get('/api/spots/stream/') for _ in range(2)]
+            return await asyncio.gather(publish(), *[read_stream(response) for response in responses])
+        
+        with self.settings(SPOT_STREAM_MAX_SECONDS=0.3, SPOT_STREAM_POLL_INTERVAL=0.01):
+            (subscribers, polling, event_id), *contents = async_to_sync(run)()
+        self.assertEqual(subscribers, 2)
+        self.assertTrue(polling)
+        for content in contents:
+            self.assertIn(f'id: {event_id}\nevent: deleted\ndata: {{"spot_id":7,"spot":null}}\n\n', content)
+
+
+class SpotBatchAPITest(TestCase):
+    """Test batch spot ingestion"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='skimmer@example.com',
+            callsign='SP1SKM',
+            password='testpass123'
+        )
+    
+    def test_batch(self):
+        """Spots and cluster lines are ingested, invalid entries reported"""
+        from .models import Spot
+        from .spot_events import get_last_event_id, read_events
+        
+        data = {
+            'spots': [
+                {'activator_callsign': 'SP2XYZ', 'frequency': '14.250', 'comment': 'CQ'},
+                {'activator_callsign': 'SP2XYZ', 'frequency': '999'},
+            ],
+            'lines': [
+                'DX de SP1ABC:     7100.0  SP3ABC       B/SP-0001 QRV          1234Z',
+                'garbage',
+            ]
+        }
+        response = self.client.post('/api/spots/batch/', data, format='json')
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+        
+        self.client.force_authenticate(user=self.user)
+        cursor = get_last_event_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/spots/batch/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            [(item.get('spot'), item.get('line')) for item in response.data['rejected']],
+            [(1, None), (None, 1)]
+        )
+        self.assertEqual(Spot.objects.get(activator_callsign='SP3ABC').bunker_reference, 'B/SP-0001')
+        events, _ = read_events(cursor)
+        self.assertEqual([event.type for event in events], ['created', 'created'])
+        
+        response = self.client.post('/api/spots/batch/', {'spots': {}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,4 +1,5 @@
 from django.test import TestCase
+from unittest import mock
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
@@ -404,3 +405,241 @@ class ClusterAlertModelTest(TestCase):
         )
         
         self.assertTrue(alert.is_currently_active())
+
+
+class ActiveSpotRegistryTest(TestCase):
+    """Test the cached active spot registry"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='spotter@example.com',
+            callsign='SP1SPT',
+            password='testpass123'
+        )
+        category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        self.bunker = Bunker.objects.create(
+            reference_number='B/SP-0001', name_pl='A', name_en='A', category=category,
+            latitude=Decimal('52.0'), longitude=Decimal('21.0'), is_verified=True
+        )
+    
+    def test_registry_follows_spot_changes(self):
+        """Count, bunkers and bands change with spots; an unchanged registry costs no query"""
+        from .active_spots import get_active_spots
+        from .models import Spot
+        from .spot_sweeper import expire_spots
+        
+        self.assertEqual(get_active_spots().count, 0)
+        
+        spot = Spot.objects.create(
+            activator_callsign='SP2ACT', spotter=self.user, frequency=Decimal('14.250'),
+            bunker_reference='B/SP-0001'
+        )
+        Spot.objects.create(activator_callsign='SP3ACT', spotter=self.user, frequency=Decimal('7.100'))
+        
+        registry = get_active_spots()
+        self.assertEqual(registry.count, 2)
+        self.assertEqual(registry.bunker_ids, {self.bunker.id})
+        self.assertEqual(registry.verified_bunker_ids, {self.bunker.id})
+        self.assertEqual(registry.bands, ['20m', '40m'])
+        with self.assertNumQueries(0):
+            self.assertIs(get_active_spots(), registry)
+        
+        # The bulk paths bump the version
+        Spot.objects.filter(id=spot.id).update(expires_at=timezone.now())
+        expire_spots()
+        self.assertEqual(get_active_spots().bands, ['40m'])
+        
+        # Raw updates bump nothing and are seen at the next database check
+        Spot.objects.filter(id=spot.id).update(is_active=True, expires_at=timezone.now() + timedelta(minutes=5))
+        with mock.patch('cluster.active_spots.SPOTS_VERSION_CHECK_SECONDS', 0):
+            self.assertEqual(get_active_spots().count, 2)
+        
+        spot.delete()
+        self.assertEqual(get_active_spots().bands, ['40m'])
+    
+    def test_expired_entries_are_skipped(self):
+        """Entries stop counting at their expiry time"""
+        from .active_spots import ActiveSpotRegistry
+        
+        now = timezone.now().timestamp()
+        registry = ActiveSpotRegistry([
+            (now - 10, 1, None, False, '20m', 'SP1AAA', 14.25, ''),
+            (now + 60, 2, 5, True, '40m', 'SP1BBB', 7.1, 'B/SP-0005'),
+            (now + 600, 3, 6, False, '40m', 'SP1CCC', 7.15, 'B/SP-0006'),
+        ])
+        self.assertEqual(registry.count, 2)
+        self.assertEqual(registry.bunker_ids, {5, 6})
+        self.assertEqual(registry.verified_bunker_ids, {5})
+        self.assertEqual(registry.bands, ['40m'])
+        self.assertEqual([entry.spot_id for entry in registry.active(now + 120)], [3])
+
+
+class SpotSweeperTest(TestCase):
+    """Test spot expiry and archiving"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='spotter@example.com',
+            callsign='SP1SPT',
+            password='testpass123'
+        )
+        self.hunter = User.objects.create_user(
+            email='hunter@example.com',
+            callsign='SP2HNT',
+            password='testpass123'
+        )
+    
+    def test_expire_and_archive(self):
+        """Expired spots are deactivated, old ones archived with history rolled up"""
+        from django.core.management import call_command
+        from .active_spots import get_active_spots
+        from .models import ArchivedSpot, Spot, SpotHistory
+        
+        now = timezone.now()
+        live = Spot.objects.create(activator_callsign='SP3LIV', spotter=self.user, frequency=Decimal('14.250'))
+        old = Spot.objects.create(
+            activator_callsign='SP3OLD', spotter=self.user, frequency=Decimal('7.100'),
+            bunker_reference='B/SP-0001', respot_count=3
+        )
+        for respotter in (self.user, self.hunter, self.hunter):
+            SpotHistory.objects.create(spot=old, respotter=respotter)
+        Spot.objects.filter(id=old.id).update(
+            expires_at=now - timedelta(days=40), updated_at=now - timedelta(days=40)
+        )
+        # Expired, though not deactivated yet
+        self.assertEqual(get_active_spots().count, 1)
+        
+        call_command('sweep_spots', stdout=open('/dev/null', 'w'))
+        
+        self.assertEqual(list(Spot.objects.values_list('id', flat=True)), [live.id])
+        self.assertEqual(get_active_spots().count, 1)
+        self.assertFalse(SpotHistory.objects.exists())
+        archived = ArchivedSpot.objects.get()
+        self.assertEqual(archived.spot_id, old.id)
+        self.assertEqual(archived.bunker_reference, 'B/SP-0001')
+        self.assertEqual(archived.respot_count, 3)
+        self.assertEqual(archived.respotter_count, 2)
+        self.assertIsNotNone(archived.last_respot_at)
+
+
+class SpotIngestTest(TestCase):
+    """Test batch spot ingestion"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='skimmer@example.com',
+            callsign='SP1SKM',
+            password='testpass123'
+        )
+        category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        self.bunker = Bunker.objects.create(
+            reference_number='B/SP-0039', name_pl='A', name_en='A', category=category,
+            latitude=Decimal('52.0'), longitude=Decimal('21.0'), is_verified=True
+        )
+    
+    def test_parse_spot_line(self):
+        """DX-cluster lines are parsed with the frequency in kHz"""
+        from .spot_ingest import parse_spot_line
+        
+        report = parse_spot_line('DX de SP1ABC:    14250.0  sp2xyz/p     B/SP-0039 CQ BOTA          1234Z')
+        self.assertEqual(report.activator_callsign, 'SP2XYZ/P')
+        self.assertEqual(report.frequency, Decimal('14.250'))
+        self.assertEqual(report.bunker_reference, 'B/SP-0039')
+        self.assertEqual(report.comment, 'B/SP-0039 CQ BOTA')
+        self.assertIsNone(parse_spot_line('SP1ABC de SP2XYZ: hello'))
+        self.assertIsNone(parse_spot_line('DX de SP1ABC:    99999.0  SP2XYZ  out of band'))
+    
+    def test_batch_deduplication(self):
+        """Repeats within a batch and of active spots refresh instead of creating spots"""
+        from .active_spots import get_active_spots
+        from .models import Spot
+        from .spot_ingest import ingest_spots, make_report
+        
+        result = ingest_spots([
+            make_report('SP2XYZ', '14.250', 'B/SP-0039', 'CQ'),
+            make_report('SP2XYZ', '14.251', 'B/SP-0039', 'CQ BOTA'),
+            make_report('SP3ABC', '7.100'),
+        ], self.user)
+        self.assertEqual(result, {'created': 2, 'updated': 0, 'duplicates': 1})
+        spot = Spot.objects.get(activator_callsign='SP2XYZ')
+        self.assertEqual(spot.bunker_id, self.bunker.id)
+        self.assertEqual(spot.band, '20m')
+        self.assertEqual(spot.comment, 'CQ BOTA')
+        self.assertEqual(get_active_spots().count, 2)
+        
+        result = ingest_spots([
+            make_report('SP2XYZ', '14.249', 'B/SP-0039', 'QRV'),
+            make_report('SP2XYZ', '14.250', 'B/SP-0039', 'QRV SSB'),
+            make_report('SP2XYZ', '21.250', 'B/SP-0039'),
+        ], self.user)
+        self.assertEqual(result, {'created': 1, 'updated': 1, 'duplicates': 1})
+        spot.refresh_from_db()
+        self.assertEqual(spot.comment, 'QRV SSB')
+        self.assertEqual(Spot.objects.count(), 3)
+    
+    def test_invalid_reports(self):
+        """Invalid fields are rejected"""
+        from .spot_ingest import make_report
+        
+        for args in (('X', '14.250'), ('SP2XYZ', 'abc'), ('SP2XYZ', '100.0'), ('SP2XYZ', '14.250', 'SP-0039')):
+            with self.assertRaises(ValueError):
+                make_report(*args)
+    
+    def test_listener_survives_ingest_errors(self):
+        """A failing batch is logged and dropped; the listener keeps flushing"""
+        import asyncio
+        from io import StringIO
+        from unittest import mock
+        from asgiref.sync import async_to_sync
+        from django.db import OperationalError
+        from .management.commands import spot_listener
+        from .models import Spot
+        from .spot_ingest import make_report
+        
+        command = spot_listener.Command(stdout=StringIO(), stderr=StringIO())
+        command.spotter = self.user
+        command.batch_size = 10
+        
+        async def flush(reports):
+            command.flush_lock = asyncio.Lock()
+            command.pending = reports
+            await command.flush()
+        
+        with mock.patch.object(spot_listener, 'close_old_connections') as close:
+            with mock.patch.object(spot_listener, 'ingest_spots', side_effect=OperationalError('gone')), \
+                    self.assertLogs(spot_listener.logger, 'ERROR'):
+                async_to_sync(flush)([make_report('SP2XYZ', '14.250')])
+            self.assertEqual(command.pending, [])
+            
+            async_to_sync(flush)([make_report('SP3ABC', '7.100')])
+        self.assertEqual(close.call_count, 2)
+        self.assertEqual(list(Spot.objects.values_list('activator_callsign', flat=True)), ['SP3ABC'])
+
+
+class BandPlanTest(TestCase):
+    """Test frequency to band lookup"""
+    
+    def test_band_for_frequency(self):
+        """Band edges are inclusive and regions restrict the bands"""
+        from .band_plan import band_for_frequency, normalize_band
+        from .models import detect_band_from_frequency
+        
+        self.assertEqual(detect_band_from_frequency(Decimal('14.250')), '20m')
+        self.assertEqual(band_for_frequency('1.8'), '160m')
+        self.assertEqual(band_for_frequency(29.7), '10m')
+        self.assertEqual(band_for_frequency(5.355), '60m')
+        self.assertIsNone(band_for_frequency(29.8))
+        self.assertIsNone(band_for_frequency(1.0))
+        self.assertIsNone(band_for_frequency('abc'))
+        
+        self.assertEqual(band_for_frequency(7.25, region=2), '40m')
+        self.assertIsNone(band_for_frequency(7.25, region=1))
+        self.assertEqual(band_for_frequency(70.2, region=1), '4m')
+        self.assertIsNone(band_for_frequency(70.2, region=2))
+        with self.settings(BAND_PLAN_REGION=1):
+            self.assertEqual(detect_band_from_frequency(Decimal('145.500')), '2m')
+            self.assertIsNone(detect_band_from_frequency(Decimal('147.000')))
+        
+        self.assertEqual(normalize_band(' 2M '), '2m')
+        self.assertEqual(normalize_band('1.25M'), '1.25m')
+        self.assertIsNone(normalize_band('UNKNOWN'))
@@ -1,6 +1,10 @@
 """
 API views for cluster app.
 """
+import asyncio
+import json
+import time
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -12,6 +16,8 @@ from .serializers import (
     ClusterSerializer, ClusterListSerializer,
     ClusterMemberSerializer, ClusterAlertSerializer, SpotSerializer
 )
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
 
@@ -132,10 +138,20 @@ class SpotViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def active(self, request):
-        """Get only currently active spots (not expired)"""
+        """
+        Get only currently active spots (not expired).
+        
+        The X-Spot-Event-Id header is the live feed cursor to continue from.
+        """
+        from .spot_events import get_last_event_id
+        
+        # Read before the query, so no later change is missed
+        event_id = get_last_event_id()
         spots = self.get_queryset()
         serializer = self.get_serializer(spots, many=True)
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response['X-Spot-Event-Id'] = str(event_id)
+        return response
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def respot(self, request, pk=None):
@@ -164,8 +180,7 @@ class SpotViewSet(viewsets.ModelViewSet):
         original_spot.comment = new_comment
         original_spot.respot_count += 1
         original_spot.last_respot_time = timezone.now()  # Track respot time
-        original_spot.refresh_expiration()  # Extends by 30 minutes
-        original_spot.save()  # Save changes to database
+        original_spot.refresh_expiration()  # Extends by 30 minutes and saves
         
         serializer = self.get_serializer(original_spot)
         return Response({
@@ -201,11 +216,161 @@ class SpotViewSet(viewsets.ModelViewSet):
             'history': history_data
         })
     
+    @extend_schema(
+        description=(
+            "Post many spots at once: {'spots': [{activator_callsign, frequency, "
+            "bunker_reference, comment}, ...]} and/or {'lines': ['DX de ...', ...]} "
+            "(DX-cluster spot lines, frequency in kHz)"
+        ),
+        tags=["cluster", "spotting"]
+    )
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def batch(self, request):
+        """
+        Batch spot ingestion for automated sources.
+        Spots repeating an active spot refresh it; invalid entries are reported, not fatal.
+        """
+        from .spot_ingest import MAX_BATCH_SIZE, ingest_spots, make_report, parse_spot_line
+        
+        spots = request.data.get('spots', [])
+        lines = request.data.get('lines', [])
+        if not isinstance(spots, list) or not isinstance(lines, list):
+            return Response(
+                {'error': 'spots and lines must be lists'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(spots) + len(lines) > MAX_BATCH_SIZE:
+            return Response(
+                {'error': f'At most {MAX_BATCH_SIZE} spots per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        reports = []
+        rejected = []
+        for index, item in enumerate(spots):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('Spot must be an object')
+                reports.append(make_report(
+                    item.get('activator_callsign'),
+                    item.get('frequency'),
+                    item.get('bunker_reference', ''),
+                    item.get('comment', '')
+                ))
+            except ValueError as e:
+                rejected.append({'spot': index, 'error': str(e)})
+        for index, line in enumerate(lines):
+            report = parse_spot_line(str(line))
+            if report is None:
+                rejected.append({'line': index, 'error': 'Not a valid spot line'})
+            else:
+                reports.append(report)
+        
+        result = ingest_spots(reports, request.user)
+        result['rejected'] = rejected
+        return Response(result)
+    
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def cleanup_expired(self, request):
         """Mark expired spots as inactive (admin only)"""
-        count = Spot.objects.filter(
-            expires_at__lt=timezone.now(),
-            is_active=True
-        ).update(is_active=False)
+        from .spot_sweeper import expire_spots
+        
+        count = len(expire_spots())
         return Response({'message': f'Marked {count} spots as inactive'})
+
+
+def _sse_message(event_type: str, data, event_id=None) -> str:
+    """Format one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def spot_stream(request):
+    """
+    Live spot feed (server-sent events).
+    
+    Streams spot events after the cursor given by the Last-Event-ID header
+    (sent by EventSource on reconnect) or the ?cursor= parameter (the
+    X-Spot-Event-Id of /api/spots/active/); without one, only new events.
+    Event types: created, updated, expired, deleted, and reset when the
+    cursor is too old to replay (reload the spot list). The stream ends
+    after SPOT_STREAM_MAX_SECONDS; clients reconnect with their cursor.
+    
+    New events come from the event hub of the process (one poll of the log
+    for all streams); the stream reads the log itself only to catch up.
+    """
+    from .spot_events import aget_last_event_id, aread_events, get_event_hub
+    
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('cursor')
+    try:
+        cursor = int(cursor) if cursor is not None else None
+    except ValueError:
+        cursor = None
+    if cursor is None or cursor < 0:
+        cursor = await aget_last_event_id()
+    
+    poll_interval = getattr(settings, 'SPOT_STREAM_POLL_INTERVAL', 1.0)
+    max_seconds = getattr(settings, 'SPOT_STREAM_MAX_SECONDS', 300)
+    
+    async def events():
+        nonlocal cursor
+        
+        yield 'retry: 3000\n\n'
+        hub = get_event_hub()
+        subscription = await hub.subscribe()
+        try:
+            synced = False
+            started = last_sent = time.monotonic()
+            while (remaining := max_seconds - (time.monotonic() - started)) > 0:
+                if subscription.overflowed:
+                    subscription.clear()
+                    synced = False
+                
+                if synced:
+                    try:
+                        batch = await asyncio.wait_for(subscription.queue.get(), min(remaining, 15))
+                    except asyncio.TimeoutError:
+                        batch = None
+                    if batch is None:
+                        new_events, reset = [], False
+                    elif batch.after_id > cursor:
+                        # Missed a batch; catch up from the log
+                        synced = False
+                        new_events, reset = [], False
+                    else:
+                        new_events, reset = batch.events, batch.reset
+                else:
+                    # Behind the hub (older cursor, overflow): read the log directly
+                    new_events, reset = await aread_events(cursor)
+                    batch = None
+                
+                if reset:
+                    cursor = batch.cursor if batch is not None else await aget_last_event_id()
+                    yield _sse_message('reset', {'cursor': cursor}, cursor)
+                    last_sent = time.monotonic()
+                for event in new_events:
+                    if event.id <= cursor:
+                        continue
+                    cursor = event.id
+                    yield _sse_message(event.type, {'spot_id': event.spot_id, 'spot': event.data}, event.id)
+                    last_sent = time.monotonic()
+                if time.monotonic() - last_sent >= 15:
+                    # Keep proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    last_sent = time.monotonic()
+                
+                if not synced:
+                    synced = cursor >= hub.cursor
+                    if not synced and not new_events:
+                        await asyncio.sleep(min(poll_interval, max(remaining, 0)))
+        finally:
+            hub.unsubscribe(subscription)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
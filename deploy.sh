@@ -61,6 +61,7 @@ echo -e "${GREEN}✓ Dependencies updated${NC}"
 echo ""
 echo -e "${YELLOW}Step 5: Running database migrations...${NC}"
 python manage.py migrate
+python manage.py createcachetable
 echo -e "${GREEN}✓ Migrations completed${NC}"
 
 echo ""
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django.urls import path, reverse
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
 from .models import DiplomaType, Diploma, DiplomaProgress, DiplomaVerification, FontFile, DiplomaLayoutElement
 from .forms import DiplomaLayoutElementForm
@@ -208,36 +208,12 @@ class DiplomaTypeAdmin(admin.ModelAdmin):
     available_fonts.short_description = _("Available Fonts")
     
     def preview_diploma(self, request, diploma_type_id):
-        """Generate preview PDF for diploma type using new PDF generator"""
-        from datetime import date
-        from .pdf_generator import generate_diploma_pdf
+        """Preview PDF of a diploma type with sample data (served from the PDF cache)"""
+        from .pdf_cache import get_or_render, preview_render_args, serve_pdf
         
         diploma_type = get_object_or_404(DiplomaType, pk=diploma_type_id)
-        
-        # Sample data for preview
-        callsign = "SP0AAA"
-        diploma_name = f"{diploma_type.name_en} / {diploma_type.name_pl}"
-        date_text = f"Issue Date: {date.today().strftime('%Y-%m-%d')}"
-        points_text = "Points: ACT: 50 | HNT: 75 | B2B: 10"
-        diploma_number = "PREVIEW-12345"
-        verification_url = "https://bota.pl/verify/PREVIEW-12345"
-        
-        # Generate PDF
-        buffer = generate_diploma_pdf(
-            diploma_type=diploma_type,
-            callsign=callsign,
-            diploma_name=diploma_name,
-            date_text=date_text,
-            points_text=points_text,
-            diploma_number=diploma_number,
-            verification_url=verification_url,
-            is_preview=True
-        )
-        
-        # Return PDF response
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="preview_{diploma_type.name_en}.pdf"'
-        return response
+        cached = get_or_render(diploma_type, preview_render_args(diploma_type))
+        return serve_pdf(request, cached, f"preview_{diploma_type.name_en}.pdf", disposition='inline')
     
     def total_issued(self, obj):
         """Display total issued diplomas"""
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class DiplomasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'diplomas'
+
+    def ready(self):
+        """
+        Import signals when the app is ready.
+        """
+        import diplomas.signals  # noqa
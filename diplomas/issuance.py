@@ -0,0 +1,59 @@
+"""
+Bulk diploma issuance.
+
+Numbers are reserved from DiplomaNumberSequence in one block per
+(category, year) and the diplomas are inserted with bulk_create, all in a
+single transaction, so mass awarding (e.g. after a rule change) does not
+lock and count per diploma and leaves no gaps if it fails.
+"""
+import logging
+from collections import defaultdict
+from typing import List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Diploma, DiplomaNumberSequence
+
+logger = logging.getLogger(__name__)
+
+
+@transaction.atomic
+def issue_diplomas(diplomas: List[Diploma], bonus_points: int = 0, created_by=None) -> List[Diploma]:
+    """
+    Number and save new diplomas in bulk.
+
+    Callers must skip (user, diploma type) pairs that already have a
+    diploma; a duplicate fails the whole batch.
+
+    Args:
+        diplomas: Unsaved Diploma instances with diploma_type set
+        bonus_points: Diploma bonus points to award per diploma (0 = none)
+        created_by: Who awarded the bonus points
+
+    Returns:
+        The saved diplomas
+    """
+    if not diplomas:
+        return []
+
+    year = timezone.now().year
+    by_category = defaultdict(list)
+    for diploma in diplomas:
+        if not diploma.diploma_number:
+            by_category[diploma.diploma_type.category].append(diploma)
+
+    for category, category_diplomas in by_category.items():
+        numbers = DiplomaNumberSequence.reserve(category, year, len(category_diplomas))
+        for diploma, number in zip(category_diplomas, numbers):
+            diploma.diploma_number = Diploma.format_diploma_number(category, year, number)
+
+    Diploma.objects.bulk_create(diplomas)
+
+    if bonus_points:
+        from accounts.points_service import PointsService
+        PointsService.award_diploma_bonuses(diplomas, points=bonus_points, created_by=created_by)
+
+    logger.info(f"Issued {len(diplomas)} diplomas")
+
+    return diplomas
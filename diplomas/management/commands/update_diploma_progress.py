@@ -3,8 +3,7 @@ Management command to update diploma progress for all users
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from diplomas.models import DiplomaType, DiplomaProgress, Diploma
-from accounts.models import UserStatistics
+from diplomas.progress_engine import refresh_diploma_progress
 
 User = get_user_model()
 
@@ -18,9 +17,22 @@ class Command(BaseCommand):
             type=str,
             help='Update only for specific user (callsign)',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of users refreshed per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--bonus-points',
+            type=int,
+            default=0,
+            help='Diploma bonus points awarded for each newly issued diploma (default: 0)',
+        )
 
     def handle(self, *args, **options):
         user_filter = options.get('user')
+        batch_size = options['batch_size']
         
         if user_filter:
             users = User.objects.filter(callsign=user_filter)
@@ -30,102 +42,22 @@ class Command(BaseCommand):
         else:
             users = User.objects.filter(is_active=True)
         
-        self.stdout.write(f'Updating diploma progress for {users.count()} users...')
-        
-        # Get all active diplomas
-        active_diplomas = DiplomaType.objects.filter(is_active=True)
-        self.stdout.write(f'Found {active_diplomas.count()} active diploma types')
+        user_ids = list(users.order_by('id').values_list('id', flat=True))
+        self.stdout.write(f'Updating diploma progress for {len(user_ids)} users...')
         
-        diplomas_awarded = 0
-        progress_updated = 0
+        totals = {'created': 0, 'updated': 0, 'awarded': 0}
         
-        for user in users:
-            from activations.models import ActivationLog
-            from django.db.models.functions import TruncDate
-            
-            # Get user statistics
-            stats, _ = UserStatistics.objects.get_or_create(user=user)
-            
-            # Calculate total activations = distinct (bunker, date) combinations
-            total_activations = ActivationLog.objects.filter(
-                activator=user
-            ).annotate(
-                activation_day=TruncDate('activation_date')
-            ).values('bunker', 'activation_day').distinct().count()
-            
-            # Calculate unique hunted bunkers
-            unique_hunted = ActivationLog.objects.filter(
-                user=user
-            ).exclude(activator=user).values('bunker').distinct().count()
-            
-            self.stdout.write(f'\nUser: {user.callsign}')
-            self.stdout.write(f'  Activator Points: {stats.activator_points}')
-            self.stdout.write(f'  Hunter Points: {stats.hunter_points}')
-            self.stdout.write(f'  B2B Points: {stats.b2b_points}')
-            self.stdout.write(f'  Unique Activations: {stats.unique_activations}')
-            self.stdout.write(f'  Total Activation Sessions: {total_activations}')
-            self.stdout.write(f'  Unique Hunted: {unique_hunted}')
-            
-            for diploma_type in active_diplomas:
-                # Skip time-limited diplomas that are not currently valid
-                if diploma_type.is_time_limited() and not diploma_type.is_currently_valid():
-                    continue
-                
-                # Get or create progress record
-                progress, created = DiplomaProgress.objects.get_or_create(
-                    user=user,
-                    diploma_type=diploma_type
-                )
-                
-                if created:
-                    self.stdout.write(f'  Created progress for: {diploma_type.name_en}')
-                
-                # Update points and bunker counts
-                progress.update_points(
-                    activator=stats.activator_points,  # Use points, not session count
-                    hunter=stats.hunter_points,
-                    b2b=stats.b2b_points,
-                    unique_activations=stats.unique_activations,
-                    total_activations=total_activations,
-                    unique_hunted=unique_hunted,
-                    total_hunted=unique_hunted
-                )
-                progress_updated += 1
-                
-                self.stdout.write(
-                    f'  {diploma_type.name_en}: '
-                    f'ACT:{progress.activator_points}/{diploma_type.min_activator_points} '
-                    f'HNT:{progress.hunter_points}/{diploma_type.min_hunter_points} '
-                    f'B2B:{progress.b2b_points}/{diploma_type.min_b2b_points} '
-                    f'({progress.percentage_complete}% - {"ELIGIBLE" if progress.is_eligible else "not eligible"})'
-                )
-                
-                # Check if eligible and not already awarded
-                if progress.is_eligible:
-                    existing = Diploma.objects.filter(
-                        user=user,
-                        diploma_type=diploma_type
-                    ).exists()
-                    
-                    if not existing:
-                        # Award diploma
-                        diploma = Diploma.objects.create(
-                            diploma_type=diploma_type,
-                            user=user,
-                            activator_points_earned=progress.activator_points,
-                            hunter_points_earned=progress.hunter_points,
-                            b2b_points_earned=progress.b2b_points
-                        )
-                        diplomas_awarded += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'  ✓ AWARDED: {diploma_type.name_en} (#{diploma.diploma_number})'
-                            )
-                        )
+        for start in range(0, len(user_ids), batch_size):
+            summary = refresh_diploma_progress(
+                user_ids[start:start + batch_size],
+                bonus_points=options['bonus_points']
+            )
+            for key, value in summary.items():
+                totals[key] += value
         
         self.stdout.write(
             self.style.SUCCESS(
-                f'\n\nCompleted! Updated {progress_updated} progress records, '
-                f'awarded {diplomas_awarded} diplomas'
+                f'\n\nCompleted! Created {totals["created"]} and updated {totals["updated"]} '
+                f'progress records, awarded {totals["awarded"]} diplomas'
             )
         )
@@ -0,0 +1,52 @@
+"""
+Management command to render diploma PDFs ahead of their first download
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from diplomas.models import Diploma
+from diplomas.pdf_cache import warm_diplomas
+
+
+class Command(BaseCommand):
+    help = 'Render diploma PDFs into the PDF cache (by default only diplomas not rendered yet)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Render all diplomas, not only those without a stored PDF',
+        )
+        parser.add_argument(
+            '--diploma-type',
+            type=int,
+            help='Render only diplomas of this diploma type (ID)',
+        )
+        parser.add_argument(
+            '--language',
+            action='append',
+            dest='languages',
+            help='Language to render (repeatable; default: all configured languages)',
+        )
+        parser.add_argument(
+            '--site-url',
+            type=str,
+            default=settings.SITE_URL,
+            help='Site root for the verification URLs (default: settings.SITE_URL)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['site_url']:
+            raise CommandError('Set SITE_URL or pass --site-url; the verification URL is part of the PDF.')
+
+        diplomas = Diploma.objects.select_related('diploma_type', 'user').order_by('id')
+        if not options['all']:
+            diplomas = diplomas.filter(Q(pdf_file='') | Q(pdf_file__isnull=True))
+        if options['diploma_type']:
+            diplomas = diplomas.filter(diploma_type_id=options['diploma_type'])
+
+        languages = options['languages'] or [code for code, _ in settings.LANGUAGES]
+        rendered = warm_diplomas(diplomas.iterator(), languages, site_url=options['site_url'])
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} diploma PDFs'))
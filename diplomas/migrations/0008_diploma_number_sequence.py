@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diplomas', '0007_add_layout_elements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiplomaNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=20, verbose_name='Category')),
+                ('year', models.PositiveIntegerField(verbose_name='Year')),
+                ('last_number', models.PositiveIntegerField(default=0, verbose_name='Last Number')),
+            ],
+            options={
+                'verbose_name': 'Diploma Number Sequence',
+                'verbose_name_plural': 'Diploma Number Sequences',
+                'unique_together': {('category', 'year')},
+            },
+        ),
+    ]
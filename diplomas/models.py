@@ -731,15 +731,37 @@ class Diploma(models.Model):
     def __str__(self):
         return f"{self.diploma_number} - {self.user.callsign} - {self.diploma_type.name_en}"
 
+    # Diploma number prefix per DiplomaType.category
+    NUMBER_PREFIXES = {
+        'hunter': 'HNT',
+        'activator': 'ACT',
+        'b2b': 'B2B',
+        'special_event': 'SPE',
+        'cluster': 'CLU',
+        'other': 'OTH'
+    }
+
     def save(self, *args, **kwargs):
         """Override save to generate diploma number if not set"""
-        if not self.diploma_number:
+        if self.diploma_number:
+            super().save(*args, **kwargs)
+            return
+        
+        # Reserve the number in the same transaction as the insert, so a
+        # failed insert does not leave a gap in the sequence
+        from django.db import transaction
+        with transaction.atomic():
             self.diploma_number = self.generate_diploma_number(
                 self.diploma_type,
                 self.user,
                 self.issue_date or timezone.now()
             )
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def format_diploma_number(cls, category, year, number):
+        """Format: CATEGORY-YYYY-XXXX (e.g., HNT-2025-0001, ACT-2025-0042)"""
+        return f"{cls.NUMBER_PREFIXES.get(category, 'DIP')}-{year}-{number:04d}"
 
     @staticmethod
     def generate_diploma_number(diploma_type, user, issue_date=None):
@@ -747,27 +769,92 @@ class Diploma(models.Model):
         if issue_date is None:
             issue_date = timezone.now()
         
-        # Format: CATEGORY-YYYY-XXXX (e.g., HNT-2025-0001, ACT-2025-0042)
-        category_code = {
-            'hunter': 'HNT',
-            'activator': 'ACT',
-            'b2b': 'B2B',
-            'special_event': 'SPE',
-            'cluster': 'CLU',
-            'other': 'OTH'
-        }.get(diploma_type.category, 'DIP')
-        
         year = issue_date.year
+        number = DiplomaNumberSequence.reserve(diploma_type.category, year)[0]
+        
+        return Diploma.format_diploma_number(diploma_type.category, year, number)
+
+
+class DiplomaNumberSequence(models.Model):
+    """
+    Last issued diploma number per (category, year).
+    
+    Numbers are reserved by incrementing this row, so issuing diplomas locks
+    one small row instead of counting diplomas, and a block of numbers can be
+    reserved at once for bulk issuance. The increment is part of the caller's
+    transaction: if issuance rolls back, so does the reservation.
+    """
+    category = models.CharField(
+        max_length=20,
+        verbose_name=_("Category")
+    )
+    year = models.PositiveIntegerField(
+        verbose_name=_("Year")
+    )
+    last_number = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Last Number")
+    )
+
+    class Meta:
+        verbose_name = _("Diploma Number Sequence")
+        verbose_name_plural = _("Diploma Number Sequences")
+        unique_together = ['category', 'year']
+
+    def __str__(self):
+        return f"{self.category} {self.year}: {self.last_number}"
+
+    @classmethod
+    def reserve(cls, category, year, count=1):
+        """
+        Reserve consecutive diploma numbers.
+        
+        A new sequence starts after the highest number already issued for
+        the category and year.
+        
+        Args:
+            category: DiplomaType.category
+            year: Issue year
+            count: How many numbers to reserve
+            
+        Returns:
+            range of reserved numbers
+        """
+        from django.db import IntegrityError, transaction
         
-        # Count existing diplomas of this type this year
-        from django.db import transaction
         with transaction.atomic():
-            count = Diploma.objects.select_for_update().filter(
-                diploma_type__category=diploma_type.category,
-                issue_date__year=year
-            ).count() + 1
+            sequence = cls.objects.select_for_update().filter(category=category, year=year).first()
+            if sequence is None:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            category=category,
+                            year=year,
+                            last_number=cls._highest_issued(category, year)
+                        )
+                except IntegrityError:
+                    # Created concurrently
+                    pass
+                sequence = cls.objects.select_for_update().get(category=category, year=year)
+            
+            first = sequence.last_number + 1
+            sequence.last_number += count
+            sequence.save(update_fields=['last_number'])
         
-        return f"{category_code}-{year}-{count:04d}"
+        return range(first, first + count)
+
+    @staticmethod
+    def _highest_issued(category, year):
+        """Highest number among diplomas issued before the sequence existed"""
+        prefix = Diploma.format_diploma_number(category, year, 0)[:-4]
+        highest = 0
+        for number in Diploma.objects.filter(
+            diploma_number__startswith=prefix
+        ).values_list('diploma_number', flat=True).iterator():
+            suffix = number[len(prefix):]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        return highest
 
 
 class DiplomaProgress(models.Model):
@@ -0,0 +1,204 @@
+"""
+Process-wide assets of the diploma PDF generator.
+
+Fonts are registered with reportlab once per process instead of for every
+PDF: the built-in Lato fonts on first use, the uploaded FontFile fonts
+whenever the font version changes. The version is derived from the
+FontFile rows with one small query per render, so every process picks up
+an upload (or any other font change) on its next render.
+
+Template images are decoded once, scaled down to TEMPLATE_IMAGE_DPI for
+the A4 landscape page and kept as a primed ImageReader in a small LRU
+cache. Opaque images are re-encoded as JPEG, which reportlab embeds as is,
+so a render neither decodes nor compresses the background again. Entries
+are keyed by the diploma type's template name and updated_at, and the
+DiplomaType signals evict them.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.conf import settings
+from PIL import Image
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+logger = logging.getLogger(__name__)
+
+# Built-in fonts (static/fonts) registered under these names
+BUILTIN_FONTS = {
+    'Lato': 'Lato-Regular.ttf',
+    'Lato-Bold': 'Lato-Bold.ttf',
+}
+
+# Resolution of the cached template images; larger images are scaled down
+TEMPLATE_IMAGE_DPI = 200
+TEMPLATE_JPEG_QUALITY = 92
+
+_lock = threading.Lock()
+_builtin_fonts: Optional[Dict[str, bool]] = None
+_custom_fonts: Optional[Dict[str, bool]] = None
+_custom_fonts_version = None
+
+_template_images: 'OrderedDict[tuple, TemplateImage]' = OrderedDict()
+
+
+def get_font_version() -> int:
+    """Current version of the uploaded fonts, derived from the FontFile rows"""
+    from .models import FontFile
+
+    try:
+        return hash(tuple(
+            FontFile.objects.order_by('id').values_list('id', 'is_active', 'name', 'font_type', 'font_file')
+        ))
+    except Exception:
+        logger.exception("Loading the font version failed")
+        return 0
+
+
+def _register_builtin_fonts() -> Dict[str, bool]:
+    registered = {}
+    fonts_dir = Path(settings.BASE_DIR) / 'static' / 'fonts'
+    for font_name, filename in BUILTIN_FONTS.items():
+        path = fonts_dir / filename
+        if not path.exists():
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(font_name, str(path)))
+            registered[font_name] = True
+        except Exception:
+            logger.exception(f"Registering font {path} failed")
+    return registered
+
+
+def _register_custom_fonts() -> Dict[str, bool]:
+    from .models import FontFile
+
+    registered = {}
+    try:
+        fonts = list(FontFile.objects.filter(is_active=True))
+    except Exception:
+        logger.exception("Loading the uploaded fonts failed")
+        return registered
+
+    for font in fonts:
+        try:
+            font_name = font.get_font_family_name()
+            pdfmetrics.registerFont(TTFont(font_name, font.font_file.path))
+            registered[font_name] = True
+        except Exception:
+            logger.exception(f"Registering font {font.name} failed")
+    return registered
+
+
+def get_registered_fonts() -> Dict[str, bool]:
+    """
+    Fonts available to the PDF generator, registering them if needed.
+
+    Returns:
+        Dictionary of registered font names (name -> True)
+    """
+    global _builtin_fonts, _custom_fonts, _custom_fonts_version
+
+    version = get_font_version()
+    with _lock:
+        if _builtin_fonts is None:
+            _builtin_fonts = _register_builtin_fonts()
+        if _custom_fonts_version != version:
+            _custom_fonts = _register_custom_fonts()
+            _custom_fonts_version = version
+        return {**_builtin_fonts, **_custom_fonts}
+
+
+class TemplateImage:
+    """Decoded template image, shared by the renders of a process"""
+
+    def __init__(self, reader: ImageReader):
+        self.reader = reader
+        # The JPEG stream of the reader is read by seeking a shared buffer
+        self.lock = threading.Lock()
+
+    def draw(self, c, width: float, height: float):
+        """Draw the image over the whole page of canvas c"""
+        with self.lock:
+            c.drawImage(self.reader, 0, 0, width=width, height=height, preserveAspectRatio=False)
+
+
+def _load_template_image(path: str) -> TemplateImage:
+    page_width, page_height = landscape(A4)
+    max_size = (
+        round(page_width / inch * TEMPLATE_IMAGE_DPI),
+        round(page_height / inch * TEMPLATE_IMAGE_DPI),
+    )
+
+    with Image.open(path) as image:
+        image.load()
+        if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
+            image.thumbnail(max_size, Image.LANCZOS)
+
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        if has_alpha:
+            reader = ImageReader(image.convert('RGBA'))
+        else:
+            buffer = BytesIO()
+            image.convert('RGB').save(buffer, format='JPEG', quality=TEMPLATE_JPEG_QUALITY)
+            buffer.seek(0)
+            reader = ImageReader(buffer)
+
+    # Decode now; reportlab keeps the pixel data for the image name digest
+    reader.getRGBData()
+    return TemplateImage(reader)
+
+
+def get_template_image(diploma_type) -> Optional[TemplateImage]:
+    """
+    Cached template image of a diploma type.
+
+    Args:
+        diploma_type: DiplomaType
+
+    Returns:
+        TemplateImage, or None if the type has no template image
+    """
+    if not diploma_type.template_image:
+        return None
+
+    key = (diploma_type.pk, diploma_type.template_image.name, diploma_type.updated_at)
+    with _lock:
+        template = _template_images.get(key)
+        if template is not None:
+            _template_images.move_to_end(key)
+            return template
+
+    template = _load_template_image(diploma_type.template_image.path)
+
+    with _lock:
+        _template_images[key] = template
+        _template_images.move_to_end(key)
+        while len(_template_images) > settings.DIPLOMA_TEMPLATE_IMAGE_CACHE_SIZE:
+            _template_images.popitem(last=False)
+    return template
+
+
+def evict_template_image(diploma_type_id: int):
+    """Drop the cached template images of a diploma type"""
+    with _lock:
+        for key in [key for key in _template_images if key[0] == diploma_type_id]:
+            del _template_images[key]
+
+
+def clear_assets():
+    """Forget all registered fonts and cached template images of this process"""
+    global _builtin_fonts, _custom_fonts, _custom_fonts_version
+
+    with _lock:
+        _builtin_fonts = None
+        _custom_fonts = None
+        _custom_fonts_version = None
+        _template_images.clear()
@@ -0,0 +1,271 @@
+"""
+Diploma PDF render cache.
+
+Rendered diplomas are stored in the media storage under a content
+address: the SHA-256 of everything that goes into the PDF (the texts and
+QR URL drawn on it, the diploma type's layout elements, template image
+and the fonts). A download whose inputs were rendered before is served
+from the stored file, with the address as ETag; nothing is re-rendered
+until an input changes.
+
+The layout/template/font part of the address is computed from the
+database on every request (a few small queries, far cheaper than a
+render), so every process sees a change at once, however it was made. The
+signals in diplomas.signals only delete the stored files that can no
+longer be requested when a type's layout or the fonts change.
+
+Newly issued diplomas can be rendered ahead of the first download with
+`manage.py warm_diploma_pdfs`; this needs settings.SITE_URL, as the
+verification URL in the QR code is part of the PDF.
+"""
+import hashlib
+import json
+import logging
+from datetime import date
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+from .models import Diploma, DiplomaType, FontFile
+from .pdf_generator import generate_diploma_pdf
+
+logger = logging.getLogger(__name__)
+
+# Storage directory of the rendered PDFs (one subdirectory per diploma type)
+PDF_CACHE_DIR = 'diploma_pdfs'
+
+
+class CachedPdf(NamedTuple):
+    """A rendered PDF in the storage"""
+    name: str
+    etag: str
+    created: bool
+
+
+def get_site_url(request=None) -> str:
+    """Site root used in verification URLs (settings.SITE_URL or the request host)"""
+    if settings.SITE_URL:
+        return settings.SITE_URL.rstrip('/')
+    if request is not None:
+        return request.build_absolute_uri('/').rstrip('/')
+    raise ValueError('SITE_URL is not set')
+
+
+def diploma_render_args(diploma: Diploma, language: str, site_url: str) -> Dict:
+    """
+    Texts drawn on a diploma.
+
+    Args:
+        diploma: Issued diploma
+        language: Language code of the texts ('pl' or other)
+        site_url: Site root for the verification URL
+
+    Returns:
+        Keyword arguments for generate_diploma_pdf() (without diploma_type)
+    """
+    is_polish = language == 'pl'
+    diploma_type = diploma.diploma_type
+
+    points_parts = []
+    if diploma.activator_points_earned > 0:
+        points_parts.append(f"ACT: {diploma.activator_points_earned}")
+    if diploma.hunter_points_earned > 0:
+        points_parts.append(f"HNT: {diploma.hunter_points_earned}")
+    if diploma.b2b_points_earned > 0:
+        points_parts.append(f"B2B: {diploma.b2b_points_earned}")
+
+    return {
+        'callsign': diploma.user.callsign,
+        'diploma_name': diploma_type.name_pl if is_polish else diploma_type.name_en,
+        'date_text': f"{'Data wydania' if is_polish else 'Issue Date'}: {diploma.issue_date.strftime('%Y-%m-%d')}",
+        'points_text': (
+            f"{'Punkty' if is_polish else 'Points'}: {' | '.join(points_parts)}" if points_parts else ""
+        ),
+        'diploma_number': diploma.diploma_number,
+        'verification_url': f"{site_url}/verify-diploma/{diploma.diploma_number}/",
+        'is_preview': False,
+    }
+
+
+def preview_render_args(diploma_type: DiplomaType) -> Dict:
+    """Sample texts for the admin preview of a diploma type"""
+    return {
+        'callsign': "SP0AAA",
+        'diploma_name': f"{diploma_type.name_en} / {diploma_type.name_pl}",
+        'date_text': f"Issue Date: {date.today().strftime('%Y-%m-%d')}",
+        'points_text': "Points: ACT: 50 | HNT: 75 | B2B: 10",
+        'diploma_number': "PREVIEW-12345",
+        'verification_url': "https://bota.pl/verify/PREVIEW-12345",
+        'is_preview': True,
+    }
+
+
+def _template_image_state(diploma_type: DiplomaType):
+    if not diploma_type.template_image:
+        return None
+    try:
+        return [diploma_type.template_image.name, diploma_type.template_image.size]
+    except (OSError, ValueError):
+        return [diploma_type.template_image.name, None]
+
+
+def get_type_fingerprint(diploma_type: DiplomaType) -> str:
+    """
+    Hash of a diploma type's layout, template image and the active fonts,
+    read from the database.
+    """
+    state = {
+        'layout': diploma_type.get_merged_layout_config(),
+        'template_image': _template_image_state(diploma_type),
+        'fonts': list(
+            FontFile.objects.filter(is_active=True)
+            .order_by('id')
+            .values_list('id', 'name', 'font_type', 'font_file')
+        ),
+    }
+    return hashlib.sha256(
+        json.dumps(state, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+def get_render_key(diploma_type: DiplomaType, render_args: Dict) -> str:
+    """Content address of a PDF"""
+    payload = json.dumps(
+        [get_type_fingerprint(diploma_type), render_args], sort_keys=True, default=str
+    ).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def get_storage_name(diploma_type_id: int, key: str) -> str:
+    return f"{PDF_CACHE_DIR}/{diploma_type_id}/{key}.pdf"
+
+
+def get_or_render(diploma_type: DiplomaType, render_args: Dict) -> CachedPdf:
+    """
+    Stored PDF for the render arguments, rendering and storing it if needed.
+
+    Args:
+        diploma_type: DiplomaType
+        render_args: Keyword arguments for generate_diploma_pdf()
+
+    Returns:
+        CachedPdf
+    """
+    key = get_render_key(diploma_type, render_args)
+    name = get_storage_name(diploma_type.pk, key)
+    if default_storage.exists(name):
+        return CachedPdf(name, key, False)
+
+    buffer = generate_diploma_pdf(diploma_type=diploma_type, **render_args)
+    saved_name = default_storage.save(name, ContentFile(buffer.getvalue()))
+    if saved_name != name:
+        # Rendered by another process in the meantime
+        default_storage.delete(saved_name)
+    return CachedPdf(name, key, True)
+
+
+def get_diploma_pdf(diploma: Diploma, language: str, site_url: str) -> CachedPdf:
+    """
+    Stored PDF of an issued diploma.
+
+    The render in the site's default language is also linked as
+    Diploma.pdf_file.
+
+    Args:
+        diploma: Issued diploma
+        language: Language code of the texts
+        site_url: Site root for the verification URL
+
+    Returns:
+        CachedPdf
+    """
+    cached = get_or_render(diploma.diploma_type, diploma_render_args(diploma, language, site_url))
+    if language == settings.LANGUAGE_CODE and diploma.pdf_file.name != cached.name:
+        diploma.pdf_file.name = cached.name
+        Diploma.objects.filter(pk=diploma.pk).update(pdf_file=cached.name)
+    return cached
+
+
+def serve_pdf(request, cached: CachedPdf, filename: str, disposition: str = 'attachment') -> HttpResponse:
+    """
+    Response sending a stored PDF.
+
+    Answers 304 Not Modified when the client has the ETag. With
+    settings.DIPLOMA_PDF_SENDFILE the file itself is sent by the web server
+    ('x-sendfile': X-Sendfile with the file path, 'x-accel-redirect':
+    X-Accel-Redirect to DIPLOMA_PDF_ACCEL_PREFIX + name).
+    """
+    etag = f'"{cached.etag}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    elif settings.DIPLOMA_PDF_SENDFILE == 'x-sendfile':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Sendfile'] = default_storage.path(cached.name)
+    elif settings.DIPLOMA_PDF_SENDFILE == 'x-accel-redirect':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = f"{settings.DIPLOMA_PDF_ACCEL_PREFIX.rstrip('/')}/{cached.name}"
+    else:
+        response = FileResponse(default_storage.open(cached.name, 'rb'), content_type='application/pdf')
+
+    if response.status_code == 200:
+        response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
+
+
+def invalidate_diploma_type(diploma_type_id: int) -> int:
+    """
+    Delete the stored PDFs of a diploma type.
+
+    Returns:
+        Number of files deleted
+    """
+    directory = f"{PDF_CACHE_DIR}/{diploma_type_id}"
+    try:
+        _, files = default_storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        files = []
+    for filename in files:
+        default_storage.delete(f"{directory}/{filename}")
+    if files:
+        Diploma.objects.filter(
+            diploma_type_id=diploma_type_id, pdf_file__startswith=f"{directory}/"
+        ).update(pdf_file='')
+    return len(files)
+
+
+def invalidate_all() -> int:
+    """Invalidate the stored PDFs of all diploma types (e.g. after a font change)"""
+    return sum(
+        invalidate_diploma_type(diploma_type_id)
+        for diploma_type_id in DiplomaType.objects.values_list('id', flat=True)
+    )
+
+
+def warm_diplomas(diplomas: Iterable[Diploma], languages: Iterable[str],
+                  site_url: Optional[str] = None) -> int:
+    """
+    Render diplomas ahead of their first download.
+
+    Args:
+        diplomas: Diplomas (with diploma_type and user loaded)
+        languages: Language codes to render
+        site_url: Site root (default: settings.SITE_URL)
+
+    Returns:
+        Number of PDFs rendered
+    """
+    site_url = (site_url or get_site_url()).rstrip('/')
+    rendered = 0
+    for diploma in diplomas:
+        for language in languages:
+            try:
+                rendered += get_diploma_pdf(diploma, language, site_url).created
+            except Exception:
+                logger.exception(f"Rendering diploma {diploma.diploma_number} ({language}) failed")
+    return rendered
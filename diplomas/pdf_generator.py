@@ -6,14 +6,12 @@ Handles font registration, layout configuration, and PDF rendering
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import cm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
 import qrcode
 from io import BytesIO
-from pathlib import Path
-from django.conf import settings
+
+from .pdf_assets import get_registered_fonts, get_template_image
 
 
 def hex_to_rgb(hex_color):
@@ -23,40 +21,8 @@ def hex_to_rgb(hex_color):
 
 
 def register_fonts(diploma_type):
-    """Register all fonts (built-in + custom uploaded fonts)"""
-    from .models import FontFile
-    
-    registered_fonts = {}
-    
-    # Register built-in Lato fonts
-    try:
-        fonts_dir = Path(settings.BASE_DIR) / 'static' / 'fonts'
-        lato_regular = fonts_dir / 'Lato-Regular.ttf'
-        lato_bold = fonts_dir / 'Lato-Bold.ttf'
-        
-        if lato_regular.exists():
-            pdfmetrics.registerFont(TTFont('Lato', str(lato_regular)))
-            registered_fonts['Lato'] = True
-        if lato_bold.exists():
-            pdfmetrics.registerFont(TTFont('Lato-Bold', str(lato_bold)))
-            registered_fonts['Lato-Bold'] = True
-    except Exception:
-        pass
-    
-    # Register custom uploaded fonts
-    try:
-        custom_fonts = FontFile.objects.filter(is_active=True)
-        for font in custom_fonts:
-            try:
-                font_name = font.get_font_family_name()
-                pdfmetrics.registerFont(TTFont(font_name, font.font_file.path))
-                registered_fonts[font_name] = True
-            except Exception:
-                pass
-    except Exception:
-        pass
-    
-    return registered_fonts
+    """Register all fonts (built-in + custom uploaded fonts), once per process"""
+    return get_registered_fonts()
 
 
 def get_font_name(element_config, registered_fonts):
@@ -145,8 +111,7 @@ def generate_diploma_pdf(diploma_type, callsign, diploma_name, date_text, points
     # Draw background image if exists
     if diploma_type.template_image:
         try:
-            img = ImageReader(diploma_type.template_image.path)
-            c.drawImage(img, 0, 0, width=width, height=height, preserveAspectRatio=False)
+            get_template_image(diploma_type).draw(c, width, height)
         except Exception:
             # If image fails, draw decorative border
             c.setStrokeColorRGB(0.1, 0.33, 0.56)
@@ -0,0 +1,334 @@
+"""
+Diploma progress engine.
+
+DiplomaProgress rows are recomputed only when a user's counters change
+(log import, B2B confirmation or cancellation, batch reversal, deleted
+logs, counter rebuilds) instead of on every page view.
+Pages read the stored rows and evaluate them against the current
+DiplomaType thresholds in memory, so rendering a dashboard needs no writes.
+
+Eligibility for all diploma types is evaluated in one pass over a
+threshold table built from a single DiplomaType query, rather than one
+DiplomaProgress.calculate_progress() call per model instance.
+"""
+import logging
+import threading
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import UserStatistics
+
+from .issuance import issue_diplomas
+from .models import Diploma, DiplomaProgress, DiplomaType
+
+logger = logging.getLogger(__name__)
+
+# DiplomaProgress counter field -> DiplomaType threshold field
+PROGRESS_REQUIREMENTS = (
+    ('activator_points', 'min_activator_points'),
+    ('hunter_points', 'min_hunter_points'),
+    ('b2b_points', 'min_b2b_points'),
+    ('unique_activations', 'min_unique_activations'),
+    ('total_activations', 'min_total_activations'),
+    ('unique_hunted', 'min_unique_hunted'),
+    ('total_hunted', 'min_total_hunted'),
+)
+PROGRESS_FIELDS = tuple(field for field, _ in PROGRESS_REQUIREMENTS)
+
+Counters = Tuple[int, ...]
+
+# Users waiting for refresh_diploma_progress_on_commit()
+_pending = threading.local()
+
+
+class ThresholdTable:
+    """
+    Requirements of a set of diploma types as rows of thresholds.
+
+    Same rules as DiplomaProgress.calculate_progress(): unset (zero)
+    requirements are ignored, each set requirement contributes
+    min(100, current / required * 100) to an average, and a diploma is
+    eligible when every set requirement is met. Time-limited diplomas
+    outside their validity window are 0% and not eligible.
+    """
+
+    def __init__(self, diploma_types: Iterable[DiplomaType], today=None):
+        today = today or timezone.now().date()
+        self.diploma_types = list(diploma_types)
+        self.rows = []
+        for diploma_type in self.diploma_types:
+            valid = (
+                (diploma_type.valid_from is None or today >= diploma_type.valid_from) and
+                (diploma_type.valid_to is None or today <= diploma_type.valid_to)
+            )
+            # Only requirements that are set, as (counter index, required)
+            requirements = tuple(
+                (index, getattr(diploma_type, threshold))
+                for index, (_, threshold) in enumerate(PROGRESS_REQUIREMENTS)
+                if getattr(diploma_type, threshold) > 0
+            )
+            self.rows.append((valid, requirements))
+
+    def evaluate(self, counters: Counters) -> List[Tuple[Decimal, bool]]:
+        """
+        Evaluate one user's counters against every diploma type.
+
+        Args:
+            counters: Values in PROGRESS_FIELDS order
+
+        Returns:
+            (percentage_complete, is_eligible) per diploma type, in table order
+        """
+        return [self.evaluate_row(index, counters) for index in range(len(self.rows))]
+
+    def evaluate_row(self, index: int, counters: Counters) -> Tuple[Decimal, bool]:
+        """
+        Evaluate counters against the diploma type at position `index`.
+
+        Returns:
+            (percentage_complete, is_eligible)
+        """
+        valid, requirements = self.rows[index]
+        if not valid:
+            return Decimal('0.00'), False
+        if not requirements:
+            return Decimal('100.00'), True
+
+        total = 0
+        all_met = True
+        for counter_index, required in requirements:
+            current = counters[counter_index]
+            total += min(100, current / required * 100)
+            if current < required:
+                all_met = False
+
+        return Decimal(str(total / len(requirements))).quantize(Decimal('0.01')), all_met
+
+
+def collect_counters(user_ids: Iterable[int]) -> Dict[int, Counters]:
+    """
+    Read progress counters for many users from UserStatistics.
+
+    Activator points count activation sessions (distinct bunker + day),
+    hunter and B2B points come from the points totals. Session and unique
+    bunker counts are materialized by activations.activity_counters.
+
+    Args:
+        user_ids: IDs of users to read counters for
+
+    Returns:
+        Dictionary mapping user ID to counters in PROGRESS_FIELDS order
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+
+    stats = {
+        row[0]: row[1:]
+        for row in UserStatistics.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'hunter_points', 'b2b_points', 'unique_activations',
+            'total_activations', 'unique_bunkers_hunted'
+        )
+    }
+
+    counters = {}
+    for user_id in user_ids:
+        (hunter_points, b2b_points, unique_activations,
+         total_activations, unique_hunted) = stats.get(user_id, (0, 0, 0, 0, 0))
+        counters[user_id] = (
+            total_activations,   # activator_points: activation sessions (bunker+date)
+            hunter_points,       # hunter_points
+            b2b_points,          # b2b_points: confirmed B2B QSOs
+            unique_activations,  # unique_activations: unique bunkers activated
+            total_activations,   # total_activations: activation sessions
+            unique_hunted,       # unique_hunted
+            unique_hunted,       # total_hunted: same as unique for hunters
+        )
+    return counters
+
+
+def refresh_diploma_progress(users, award: bool = True, bonus_points: int = 0) -> Dict[str, int]:
+    """
+    Recompute stored DiplomaProgress rows for users whose counters changed
+    and issue diplomas that became eligible.
+
+    Rows are written only when a counter, the percentage or eligibility
+    differs from the stored values.
+
+    Args:
+        users: Users (or user IDs) to refresh
+        award: Automatically issue diplomas the users became eligible for
+        bonus_points: Diploma bonus points for each issued diploma (0 = none)
+
+    Returns:
+        Dictionary with 'created', 'updated' and 'awarded' counts
+    """
+    user_ids = {getattr(user, 'pk', user) for user in users}
+    summary = {'created': 0, 'updated': 0, 'awarded': 0}
+    if not user_ids:
+        return summary
+
+    table = ThresholdTable(DiplomaType.objects.filter(is_active=True))
+    if not table.diploma_types:
+        return summary
+
+    counters = collect_counters(user_ids)
+    existing = {
+        (progress.user_id, progress.diploma_type_id): progress
+        for progress in DiplomaProgress.objects.filter(
+            user_id__in=user_ids,
+            diploma_type__in=table.diploma_types
+        )
+    }
+
+    to_create = []
+    to_update = []
+    eligible = []
+    now = timezone.now()
+
+    for user_id, user_counters in counters.items():
+        values = dict(zip(PROGRESS_FIELDS, user_counters))
+        results = table.evaluate(user_counters)
+
+        for diploma_type, (percentage, is_eligible) in zip(table.diploma_types, results):
+            progress = existing.get((user_id, diploma_type.id))
+            if progress is None:
+                to_create.append(DiplomaProgress(
+                    user_id=user_id,
+                    diploma_type=diploma_type,
+                    percentage_complete=percentage,
+                    is_eligible=is_eligible,
+                    **values
+                ))
+            elif (
+                any(getattr(progress, field) != value for field, value in values.items()) or
+                progress.percentage_complete != percentage or
+                progress.is_eligible != is_eligible
+            ):
+                for field, value in values.items():
+                    setattr(progress, field, value)
+                progress.percentage_complete = percentage
+                progress.is_eligible = is_eligible
+                progress.last_updated = now
+                to_update.append(progress)
+
+            if is_eligible:
+                eligible.append((user_id, diploma_type, values))
+
+    if to_create:
+        DiplomaProgress.objects.bulk_create(to_create, ignore_conflicts=True)
+    if to_update:
+        DiplomaProgress.objects.bulk_update(
+            to_update,
+            PROGRESS_FIELDS + ('percentage_complete', 'is_eligible', 'last_updated')
+        )
+    summary['created'] = len(to_create)
+    summary['updated'] = len(to_update)
+
+    if award and eligible:
+        issued = set(Diploma.objects.filter(
+            user_id__in={user_id for user_id, _, _ in eligible},
+            diploma_type__in={diploma_type for _, diploma_type, _ in eligible}
+        ).values_list('user_id', 'diploma_type_id'))
+
+        # Automatically issue diplomas
+        new_diplomas = [
+            Diploma(
+                diploma_type=diploma_type,
+                user_id=user_id,
+                activator_points_earned=values['activator_points'],
+                hunter_points_earned=values['hunter_points'],
+                b2b_points_earned=values['b2b_points']
+            )
+            for user_id, diploma_type, values in eligible
+            if (user_id, diploma_type.id) not in issued
+        ]
+        issue_diplomas(new_diplomas, bonus_points=bonus_points)
+        summary['awarded'] = len(new_diplomas)
+
+    logger.info(
+        f"Diploma progress refreshed for {len(user_ids)} users: "
+        f"{summary['created']} created, {summary['updated']} updated, "
+        f"{summary['awarded']} diplomas awarded"
+    )
+
+    return summary
+
+
+def refresh_diploma_progress_on_commit(users):
+    """
+    Refresh the diploma progress of users once the current transaction commits.
+
+    Calls within one transaction (e.g. the post_delete signals of a bulk
+    delete) are merged into one refresh_diploma_progress() call.
+
+    Args:
+        users: Users (or user IDs); None entries are ignored
+    """
+    user_ids = getattr(_pending, 'user_ids', None)
+    if user_ids is None:
+        user_ids = _pending.user_ids = set()
+    user_ids.update(getattr(user, 'pk', user) for user in users if user is not None)
+    # Registered with every call, so the users are refreshed even if an
+    # earlier transaction was rolled back; the first callback does the work
+    transaction.on_commit(_refresh_pending)
+
+
+def _refresh_pending():
+    from django.contrib.auth import get_user_model
+
+    user_ids = getattr(_pending, 'user_ids', None)
+    _pending.user_ids = None
+    if user_ids:
+        # Users deleted in the meantime (cascading to their logs) are skipped
+        refresh_diploma_progress(
+            get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+        )
+
+
+def get_progress_for_display(user, diploma_types: Iterable[DiplomaType]) -> List[DiplomaProgress]:
+    """
+    Read precomputed progress for a page without writing anything.
+
+    Stored counters are evaluated against the current thresholds in memory,
+    so threshold edits and validity windows show up immediately. Diploma
+    types without a stored row (e.g. created after the last refresh) get an
+    unsaved DiplomaProgress built from freshly collected counters.
+
+    Args:
+        user: User whose progress is shown
+        diploma_types: DiplomaType instances to show, in display order
+
+    Returns:
+        List of DiplomaProgress instances, one per diploma type
+    """
+    table = ThresholdTable(diploma_types)
+    stored = {
+        progress.diploma_type_id: progress
+        for progress in DiplomaProgress.objects.filter(
+            user=user,
+            diploma_type__in=table.diploma_types
+        )
+    }
+
+    missing_counters = None
+    all_progress = []
+    for index, diploma_type in enumerate(table.diploma_types):
+        progress = stored.get(diploma_type.id)
+        if progress is None:
+            if missing_counters is None:
+                missing_counters = collect_counters([user.pk])[user.pk]
+            progress = DiplomaProgress(
+                user=user,
+                **dict(zip(PROGRESS_FIELDS, missing_counters))
+            )
+        progress.diploma_type = diploma_type
+
+        counters = tuple(getattr(progress, field) for field in PROGRESS_FIELDS)
+        progress.percentage_complete, progress.is_eligible = table.evaluate_row(index, counters)
+        all_progress.append(progress)
+
+    return all_progress
@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import DiplomaLayoutElement, DiplomaType, FontFile
+from .pdf_assets import evict_template_image
+from .pdf_cache import invalidate_all, invalidate_diploma_type
+
+
+def _invalidate_on_commit(invalidate, *args):
+    """
+    Invalidate now and again on commit, so a PDF rendered from the not yet
+    committed state in between is not kept.
+    """
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
+
+
+@receiver(post_save, sender=DiplomaType)
+@receiver(post_delete, sender=DiplomaType)
+def diploma_type_changed(sender, instance, **kwargs):
+    """Drop the stored PDFs and cached template image of a changed diploma type"""
+    _invalidate_on_commit(invalidate_diploma_type, instance.pk)
+    _invalidate_on_commit(evict_template_image, instance.pk)
+
+
+@receiver(post_save, sender=DiplomaLayoutElement)
+@receiver(post_delete, sender=DiplomaLayoutElement)
+def layout_element_changed(sender, instance, **kwargs):
+    """Drop the stored PDFs of the diploma type of a changed layout element"""
+    _invalidate_on_commit(invalidate_diploma_type, instance.diploma_type_id)
+
+
+@receiver(post_save, sender=FontFile)
+@receiver(post_delete, sender=FontFile)
+def font_file_changed(sender, instance, **kwargs):
+    """Fonts are shared by all diploma types; drop the stored PDFs of all types"""
+    _invalidate_on_commit(invalidate_all)
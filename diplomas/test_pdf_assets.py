@@ -0,0 +1,118 @@
+"""
+Tests for the process-wide assets of the diploma PDF generator.
+"""
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from diplomas import pdf_assets
+from diplomas.models import DiplomaType, FontFile
+from diplomas.pdf_assets import clear_assets, get_registered_fonts, get_template_image
+from diplomas.pdf_generator import generate_diploma_pdf
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(size=(4000, 2800), mode='RGB', image_format='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 180, 120) if mode == 'RGB' else (200, 180, 120, 128)).save(buffer, image_format)
+    return SimpleUploadedFile(f'template.{image_format.lower()}', buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DIPLOMA_TEMPLATE_IMAGE_CACHE_SIZE=2)
+class PdfAssetsTest(TestCase):
+    """Test font registration and the template image cache"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        clear_assets()
+        self.addCleanup(clear_assets)
+        self.diploma_type = DiplomaType.objects.create(
+            name_pl='Aktywator',
+            name_en='Activator',
+            category='activator',
+            template_image=make_image()
+        )
+
+    def render(self):
+        return generate_diploma_pdf(
+            diploma_type=self.diploma_type,
+            callsign='SP1ACT',
+            diploma_name='Activator',
+            date_text='Issue Date: 2025-06-01',
+            points_text='',
+            diploma_number='BOTA-1',
+            verification_url='https://bota.example/verify-diploma/BOTA-1/'
+        )
+
+    def test_fonts_registered_once(self):
+        """Fonts are registered again only after a FontFile change"""
+        with mock.patch.object(pdf_assets.pdfmetrics, 'registerFont') as register:
+            get_registered_fonts()
+            first = register.call_count
+            get_registered_fonts()
+            self.assertEqual(register.call_count, first)
+
+            with mock.patch.object(pdf_assets, '_register_custom_fonts', return_value={}) as custom:
+                FontFile.objects.create(name='Test', font_file='diploma_fonts/test.ttf', is_active=False)
+                get_registered_fonts()
+                get_registered_fonts()
+                self.assertEqual(custom.call_count, 1)
+                # Changes without signals (other processes, bulk updates) are seen as well
+                FontFile.objects.update(is_active=True)
+                get_registered_fonts()
+            self.assertEqual(custom.call_count, 2)
+            # Built-in fonts stay registered
+            self.assertEqual(register.call_count, first)
+
+    def test_template_image_cached(self):
+        """The template is decoded once and scaled down to the page resolution"""
+        with mock.patch.object(pdf_assets, '_load_template_image', wraps=pdf_assets._load_template_image) as load:
+            self.assertTrue(self.render().getvalue().startswith(b'%PDF'))
+            self.render()
+        self.assertEqual(load.call_count, 1)
+
+        template = get_template_image(self.diploma_type)
+        width, height = template.reader.getSize()
+        self.assertLessEqual(width, 2339)
+        self.assertIsNotNone(template.reader.jpeg_fh())
+
+    def test_transparent_template(self):
+        self.diploma_type.template_image = make_image((100, 70), mode='RGBA')
+        self.diploma_type.save()
+        template = get_template_image(self.diploma_type)
+        self.assertIsNone(template.reader.jpeg_fh())
+        self.assertTrue(self.render().getvalue().startswith(b'%PDF'))
+
+    def test_invalidated_on_save(self):
+        """Saving a diploma type evicts its template image"""
+        template = get_template_image(self.diploma_type)
+        self.assertIs(get_template_image(self.diploma_type), template)
+
+        self.diploma_type.template_image = make_image((800, 560))
+        self.diploma_type.save()
+        self.assertEqual(len(pdf_assets._template_images), 0)
+        self.assertEqual(get_template_image(self.diploma_type).reader.getSize(), (800, 560))
+
+    def test_lru_eviction(self):
+        others = [
+            DiplomaType.objects.create(
+                name_pl=f'Typ {i}', name_en=f'Type {i}', category='hunter', template_image=make_image((60, 40))
+            )
+            for i in range(2)
+        ]
+        get_template_image(self.diploma_type)
+        for diploma_type in others:
+            get_template_image(diploma_type)
+        self.assertEqual([key[0] for key in pdf_assets._template_images], [other.pk for other in others])
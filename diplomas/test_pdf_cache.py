@@ -0,0 +1,124 @@
+"""
+Tests for the diploma PDF render cache.
+"""
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from diplomas import pdf_cache
+from diplomas.models import Diploma, DiplomaLayoutElement, DiplomaType, FontFile
+from diplomas.pdf_cache import get_diploma_pdf, get_or_render, preview_render_args
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, SITE_URL='https://bota.example')
+class DiplomaPdfCacheTest(TestCase):
+    """Test rendering, serving and invalidation of cached diploma PDFs"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='hunter@test.com',
+            callsign='SP1HNT',
+            password='test123'
+        )
+        self.diploma_type = DiplomaType.objects.create(
+            name_pl='Myśliwy',
+            name_en='Hunter',
+            category='hunter',
+            min_hunter_points=10
+        )
+        self.diploma = Diploma.objects.create(
+            user=self.user,
+            diploma_type=self.diploma_type,
+            hunter_points_earned=15
+        )
+
+    def render_count(self):
+        return mock.patch.object(pdf_cache, 'generate_diploma_pdf', wraps=pdf_cache.generate_diploma_pdf)
+
+    def test_rendered_once(self):
+        """A second request is served from the stored file"""
+        with self.render_count() as render:
+            first = get_diploma_pdf(self.diploma, 'en', 'https://bota.example')
+            second = get_diploma_pdf(self.diploma, 'en', 'https://bota.example')
+        self.assertEqual(render.call_count, 1)
+        self.assertTrue(first.created)
+        self.assertFalse(second.created)
+        self.assertEqual(first.name, second.name)
+        self.assertTrue(default_storage.exists(first.name))
+
+        self.diploma.refresh_from_db()
+        self.assertEqual(self.diploma.pdf_file.name, first.name)
+
+    def test_key_depends_on_inputs(self):
+        """Language and layout changes give a new content address"""
+        element = DiplomaLayoutElement.objects.create(
+            diploma_type=self.diploma_type, element_type='callsign', font_size=24
+        )
+        english = get_diploma_pdf(self.diploma, 'en', 'https://bota.example')
+        polish = get_diploma_pdf(self.diploma, 'pl', 'https://bota.example')
+        self.assertNotEqual(english.etag, polish.etag)
+
+        element.font_size = 40
+        element.save()
+
+        self.assertFalse(default_storage.exists(english.name))
+        changed = get_diploma_pdf(self.diploma, 'en', 'https://bota.example')
+        self.assertNotEqual(changed.etag, english.etag)
+
+        # Changes without signals (bulk updates) are seen as well
+        DiplomaLayoutElement.objects.filter(pk=element.pk).update(font_size=30)
+        self.assertNotEqual(get_diploma_pdf(self.diploma, 'en', 'https://bota.example').etag, changed.etag)
+
+    def test_font_change_invalidates_all_types(self):
+        cached = get_or_render(self.diploma_type, preview_render_args(self.diploma_type))
+        FontFile.objects.create(name='Test', font_file='diploma_fonts/test.ttf', is_active=False)
+        self.assertFalse(default_storage.exists(cached.name))
+
+    def test_download_view(self):
+        """ETag, 304 and X-Sendfile responses"""
+        self.client.force_login(self.user)
+        url = reverse('download_certificate', args=[self.diploma.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content)[:4], b'%PDF')
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.settings(DIPLOMA_PDF_SENDFILE='x-accel-redirect'):
+            response = self.client.get(url)
+        self.diploma.refresh_from_db()
+        self.assertEqual(response['X-Accel-Redirect'], f"/protected-media/{self.diploma.pdf_file.name}")
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_warm_command(self):
+        """Newly issued diplomas are rendered ahead of the download"""
+        out = StringIO()
+        call_command('warm_diploma_pdfs', '--language', 'en', stdout=out)
+        self.assertIn('Rendered 1', out.getvalue())
+        self.diploma.refresh_from_db()
+        self.assertTrue(self.diploma.pdf_file.name)
+
+        out = StringIO()
+        call_command('warm_diploma_pdfs', '--language', 'en', stdout=out)
+        self.assertIn('Rendered 0', out.getvalue())
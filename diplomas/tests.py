@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import uuid
 
-from .models import DiplomaType, Diploma, DiplomaProgress, DiplomaVerification
+from .models import DiplomaType, Diploma, DiplomaNumberSequence, DiplomaProgress, DiplomaVerification
 
 User = get_user_model()
 
@@ -207,6 +207,75 @@ class DiplomaModelTest(TestCase):
         num2 = int(diploma2.diploma_number.split('-')[2])
         self.assertEqual(num2, num1 + 1)
     
+    def test_diploma_number_sequence(self):
+        """Test that the sequence continues after existing numbers and has no gaps"""
+        from django.utils import timezone
+        
+        year = timezone.now().year
+        Diploma.objects.create(
+            user=self.user,
+            diploma_type=self.diploma_type,
+            diploma_number=f'HNT-{year}-0041'
+        )
+        
+        user2 = User.objects.create_user(
+            email='hunter2@example.com',
+            callsign='SP2TEST',
+            password='testpass123'
+        )
+        diploma = Diploma.objects.create(user=user2, diploma_type=self.diploma_type)
+        self.assertEqual(diploma.diploma_number, f'HNT-{year}-0042')
+        
+        # A failed insert does not use up a number
+        with self.assertRaises(IntegrityError):
+            Diploma.objects.create(user=user2, diploma_type=self.diploma_type)
+        self.assertEqual(DiplomaNumberSequence.objects.get(category='hunter', year=year).last_number, 42)
+    
+    def test_issue_diplomas_bulk(self):
+        """Test bulk issuance reserves a block of numbers and awards bonuses"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from accounts.models import PointsTransaction, UserStatistics
+        from .issuance import issue_diplomas
+        
+        activator_type = DiplomaType.objects.create(
+            name_pl="Aktywator", name_en="Activator",
+            description_pl="Opis", description_en="Description",
+            category="activator"
+        )
+        users = [self.user] + [
+            User.objects.create_user(
+                email=f'bulk{i}@example.com', callsign=f'SP{i}BLK', password='testpass123'
+            )
+            for i in range(3)
+        ]
+        new_diplomas = [
+            Diploma(user=user, diploma_type=diploma_type)
+            for user in users for diploma_type in (self.diploma_type, activator_type)
+        ]
+        
+        with CaptureQueriesContext(connection) as queries:
+            issue_diplomas(new_diplomas, bonus_points=10)
+        
+        diploma_inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "diplomas_diploma"')
+        ]
+        self.assertEqual(len(diploma_inserts), 1)
+        self.assertEqual(
+            sorted(int(number[-4:]) for number in Diploma.objects.filter(
+                diploma_type=self.diploma_type
+            ).values_list('diploma_number', flat=True)),
+            [1, 2, 3, 4]
+        )
+        self.assertEqual(Diploma.objects.filter(diploma_type=activator_type).count(), 4)
+        self.assertEqual(
+            PointsTransaction.objects.filter(transaction_type=PointsTransaction.DIPLOMA_BONUS).count(), 8
+        )
+        stats = UserStatistics.objects.get(user=self.user)
+        self.assertEqual(stats.diploma_points, 20)
+        self.assertEqual(stats.total_points, 20)
+    
     def test_verification_code_uuid(self):
         """Test verification code is UUID"""
         diploma = Diploma.objects.create(
@@ -543,3 +612,128 @@ class DiplomaVerificationModelTest(TestCase):
         )
         
         self.assertEqual(DiplomaVerification.objects.filter(diploma=self.diploma).count(), 3)
+
+
+class DiplomaProgressEngineTest(TestCase):
+    """Test suite for the incremental diploma progress engine"""
+    
+    def setUp(self):
+        """Set up test data"""
+        from bunkers.models import Bunker, BunkerCategory
+        from accounts.models import UserStatistics
+        
+        self.user = User.objects.create_user(
+            email='engine@example.com',
+            callsign='SP3ENG',
+            password='testpass123'
+        )
+        self.activator_type = DiplomaType.objects.create(
+            name_pl="Aktywator", name_en="Activator",
+            description_pl="Opis", description_en="Description",
+            category="activator", min_activator_points=2, min_unique_activations=3
+        )
+        self.hunter_type = DiplomaType.objects.create(
+            name_pl="Myśliwy", name_en="Hunter",
+            description_pl="Opis", description_en="Description",
+            category="hunter", min_hunter_points=5
+        )
+        self.expired_type = DiplomaType.objects.create(
+            name_pl="Wydarzenie", name_en="Event",
+            description_pl="Opis", description_en="Description",
+            category="special_event", min_hunter_points=1,
+            valid_from=datetime(2020, 1, 1).date(), valid_to=datetime(2020, 1, 31).date()
+        )
+        
+        category = BunkerCategory.objects.create(name_pl='Schron', name_en='Shelter')
+        self.bunkers = [
+            Bunker.objects.create(
+                reference_number=f'B/SP-000{i}', name_pl=f'B{i}', name_en=f'B{i}',
+                category=category, latitude=Decimal('52.0'), longitude=Decimal('21.0')
+            )
+            for i in range(1, 4)
+        ]
+        hunter = User.objects.create_user(
+            email='hunter@example.com', callsign='SP3HNT', password='testpass123'
+        )
+        from activations.models import ActivationLog
+        from django.utils import timezone
+        start = timezone.now() - timedelta(days=10)
+        for day, bunker in enumerate(self.bunkers):
+            ActivationLog.objects.create(
+                activator=self.user, user=hunter, bunker=bunker,
+                activation_date=start + timedelta(days=day), qso_count=1
+            )
+        UserStatistics.objects.filter(user=self.user).update(
+            unique_activations=3, hunter_points=4
+        )
+    
+    def test_threshold_table_matches_calculate_progress(self):
+        """Vectorized evaluation gives the same result as calculate_progress()"""
+        from .progress_engine import PROGRESS_FIELDS, ThresholdTable
+        
+        diploma_types = [self.activator_type, self.hunter_type, self.expired_type]
+        table = ThresholdTable(diploma_types)
+        counters = (1, 4, 0, 3, 1, 0, 0)
+        
+        for diploma_type, (percentage, is_eligible) in zip(diploma_types, table.evaluate(counters)):
+            progress = DiplomaProgress(
+                user=self.user, diploma_type=diploma_type,
+                **dict(zip(PROGRESS_FIELDS, counters))
+            )
+            progress.calculate_progress()
+            self.assertEqual(percentage, progress.percentage_complete.quantize(Decimal('0.01')))
+            self.assertEqual(is_eligible, progress.is_eligible)
+    
+    def test_refresh_writes_only_changes(self):
+        """Refresh creates rows, awards diplomas and skips unchanged rows"""
+        from .progress_engine import refresh_diploma_progress
+        
+        summary = refresh_diploma_progress([self.user])
+        
+        self.assertEqual(summary, {'created': 3, 'updated': 0, 'awarded': 1})
+        progress = DiplomaProgress.objects.get(user=self.user, diploma_type=self.activator_type)
+        self.assertEqual(progress.activator_points, 3)
+        self.assertTrue(progress.is_eligible)
+        self.assertTrue(Diploma.objects.filter(user=self.user, diploma_type=self.activator_type).exists())
+        self.assertFalse(Diploma.objects.filter(user=self.user, diploma_type=self.expired_type).exists())
+        
+        summary = refresh_diploma_progress([self.user])
+        self.assertEqual(summary, {'created': 0, 'updated': 0, 'awarded': 0})
+    
+    def test_deleted_logs_refresh_progress(self):
+        """Deleting logs refreshes the stored progress once committed"""
+        from activations.models import ActivationLog
+        from .progress_engine import refresh_diploma_progress
+        
+        refresh_diploma_progress([self.user])
+        with self.captureOnCommitCallbacks(execute=True):
+            ActivationLog.objects.filter(bunker__in=self.bunkers[1:]).delete()
+        
+        progress = DiplomaProgress.objects.get(user=self.user, diploma_type=self.activator_type)
+        self.assertEqual(progress.unique_activations, 1)
+        self.assertFalse(progress.is_eligible)
+    
+    def test_diploma_pages_do_not_write(self):
+        """Dashboard and diplomas pages only read precomputed progress"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        from .progress_engine import refresh_diploma_progress
+        
+        refresh_diploma_progress([self.user])
+        self.client.force_login(self.user)
+        
+        for url in (reverse('dashboard'), reverse('diplomas')):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            
+            self.assertEqual(response.status_code, 200)
+            writes = [
+                query['sql'] for query in queries.captured_queries
+                if query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+            ]
+            self.assertEqual(writes, [], url)
+        
+        hunter_progress = response.context['hunter_progress']
+        self.assertEqual(hunter_progress[0].hunter_points, 4)
+        self.assertEqual(hunter_progress[0].percentage_complete, Decimal('80.00'))
@@ -12,6 +12,7 @@ import csv
 import io
 
 from bunkers.models import Bunker, BunkerCategory, BunkerRequest
+from bunkers.references import save_bunkers
 
 
 def bunker_list(request):
@@ -70,21 +71,14 @@ def bunker_list(request):
     hunted_bunker_ids = set()
     
     if request.user.is_authenticated:
-        from activations.models import ActivationLog
+        from activations.activity_counters import get_user_bunker_ids
+        from activations.models import UserBunkerActivity
         
         # Get bunkers activated by user
-        activated_bunker_ids = set(
-            ActivationLog.objects.filter(
-                activator=request.user
-            ).values_list('bunker_id', flat=True).distinct()
-        )
+        activated_bunker_ids = get_user_bunker_ids(request.user, UserBunkerActivity.ROLE_ACTIVATOR)
         
         # Get bunkers hunted by user (as hunter, not activator)
-        hunted_bunker_ids = set(
-            ActivationLog.objects.filter(
-                user=request.user
-            ).exclude(activator=request.user).values_list('bunker_id', flat=True).distinct()
-        )
+        hunted_bunker_ids = get_user_bunker_ids(request.user, UserBunkerActivity.ROLE_HUNTER)
     
     context = {
         'bunkers': bunkers,
@@ -348,7 +342,6 @@ def bunker_detail(request, reference):
     from django.db.models import Count
     from django.db.models.functions import TruncDate
     import json
-    from math import radians, sin, cos, sqrt, atan2
     
     # Count unique activation sessions (unique combinations of activator + date)
     activation_count = (
@@ -379,33 +372,18 @@ def bunker_detail(request, reference):
     )
     
     # Get nearby bunkers (within 50km)
-    def get_distance(lat1, lon1, lat2, lon2):
-        R = 6371  # Earth radius in km
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        return R * c
-    
-    nearby_bunkers = []
-    all_bunkers = Bunker.objects.exclude(id=bunker.id).filter(
-        latitude__isnull=False, 
-        longitude__isnull=False
-    ).values('reference_number', 'name_en', 'latitude', 'longitude')
-    
-    for b in all_bunkers:
-        distance = get_distance(
-            float(bunker.latitude), float(bunker.longitude),
-            float(b['latitude']), float(b['longitude'])
+    from bunkers.spatial_index import get_spatial_index
+    nearby_bunkers = [
+        {
+            'ref': point.reference_number,
+            'name': point.name_en,
+            'lat': point.latitude,
+            'lng': point.longitude
+        }
+        for _, point in get_spatial_index().within(
+            float(bunker.latitude), float(bunker.longitude), 50, exclude_id=bunker.id
         )
-        if distance < 50:  # Within 50km
-            nearby_bunkers.append({
-                'ref': b['reference_number'],
-                'name': b['name_en'],
-                'lat': float(b['latitude']),
-                'lng': float(b['longitude'])
-            })
+    ]
     
     nearby_bunkers_json = json.dumps(nearby_bunkers)
     
@@ -475,8 +453,8 @@ def upload_bunkers_csv(request):
             io_string = io.StringIO(file_data)
             reader = csv.DictReader(io_string)
             
-            created_count = 0
-            updated_count = 0
+            bunkers = {}
+            categories = {}
             error_count = 0
             errors = []
             
@@ -498,14 +476,17 @@ def upload_bunkers_csv(request):
                                     row.get('Type') or 
                                     row.get('type') or 
                                     'Military').strip()
-                    category, cat_created = BunkerCategory.objects.get_or_create(
-                        name_en=category_name,
-                        defaults={
-                            'name_pl': category_name,
-                            'description_en': f'{category_name} bunkers',
-                            'description_pl': f'Bunkry typu {category_name}',
-                        }
-                    )
+                    category = categories.get(category_name)
+                    if category is None:
+                        category, cat_created = BunkerCategory.objects.get_or_create(
+                            name_en=category_name,
+                            defaults={
+                                'name_pl': category_name,
+                                'description_en': f'{category_name} bunkers',
+                                'description_pl': f'Bunkry typu {category_name}',
+                            }
+                        )
+                        categories[category_name] = category
                     
                     # Parse coordinates - support multiple column names
                     try:
@@ -547,33 +528,29 @@ def upload_bunkers_csv(request):
                     locator_value = (row.get('locator') or row.get('Locator') or 
                                     row.get('grid') or row.get('Grid') or '').strip()
                     
-                    # Create or update bunker
-                    bunker, created = Bunker.objects.update_or_create(
-                        reference_number=reference,
-                        defaults={
-                            'name_en': name_en,
-                            'name_pl': name_pl,
-                            'description_en': desc_en,
-                            'description_pl': desc_pl,
-                            'category': category,
-                            'latitude': latitude,
-                            'longitude': longitude,
-                            'locator': locator_value,
-                            'is_verified': True,
-                            'verified_by': request.user,
-                            'created_by': request.user,
-                        }
-                    )
-                    
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
+                    bunkers[reference] = {
+                        'name_en': name_en,
+                        'name_pl': name_pl,
+                        'description_en': desc_en,
+                        'description_pl': desc_pl,
+                        'category': category,
+                        'latitude': latitude,
+                        'longitude': longitude,
+                        'locator': locator_value,
+                        'is_verified': True,
+                        'verified_by': request.user,
+                        'created_by': request.user,
+                    }
                         
                 except Exception as e:
                     errors.append(f"Row {row_num}: {str(e)}")
                     error_count += 1
             
+            # Create new and update existing bunkers in bulk
+            created, updated = save_bunkers(bunkers)
+            created_count = len(created)
+            updated_count = len(updated)
+            
             # Show results
             if created_count > 0:
                 messages.success(request, _(f'Successfully created {created_count} bunker(s).'))
@@ -16,12 +16,18 @@ urlpatterns = [
     path('diplomas/<int:diploma_id>/download/', views.download_certificate, name='download_certificate'),
     path('verify-diploma/<str:diploma_number>/', views.verify_diploma_view, name='verify_diploma'),
     path('profile/', views.profile_view, name='profile'),
+    path('profile/bunkers/<str:kind>.json', views.profile_bunkers, name='profile_bunkers'),
     path('log-history/', views.log_history_view, name='log_history'),
     path('register/', views.register_view, name='register'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('cluster/', views.cluster_view, name='cluster'),
     path('map/', views.map_view, name='map'),
+    path('map/layers/bunkers.json', views.map_bunkers_layer, name='map_bunkers_layer'),
+    path('map/layers/user.json', views.map_user_overlay, name='map_user_overlay'),
+    path('map/layers/spots.json', views.map_spots_overlay, name='map_spots_overlay'),
+    path('map/tiles/<int:z>/<int:x>/<int:y>.json', views.map_tile, name='map_tile'),
+    path('map/search.json', views.map_search, name='map_search'),
     
     # Password Reset
     path('password-reset/', 
@@ -10,10 +10,13 @@ from django.contrib import messages
 from django.db.models import Count, Sum, Max
 from django.utils.translation import gettext as _
 from django.core.cache import cache
+from django.conf import settings
 from accounts.models import User, UserStatistics
-from bunkers.models import Bunker
+from accounts.profile_stats import get_profile_stats
+from bunkers.models import Bunker, BunkerCategory
 from activations.models import ActivationLog
 from diplomas.models import Diploma, DiplomaProgress
+from diplomas.progress_engine import get_progress_for_display
 
 
 def home(request):
@@ -55,7 +58,6 @@ def home(request):
 def dashboard(request):
     """User dashboard with statistics and progress"""
     from diplomas.models import DiplomaType
-    from django.db.models.functions import TruncDate
     
     # Get or create user statistics
     stats, created = UserStatistics.objects.get_or_create(user=request.user)
@@ -75,43 +77,8 @@ def dashboard(request):
         id__in=earned_diploma_type_ids
     ).order_by('category', 'display_order')
     
-    # Calculate current user stats for progress
-    unique_activations = ActivationLog.objects.filter(
-        activator=request.user
-    ).values('bunker').distinct().count()
-    
-    total_activations = ActivationLog.objects.filter(
-        activator=request.user
-    ).annotate(
-        activation_day=TruncDate('activation_date')
-    ).values('bunker', 'activation_day').distinct().count()
-    
-    unique_hunted = ActivationLog.objects.filter(
-        user=request.user
-    ).exclude(activator=request.user).values('bunker').distinct().count()
-    
-    total_hunted = unique_hunted
-    
-    # For each available diploma type, get or create progress
-    all_progress = []
-    for diploma_type in available_diploma_types:
-        progress, created = DiplomaProgress.objects.get_or_create(
-            user=request.user,
-            diploma_type=diploma_type
-        )
-        
-        # Activator points = activation sessions (not QSOs)
-        progress.update_points(
-            activator=total_activations,
-            hunter=stats.hunter_points,
-            b2b=stats.b2b_points,
-            unique_activations=unique_activations,
-            total_activations=total_activations,
-            unique_hunted=unique_hunted,
-            total_hunted=total_hunted
-        )
-        
-        all_progress.append(progress)
+    # Precomputed progress (refreshed when the user's counters change)
+    all_progress = get_progress_for_display(request.user, available_diploma_types)
     
     # Organize progress by category - show top 2 from each category
     activator_progress = sorted([p for p in all_progress if p.diploma_type.category == 'activator'], 
@@ -144,7 +111,7 @@ def dashboard(request):
 def upload_log(request):
     """ADIF log upload page"""
     if request.method == 'POST':
-        from activations.log_import_service import LogImportService
+        from activations.adif_files import import_adif_file, inspect_adif_file
         
         if 'file' not in request.FILES:
             messages.error(request, _('No file uploaded'))
@@ -158,12 +125,22 @@ def upload_log(request):
             return redirect('upload_log')
         
         try:
-            # Read file content
-            content = file.read().decode('utf-8')
+            # Queue for background processing
+            if settings.LOG_UPLOAD_QUEUE_ENABLED:
+                from activations.upload_queue import enqueue_adif_file
+                
+                file_checksum, encoding = inspect_adif_file(file)
+                result = enqueue_adif_file(file, request.user, file_checksum, filename=file.name)
+                if not result.get('success'):
+                    for error in result.get('errors', ['Unknown error']):
+                        messages.error(request, error)
+                    return redirect('upload_log')
+                
+                messages.success(request, _('Log file queued for processing. Progress is shown in the log history.'))
+                return redirect(f"{reverse('log_history')}#upload-{result['log_upload_id']}")
             
-            # Process upload
-            service = LogImportService()
-            result = service.process_adif_upload(content, request.user, filename=file.name)
+            # Process upload, streaming the file into the parser
+            result = import_adif_file(file, request.user, filename=file.name)
             
             # Check if successful
             if not result.get('success'):
@@ -200,8 +177,6 @@ def upload_log(request):
 def diplomas_view(request):
     """User diplomas and progress"""
     from diplomas.models import DiplomaType
-    from activations.models import ActivationLog
-    from django.db.models import Q, Count
     
     # Get earned diplomas
     earned_diplomas = Diploma.objects.filter(
@@ -211,9 +186,6 @@ def diplomas_view(request):
     # Get IDs of earned diploma types
     earned_diploma_type_ids = earned_diplomas.values_list('diploma_type_id', flat=True)
     
-    # Get or create user statistics
-    stats, created = UserStatistics.objects.get_or_create(user=request.user)
-    
     # Get all active diploma types not yet earned
     available_diploma_types = DiplomaType.objects.filter(
         is_active=True
@@ -221,52 +193,8 @@ def diplomas_view(request):
         id__in=earned_diploma_type_ids
     ).order_by('category', 'display_order')
     
-    # Calculate current user stats for progress
-    # Unique activations = distinct bunkers activated
-    unique_activations = ActivationLog.objects.filter(
-        activator=request.user
-    ).values('bunker').distinct().count()
-    
-    # Total activations = distinct (bunker, date) combinations
-    # Each activation session counts as one, regardless of QSO count
-    from django.db.models.functions import TruncDate
-    total_activations = ActivationLog.objects.filter(
-        activator=request.user
-    ).annotate(
-        activation_day=TruncDate('activation_date')
-    ).values('bunker', 'activation_day').distinct().count()
-    
-    # Unique hunted = distinct bunkers hunted (as non-activator)
-    unique_hunted = ActivationLog.objects.filter(
-        user=request.user
-    ).exclude(activator=request.user).values('bunker').distinct().count()
-    
-    # Total hunted = count of distinct bunkers hunted (not QSOs)
-    # For hunters, we count each unique bunker they worked
-    total_hunted = unique_hunted
-    
-    # For each available diploma type, get or create progress with proper calculation
-    all_progress = []
-    for diploma_type in available_diploma_types:
-        # Get or create progress record
-        progress, created = DiplomaProgress.objects.get_or_create(
-            user=request.user,
-            diploma_type=diploma_type
-        )
-        
-        # Update progress with current stats
-        # Activator points = activation sessions (not QSOs)
-        progress.update_points(
-            activator=total_activations,
-            hunter=stats.hunter_points,
-            b2b=stats.b2b_points,
-            unique_activations=unique_activations,
-            total_activations=total_activations,
-            unique_hunted=unique_hunted,
-            total_hunted=total_hunted
-        )
-        
-        all_progress.append(progress)
+    # Precomputed progress (refreshed when the user's counters change)
+    all_progress = get_progress_for_display(request.user, available_diploma_types)
     
     # Organize progress by category
     activator_progress = [p for p in all_progress if p.diploma_type.category == 'activator']
@@ -292,54 +220,17 @@ def diplomas_view(request):
 
 @login_required
 def download_certificate(request, diploma_id):
-    """Download diploma certificate as PDF using advanced customization"""
-    from django.http import HttpResponse
+    """Download diploma certificate as PDF (rendered once, then served from the PDF cache)"""
     from django.utils.translation import get_language
-    from diplomas.pdf_generator import generate_diploma_pdf
+    from diplomas.pdf_cache import get_diploma_pdf, get_site_url, serve_pdf
     
     # Get the diploma (ensure user owns it)
-    diploma = get_object_or_404(Diploma, id=diploma_id, user=request.user)
-    
-    # Determine language
-    current_lang = get_language()
-    is_polish = current_lang == 'pl'
-    
-    # Prepare data
-    callsign = diploma.user.callsign
-    diploma_name = diploma.diploma_type.name_pl if is_polish else diploma.diploma_type.name_en
-    date_text = f"{'Data wydania' if is_polish else 'Issue Date'}: {diploma.issue_date.strftime('%Y-%m-%d')}"
-    
-    # Points information
-    points_parts = []
-    if diploma.activator_points_earned > 0:
-        points_parts.append(f"ACT: {diploma.activator_points_earned}")
-    if diploma.hunter_points_earned > 0:
-        points_parts.append(f"HNT: {diploma.hunter_points_earned}")
-    if diploma.b2b_points_earned > 0:
-        points_parts.append(f"B2B: {diploma.b2b_points_earned}")
-    
-    points_text = f"{'Punkty' if is_polish else 'Points'}: {' | '.join(points_parts)}" if points_parts else ""
-    
-    diploma_number = diploma.diploma_number
-    verification_url = request.build_absolute_uri(f'/verify-diploma/{diploma.diploma_number}/')
-    
-    # Generate PDF
-    buffer = generate_diploma_pdf(
-        diploma_type=diploma.diploma_type,
-        callsign=callsign,
-        diploma_name=diploma_name,
-        date_text=date_text,
-        points_text=points_text,
-        diploma_number=diploma_number,
-        verification_url=verification_url,
-        is_preview=False
+    diploma = get_object_or_404(
+        Diploma.objects.select_related('diploma_type', 'user'), id=diploma_id, user=request.user
     )
     
-    # Create response
-    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="BOTA_Diploma_{diploma.diploma_number}.pdf"'
-    
-    return response
+    cached = get_diploma_pdf(diploma, get_language(), get_site_url(request))
+    return serve_pdf(request, cached, f"BOTA_Diploma_{diploma.diploma_number}.pdf")
 
 
 def verify_diploma_view(request, diploma_number):
@@ -390,210 +281,67 @@ def verify_diploma_view(request, diploma_number):
 @login_required
 def profile_view(request):
     """User profile page with detailed statistics"""
-    from activations.models import ActivationLog
-    from bunkers.models import Bunker
-    from django.db.models import Count, Q, Max
-    
     stats, created = UserStatistics.objects.get_or_create(user=request.user)
     
-    # Get activated bunkers (as activator) with bunker id for detail queries
-    # Count distinct dates for actual activation count
-    from django.db.models import Count, Max, Sum
-    from django.db.models.functions import TruncDate
-    
-    activated_bunkers_raw = ActivationLog.objects.filter(
-        activator=request.user
-    ).annotate(
-        activation_date_only=TruncDate('activation_date')
-    ).values(
-        'bunker__id',
-        'bunker__reference_number', 
-        'bunker__name_en', 
-        'bunker__name_pl'
-    ).annotate(
-        activation_count=Count('activation_date_only', distinct=True),
-        total_qso=Sum('qso_count'),
-        last_activation=Max('activation_date')
-    ).order_by('-activation_count')
-    
-    activated_bunkers = list(activated_bunkers_raw)
-    
-    # Get all activations for each bunker (for expandable details)
-    # Group by date and aggregate modes and QSO counts
-    all_activations = {}
-    for bunker in activated_bunkers:
-        bunker_id = bunker['bunker__id']
-        from itertools import groupby
-        
-        # Get all activations for this bunker
-        activations_query = ActivationLog.objects.filter(
-            activator=request.user,
-            bunker__id=bunker_id
-        ).order_by('-activation_date')
-        
-        # Group by date (year-month-day) and aggregate
-        grouped_activations = []
-        for date_key, group_iter in groupby(activations_query, key=lambda x: x.activation_date.date()):
-            group_list = list(group_iter)
-            
-            # Collect unique modes and bands
-            modes = sorted(set(a.mode for a in group_list if a.mode))
-            bands = sorted(set(a.band for a in group_list if a.band))
-            
-            # Sum QSO counts - properly handle None and 0 values
-            total_qso = sum(a.qso_count if a.qso_count else 0 for a in group_list)
-            
-            # Check if any is B2B
-            is_b2b = any(a.is_b2b for a in group_list)
-            
-            grouped_activations.append({
-                'date': date_key,
-                'bands': bands,
-                'modes': modes,
-                'total_qso': total_qso,
-                'is_b2b': is_b2b,
-                'count': len(group_list)
-            })
-        
-        all_activations[bunker_id] = grouped_activations
-    
-    # Get hunted bunkers (as hunter/user)
-    hunted_bunkers = ActivationLog.objects.filter(
-        user=request.user
-    ).exclude(activator=request.user).values(
-        'bunker__id',
-        'bunker__reference_number', 
-        'bunker__name_en', 
-        'bunker__name_pl'
-    ).annotate(
-        qso_count=Count('id'),
-        last_qso=Max('activation_date')
-    ).order_by('-qso_count')
-    
-    # Get all hunted QSOs for each bunker
-    # Group by date and aggregate
-    all_hunted_qsos = {}
-    for bunker in hunted_bunkers:
-        bunker_id = bunker['bunker__id']
-        from django.db.models import Sum
-        from itertools import groupby
-        from operator import attrgetter
-        
-        # Get all hunted QSOs for this bunker
-        qsos_query = ActivationLog.objects.filter(
-            user=request.user,
-            bunker__id=bunker_id
-        ).exclude(activator=request.user).order_by('-activation_date')
-        
-        # Group by date (year-month-day) and aggregate
-        grouped_qsos = []
-        for date_key, group_iter in groupby(qsos_query, key=lambda x: x.activation_date.date()):
-            group_list = list(group_iter)
-            
-            # Collect unique activators, modes and bands
-            activators = sorted(set(a.activator.callsign for a in group_list if a.activator))
-            modes = sorted(set(a.mode for a in group_list if a.mode))
-            bands = sorted(set(a.band for a in group_list if a.band))
-            
-            # Count QSOs
-            total_qso = len(group_list)
-            
-            # Check if any is B2B
-            is_b2b = any(a.is_b2b for a in group_list)
-            
-            grouped_qsos.append({
-                'date': date_key,
-                'activators': activators,
-                'bands': bands,
-                'modes': modes,
-                'total_qso': total_qso,
-                'is_b2b': is_b2b
-            })
-        
-        all_hunted_qsos[bunker_id] = grouped_qsos
-    
-    # Activator statistics by band
-    activator_bands = ActivationLog.objects.filter(
-        activator=request.user
-    ).values('band').annotate(
-        count=Count('id'),
-        qso_sum=Count('qso_count')
-    ).order_by('-count')
-    
-    # Activator statistics by mode
-    activator_modes = ActivationLog.objects.filter(
-        activator=request.user
-    ).values('mode').annotate(
-        count=Count('id'),
-        qso_sum=Count('qso_count')
-    ).order_by('-count')
-    
-    # Hunter statistics by band
-    hunter_bands = ActivationLog.objects.filter(
-        user=request.user
-    ).exclude(activator=request.user).values('band').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # Hunter statistics by mode
-    hunter_modes = ActivationLog.objects.filter(
-        user=request.user
-    ).exclude(activator=request.user).values('mode').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # Get non-activated bunkers (for activator)
-    activated_bunker_ids = [b['bunker__id'] for b in activated_bunkers]
-    non_activated_bunkers = Bunker.objects.exclude(
-        id__in=activated_bunker_ids
-    ).select_related('category').order_by('reference_number')
-    
-    # Check which non-activated bunkers have planned activations by this user
-    from planned_activations.models import PlannedActivation
-    user_planned_bunker_ids = PlannedActivation.objects.filter(
-        user=request.user
-    ).values_list('bunker_id', flat=True)
-    
-    # Get non-hunted bunkers (for hunter)
-    hunted_bunker_ids = [b['bunker__id'] for b in hunted_bunkers]
-    non_hunted_bunkers = Bunker.objects.exclude(
-        id__in=hunted_bunker_ids
-    ).select_related('category').order_by('reference_number')
-    
-    # Check which non-hunted bunkers have ANY planned activations (excluding current user's plans)
-    planned_bunker_ids = PlannedActivation.objects.exclude(
-        user=request.user
-    ).values_list('bunker_id', flat=True).distinct()
-    
-    # Check which non-hunted bunkers have active spots
-    from cluster.models import Spot
-    from django.utils import timezone
-    from datetime import timedelta
-    active_spot_bunker_ids = Spot.objects.filter(
-        bunker__isnull=False,
-        is_active=True,
-        expires_at__gte=timezone.now()  # Not expired yet
-    ).values_list('bunker_id', flat=True).distinct()
+    # Activated/hunted bunkers with per-day history and band/mode breakdowns,
+    # aggregated from one query and cached until the user's logs change
+    profile_stats = get_profile_stats(request.user)
     
+    # The not-activated/not-hunted lists are loaded by the page from profile_bunkers
     context = {
         'stats': stats,
-        'activated_bunkers': activated_bunkers,
-        'hunted_bunkers': hunted_bunkers,
-        'all_activations': all_activations,
-        'all_hunted_qsos': all_hunted_qsos,
-        'activator_bands': activator_bands,
-        'activator_modes': activator_modes,
-        'hunter_bands': hunter_bands,
-        'hunter_modes': hunter_modes,
-        'non_activated_bunkers': non_activated_bunkers,
-        'user_planned_bunker_ids': list(user_planned_bunker_ids),
-        'non_hunted_bunkers': non_hunted_bunkers,
-        'planned_bunker_ids': list(planned_bunker_ids),
-        'active_spot_bunker_ids': list(active_spot_bunker_ids),
+        **profile_stats,
+        'bunker_categories': BunkerCategory.objects.all(),
     }
     return render(request, 'profile.html', context)
 
 
+
+@login_required
+def profile_bunkers(request, kind):
+    """
+    One page of the bunkers the user has not activated or hunted yet (JSON).
+    
+    Query parameters: prefix, category, lat/lng/radius, planned=1,
+    after (cursor from the previous page) and limit.
+    """
+    from django.http import Http404, JsonResponse
+    from accounts.profile_stats import (
+        MISSING_BUNKER_LISTS, MISSING_BUNKERS_DEFAULT_RADIUS_KM, MISSING_BUNKERS_PAGE_SIZE, get_missing_bunkers
+    )
+    
+    if kind not in MISSING_BUNKER_LISTS:
+        raise Http404('No such list')
+    
+    params = request.GET
+    try:
+        category_id = int(params['category']) if params.get('category') else None
+        limit = int(params.get('limit', MISSING_BUNKERS_PAGE_SIZE))
+        near = None
+        if params.get('lat') or params.get('lng'):
+            near = (float(params['lat']), float(params['lng']), float(params.get('radius', MISSING_BUNKERS_DEFAULT_RADIUS_KM)))
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {'error': 'category and limit must be integers; lat, lng and radius must be numbers'},
+            status=400
+        )
+    if near is not None and not (-90 <= near[0] <= 90 and -180 <= near[1] <= 180 and near[2] > 0):
+        return JsonResponse({'error': 'Coordinates out of range or non-positive radius'}, status=400)
+    
+    page = get_missing_bunkers(
+        request.user,
+        kind,
+        prefix=params.get('prefix', ''),
+        category_id=category_id,
+        near=near,
+        planned_only=params.get('planned') == '1',
+        after=params.get('after', ''),
+        limit=limit
+    )
+    for row in page['results']:
+        row['url'] = reverse('bunker_detail', args=[row['reference_number']])
+    return JsonResponse(page)
+
 def register_view(request):
     """User registration"""
     if request.user.is_authenticated:
@@ -773,6 +521,11 @@ def cluster_view(request):
             }, status=500)
     
     # GET request - display spots
+    from cluster.spot_events import get_last_event_id
+    
+    # Live feed cursor, read before the queries so no later change is missed
+    spot_event_id = get_last_event_id()
+    
     # Get filter parameters
     activator_filter = request.GET.get('activator', '')
     spotter_filter = request.GET.get('spotter', '')
@@ -793,10 +546,8 @@ def cluster_view(request):
         spots = spots.filter(band=band_filter)
     
     # Get unique bands for filter dropdown
-    unique_bands = Spot.objects.filter(
-        is_active=True,
-        expires_at__gt=timezone.now()
-    ).values_list('band', flat=True).distinct().order_by('band')
+    from cluster.active_spots import get_active_spots
+    unique_bands = get_active_spots().bands
     
     context = {
         'spots': spots,
@@ -804,6 +555,7 @@ def cluster_view(request):
         'activator_filter': activator_filter,
         'spotter_filter': spotter_filter,
         'band_filter': band_filter,
+        'spot_stream_url': f"{reverse('spot_stream')}?cursor={spot_event_id}",
     }
     
     return render(request, 'cluster.html', context)
@@ -826,99 +578,59 @@ def terms_of_service(request):
 
 @login_required
 def log_history_view(request):
-    """Log upload history page with filtering"""
-    from activations.models import LogUpload, ActivationLog
-    from django.db.models import Q, Count
-    
-    # Get all uploads for current user
-    uploads = LogUpload.objects.filter(user=request.user).prefetch_related('qsos')
-    
-    # Filters
-    callsign_filter = request.GET.get('callsign', '').strip()
-    bunker_ref_filter = request.GET.get('bunker_ref', '').strip()
-    mode_filter = request.GET.get('mode', '').strip()
-    band_filter = request.GET.get('band', '').strip()
-    date_from = request.GET.get('date_from', '').strip()
-    date_to = request.GET.get('date_to', '').strip()
-    
-    # Build QSOs query for filtering
-    qsos_query = ActivationLog.objects.filter(user=request.user)
-    
-    if callsign_filter:
-        qsos_query = qsos_query.filter(
-            Q(activator__callsign__icontains=callsign_filter) |
-            Q(user__callsign__icontains=callsign_filter)
-        )
-    
-    if bunker_ref_filter:
-        qsos_query = qsos_query.filter(bunker__reference_number__icontains=bunker_ref_filter)
+    """
+    Log upload history page with filtering, paginated by upload.
     
-    if mode_filter:
-        qsos_query = qsos_query.filter(mode__icontains=mode_filter)
+    With ?export=csv or ?export=adif the filtered QSOs are downloaded instead.
+    """
+    from django.http import StreamingHttpResponse
+    from activations.log_history import (
+        export_adif, export_csv, filter_qsos, get_history_page, parse_filters
+    )
+    from activations.models import LogUpload, ActivationLog
     
-    if band_filter:
-        qsos_query = qsos_query.filter(band__icontains=band_filter)
+    filters = parse_filters(request.GET)
     
-    if date_from:
-        from datetime import datetime
-        qsos_query = qsos_query.filter(activation_date__gte=datetime.strptime(date_from, '%Y-%m-%d'))
+    export = request.GET.get('export')
+    if export in ('csv', 'adif'):
+        qsos = filter_qsos(request.user, filters)
+        if export == 'csv':
+            response = StreamingHttpResponse(export_csv(qsos), content_type='text/csv; charset=utf-8')
+            filename = 'bota-log-history.csv'
+        else:
+            response = StreamingHttpResponse(export_adif(qsos), content_type='text/plain; charset=utf-8')
+            filename = 'bota-log-history.adi'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
     
-    if date_to:
-        from datetime import datetime
-        qsos_query = qsos_query.filter(activation_date__lte=datetime.strptime(date_to, '%Y-%m-%d'))
+    page = get_history_page(request.user, filters, cursor=request.GET.get('cursor', ''))
     
-    filtered_qso_count = qsos_query.count()
+    filtered_qso_count = filter_qsos(request.user, filters).count() if filters.active else None
     
     # Get unique values for filters
-    unique_modes = ActivationLog.objects.filter(user=request.user).exclude(mode='').values_list('mode', flat=True).distinct().order_by('mode')
-    unique_bands = ActivationLog.objects.filter(user=request.user).exclude(band='').values_list('band', flat=True).distinct().order_by('band')
+    user_qsos = ActivationLog.objects.filter(log_upload__user=request.user)
+    unique_modes = user_qsos.exclude(mode='').values_list('mode', flat=True).distinct().order_by('mode')
+    unique_bands = user_qsos.exclude(band='').values_list('band', flat=True).distinct().order_by('band')
     
-    # Get QSOs grouped by upload
-    uploads_with_qsos = {}
-    for upload in uploads:
-        upload_qsos = upload.qsos.all().order_by('-activation_date')
-        
-        # Apply filters to this upload's QSOs
-        if callsign_filter or bunker_ref_filter or mode_filter or band_filter or date_from or date_to:
-            filtered_upload_qsos = upload_qsos
-            
-            if callsign_filter:
-                filtered_upload_qsos = filtered_upload_qsos.filter(
-                    Q(activator__callsign__icontains=callsign_filter) |
-                    Q(user__callsign__icontains=callsign_filter)
-                )
-            
-            if bunker_ref_filter:
-                filtered_upload_qsos = filtered_upload_qsos.filter(bunker__reference_number__icontains=bunker_ref_filter)
-            
-            if mode_filter:
-                filtered_upload_qsos = filtered_upload_qsos.filter(mode__icontains=mode_filter)
-            
-            if band_filter:
-                filtered_upload_qsos = filtered_upload_qsos.filter(band__icontains=band_filter)
-            
-            if date_from:
-                from datetime import datetime
-                filtered_upload_qsos = filtered_upload_qsos.filter(activation_date__gte=datetime.strptime(date_from, '%Y-%m-%d'))
-            
-            if date_to:
-                from datetime import datetime
-                filtered_upload_qsos = filtered_upload_qsos.filter(activation_date__lte=datetime.strptime(date_to, '%Y-%m-%d'))
-            
-            uploads_with_qsos[upload.id] = filtered_upload_qsos
-        else:
-            uploads_with_qsos[upload.id] = upload_qsos
+    # Query string of the filters, for the pagination and export links
+    filter_query = request.GET.copy()
+    for key in ('cursor', 'export'):
+        filter_query.pop(key, None)
     
     context = {
-        'uploads': uploads,
-        'uploads_with_qsos': uploads_with_qsos,
+        'uploads': page['uploads'],
+        'uploads_with_qsos': page['qsos_by_upload'],
+        'upload_count': LogUpload.objects.filter(user=request.user).count(),
+        'next_cursor': page['next_cursor'],
+        'is_first_page': not request.GET.get('cursor'),
+        'filter_query': filter_query.urlencode(),
         'filtered_qso_count': filtered_qso_count,
-        'callsign_filter': callsign_filter,
-        'bunker_ref_filter': bunker_ref_filter,
-        'mode_filter': mode_filter,
-        'band_filter': band_filter,
-        'date_from': date_from,
-        'date_to': date_to,
+        'callsign_filter': request.GET.get('callsign', '').strip(),
+        'bunker_ref_filter': request.GET.get('bunker_ref', '').strip(),
+        'mode_filter': filters.mode,
+        'band_filter': filters.band,
+        'date_from': filters.date_from.isoformat() if filters.date_from else '',
+        'date_to': filters.date_to.isoformat() if filters.date_to else '',
         'unique_modes': unique_modes,
         'unique_bands': unique_bands,
     }
@@ -937,104 +649,104 @@ def map_view(request):
       - Green: Activated, not hunted  
       - Gold: Activated AND hunted
       - Orange: Currently being activated (active spot)
+    
+    The page itself carries no bunker data: the browser loads the
+    clustered tiles of the visible area (versioned and cacheable) and the
+    small status overlays.
     """
-    from bunkers.models import Bunker
-    from activations.models import ActivationLog
-    from cluster.models import Spot
-    from django.db.models import Q
-    from django.utils import timezone
     import json
+    from bunkers.map_tiles import get_tile_index
     
-    # Get all verified bunkers with coordinates
-    bunkers = Bunker.objects.filter(
-        is_verified=True,
-        latitude__isnull=False,
-        longitude__isnull=False
-    ).select_related().order_by('reference_number')
+    index = get_tile_index()
+    tile_url = reverse('map_tile', args=[0, 0, 0]).replace('/0/0/0.json', '/{z}/{x}/{y}.json')
     
-    # Get active spots (not expired)
-    active_spot_bunker_ids = set(
-        Spot.objects.filter(
-            is_active=True,
-            expires_at__gt=timezone.now(),
-            bunker__isnull=False
-        ).values_list('bunker_id', flat=True).distinct()
-    )
+    context = {
+        'bunkers_tile_url': f"{tile_url}?v={index.version}",
+        'bunkers_count': len(index),
+        'bunkers_bounds': json.dumps(index.bounds()),
+    }
     
-    bunkers_data = []
+    return render(request, 'map.html', context)
+
+
+def _map_layer_response(request, layer, cache_control):
+    """
+    Send a serialized map layer with ETag and (if accepted) gzip encoding.
     
-    if request.user.is_authenticated:
-        # Get user's activated and hunted bunkers
-        activated_bunker_ids = set(
-            ActivationLog.objects.filter(activator=request.user)
-            .values_list('bunker_id', flat=True)
-            .distinct()
-        )
-        
-        hunted_bunker_ids = set(
-            ActivationLog.objects.filter(user=request.user)
-            .values_list('bunker_id', flat=True)
-            .distinct()
-        )
-        
-        for bunker in bunkers:
-            is_activated = bunker.id in activated_bunker_ids
-            is_hunted = bunker.id in hunted_bunker_ids
-            is_under_activation = bunker.id in active_spot_bunker_ids
-            
-            # Determine color based on status (ignore under_activation for color)
-            if is_activated and is_hunted:
-                color = 'gold'  # Both activated and hunted
-                icon = 'trophy'
-            elif is_activated:
-                color = 'green'  # Only activated
-                icon = 'broadcast'
-            elif is_hunted:
-                color = 'blue'  # Only hunted
-                icon = 'binoculars'
-            else:
-                color = 'gray'  # Neither
-                icon = 'geo-alt'
-            
-            # If under activation, add orange border via CSS animation
-            # (handled in frontend with is_under_activation flag)
-            
-            bunkers_data.append({
-                'id': bunker.id,
-                'reference': bunker.reference_number,
-                'name': bunker.name_en,
-                'lat': float(bunker.latitude),
-                'lng': float(bunker.longitude),
-                'color': color,
-                'icon': icon,
-                'is_activated': is_activated,
-                'is_hunted': is_hunted,
-                'is_under_activation': is_under_activation,
-            })
+    Answers 304 Not Modified when the client already has this ETag.
+    """
+    from django.http import HttpResponse, HttpResponseNotModified
+    from django.utils.cache import patch_cache_control, patch_vary_headers
+    
+    if layer.etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(layer.gzip_body, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
     else:
-        # Anonymous user - simple markers
-        for bunker in bunkers:
-            is_under_activation = bunker.id in active_spot_bunker_ids
-            
-            bunkers_data.append({
-                'id': bunker.id,
-                'reference': bunker.reference_number,
-                'name': bunker.name_en,
-                'lat': float(bunker.latitude),
-                'lng': float(bunker.longitude),
-                'color': 'red',  # Default red for anonymous
-                'icon': 'geo-alt',
-                'is_activated': False,
-                'is_hunted': False,
-                'is_under_activation': is_under_activation,
-            })
+        response = HttpResponse(layer.body, content_type='application/json')
     
-    context = {
-        'bunkers_json': json.dumps(bunkers_data),
-        'bunkers_count': len(bunkers_data),
-    }
+    response['ETag'] = layer.etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+def map_bunkers_layer(request):
+    """Bunker map layer: compact array of verified bunkers with coordinates"""
+    from bunkers.map_layer import get_bunker_layer
     
-    return render(request, 'map.html', context)
+    layer = get_bunker_layer()
+    if request.GET.get('v') == str(layer.version):
+        # Versioned URL: content never changes
+        cache_control = {'public': True, 'max_age': 365 * 24 * 60 * 60, 'immutable': True}
+    else:
+        cache_control = {'public': True, 'max_age': 0, 'must_revalidate': True}
+    return _map_layer_response(request, layer, cache_control)
+
+
+def map_tile(request, z, x, y):
+    """Clustered bunker markers of one map tile"""
+    from django.http import Http404
+    from bunkers.map_tiles import get_tile, valid_tile
+    
+    if not valid_tile(z, x, y):
+        raise Http404('No such tile')
+    
+    layer = get_tile(z, x, y)
+    if request.GET.get('v') == str(layer.version):
+        cache_control = {'public': True, 'max_age': 365 * 24 * 60 * 60, 'immutable': True}
+    else:
+        cache_control = {'public': True, 'max_age': 0, 'must_revalidate': True}
+    return _map_layer_response(request, layer, cache_control)
+
+
+def map_search(request):
+    """Bunker matching the map search box (by reference or name)"""
+    from django.http import JsonResponse
+    from bunkers.map_layer import BUNKER_LAYER_FIELDS
+    from bunkers.map_tiles import search
+    
+    row = search(request.GET.get('q', ''))
+    return JsonResponse({'bunker': dict(zip(BUNKER_LAYER_FIELDS, row)) if row else None})
+
+
+def map_user_overlay(request):
+    """Bunkers activated and hunted by the current user (empty for anonymous users)"""
+    from bunkers.map_layer import build_user_overlay
+    
+    return _map_layer_response(
+        request,
+        build_user_overlay(request.user),
+        {'private': True, 'max_age': 0, 'must_revalidate': True}
+    )
+
+
+def map_spots_overlay(request):
+    """Bunkers with an active spot"""
+    from bunkers.map_layer import build_spot_overlay
+    
+    return _map_layer_response(request, build_spot_overlay(), {'public': True, 'max_age': 30})
 
 
 @login_required
@@ -1071,52 +783,17 @@ def change_password_required(request):
 
 def public_stats(request):
     """Public statistics page - top activators, hunters, bunkers"""
-    from django.db.models import Count, Q
-    from django.db.models.functions import TruncDate
-    
-    # Top 10 Activators
-    top_activators = (
-        UserStatistics.objects
-        .select_related('user')
-        .filter(total_activator_qso__gt=0)
-        .order_by('-total_activator_qso')[:10]
-        .values('user__callsign', 'total_activator_qso', 'unique_activations')
-    )
-    
-    # Top 10 Hunters
-    top_hunters = (
-        UserStatistics.objects
-        .select_related('user')
-        .filter(total_hunter_qso__gt=0)
-        .order_by('-total_hunter_qso')[:10]
-        .values('user__callsign', 'total_hunter_qso', 'unique_bunkers_hunted')
-    )
-    
-    # Most Active Bunkers (by activation sessions)
-    most_active_bunkers = (
-        ActivationLog.objects
-        .values('bunker__id', 'bunker__reference_number', 'bunker__name_en')
-        .annotate(
-            activation_count=Count('activator', distinct=True),
-            qso_count=Count('id')
-        )
-        .order_by('-qso_count')[:10]
-    )
+    from accounts.leaderboard import get_snapshot
     
-    # Overall statistics
-    total_users = User.objects.filter(is_active=True, auto_created=False).count()
-    total_bunkers = Bunker.objects.filter(is_verified=True).count()
-    total_activations = ActivationLog.objects.values('activator', 'bunker').distinct().count()
-    total_qsos = ActivationLog.objects.count()
+    # Leaderboards and totals come from the periodically rebuilt snapshot
+    snapshot = get_snapshot()
     
     context = {
-        'top_activators': top_activators,
-        'top_hunters': top_hunters,
-        'most_active_bunkers': most_active_bunkers,
-        'total_users': total_users,
-        'total_bunkers': total_bunkers,
-        'total_activations': total_activations,
-        'total_qsos': total_qsos,
+        'top_activators': snapshot.top('activator', 10),
+        'top_hunters': snapshot.top('hunter', 10),
+        'most_active_bunkers': snapshot.bunkers(10),
+        'snapshot_version': snapshot.version,
+        **snapshot.totals,
     }
     return render(request, 'public_stats.html', context)
 
@@ -11,7 +11,9 @@ backlog = 2048
 
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# ASGI workers: the live spot feed (/api/spots/stream/) keeps connections open,
+# which would tie up a sync worker per listener
+worker_class = "uvicorn_worker.UvicornWorker"
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 50
@@ -99,13 +99,12 @@ class PlannedActivationForm(forms.ModelForm):
         
         # If bunker is not set but bunker_search has value, try to find the bunker
         if bunker_search and not bunker:
-            from bunkers.models import Bunker
+            from bunkers.references import resolve
             # Extract reference number (everything before " - ")
-            reference = bunker_search.split(' - ')[0].strip()
-            try:
-                bunker = Bunker.objects.get(reference_number=reference)
-                cleaned_data['bunker'] = bunker
-            except Bunker.DoesNotExist:
+            record = resolve(bunker_search.split(' - ')[0])
+            if record is not None:
+                cleaned_data['bunker'] = record.to_bunker()
+            else:
                 raise forms.ValidationError({
                     'bunker_search': _('Invalid bunker selected. Please choose from the list.')
                 })
@@ -91,11 +91,11 @@ def planned_activation_create(request):
         initial_data = {}
         
         if bunker_ref:
-            from bunkers.models import Bunker
-            try:
-                bunker = Bunker.objects.get(reference_number=bunker_ref)
-                initial_data['bunker'] = bunker
-            except Bunker.DoesNotExist:
+            from bunkers.references import resolve
+            record = resolve(bunker_ref)
+            if record is not None:
+                initial_data['bunker'] = record.id
+            else:
                 messages.warning(request, _('Bunker with reference %(ref)s not found.') % {'ref': bunker_ref})
         
         form = PlannedActivationForm(user=request.user, initial=initial_data)
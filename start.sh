@@ -9,4 +9,4 @@ echo "Collecting static files..."
 python manage.py collectstatic --no-input --clear
 
 echo "Static files collected. Starting Gunicorn..."
-exec gunicorn bota_project.wsgi:application
+exec gunicorn -k uvicorn_worker.UvicornWorker bota_project.asgi:application